@@ -10,24 +10,14 @@ from superagentx.result import GoalResult
 from superagentx.constants import SEQUENCE
 from superagentx.exceptions import StopSuperAgentX
 from superagentx.llm import LLMClient, ChatCompletionParams
+from superagentx.llm.metrics import llm_caller
 from superagentx.prompt import PromptTemplate
-from superagentx.utils.helper import iter_to_aiter
+from superagentx.utils.helper import json_loads
 
 logger = logging.getLogger(__name__)
 
-_GOAL_PROMPT_TEMPLATE = """Review the given output context and make sure
-
-the following goal is achieved.
-
-Goal: {goal}
-
-Query_Instruction: {query_instruction}
-
-Output_Context : {output_context}
-
-Feedback: {feedback}
-
-Output_Format: {output_format}
+# Static instructions first, identical for every goal verification so providers serve them from the prompt cache
+_GOAL_INSTRUCTIONS = """Review the given output context and make sure the given goal is achieved.
 
 Follow the instructions step-by-step carefully and act upon.
 
@@ -35,17 +25,29 @@ Review the Output_Context based on the given Goal with Query_Instruction and set
 
 Answer should be based on the given output context. Do not try answer by your own.
 
-Make sure generate the result based on the given output format if provided. 
+Make sure generate the result based on the given output format if provided.
 
-{{
+{
     reason: Set the reason for result,
     result: Set this based on given output format if output format given. Otherwise set the result as it is.,
     is_goal_satisfied: 'True' if result satisfied based on the given goal. Otherwise set as 'False'. Set only 'True' or 'False' boolean.
-}}
+}
 
 Always generate the JSON output.
 """
 
+# Varying parts last, the agent settings before the query and its output
+_GOAL_PROMPT_TEMPLATE = """Goal: {goal}
+
+Output_Format: {output_format}
+
+Query_Instruction: {query_instruction}
+
+Feedback: {feedback}
+
+Output_Context : {output_context}
+"""
+
 
 class Agent:
 
@@ -149,6 +151,7 @@ class Agent:
     ) -> GoalResult:
         prompt_message = await self.prompt_template.get_messages(
             input_prompt=_GOAL_PROMPT_TEMPLATE,
+            instructions=_GOAL_INSTRUCTIONS,
             goal=self.goal,
             query_instruction=query_instruction,
             output_context=results,
@@ -162,14 +165,15 @@ class Agent:
         messages = await self.llm.achat_completion(
             chat_completion_params=chat_completion_params
         )
-        logger.debug(f"Goal pre result => {messages}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Goal pre result => {messages}")
         if messages and messages.choices:
             for choice in messages.choices:
                 if choice and choice.message:
                     _res = choice.message.content or ''
                     _res = _res.replace('```json', '').replace('```', '')
                     try:
-                        __res = json.loads(_res)
+                        __res = json_loads(_res)
                         return GoalResult(
                             name=self.name,
                             agent_id=self.agent_id,
@@ -199,32 +203,33 @@ class Agent:
             old_memory: str | None = None
     ) -> GoalResult:
         results = []
-        instruction = query_instruction
-        if old_memory:
-            instruction = f"Context:\n{old_memory}\nQuestion: {query_instruction}"
-        async for _engines in iter_to_aiter(self.engines):
+        for _engines in self.engines:
             if isinstance(_engines, list):
                 _res = await asyncio.gather(
                     *[
                         _engine.start(
-                            input_prompt=instruction,
-                            pre_result=pre_result
+                            input_prompt=query_instruction,
+                            pre_result=pre_result,
+                            old_memory=old_memory
                         )
-                        async for _engine in iter_to_aiter(_engines)
+                        for _engine in _engines
                     ]
                 )
             else:
                 _res = await _engines.start(
-                    input_prompt=instruction,
-                    pre_result=pre_result
+                    input_prompt=query_instruction,
+                    pre_result=pre_result,
+                    old_memory=old_memory
                 )
             results.append(_res)
-        logger.debug(f"Engine results =>\n{results}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Engine results =>\n{results}")
         final_result = await self._verify_goal(
             results=results,
             query_instruction=query_instruction
         )
-        logger.debug(f"Final Result =>\n, {final_result.model_dump()}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Final Result =>\n, {final_result.model_dump()}")
         return final_result
 
     async def execute(
@@ -263,11 +268,12 @@ class Agent:
         _goal_result = None
         for _retry in range(1, self.max_retry+1):
             logger.info(f"Agent `{self.name}` retry {_retry}")
-            _goal_result = await self._execute(
-                query_instruction=query_instruction,
-                pre_result=pre_result,
-                old_memory=old_memory
-            )
+            with llm_caller(self.name):
+                _goal_result = await self._execute(
+                    query_instruction=query_instruction,
+                    pre_result=pre_result,
+                    old_memory=old_memory
+                )
             if _goal_result.is_goal_satisfied:
                 return _goal_result
             elif _goal_result.is_goal_satisfied is False and stop_if_goal_not_satisfied:
@@ -278,3 +284,37 @@ class Agent:
 
         logger.warning(f"Done engine `{self.name}` max retry {self.max_retry}!")
         return _goal_result
+
+    async def execute_many(
+            self,
+            *,
+            query_instructions: list[str],
+            pre_result: str | None = None,
+            old_memory: str | None = None,
+            max_concurrency: int | None = None
+    ) -> list[GoalResult | None]:
+        """
+        Executes the query instructions concurrently, e.g. an offline workload with an `LLMClient` in deferred
+        batch mode, where the concurrent requests of each step are collected into one provider batch job.
+
+        Args:
+            query_instructions: The query instructions to execute.
+            pre_result: An optional pre-computed result shared by every execution.
+            old_memory: An optional previous context shared by every execution.
+            max_concurrency: Maximum concurrent executions, defaults to all of them.
+
+        Returns:
+            list[GoalResult | None]
+                The results in the order of the query instructions.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or len(query_instructions) or 1)
+
+        async def _execute(query_instruction: str) -> GoalResult | None:
+            async with semaphore:
+                return await self.execute(
+                    query_instruction=query_instruction,
+                    pre_result=pre_result,
+                    old_memory=old_memory
+                )
+
+        return await asyncio.gather(*[_execute(query_instruction) for query_instruction in query_instructions])
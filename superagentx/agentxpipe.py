@@ -10,7 +10,6 @@ from superagentx.constants import SEQUENCE
 from superagentx.exceptions import StopSuperAgentX
 from superagentx.llm.types.base import logger
 from superagentx.memory import Memory
-from superagentx.utils.helper import iter_to_aiter
 
 
 class AgentXPipe:
@@ -111,7 +110,7 @@ class AgentXPipe:
             (f'Reason: {result.reason}\n'
              f'Result: \n{yaml.dump(result.result)}\n'
              f'Is Goal Satisfied: {result.is_goal_satisfied}\n\n')
-            async for result in iter_to_aiter(results)
+            for result in results
         ]
 
     async def add_memory(
@@ -134,7 +133,7 @@ class AgentXPipe:
         Returns:
             None
         """
-        async for prompt in iter_to_aiter(prompt_instruction):
+        for prompt in prompt_instruction:
             await self.memory.add(
                 memory_id=self.memory_id,
                 chat_id=self.chat_id,
@@ -181,16 +180,16 @@ class AgentXPipe:
         trigger_break = False
         results = []
         old_memory = None
-        async for _agents in iter_to_aiter(self.agents):
+        for _agents in self.agents:
             pre_result = await self._pre_result(results=results)
             if self.memory:
                 old_memory = await self.retrieve_memory(query_instruction)
                 logger.info(f"Old Memory: {old_memory}")
                 if old_memory:
                     message_content = ""
-                    async for _mem in iter_to_aiter(old_memory):
+                    for _mem in old_memory:
                         message_content += f"{_mem.get('content')} "
-                    old_memory = f"Context:\n{message_content}\nQuestion: {query_instruction}"
+                    old_memory = message_content
             try:
                 if isinstance(_agents, list):
                     _res = await asyncio.gather(
@@ -201,7 +200,7 @@ class AgentXPipe:
                                 old_memory=old_memory,
                                 stop_if_goal_not_satisfied=self.stop_if_goal_not_satisfied
                             )
-                            async for _agent in iter_to_aiter(_agents)
+                            for _agent in _agents
                         ]
                     )
                 else:
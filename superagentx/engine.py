@@ -6,8 +6,9 @@ from superagentx.exceptions import ToolError
 from superagentx.handler.base import BaseHandler
 from superagentx.handler.exceptions import InvalidHandler
 from superagentx.llm import LLMClient, ChatCompletionParams
+from superagentx.llm.metrics import llm_caller
 from superagentx.prompt import PromptTemplate
-from superagentx.utils.helper import iter_to_aiter, sync_to_async
+from superagentx.utils.helper import sync_to_async
 from superagentx.utils.parsers.base import BaseParser
 
 logger = logging.getLogger(__name__)
@@ -42,13 +43,15 @@ class Engine:
         self.prompt_template = prompt_template
         self.tools = tools
         self.output_parser = output_parser
+        # Tool definitions of the handler, built on the first start
+        self._tool_definitions: list[dict] | None = None
 
     async def __funcs_props(
             self,
             funcs: list[str]
     ) -> list[dict]:
         _funcs_props: list[dict] = []
-        async for _func_name in iter_to_aiter(funcs):
+        for _func_name in funcs:
             _func_name = _func_name.split('.')[-1]
             _func = getattr(self.handler, _func_name)
             logger.debug(f"Func Name => {_func_name}, Func => {_func}")
@@ -58,6 +61,8 @@ class Engine:
         return _funcs_props
 
     async def _construct_tools(self) -> list[dict]:
+        if self._tool_definitions is not None:
+            return self._tool_definitions
         funcs = dir(self.handler)
         logger.debug(f"Handler Funcs => {funcs}")
         if not funcs:
@@ -68,12 +73,15 @@ class Engine:
             _tools = await self.__funcs_props(funcs=self.tools)
         if not _tools:
             _tools = await self.__funcs_props(funcs=funcs)
+        # Handler methods and their signatures do not change, later starts reuse the definitions
+        self._tool_definitions = _tools
         return _tools
 
     async def start(
             self,
             input_prompt: str,
             pre_result: str | None = None,
+            old_memory: str | None = None,
             **kwargs
     ) -> list[typing.Any]:
         """
@@ -84,6 +92,8 @@ class Engine:
                  based on the context.
             pre_result: An optional pre-computed result or state to be used during the execution.
                 Defaults to `None` if not provided.
+            old_memory: An optional previous context of the user's instruction. It is the first context trimmed when
+                the prompt template has a token budget.
             kwargs: Additional keyword arguments to update the `input_prompt` dynamically.
 
         Returns:
@@ -91,34 +101,39 @@ class Engine:
                 A list of results generated during the process. The content and
                 structure of the list depend on the implementation details.
         """
-        if pre_result:
-            input_prompt = f'{input_prompt}\n\n{pre_result}'
-
         if not kwargs:
             kwargs = {}
         prompt_messages = await self.prompt_template.get_messages(
             input_prompt=input_prompt,
+            context_sections={
+                'pre_result': pre_result,
+                'memory': f'Context:\n{old_memory}' if old_memory else None
+            },
             **kwargs
         )
-        logger.debug(f"Prompt message => {prompt_messages}")
         tools = await self._construct_tools()
-        logger.debug(f"Handler Tools => {tools}")
         chat_completion_params = ChatCompletionParams(
             messages=prompt_messages,
             tools=tools
         )
-        logger.debug(f"Chat completion params => {chat_completion_params.model_dump_json(exclude_none=True)}")
-        messages = await self.llm.afunc_chat_completion(
-            chat_completion_params=chat_completion_params
-        )
-        logger.debug(f"Func chat completion => {messages}")
+        if logger.isEnabledFor(logging.DEBUG):
+            # The dumps cost more than the rest of the engine step, they are built only when logged
+            logger.debug(f"Prompt message => {prompt_messages}")
+            logger.debug(f"Handler Tools => {tools}")
+            logger.debug(f"Chat completion params => {chat_completion_params.model_dump_json(exclude_none=True)}")
+        with llm_caller(type(self.handler).__name__):
+            messages = await self.llm.afunc_chat_completion(
+                chat_completion_params=chat_completion_params
+            )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Func chat completion => {messages}")
         if not messages:
             raise ToolError("Tool not found for the inputs!")
 
         results = []
-        async for message in iter_to_aiter(messages):
+        for message in messages:
             if message.tool_calls:
-                async for tool in iter_to_aiter(message.tool_calls):
+                for tool in message.tool_calls:
                     if tool.tool_type == 'function':
                         func = getattr(self.handler, tool.name)
                         if func and (inspect.ismethod(func) or inspect.isfunction(func)):
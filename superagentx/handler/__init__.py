@@ -1,6 +1,14 @@
-from .ai import AIHandler
-from .elastic_search import ElasticsearchHandler
-from .send_email import EmailHandler
-from .exa_search import ExaHandler
-from .financial_data import FinancialHandler
-from .serper_dev import SerperDevToolHandler
+from superagentx.utils.helper import lazy_import
+
+# Handlers are imported on first use, with their client SDKs
+__getattr__ = lazy_import(
+    __name__,
+    {
+        'AIHandler': 'superagentx.handler.ai',
+        'ElasticsearchHandler': 'superagentx.handler.elastic_search',
+        'EmailHandler': 'superagentx.handler.send_email',
+        'ExaHandler': 'superagentx.handler.exa_search',
+        'FinancialHandler': 'superagentx.handler.financial_data',
+        'SerperDevToolHandler': 'superagentx.handler.serper_dev'
+    }
+)
@@ -1,13 +1,17 @@
 import os
 import smtplib
 from email import encoders
-from email.message import EmailMessage
+from email.message import Message
 from email.mime.base import MIMEBase
+from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from ssl import SSLContext
 
 from superagentx.handler.base import BaseHandler
-from superagentx.utils.helper import sync_to_async
+from superagentx.utils.helper import register_inline, sync_to_async
+
+# In-memory message edits, the SMTP calls, encoding and serialization stay offloaded
+register_inline(Message.attach, Message.set_payload, Message.add_header)
 
 
 class SendEmailFailed(Exception):
@@ -77,7 +81,7 @@ class EmailHandler(BaseHandler):
         """
 
         try:
-            msg = EmailMessage()
+            msg = MIMEMultipart()
             msg['From'] = f"{from_name} <{sender}>"
             msg['To'] = ', '.join(to)
             msg['Cc'] = ', '.join(cc) if cc else ''
@@ -1,25 +1,45 @@
+import hashlib
 import json
 import logging
 import os
+import time
 import typing
 from typing import List
 
-import boto3
-from botocore.config import Config
-from openai import OpenAI, AzureOpenAI, AsyncOpenAI, AsyncAzureOpenAI
-from openai.types.chat import ChatCompletion
+import numpy as np
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
 
 from superagentx.exceptions import InvalidType
-from superagentx.llm.bedrock import BedrockClient
+from superagentx.llm.batch import BatchCollector
+from superagentx.llm.cache import EmbeddingCache, ResponseCache, chat_completion_key, embedding_key
+from superagentx.llm.client import Client
+from superagentx.llm.embeddings import to_matrix
+from superagentx.llm.exceptions import TokenBudgetExceeded
+from superagentx.llm.metrics import LLMMetrics, usage_cached_tokens
 from superagentx.llm.models import ChatCompletionParams
-from superagentx.llm.openai import OpenAIClient
+from superagentx.llm.registry import ClientRegistry, get_client_registry
+from superagentx.llm.singleflight import SingleFlight
+from superagentx.llm.scheduler import Priority, RequestScheduler, current_priority, get_scheduler
+from superagentx.llm.stream import MessageStream
+from superagentx.llm.tokens import TokenBudget, get_token_counter
 from superagentx.llm.types.base import LLMModelConfig
 from superagentx.llm.types.response import Message, Tool
-from superagentx.utils.helper import iter_to_aiter
+from superagentx.utils.helper import json_loads, lazy_import
 from superagentx.utils.llm_config import LLMType
 
 logger = logging.getLogger(__name__)
 
+# Provider clients are imported by the first `LLMClient` of their type, boto3 alone takes hundreds of milliseconds
+__getattr__ = lazy_import(
+    __name__,
+    {
+        'BedrockClient': 'superagentx.llm.bedrock',
+        'OpenAIClient': 'superagentx.llm.openai',
+        'ReplayClient': 'superagentx.llm.replay',
+        'RouterClient': 'superagentx.llm.router'
+    }
+)
+
 _retries = 5
 
 
@@ -40,16 +60,131 @@ class LLMClient:
         "api_type": "openai",
       }
 
+      Response Cache:
+
+      llm_client = LLMClient(
+        llm_config={"model": "gpt-4o", "llm_type": "openai"},
+        response_cache=ResponseCache(backend=SQLiteCache(db_path="llm_cache.db"), ttl=86400)
+      )
+
+      Rate Limit (shared by every client of the same model, the first one sets the limits). The async chat
+      completions, streams and embeddings are queued, the sync calls are not:
+
+      llm_client = LLMClient(
+        llm_config={"model": "gpt-4o", "llm_type": "openai"},
+        rate_limit={"requests_per_minute": 500, "tokens_per_minute": 30000},
+        priority=Priority.BATCH
+      )
+
+      Coalesce identical concurrent requests (e.g. a PARALLEL agent group sharing a prompt):
+
+      llm_client = LLMClient(llm_config={"model": "gpt-4o", "llm_type": "openai"}, coalesce_requests=True)
+
+      Embedding Cache (vectors stored once per model, dimensions and text):
+
+      embed_client = LLMClient(
+        llm_config={"model": "text-embedding-3-small", "llm_type": "openai"},
+        embed_cache=EmbeddingCache(db_path="embeddings.db", dtype="float16")
+      )
+
+      Prompt Token Budget (checked before sending, `prompt_overflow="trim"` drops the oldest messages):
+
+      llm_client = LLMClient(llm_config={"model": "gpt-4o", "llm_type": "openai"}, max_prompt_tokens=100000)
+
+      Telemetry (latency, tokens, cost and errors per model and calling agent/engine):
+
+      metrics = LLMMetrics()
+      llm_client = LLMClient(llm_config={"model": "gpt-4o", "llm_type": "openai"}, metrics=metrics)
+      print(metrics.to_prometheus())
+
+      Router (one logical model over several providers, fail over and hedged requests):
+
+      llm_client = LLMClient(
+        llm_config={"model": "gpt-4o", "llm_type": "router"},
+        backends=[openai_llm_client, azure_llm_client, bedrock_llm_client],
+        hedge=True
+      )
+
+      Bedrock prompt caching (cache checkpoints after the tools and the system prompt, cached tokens are
+      reported in `Message.cached_tokens` and the metrics, OpenAI caches long prompt prefixes automatically):
+
+      llm_client = LLMClient(
+        llm_config={"model": "anthropic.claude-3-7-sonnet-20250219-v1:0", "llm_type": "bedrock"},
+        prompt_caching=True
+      )
+
+      Deferred batch mode (offline workloads, async chat completions are collected into batch jobs at the batch
+      price, streaming and synchronous calls stay online):
+
+      llm_client = LLMClient(
+        llm_config={"model": "gpt-4o", "llm_type": "openai"},
+        batch=BatchCollector(backend=OpenAIBatchBackend(), flush_interval=10, poll_interval=60)
+      )
+      results = await agent.execute_many(query_instructions=questions)
+
+      Shared connection pools (clients of the same account share one SDK client, close them at shutdown):
+
+      llm_client = LLMClient(llm_config={"model": "gpt-4o", "llm_type": "openai"})
+      embed_client = LLMClient(llm_config={"model": "text-embedding-3-small", "llm_type": "openai"})
+      print(get_client_registry().stats())
+      await get_client_registry().aclose()
+
+      Record / Replay (offline benchmarks and CI, no network):
+
+      recorder = LLMClient(
+        llm_config={"model": "gpt-4o", "llm_type": "replay"},
+        cassette="tests/cassettes/pipe.json",
+        replay_mode="record",
+        record_client=LLMClient(llm_config={"model": "gpt-4o", "llm_type": "openai"})
+      )
+      async with recorder:  # The cassette is written on exit
+        await pipe.flow(query_instruction="What is the weather in Chennai?")
+      llm_client = LLMClient(
+        llm_config={"model": "gpt-4o", "llm_type": "replay"},
+        cassette="tests/cassettes/pipe.json",
+        latency=(0.2, 0.8)
+      )
+
     """
 
     def __init__(
             self,
             *,
             llm_config: dict,
+            response_cache: ResponseCache | None = None,
+            rate_limit: dict | None = None,
+            priority: Priority = Priority.INTERACTIVE,
+            coalesce_requests: bool = False,
+            embed_cache: EmbeddingCache | None = None,
+            max_prompt_tokens: int | None = None,
+            prompt_overflow: typing.Literal['error', 'trim'] = 'error',
+            metrics: LLMMetrics | None = None,
+            client_registry: ClientRegistry | None = None,
+            batch: BatchCollector | None = None,
             **kwargs
     ):
         self.llm_config_model = LLMModelConfig(**llm_config)
-
+        self.metrics = metrics
+        self.token_counter = get_token_counter(self.llm_config_model.model, self.llm_config_model.llm_type)
+        self.max_prompt_tokens = max_prompt_tokens
+        self.prompt_overflow = prompt_overflow
+        # Budget report of the latest request checked against `max_prompt_tokens`
+        self.last_token_budget: TokenBudget | None = None
+        self.response_cache = response_cache
+        self.embed_cache = embed_cache
+        # Deferred mode, the async chat completions wait for provider batch jobs instead of online calls
+        self.batch = batch
+        self.priority = priority
+        self.singleflight: SingleFlight | None = SingleFlight() if coalesce_requests else None
+        self.scheduler: RequestScheduler | None = None
+        if rate_limit:
+            self.scheduler = get_scheduler(
+                f'{self.llm_config_model.llm_type}:{self.llm_config_model.model}',
+                **rate_limit
+            )
+        # SDK clients are shared by the clients of the same account, released by `close`/`aclose`
+        self.client_registry = client_registry if client_registry is not None else get_client_registry()
+        self._shared_clients: list = []
         match self.llm_config_model.llm_type:
 
             case LLMType.OPENAI_CLIENT:  # OPEN AI Client Type
@@ -60,17 +195,19 @@ class LLMClient:
                     if self.llm_config_model.api_key else os.getenv("OPENAI_API_KEY")
                 )
 
-                # Determine the client class based on async_mode
-                client_class = AsyncOpenAI if self.llm_config_model.async_mode else OpenAI
-
-                # Initialize the client with the API key
-                cli = client_class(api_key=api_key)
+                from superagentx.llm.openai import OpenAIClient
 
-                # Set the model attribute
-                cli.model = self.llm_config_model.model
+                # Shared client of the account, the model is set on the wrapper
+                cli = self.client_registry.openai_client(
+                    llm_type=self.llm_config_model.llm_type,
+                    async_mode=self.llm_config_model.async_mode,
+                    api_key=api_key,
+                    base_url=self.llm_config_model.base_url
+                )
+                self._shared_clients.append(cli)
 
                 # Assign the client to self.client
-                self.client = OpenAIClient(client=cli)
+                self.client = OpenAIClient(client=cli, model=self.llm_config_model.model)
 
             case LLMType.AZURE_OPENAI_CLIENT:
 
@@ -80,22 +217,21 @@ class LLMClient:
                 azure_deployment = self.llm_config_model.model or os.getenv("AZURE_DEPLOYMENT")
                 api_version = self.llm_config_model.api_version or os.getenv("API_VERSION")
 
-                # Determine the client class based on async_mode
-                client_class = AsyncAzureOpenAI if self.llm_config_model.async_mode else AzureOpenAI
+                from superagentx.llm.openai import OpenAIClient
 
-                # Initialize the client with the gathered configuration
-                cli = client_class(
+                # Shared client of the deployment, the model is set on the wrapper
+                cli = self.client_registry.openai_client(
+                    llm_type=self.llm_config_model.llm_type,
+                    async_mode=self.llm_config_model.async_mode,
                     api_key=api_key,
-                    azure_endpoint=base_url,
+                    base_url=base_url,
                     azure_deployment=azure_deployment,
                     api_version=api_version
                 )
-
-                # Set the model attribute
-                cli.model = self.llm_config_model.model
+                self._shared_clients.append(cli)
 
                 # Assign the client to self.client
-                self.client = OpenAIClient(client=cli)
+                self.client = OpenAIClient(client=cli, model=self.llm_config_model.model)
 
             case LLMType.BEDROCK_CLIENT:
 
@@ -107,45 +243,278 @@ class LLMClient:
                 aws_access_key = kwargs.get("aws_access_key", None) or os.getenv("AWS_ACCESS_KEY")
                 aws_secret_key = kwargs.get("aws_secret_key", None) or os.getenv("AWS_SECRET_KEY")
 
-                # Initialize Bedrock client, session, and runtime
-                bedrock_config = Config(
-                    region_name=aws_region,
-                    signature_version="v4",
-                    retries={
-                        "max_attempts": _retries,
-                        "mode": "standard"
-                    },
+                from superagentx.llm.bedrock import BedrockClient
+
+                # Shared Bedrock runtime client of the region and credentials
+                aws_cli = self.client_registry.bedrock_client(
+                    region=aws_region,
+                    aws_access_key=aws_access_key,
+                    aws_secret_key=aws_secret_key,
+                    max_attempts=_retries
                 )
+                self._shared_clients.append(aws_cli)
+                # Single attempt client of the requests retried by the scheduler
+                retry_free_cli = None
+                if self.scheduler:
+                    retry_free_cli = self.client_registry.bedrock_client(
+                        region=aws_region,
+                        aws_access_key=aws_access_key,
+                        aws_secret_key=aws_secret_key,
+                        # Retries after the first attempt, none
+                        max_attempts=0
+                    )
+                    self._shared_clients.append(retry_free_cli)
+
+                self.client = BedrockClient(
+                    client=aws_cli,
+                    model=self.llm_config_model.model,
+                    prompt_caching=kwargs.get("prompt_caching", False),
+                    retry_free_client=retry_free_cli
+                )
+
+            case LLMType.ROUTER_CLIENT:
 
-                # Assign Bedrock client to self.client
-                aws_cli = boto3.client(
-                    service_name="bedrock-runtime",
-                    aws_access_key_id=aws_access_key,
-                    aws_secret_access_key=aws_secret_key,
-                    config=bedrock_config
+                backends = kwargs.get("backends")
+                if not backends:
+                    raise ValueError("Backend clients are required to use the router.")
+
+                from superagentx.llm.router import RouterClient
+
+                self.client = RouterClient(
+                    backends=backends,
+                    **{
+                        key: kwargs[key]
+                        for key in (
+                            "hedge", "hedge_delay", "cooldown", "failure_threshold", "error_weight", "cost_weight"
+                        )
+                        if key in kwargs
+                    }
                 )
 
-                # Set the model attribute
-                aws_cli.model = self.llm_config_model.model
+            case LLMType.REPLAY_CLIENT:
 
-                self.client = BedrockClient(client=aws_cli)
+                cassette = kwargs.get("cassette")
+                if cassette is None:
+                    raise ValueError("Cassette is required to use the replay client.")
+
+                from superagentx.llm.replay import ReplayClient
+
+                record_client = kwargs.get("record_client")
+                self.client = ReplayClient(
+                    cassette=cassette,
+                    model=self.llm_config_model.model,
+                    mode=kwargs.get("replay_mode", "replay"),
+                    client=record_client.client if record_client else None,
+                    latency=kwargs.get("latency", 0.0),
+                    strict=kwargs.get("strict", True)
+                )
 
             case _:
                 raise InvalidType(f'Not a valid LLM model `{self.llm_config_model.llm_type}`.')
 
+        if self.batch is not None:
+            self.batch.backend.bind(self)
+
+    def _cache_key(
+            self,
+            chat_completion_params: ChatCompletionParams
+    ) -> str | None:
+        if not self.response_cache:
+            return None
+        if not self.response_cache.is_cacheable(chat_completion_params):
+            self.response_cache.bypassed += 1
+            return None
+        return chat_completion_key(
+            chat_completion_params,
+            model=self.llm_config_model.model,
+            llm_type=self.llm_config_model.llm_type
+        )
+
+    def _estimate_tokens(
+            self,
+            chat_completion_params: ChatCompletionParams
+    ) -> int:
+        # Prompt tokens plus the completion budget
+        return (
+                self.token_counter.count_messages(chat_completion_params.messages)
+                + self.token_counter.count_tools(chat_completion_params.tools)
+                + (chat_completion_params.max_tokens or 0)
+        )
+
+    def token_budget(
+            self,
+            chat_completion_params: ChatCompletionParams
+    ) -> TokenBudget:
+        """
+        Counts the prompt tokens of the request without sending it.
+        """
+        budget = TokenBudget(
+            max_prompt_tokens=self.max_prompt_tokens,
+            exact=self.token_counter.exact,
+            sections={
+                'messages': self.token_counter.count_messages(chat_completion_params.messages),
+                'tools': self.token_counter.count_tools(chat_completion_params.tools)
+            }
+        )
+        budget.prompt_tokens = sum(budget.sections.values())
+        return budget
+
+    def _apply_token_budget(
+            self,
+            chat_completion_params: ChatCompletionParams
+    ) -> ChatCompletionParams:
+        if self.max_prompt_tokens is None:
+            return chat_completion_params
+        budget = self.token_budget(chat_completion_params)
+        if budget.remaining < 0 and self.prompt_overflow == 'trim':
+            messages = list(chat_completion_params.messages)
+            trimmed = 0
+            # System messages and the latest message are kept, the oldest turns go first
+            while budget.remaining < 0:
+                index = next(
+                    (_index for _index, message in enumerate(messages[:-1]) if message.role != 'system'),
+                    None
+                )
+                if index is None:
+                    break
+                tokens = self.token_counter.count_message(messages.pop(index))
+                trimmed += tokens
+                budget.prompt_tokens -= tokens
+                budget.sections['messages'] -= tokens
+            if trimmed:
+                budget.trimmed['messages'] = trimmed
+                logger.info(f'Dropped {trimmed} prompt tokens of the oldest messages to fit {self.max_prompt_tokens}')
+                chat_completion_params = chat_completion_params.model_copy(update={'messages': messages})
+        self.last_token_budget = budget
+        logger.debug(f'Prompt token budget {budget.model_dump()}')
+        if budget.remaining < 0:
+            raise TokenBudgetExceeded(
+                f'Prompt of {budget.prompt_tokens} tokens exceeds the budget of {self.max_prompt_tokens} tokens '
+                f'for `{self.llm_config_model.model}`',
+                budget=budget
+            )
+        return chat_completion_params
+
+    @staticmethod
+    def _usage_tokens(response: ChatCompletion) -> int | None:
+        if response and response.usage:
+            return response.usage.total_tokens
+        return None
+
+    def _record(
+            self,
+            started_at: float,
+            response: ChatCompletion | ChatCompletionChunk | None = None,
+            error: BaseException | None = None
+    ) -> None:
+        if self.metrics is not None:
+            self.metrics.record(
+                model=self.llm_config_model.model,
+                latency=time.perf_counter() - started_at,
+                usage=response.usage if response is not None else None,
+                error=error
+            )
+
+    def _record_cache_hit(self) -> None:
+        if self.metrics is not None:
+            self.metrics.record_cache_hit(model=self.llm_config_model.model)
+
+    def _request_priority(self) -> Priority:
+        # `Priority.INTERACTIVE` is 0, a falsy priority of the context still wins over the client priority
+        priority = current_priority()
+        return priority if priority is not None else self.priority
+
+    async def _arequest(
+            self,
+            chat_completion_params: ChatCompletionParams
+    ) -> ChatCompletion:
+        if self.batch is not None:
+            return await self.batch.asubmit(chat_completion_params)
+        if not self.scheduler:
+            return await self.client.achat_completion(chat_completion_params=chat_completion_params)
+        # The scheduler retries rate limited requests for the whole queue, SDK retries would amplify the errors.
+        # The other requests are not wrapped by the scheduler and keep the SDK retries.
+        client = self.client.without_retries()
+        return await self.scheduler.run(
+            lambda: client.achat_completion(chat_completion_params=chat_completion_params),
+            tokens=self._estimate_tokens(chat_completion_params),
+            priority=self._request_priority(),
+            usage_tokens=self._usage_tokens
+        )
+
+    async def _achat_completion(
+            self,
+            chat_completion_params: ChatCompletionParams
+    ) -> ChatCompletion:
+        started_at = time.perf_counter()
+        try:
+            response = await self._arequest(chat_completion_params)
+        except Exception as ex:
+            self._record(started_at, error=ex)
+            raise
+        self._record(started_at, response=response)
+        return response
+
     def chat_completion(
             self,
             *,
             chat_completion_params: ChatCompletionParams
     ) -> ChatCompletion:
-        return self.client.chat_completion(chat_completion_params=chat_completion_params)
+        """
+        Chat completion in synchronous mode. It is not queued by the `rate_limit` scheduler, which runs on the
+        event loop, and keeps the SDK retries, use `achat_completion` for the rate limited requests.
+        """
+        chat_completion_params = self._apply_token_budget(chat_completion_params)
+        cache_key = self._cache_key(chat_completion_params)
+        if cache_key:
+            response = self.response_cache.get(cache_key)
+            if response:
+                self._record_cache_hit()
+                return response
+        started_at = time.perf_counter()
+        try:
+            response = self.client.chat_completion(chat_completion_params=chat_completion_params)
+        except Exception as ex:
+            self._record(started_at, error=ex)
+            raise
+        self._record(started_at, response=response)
+        if cache_key:
+            self.response_cache.set(cache_key, response)
+        return response
+
+    async def _afetch_chat_completion(
+            self,
+            chat_completion_params: ChatCompletionParams,
+            cache_key: str | None
+    ) -> ChatCompletion:
+        response = await self._achat_completion(chat_completion_params)
+        if cache_key:
+            await self.response_cache.aset(cache_key, response)
+        return response
 
     async def achat_completion(
             self,
             *,
             chat_completion_params: ChatCompletionParams
     ) -> ChatCompletion:
-        return await self.client.achat_completion(chat_completion_params=chat_completion_params)
+        chat_completion_params = self._apply_token_budget(chat_completion_params)
+        cache_key = self._cache_key(chat_completion_params)
+        if cache_key:
+            response = await self.response_cache.aget(cache_key)
+            if response:
+                self._record_cache_hit()
+                return response
+        if self.singleflight and not chat_completion_params.stream:
+            flight_key = cache_key or chat_completion_key(
+                chat_completion_params,
+                model=self.llm_config_model.model,
+                llm_type=self.llm_config_model.llm_type
+            )
+            return await self.singleflight.do(
+                flight_key,
+                lambda: self._afetch_chat_completion(chat_completion_params, cache_key)
+            )
+        return await self._afetch_chat_completion(chat_completion_params, cache_key)
 
     async def get_tool_json(
             self,
@@ -154,16 +523,69 @@ class LLMClient:
     ) -> dict:
         return await self.client.get_tool_json(func=func)
 
+    def _embedding_key(self, text: str, options: dict) -> str:
+        return embedding_key(text, model=self.llm_config_model.model, **options)
+
     def embed(
             self,
             *,
             text: str,
             **kwargs
     ):
-        return self.client.embed(
+        """Embeds the text in synchronous mode, not queued by the `rate_limit` scheduler unlike `aembed`."""
+        if self.embed_cache is None:
+            return self.client.embed(
+                text,
+                **kwargs
+            )
+        key = self._embedding_key(text, kwargs)
+        vector = self.embed_cache.get(key)
+        if vector is not None:
+            return vector.tolist()
+        vector = self.client.embed(
             text,
             **kwargs
         )
+        if vector:
+            self.embed_cache.set(key, vector)
+        return vector
+
+    async def _ascheduled(
+            self,
+            func: typing.Callable[[Client], typing.Awaitable[typing.Any]],
+            texts: list[str]
+    ) -> typing.Any:
+        # Embedding requests share the quota of the model with the chat completions
+        if not self.scheduler:
+            return await func(self.client)
+        client = self.client.without_retries()
+        return await self.scheduler.run(
+            lambda: func(client),
+            tokens=sum(self.token_counter.count(text) for text in texts),
+            priority=self._request_priority()
+        )
+
+    async def _aembed(
+            self,
+            text: str,
+            **kwargs
+    ):
+        if self.singleflight:
+            flight_key = hashlib.sha256(
+                json.dumps(
+                    ['embed', self.llm_config_model.llm_type, self.llm_config_model.model, text, kwargs],
+                    sort_keys=True,
+                    default=str
+                ).encode('utf-8')
+            ).hexdigest()
+            return await self.singleflight.do(
+                flight_key,
+                lambda: self._ascheduled(lambda client: client.aembed(text, **kwargs), [text])
+            )
+        return await self._ascheduled(
+            lambda client: client.aembed(text, **kwargs),
+            [text]
+        )
 
     async def aembed(
             self,
@@ -171,9 +593,130 @@ class LLMClient:
             text: str,
             **kwargs
     ):
-        return await self.client.aembed(
-            text,
+        if self.embed_cache is None:
+            return await self._aembed(text, **kwargs)
+        key = self._embedding_key(text, kwargs)
+        vector = await self.embed_cache.aget(key)
+        if vector is not None:
+            return vector.tolist()
+        vector = await self._aembed(text, **kwargs)
+        if vector:
+            await self.embed_cache.aset(key, vector)
+        return vector
+
+    def _missing_embeddings(
+            self,
+            texts: list[str],
+            keys: list[str],
+            cached: dict[str, np.ndarray]
+    ) -> dict[str, str]:
+        # Unique texts to embed, keyed by their cache key
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached:
+                missing.setdefault(key, text)
+        return missing
+
+    def embed_many(
+            self,
+            *,
+            texts: list[str],
             **kwargs
+    ) -> np.ndarray:
+        """
+        Embeds the texts with batched requests, only the texts missing from the embedding cache are sent. The
+        requests are not queued by the `rate_limit` scheduler unlike `aembed_many`.
+
+        Returns:
+            np.ndarray: Contiguous float32 matrix, one row per text in the input order.
+        """
+        if self.embed_cache is None:
+            return self.client.embed_many(
+                texts,
+                **kwargs
+            )
+        keys = [self._embedding_key(text, kwargs) for text in texts]
+        cached = self.embed_cache.get_many(list(dict.fromkeys(keys)))
+        missing = self._missing_embeddings(texts, keys, cached)
+        if missing:
+            fresh = dict(zip(missing, self.client.embed_many(list(missing.values()), **kwargs)))
+            self.embed_cache.set_many(fresh)
+            cached.update(fresh)
+        return to_matrix([cached[key] for key in keys])
+
+    async def aembed_many(
+            self,
+            *,
+            texts: list[str],
+            **kwargs
+    ) -> np.ndarray:
+        """
+        Embeds the texts with batched requests sent concurrently, only the texts missing from the embedding cache
+        are sent. With a `rate_limit`, the texts are scheduled as one request of their token count.
+
+        Returns:
+            np.ndarray: Contiguous float32 matrix, one row per text in the input order.
+        """
+        if self.embed_cache is None:
+            return await self._ascheduled(
+                lambda client: client.aembed_many(texts, **kwargs),
+                texts
+            )
+        keys = [self._embedding_key(text, kwargs) for text in texts]
+        cached = await self.embed_cache.aget_many(list(dict.fromkeys(keys)))
+        missing = self._missing_embeddings(texts, keys, cached)
+        if missing:
+            missing_texts = list(missing.values())
+            fresh = dict(zip(
+                missing,
+                await self._ascheduled(lambda client: client.aembed_many(missing_texts, **kwargs), missing_texts)
+            ))
+            await self.embed_cache.aset_many(fresh)
+            cached.update(fresh)
+        return to_matrix([cached[key] for key in keys])
+
+    async def astream_chat_completion(
+            self,
+            *,
+            chat_completion_params: ChatCompletionParams
+    ) -> typing.AsyncIterator[ChatCompletionChunk]:
+        """
+        Streams the raw `ChatCompletionChunk` objects from the underlying client.
+        """
+        chat_completion_params = self._apply_token_budget(chat_completion_params)
+        if self.scheduler:
+            await self.scheduler.acquire(
+                tokens=self._estimate_tokens(chat_completion_params),
+                priority=self._request_priority()
+            )
+        started_at = time.perf_counter()
+        last_chunk = None
+        error = None
+        try:
+            async for chunk in self.client.achat_completion_stream(chat_completion_params=chat_completion_params):
+                last_chunk = chunk
+                yield chunk
+        except Exception as ex:
+            error = ex
+            raise
+        finally:
+            # The usage comes with the last chunk, also recorded when the consumer stops early
+            self._record(started_at, response=last_chunk if error is None else None, error=error)
+
+    def afunc_chat_completion_stream(
+            self,
+            *,
+            chat_completion_params: ChatCompletionParams
+    ) -> MessageStream:
+        """
+        Streams the chat completion as content deltas while assembling the tool calls.
+
+        Iterate the returned `MessageStream` to forward the content deltas as they arrive, then await
+        `messages()` to get the same `Message` list `afunc_chat_completion` returns.
+        """
+        chat_completion_params.stream = True
+        return MessageStream(
+            self.astream_chat_completion(chat_completion_params=chat_completion_params)
         )
 
     async def afunc_chat_completion(
@@ -182,49 +725,70 @@ class LLMClient:
             chat_completion_params: ChatCompletionParams
     ) -> List[Message]:
 
-        stream = bool(chat_completion_params.stream)
-
-        # Most models don't support streaming with tool use
-        if stream:
-            logger.warning(
-                "Streaming is not currently supported, streaming will be disabled.",
+        if chat_completion_params.stream:
+            return await self.afunc_chat_completion_stream(
+                chat_completion_params=chat_completion_params
+            ).messages()
+
+        response: ChatCompletion = await self.achat_completion(chat_completion_params=chat_completion_params)
+        if not response:
+            return []
+        return self._build_messages(response)
+
+    @staticmethod
+    def _build_messages(response: ChatCompletion) -> List[Message]:
+        """
+        Builds the messages of the response with one pydantic validation per choice. Validating plain dicts in a
+        single call is faster than building each `Tool` model first, and `json_loads` uses orjson when installed.
+        """
+        usage_data = response.usage
+        details = usage_data.completion_tokens_details
+        messages = []
+        for choice in response.choices:
+            tool_calls_data = [
+                {
+                    'tool_type': tool_call.type,
+                    'name': tool_call.function.name,
+                    'arguments': json_loads(tool_call.function.arguments)
+                }
+                for tool_call in choice.message.tool_calls or []
+            ]
+            messages.append(
+                Message.model_validate({
+                    'role': choice.message.role,
+                    'model': response.model,
+                    'content': choice.message.content,
+                    'tool_calls': tool_calls_data or None,
+                    'completion_tokens': usage_data.completion_tokens,
+                    'prompt_tokens': usage_data.prompt_tokens,
+                    'total_tokens': usage_data.total_tokens,
+                    'reasoning_tokens': (details.reasoning_tokens or 0) if details else 0,
+                    'cached_tokens': usage_cached_tokens(usage_data),
+                    'created': response.created
+                })
             )
-            chat_completion_params.stream = False
-
-        response: ChatCompletion = await self.client.achat_completion(chat_completion_params=chat_completion_params)
-
-        # List to store multiple Message instances
-        message_instances = []
-
-        if response:
-            # Iterate over each choice and create a Message instance
-            async for choice in iter_to_aiter(response.choices):
-                tool_calls_data = []
-                if choice.message.tool_calls:
-                    tool_calls_data = [
-                        Tool(
-                            tool_type=tool_call.type,
-                            name=tool_call.function.name,
-                            arguments=json.loads(tool_call.function.arguments)  # Use json.loads for safer parsing
-                        ) async for tool_call in iter_to_aiter(choice.message.tool_calls)
-                    ]
-
-                # Extract token details from usage
-                usage_data = response.usage
-
-                # Add the created Message instance to the list
-                message_instances.append(
-                    Message(
-                        role=choice.message.role,
-                        model=response.model,
-                        content=choice.message.content,
-                        tool_calls=tool_calls_data if tool_calls_data else None,
-                        completion_tokens=usage_data.completion_tokens,
-                        prompt_tokens=usage_data.prompt_tokens,
-                        total_tokens=usage_data.total_tokens,
-                        reasoning_tokens=usage_data.completion_tokens_details.reasoning_tokens if usage_data.completion_tokens_details else 0,
-                        created=response.created
-                    )
-                )
-
-        return message_instances
+        return messages
+
+    def close(self) -> None:
+        """
+        Closes the client, e.g. writes the cassette of a recording, and releases the shared SDK clients. The last
+        client of an account closes its connection pool.
+        """
+        self.client.close()
+        while self._shared_clients:
+            self.client_registry.release(self._shared_clients.pop())
+
+    async def aclose(self) -> None:
+        """
+        Closes the client, e.g. writes the cassette of a recording, and releases the shared SDK clients. The last
+        client of an account closes its connection pool.
+        """
+        await self.client.aclose()
+        while self._shared_clients:
+            await self.client_registry.arelease(self._shared_clients.pop())
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
@@ -0,0 +1,634 @@
+import asyncio
+import itertools
+import json
+import logging
+import os
+import tempfile
+import time
+import typing
+import uuid
+from abc import ABCMeta, abstractmethod
+from pathlib import Path
+
+from openai.types.chat import ChatCompletion
+
+from superagentx.llm.client import Client
+from superagentx.llm.exceptions import BatchJobError, BatchRequestError
+from superagentx.llm.models import ChatCompletionParams
+from superagentx.utils.helper import json_loads, sync_to_async
+from superagentx.utils.llm_config import LLMType
+
+logger = logging.getLogger(__name__)
+
+BatchStatus = typing.Literal['pending', 'completed', 'failed']
+BatchResults = dict[str, ChatCompletion | Exception]
+
+_CHAT_COMPLETIONS_URL = '/v1/chat/completions'
+_ANTHROPIC_VERSION = 'bedrock-2023-05-31'
+_ANTHROPIC_FINISH_REASONS = {
+    'end_turn': 'stop',
+    'stop_sequence': 'stop',
+    'max_tokens': 'length',
+    'tool_use': 'tool_calls'
+}
+
+
+def openai_batch_line(
+        custom_id: str,
+        chat_completion_params: ChatCompletionParams,
+        model: str | None
+) -> dict:
+    """Request line of an OpenAI Batch API input file."""
+    body = chat_completion_params.model_dump(exclude_none=True)
+    if model:
+        body['model'] = model
+    return {'custom_id': custom_id, 'method': 'POST', 'url': _CHAT_COMPLETIONS_URL, 'body': body}
+
+
+def parse_openai_batch_output(text: str) -> BatchResults:
+    """Results of an OpenAI Batch API output or error file by request id."""
+    results: BatchResults = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        record = json_loads(line)
+        response = record.get('response') or {}
+        error = record.get('error')
+        if error or response.get('status_code', 200) >= 400:
+            error = error or response.get('body', {}).get('error')
+            results[record['custom_id']] = BatchRequestError(f'Batch request {record["custom_id"]} failed: {error}')
+        else:
+            results[record['custom_id']] = ChatCompletion.model_validate(response['body'])
+    return results
+
+
+def _write_atomic(path: Path, payload: str) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.')
+    with os.fdopen(fd, 'w', encoding='utf-8') as file:
+        file.write(payload)
+    os.replace(tmp_path, path)
+
+
+class BatchBackend(metaclass=ABCMeta):
+    """Provider batch job API used by the `BatchCollector`."""
+
+    @abstractmethod
+    async def asubmit(
+            self,
+            requests: list[tuple[str, ChatCompletionParams]]
+    ) -> str:
+        """Submits the requests, keyed by request id, as one batch job and returns the job id."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def astatus(
+            self,
+            job_id: str
+    ) -> BatchStatus:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def aresults(
+            self,
+            job_id: str
+    ) -> BatchResults:
+        """Responses of a completed job by request id, failed requests map to their error."""
+        raise NotImplementedError
+
+    def bind(self, llm_client) -> None:
+        """Called by the `LLMClient` of the collector, a backend may reuse its client and model."""
+
+    def validate(
+            self,
+            chat_completion_params: ChatCompletionParams
+    ) -> None:
+        """Raises `ValueError` for a request the provider would reject, before it joins a batch job."""
+
+
+class OpenAIBatchBackend(BatchBackend):
+
+    def __init__(
+            self,
+            *,
+            model: str | None = None,
+            client: typing.Any = None,
+            completion_window: str = '24h'
+    ):
+        """
+        OpenAI and Azure OpenAI Batch API, the requests are uploaded as a JSONL file and billed at the batch rate.
+
+        Args:
+            model: Model, or Azure deployment, of the requests, defaults to the model of the `LLMClient`.
+            client: `AsyncOpenAI` or `AsyncAzureOpenAI` client, defaults to the shared SDK client of the
+                `LLMClient`, with its credentials, endpoint and connection pool.
+            completion_window: Completion window of the batch jobs.
+        """
+        self.client = client
+        self.model = model
+        self.completion_window = completion_window
+        self._batches: dict[str, typing.Any] = {}
+
+    def bind(self, llm_client) -> None:
+        if self.client is None:
+            llm_config = llm_client.llm_config_model
+            if (
+                    llm_config.llm_type not in (LLMType.OPENAI_CLIENT, LLMType.AZURE_OPENAI_CLIENT)
+                    or not llm_config.async_mode
+            ):
+                raise ValueError('The OpenAI batch backend requires an async OpenAI or Azure OpenAI LLMClient.')
+            self.client = llm_client.client.client
+        self.model = self.model or llm_client.llm_config_model.model
+
+    async def asubmit(
+            self,
+            requests: list[tuple[str, ChatCompletionParams]]
+    ) -> str:
+        if self.client is None:
+            raise ValueError('No client, pass a `client` or use the backend in the batch of an `LLMClient`.')
+        payload = '\n'.join(
+            json.dumps(openai_batch_line(custom_id, chat_completion_params, self.model))
+            for custom_id, chat_completion_params in requests
+        )
+        input_file = await self.client.files.create(
+            file=('superagentx-batch.jsonl', payload.encode('utf-8'), 'application/jsonl'),
+            purpose='batch'
+        )
+        batch = await self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=_CHAT_COMPLETIONS_URL,
+            completion_window=self.completion_window
+        )
+        return batch.id
+
+    async def astatus(
+            self,
+            job_id: str
+    ) -> BatchStatus:
+        batch = self._batches[job_id] = await self.client.batches.retrieve(job_id)
+        if batch.status == 'completed':
+            return 'completed'
+        if batch.status in ('expired', 'cancelled'):
+            # Requests done before the expiry are in the output file, the others are missing results
+            return 'completed' if batch.output_file_id else 'failed'
+        if batch.status == 'failed':
+            return 'failed'
+        return 'pending'
+
+    async def aresults(
+            self,
+            job_id: str
+    ) -> BatchResults:
+        batch = self._batches.pop(job_id, None) or await self.client.batches.retrieve(job_id)
+        results: BatchResults = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                content = await self.client.files.content(file_id)
+                results.update(parse_openai_batch_output(content.text))
+        return results
+
+
+class BedrockBatchBackend(BatchBackend):
+
+    def __init__(
+            self,
+            *,
+            model: str,
+            role_arn: str,
+            input_s3_uri: str,
+            output_s3_uri: str,
+            aws_region: str | None = None,
+            bedrock_client: typing.Any = None,
+            s3_client: typing.Any = None,
+            max_tokens: int = 4096
+    ):
+        """
+        Amazon Bedrock batch inference, the requests are written as JSONL records to S3 and processed by a model
+        invocation job. The records use the Anthropic messages format, so the model must be an Anthropic model.
+        Bedrock requires a minimum number of records per job, see the Bedrock batch inference quotas.
+
+        Args:
+            model: Anthropic model id.
+            role_arn: Service role of the job, with access to the S3 locations.
+            input_s3_uri: S3 prefix of the input files, `s3://bucket/prefix`.
+            output_s3_uri: S3 prefix of the job outputs.
+            aws_region: AWS region, defaults to the `AWS_REGION` environment variable.
+            bedrock_client: boto3 `bedrock` client, created when not given.
+            s3_client: boto3 `s3` client, created when not given.
+            max_tokens: Completion tokens of the requests without `max_tokens`, required by the messages format.
+        """
+        if 'anthropic' not in model:
+            raise ValueError(f'Bedrock batch inference supports Anthropic models only, got `{model}`.')
+        aws_region = aws_region or os.getenv('AWS_REGION')
+        if bedrock_client is None or s3_client is None:
+            import boto3
+
+            bedrock_client = bedrock_client or boto3.client('bedrock', region_name=aws_region)
+            s3_client = s3_client or boto3.client('s3', region_name=aws_region)
+        self.model = model
+        self.role_arn = role_arn
+        self.input_s3_uri = input_s3_uri.rstrip('/')
+        self.output_s3_uri = output_s3_uri.rstrip('/')
+        self.bedrock_client = bedrock_client
+        self.s3_client = s3_client
+        self.max_tokens = max_tokens
+        self._input_names: dict[str, str] = {}
+
+    @staticmethod
+    def _split_s3_uri(uri: str) -> tuple[str, str]:
+        bucket, _, key = uri.removeprefix('s3://').partition('/')
+        return bucket, key
+
+    @staticmethod
+    def _anthropic_tool(tool: dict) -> dict:
+        if 'toolSpec' in tool:
+            spec = tool['toolSpec']
+            return {
+                'name': spec['name'],
+                'description': spec.get('description') or '',
+                'input_schema': spec.get('inputSchema', {}).get('json') or {'type': 'object', 'properties': {}}
+            }
+        function = tool['function']
+        return {
+            'name': function['name'],
+            'description': function.get('description') or '',
+            'input_schema': function.get('parameters') or {'type': 'object', 'properties': {}}
+        }
+
+    def model_input(
+            self,
+            chat_completion_params: ChatCompletionParams
+    ) -> dict:
+        """
+        Anthropic messages request of the chat completion.
+
+        The messages do not keep the tool call ids, the tool results and the tool calls of the assistant cannot be
+        sent as the `tool_result` and `tool_use` blocks Anthropic requires, so they are rejected.
+        """
+        for message in chat_completion_params.messages:
+            if message.role not in ('system', 'user', 'assistant'):
+                raise ValueError(f'Bedrock batch inference does not support `{message.role}` messages.')
+            if message.role == 'assistant' and not message.content:
+                raise ValueError('Bedrock batch inference does not support assistant messages without content.')
+        system = [message.content for message in chat_completion_params.messages if message.role == 'system']
+        model_input = {
+            'anthropic_version': _ANTHROPIC_VERSION,
+            'max_tokens': chat_completion_params.max_tokens or self.max_tokens,
+            'messages': [
+                {'role': message.role, 'content': message.content}
+                for message in chat_completion_params.messages
+                if message.role != 'system'
+            ]
+        }
+        if system:
+            model_input['system'] = '\n\n'.join(system)
+        if chat_completion_params.temperature is not None:
+            model_input['temperature'] = chat_completion_params.temperature
+        if chat_completion_params.top_p is not None:
+            model_input['top_p'] = chat_completion_params.top_p
+        if chat_completion_params.tools:
+            model_input['tools'] = [self._anthropic_tool(tool) for tool in chat_completion_params.tools]
+        return model_input
+
+    def validate(
+            self,
+            chat_completion_params: ChatCompletionParams
+    ) -> None:
+        self.model_input(chat_completion_params)
+
+    @staticmethod
+    def to_chat_completion(
+            record_id: str,
+            model_id: str,
+            model_output: dict
+    ) -> ChatCompletion:
+        """Converts an Anthropic messages response to a `ChatCompletion`."""
+        content = model_output.get('content', [])
+        tool_calls = [
+            {
+                'id': block['id'],
+                'type': 'function',
+                'function': {'name': block['name'], 'arguments': json.dumps(block.get('input') or {})}
+            }
+            for block in content
+            if block.get('type') == 'tool_use'
+        ]
+        usage = model_output.get('usage', {})
+        prompt_tokens = (
+                usage.get('input_tokens', 0)
+                + usage.get('cache_read_input_tokens', 0)
+                + usage.get('cache_creation_input_tokens', 0)
+        )
+        completion_tokens = usage.get('output_tokens', 0)
+        return ChatCompletion.model_validate({
+            'id': model_output.get('id', record_id),
+            'choices': [{
+                'finish_reason': _ANTHROPIC_FINISH_REASONS.get(model_output.get('stop_reason'), 'stop'),
+                'index': 0,
+                'message': {
+                    'role': 'assistant',
+                    'content': ''.join(block['text'] for block in content if block.get('type') == 'text'),
+                    'tool_calls': tool_calls or None
+                }
+            }],
+            'created': int(time.time()),
+            'model': model_id,
+            'object': 'chat.completion',
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens,
+                'prompt_tokens_details': {'cached_tokens': usage.get('cache_read_input_tokens', 0)}
+            }
+        })
+
+    async def asubmit(
+            self,
+            requests: list[tuple[str, ChatCompletionParams]]
+    ) -> str:
+        input_name = f'superagentx-{uuid.uuid4().hex}.jsonl'
+        payload = '\n'.join(
+            json.dumps({'recordId': custom_id, 'modelInput': self.model_input(chat_completion_params)})
+            for custom_id, chat_completion_params in requests
+        )
+        bucket, prefix = self._split_s3_uri(self.input_s3_uri)
+        key = f'{prefix}/{input_name}' if prefix else input_name
+        await sync_to_async(self.s3_client.put_object, Bucket=bucket, Key=key, Body=payload.encode('utf-8'))
+        response = await sync_to_async(
+            self.bedrock_client.create_model_invocation_job,
+            jobName=input_name.removesuffix('.jsonl'),
+            roleArn=self.role_arn,
+            modelId=self.model,
+            inputDataConfig={'s3InputDataConfig': {'s3Uri': f's3://{bucket}/{key}', 's3InputFormat': 'JSONL'}},
+            outputDataConfig={'s3OutputDataConfig': {'s3Uri': f'{self.output_s3_uri}/'}}
+        )
+        job_id = response['jobArn']
+        self._input_names[job_id] = input_name
+        return job_id
+
+    async def astatus(
+            self,
+            job_id: str
+    ) -> BatchStatus:
+        response = await sync_to_async(self.bedrock_client.get_model_invocation_job, jobIdentifier=job_id)
+        status = response['status']
+        if status in ('Completed', 'PartiallyCompleted'):
+            return 'completed'
+        if status in ('Failed', 'Stopped', 'Expired'):
+            logger.warning(f'Bedrock batch job {job_id} {status}: {response.get("message")}')
+            return 'failed'
+        return 'pending'
+
+    async def _input_name(
+            self,
+            job_id: str
+    ) -> str:
+        input_name = self._input_names.pop(job_id, None)
+        if input_name is None:
+            # Jobs submitted by another backend, e.g. before a restart, keep their input file in the job
+            response = await sync_to_async(self.bedrock_client.get_model_invocation_job, jobIdentifier=job_id)
+            input_name = response['inputDataConfig']['s3InputDataConfig']['s3Uri'].rsplit('/', 1)[-1]
+        return input_name
+
+    async def aresults(
+            self,
+            job_id: str
+    ) -> BatchResults:
+        # Bedrock writes `<input file>.out` under the job id folder of the output prefix
+        bucket, prefix = self._split_s3_uri(self.output_s3_uri)
+        folder = job_id.rsplit('/', 1)[-1]
+        key = '/'.join(part for part in (prefix, folder, f'{await self._input_name(job_id)}.out') if part)
+        response = await sync_to_async(self.s3_client.get_object, Bucket=bucket, Key=key)
+        body = await sync_to_async(response['Body'].read)
+        results: BatchResults = {}
+        for line in body.decode('utf-8').splitlines():
+            if not line.strip():
+                continue
+            record = json_loads(line)
+            if record.get('error') or 'modelOutput' not in record:
+                results[record['recordId']] = BatchRequestError(
+                    f'Batch request {record["recordId"]} failed: {record.get("error")}'
+                )
+            else:
+                results[record['recordId']] = self.to_chat_completion(
+                    record['recordId'],
+                    self.model,
+                    record['modelOutput']
+                )
+        return results
+
+
+class LocalFileBatchBackend(BatchBackend):
+
+    def __init__(
+            self,
+            *,
+            directory: str | Path,
+            client: Client | None = None,
+            model: str | None = None,
+            delay: float = 0.0
+    ):
+        """
+        Offline stand-in of a provider batch API, for tests and local runs.
+
+        Jobs are OpenAI Batch API files in `directory`: `<job>.jsonl` holds the requests and `<job>.output.jsonl`
+        the results. With a `client`, e.g. a `ReplayClient`, each job is processed after `delay` seconds,
+        otherwise another process writes the output file, e.g. with `aprocess`.
+
+        Args:
+            directory: Directory of the job files.
+            client: Client processing the jobs.
+            model: Model written in the request lines.
+            delay: Seconds before a job is processed, simulates the provider queue.
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.client = client
+        self.model = model
+        self.delay = delay
+        self._tasks: set[asyncio.Task] = set()
+
+    def _input_path(self, job_id: str) -> Path:
+        return self.directory / f'{job_id}.jsonl'
+
+    def _output_path(self, job_id: str) -> Path:
+        return self.directory / f'{job_id}.output.jsonl'
+
+    def _error_path(self, job_id: str) -> Path:
+        return self.directory / f'{job_id}.error'
+
+    async def asubmit(
+            self,
+            requests: list[tuple[str, ChatCompletionParams]]
+    ) -> str:
+        job_id = f'batch_{uuid.uuid4().hex}'
+        payload = '\n'.join(
+            json.dumps(openai_batch_line(custom_id, chat_completion_params, self.model))
+            for custom_id, chat_completion_params in requests
+        )
+        _write_atomic(self._input_path(job_id), payload)
+        if self.client is not None:
+            task = asyncio.ensure_future(self.aprocess(job_id))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return job_id
+
+    async def _aprocess_line(self, line: dict) -> dict:
+        body = dict(line['body'])
+        body.pop('model', None)
+        try:
+            response = await self.client.achat_completion(chat_completion_params=ChatCompletionParams(**body))
+        except Exception as ex:
+            return {'id': uuid.uuid4().hex, 'custom_id': line['custom_id'], 'response': None, 'error': str(ex)}
+        return {
+            'id': uuid.uuid4().hex,
+            'custom_id': line['custom_id'],
+            'response': {'status_code': 200, 'body': response.model_dump(mode='json')},
+            'error': None
+        }
+
+    async def aprocess(self, job_id: str) -> None:
+        """Processes the job with the client and writes its output file."""
+        await asyncio.sleep(self.delay)
+        try:
+            lines = [
+                json_loads(line)
+                for line in self._input_path(job_id).read_text(encoding='utf-8').splitlines()
+                if line.strip()
+            ]
+            records = await asyncio.gather(*[self._aprocess_line(line) for line in lines])
+        except Exception as ex:
+            logger.error(f'Local batch job {job_id} failed', exc_info=ex)
+            _write_atomic(self._error_path(job_id), str(ex))
+            return
+        _write_atomic(self._output_path(job_id), '\n'.join(json.dumps(record) for record in records))
+
+    async def astatus(
+            self,
+            job_id: str
+    ) -> BatchStatus:
+        if self._output_path(job_id).exists():
+            return 'completed'
+        if self._error_path(job_id).exists():
+            return 'failed'
+        return 'pending'
+
+    async def aresults(
+            self,
+            job_id: str
+    ) -> BatchResults:
+        return parse_openai_batch_output(self._output_path(job_id).read_text(encoding='utf-8'))
+
+
+class BatchCollector:
+
+    def __init__(
+            self,
+            *,
+            backend: BatchBackend,
+            max_batch_size: int = 1000,
+            flush_interval: float = 5.0,
+            poll_interval: float = 30.0,
+            timeout: float | None = 86400.0
+    ):
+        """
+        Collects the chat completions of an `LLMClient` in deferred mode into provider batch jobs.
+
+        Each request waits while the collector gathers the requests arriving within `flush_interval`, or until
+        `max_batch_size` requests, submits them as one batch job, polls the job every `poll_interval` seconds and
+        resumes every waiting request with its own response or error. Meant for offline workloads, where the
+        batch price matters more than the latency, e.g. `Agent.execute_many`.
+
+        Args:
+            backend: Provider batch API, `OpenAIBatchBackend`, `BedrockBatchBackend` or `LocalFileBatchBackend`.
+            max_batch_size: Requests per batch job, a full batch is submitted right away.
+            flush_interval: Seconds the first request of a batch waits for more requests.
+            poll_interval: Seconds between two job status checks.
+            timeout: Seconds before a pending job fails the waiting requests, `None` waits forever.
+        """
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self._pending: list[tuple[str, ChatCompletionParams, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._jobs: set[asyncio.Task] = set()
+        self._ids = itertools.count(1)
+        self.jobs_submitted = 0
+        self.requests_submitted = 0
+        self.failed_requests = 0
+
+    async def asubmit(
+            self,
+            chat_completion_params: ChatCompletionParams
+    ) -> ChatCompletion:
+        """Queues the request for the next batch job and waits for its response."""
+        # An invalid request fails alone instead of the whole job
+        self.backend.validate(chat_completion_params)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((f'request-{next(self._ids)}', chat_completion_params, future))
+        if len(self._pending) >= self.max_batch_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.flush_interval, self.flush)
+        return await future
+
+    def flush(self) -> None:
+        """Submits the queued requests as a batch job now."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending = [item for item in self._pending if not item[2].done()]
+        self._pending = []
+        if pending:
+            task = asyncio.ensure_future(self._arun(pending))
+            self._jobs.add(task)
+            task.add_done_callback(self._jobs.discard)
+
+    async def _await_job(self, job_id: str) -> BatchResults:
+        started_at = time.monotonic()
+        while (status := await self.backend.astatus(job_id)) == 'pending':
+            if self.timeout is not None and time.monotonic() - started_at > self.timeout:
+                raise BatchJobError(f'Batch job {job_id} did not complete in {self.timeout} seconds.')
+            await asyncio.sleep(self.poll_interval)
+        if status == 'failed':
+            raise BatchJobError(f'Batch job {job_id} failed.')
+        return await self.backend.aresults(job_id)
+
+    async def _arun(self, pending: list[tuple[str, ChatCompletionParams, asyncio.Future]]) -> None:
+        try:
+            job_id = await self.backend.asubmit([(custom_id, params) for custom_id, params, _ in pending])
+            self.jobs_submitted += 1
+            self.requests_submitted += len(pending)
+            logger.info(f'Submitted batch job {job_id} of {len(pending)} requests')
+            results = await self._await_job(job_id)
+        except Exception as ex:
+            self.failed_requests += len(pending)
+            for _, _, future in pending:
+                if not future.done():
+                    future.set_exception(ex)
+            return
+        for custom_id, _, future in pending:
+            if future.done():
+                continue
+            result = results.get(custom_id) or BatchRequestError(f'No batch result for request {custom_id}.')
+            if isinstance(result, Exception):
+                self.failed_requests += 1
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def aclose(self) -> None:
+        """Submits the queued requests and waits for every running job."""
+        self.flush()
+        await asyncio.gather(*self._jobs, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            'pending_requests': len(self._pending),
+            'running_jobs': len(self._jobs),
+            'jobs_submitted': self.jobs_submitted,
+            'requests_submitted': self.requests_submitted,
+            'failed_requests': self.failed_requests
+        }
@@ -1,26 +1,39 @@
+import asyncio
 import inspect
 import json
 import time
-from concurrent.futures import ThreadPoolExecutor
-from typing import List, Dict, Tuple, Any
-import asyncio
+from typing import List, Dict
 
 import boto3
+import numpy as np
 from openai.types import CompletionUsage
-from openai.types.chat import ChatCompletion, ChatCompletionMessage, ChatCompletionMessageToolCall
+from openai.types.completion_usage import PromptTokensDetails
+from openai.types.chat import ChatCompletion, ChatCompletionMessage, ChatCompletionMessageToolCall, ChatCompletionChunk
 from openai.types.chat.chat_completion import Choice
+from openai.types.chat.chat_completion_chunk import (
+    Choice as ChunkChoice,
+    ChoiceDelta,
+    ChoiceDeltaToolCall,
+    ChoiceDeltaToolCallFunction
+)
 from pydantic import typing
 
 from superagentx.llm.client import Client
+from superagentx.llm.embeddings import to_matrix
 from superagentx.llm.models import ChatCompletionParams, Message
-from superagentx.utils.helper import iter_to_aiter, ptype_to_json_scheme
-from superagentx.utils.helper import sync_to_async
+from superagentx.utils.helper import ptype_to_json_scheme
+from superagentx.utils.helper import run_inline, sync_to_async, sync_iter_to_aiter
 
 import logging
 
 logger = logging.getLogger(__name__)
 
 _retries = 5
+# Cohere embed models accept up to 96 texts per request, Titan embed models a single text
+_COHERE_EMBED_MODEL = 'cohere.embed'
+_COHERE_EMBED_BATCH_SIZE = 96
+_EMBED_MAX_CONCURRENCY = 8
+_CACHE_POINT = {'cachePoint': {'type': 'default'}}
 
 
 class BedrockClient(Client):
@@ -28,9 +41,37 @@ class BedrockClient(Client):
     def __init__(
             self,
             *,
-            client: boto3.client
+            client: boto3.client,
+            model: str | None = None,
+            prompt_caching: bool = False,
+            retry_free_client: boto3.client = None
     ):
+        """
+        Args:
+            client: The `bedrock-runtime` client.
+            model: Model id, defaults to the `model` attribute of the client.
+            prompt_caching: Close the tools and the system prompt with `cachePoint` blocks, so the shared prefix is
+                read from the Bedrock prompt cache. Only for models supporting prompt caching.
+            retry_free_client: The `bedrock-runtime` client with a single attempt, used by `without_retries`.
+        """
         self.client = client
+        # Shared runtime clients serve several models, the model attribute of the client is the legacy fallback
+        self.model = model or getattr(self.client, 'model', None)
+        self.prompt_caching = prompt_caching
+        self.retry_free_client = retry_free_client
+        self._without_retries: BedrockClient | None = None
+
+    def without_retries(self) -> 'BedrockClient':
+        # boto3 clients cannot change their retries per request, the single attempt client is a second client
+        if self.retry_free_client is None:
+            return self
+        if self._without_retries is None:
+            self._without_retries = BedrockClient(
+                client=self.retry_free_client,
+                model=self.model,
+                prompt_caching=self.prompt_caching
+            )
+        return self._without_retries
 
     def chat_completion(
             self,
@@ -43,89 +84,22 @@ class BedrockClient(Client):
         @param chat_completion_params:
         @return ChatCompletion:
         """
-
         if chat_completion_params:
-            tools = chat_completion_params.tools
-
-            # Get model name from client object attribute and set,
-            model_id = ''.join(getattr(self.client, 'model'))
-
-            inference_config = {}
-
-            if chat_completion_params.temperature:
-                inference_config["temperature"] = chat_completion_params.temperature
-
-            if chat_completion_params.max_tokens:
-                inference_config["maxTokens"] = chat_completion_params.max_tokens
-
-            if chat_completion_params.top_p:
-                inference_config["topP"] = chat_completion_params.top_p
-
-            messages = chat_completion_params.messages
-            logger.debug(f"Bedrock Message {messages} ")
-            conversations = self._construct_message(messages)
-
-            user_message = {'role': 'user', 'content': conversations['user']}
-            assistant_message = conversations['assistant'] if len(conversations['assistant']) > 0 else None
-
+            request = self._converse_request(chat_completion_params)
+            logger.debug(f"Bedrock Request {request} ")
             try:
-                if tools:
-                    tools_config = {"tools": tools}
-                    # Convert from synchronous to asynchronous mode and invoke Bedrock client!
-                    response = self.client.converse(
-                        modelId=model_id,
-                        messages=[user_message],
-                        inferenceConfig=inference_config,
-                        toolConfig=tools_config)
-
-                    logger.debug(f"Bedrock Tool Response {response}")
-                else:
-                    response = self.client.converse(
-                        modelId=model_id,
-                        messages=[user_message],
-                        system=assistant_message,
-                        inferenceConfig=inference_config)
-                    logger.debug(f"Bedrock Message ==> Bedrock no tool {response} ")
-
+                response = self.client.converse(**request)
+                logger.debug(f"Bedrock Response {response}")
             except Exception as e:
-                raise RuntimeError(f"Failed to get response from Bedrock: {e}")
+                raise RuntimeError(f"Failed to get response from Bedrock: {e}") from e
 
             if response is None:
                 raise RuntimeError(f"Failed to get response from Bedrock after retrying {_retries} times.")
 
-            if tools:
-                messages = chat_completion_params.messages
-                conversations = self._construct_message(messages)
-                tools_config = {"tools": tools}
-
-                try:
-                    response = self.client.converse(
-                        modelId=model_id,
-                        messages=conversations,
-                        inferenceConfig=inference_config,
-                        toolConfig=tools_config,
-                    )
-                except Exception as e:
-                    raise RuntimeError(f"Failed to get response from Bedrock: {e}")
-
-                if not response:
-                    raise RuntimeError(f"Failed to get response from Bedrock after retrying {_retries} times.")
-
-                try:
-                    asyncio.get_running_loop()  # Triggers RuntimeError if no running event loop
-                    # Create a separate thread so we can block before returning
-                    with ThreadPoolExecutor(1) as pool:
-                        chat_completion: ChatCompletion = pool.submit(
-                            lambda: asyncio.run(
-                                self.__prepare_bedrock_formatted_output_(
-                                    response=response,
-                                    model_id=model_id,
-                                    is_async=True
-                                )
-                            )).result()
-                        return chat_completion
-                except RuntimeError as error:
-                    logger.error(f'Unable tp process the result from Bedrock response {error} ')
+            return self._prepare_bedrock_formatted_output(
+                response=response,
+                model_id=request['modelId']
+            )
 
     async def achat_completion(
             self,
@@ -139,103 +113,209 @@ class BedrockClient(Client):
         @return ChatCompletion:
         """
         if chat_completion_params:
-            tools = chat_completion_params.tools
-
-            # Get model name from client object attribute and set,
-            model_id = ''.join(getattr(self.client, 'model'))
+            request = await sync_to_async(
+                self._converse_request,
+                chat_completion_params
+            )
+            logger.debug(f"Bedrock Request {request} ")
+            try:
+                # Convert from synchronous to asynchronous mode and invoke Bedrock client!
+                response = await sync_to_async(
+                    self.client.converse,
+                    **request
+                )
+                logger.debug(f"Bedrock Response {response}")
+            except Exception as e:
+                raise RuntimeError(f"Failed to get response from Bedrock: {e}") from e
 
-            inference_config = {}
+            if response is None:
+                raise RuntimeError(f"Failed to get response from Bedrock after retrying {_retries} times.")
 
-            if chat_completion_params.temperature:
-                inference_config["temperature"] = chat_completion_params.temperature
+            return self._prepare_bedrock_formatted_output(
+                response=response,
+                model_id=request['modelId']
+            )
 
-            if chat_completion_params.max_tokens:
-                inference_config["maxTokens"] = chat_completion_params.max_tokens
+    @run_inline
+    def _converse_request(
+            self,
+            chat_completion_params: ChatCompletionParams
+    ) -> dict:
+        """
+        Builds the keyword arguments of the Bedrock-runtime `converse` / `converse_stream` call.
+        """
+        inference_config = {}
 
-            if chat_completion_params.top_p:
-                inference_config["topP"] = chat_completion_params.top_p
+        if chat_completion_params.temperature:
+            inference_config["temperature"] = chat_completion_params.temperature
 
-            messages = chat_completion_params.messages
-            logger.debug(f"Bedrock Message {messages} ")
-            conversations = await sync_to_async(
-                self._construct_message,
-                messages
-            )
-            user_message = {'role': 'user', 'content': conversations['user']}
-            assistant_message = conversations['assistant'] if len(conversations['assistant']) > 0 else None
+        if chat_completion_params.max_tokens:
+            inference_config["maxTokens"] = chat_completion_params.max_tokens
 
-            try:
-                if tools:
-                    tools_config = {"tools": tools}
-                    # Convert from synchronous to asynchronous mode and invoke Bedrock client!
-                    response = await sync_to_async(
-                        self.client.converse,
-                        modelId=model_id,
-                        messages=[user_message],
-                        inferenceConfig=inference_config,
-                        toolConfig=tools_config,
-                    )
-                    logger.debug(f"Bedrock Tool Response {response}")
-                else:
-                    response = await sync_to_async(
-                        self.client.converse,
-                        modelId=model_id,
-                        messages=[user_message],
-                        system=assistant_message,
-                        inferenceConfig=inference_config,
-                    )
-                    logger.debug(f"Bedrock Message ==> Bedrock no tool {response} ")
+        if chat_completion_params.top_p:
+            inference_config["topP"] = chat_completion_params.top_p
 
-            except Exception as e:
-                raise RuntimeError(f"Failed to get response from Bedrock: {e}")
+        conversations = self._construct_message(chat_completion_params.messages)
+        request = {
+            'modelId': self.model,
+            'messages': [{'role': 'user', 'content': conversations['user']}],
+            'inferenceConfig': inference_config
+        }
+        # Bedrock reads the prompt as tools, system then messages, the cache checkpoints close the static prefix
+        tools = chat_completion_params.tools
+        system = conversations['assistant']
+        if self.prompt_caching:
+            tools = [*tools, _CACHE_POINT] if tools else tools
+            system = [*system, _CACHE_POINT] if system else system
+        if tools:
+            request['toolConfig'] = {"tools": tools}
+        if system:
+            request['system'] = system
+        return request
+
+    async def achat_completion_stream(
+            self,
+            *,
+            chat_completion_params: ChatCompletionParams
+    ) -> typing.AsyncIterator[ChatCompletionChunk]:
+        """
+        Chat Completion streaming using Bedrock-runtime `converse_stream`.
 
-            if response is None:
-                raise RuntimeError(f"Failed to get response from Bedrock after retrying {_retries} times.")
+        The Bedrock stream events are converted to OpenAI `ChatCompletionChunk` objects, so callers handle
+        one stream format for every client.
 
-            chat_completion: ChatCompletion = await self.__prepare_bedrock_formatted_output_(
-                response=response,
-                model_id=model_id,
-                is_async=True
+        @param chat_completion_params:
+        @return AsyncIterator[ChatCompletionChunk]:
+        """
+        request = self._converse_request(chat_completion_params)
+        try:
+            response = await sync_to_async(
+                self.client.converse_stream,
+                **request
             )
-            return chat_completion
+        except Exception as e:
+            raise RuntimeError(f"Failed to get response from Bedrock: {e}") from e
+
+        chunk_id = response.get("ResponseMetadata", {}).get("RequestId", "")
+        created = int(time.time())
+        async for event in sync_iter_to_aiter(response["stream"]):
+            chunk = self._stream_event_to_chunk(
+                event=event,
+                chunk_id=chunk_id,
+                model_id=request['modelId'],
+                created=created
+            )
+            if chunk:
+                yield chunk
 
     @staticmethod
-    async def __prepare_bedrock_formatted_output_(
-            response,
+    def _stream_event_to_chunk(
+            *,
+            event: dict,
+            chunk_id: str,
             model_id: str,
-            is_async: bool
+            created: int
+    ) -> ChatCompletionChunk | None:
+        delta = None
+        finish_reason = None
+        usage = None
+        if "messageStart" in event:
+            delta = ChoiceDelta(role=event["messageStart"].get("role", "assistant"))
+        elif "contentBlockStart" in event:
+            start = event["contentBlockStart"].get("start", {})
+            if "toolUse" in start:
+                delta = ChoiceDelta(
+                    tool_calls=[
+                        ChoiceDeltaToolCall(
+                            index=event["contentBlockStart"].get("contentBlockIndex", 0),
+                            id=start["toolUse"]["toolUseId"],
+                            type="function",
+                            function=ChoiceDeltaToolCallFunction(
+                                name=start["toolUse"]["name"],
+                                arguments=""
+                            )
+                        )
+                    ]
+                )
+        elif "contentBlockDelta" in event:
+            block_delta = event["contentBlockDelta"].get("delta", {})
+            if "text" in block_delta:
+                delta = ChoiceDelta(content=block_delta["text"])
+            elif "toolUse" in block_delta:
+                delta = ChoiceDelta(
+                    tool_calls=[
+                        ChoiceDeltaToolCall(
+                            index=event["contentBlockDelta"].get("contentBlockIndex", 0),
+                            function=ChoiceDeltaToolCallFunction(
+                                arguments=block_delta["toolUse"].get("input", "")
+                            )
+                        )
+                    ]
+                )
+        elif "messageStop" in event:
+            delta = ChoiceDelta()
+            finish_reason = BedrockClient.convert_stop_to_finish_reason(event["messageStop"].get("stopReason"))
+        elif "metadata" in event:
+            usage = BedrockClient._convert_usage(event["metadata"].get("usage", {}))
+        else:
+            return None
+
+        if delta is None and usage is None:
+            return None
+        return ChatCompletionChunk(
+            id=chunk_id,
+            choices=[
+                ChunkChoice(
+                    delta=delta,
+                    finish_reason=finish_reason,
+                    index=0
+                )
+            ] if delta is not None else [],
+            created=created,
+            model=model_id,
+            object="chat.completion.chunk",
+            usage=usage
+        )
+
+    @staticmethod
+    def _convert_usage(response_usage: dict) -> CompletionUsage:
+        """
+        Converts the Bedrock usage. Bedrock input tokens exclude the prompt cache reads and writes, while OpenAI
+        prompt tokens include the cached tokens, so both are added to the prompt tokens.
+        """
+        cache_read = response_usage.get("cacheReadInputTokens", 0)
+        prompt_tokens = (
+                response_usage.get("inputTokens", 0) + cache_read + response_usage.get("cacheWriteInputTokens", 0)
+        )
+        completion_tokens = response_usage.get("outputTokens", 0)
+        return CompletionUsage(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+            prompt_tokens_details=PromptTokensDetails(cached_tokens=cache_read) if cache_read else None
+        )
+
+    @staticmethod
+    def _prepare_bedrock_formatted_output(
+            response: dict,
+            model_id: str
     ) -> ChatCompletion:
+        """
+        Formats the Bedrock `converse` response as an OpenAI `ChatCompletion`.
+
+        Pure dict to model conversion, shared by the synchronous and asynchronous paths.
+        """
         response_message = response["output"]["message"]
 
-        finish_reason = (
-            await sync_to_async(
-                BedrockClient.convert_stop_to_finish_reason,
-                response["stopReason"]
-            )
-            if is_async
-            else await sync_to_async(
-                BedrockClient.convert_stop_to_finish_reason,
-                response["stopReason"]
-            )
-        )
+        finish_reason = BedrockClient.convert_stop_to_finish_reason(response["stopReason"])
 
         if finish_reason == "tool_calls":
-            tool_calls = (
-                await sync_to_async(
-                    BedrockClient.convert_tool_response_to_openai_format,
-                    response_message["content"]
-                )
-                if is_async
-                else await sync_to_async(
-                    BedrockClient.convert_tool_response_to_openai_format,
-                    response_message["content"]
-                )
-            )
+            tool_calls = BedrockClient.convert_tool_response_to_openai_format(response_message["content"])
         else:
             tool_calls = None
 
         text = ""
-        async for content in iter_to_aiter(response_message["content"]):
+        for content in response_message["content"]:
             if "text" in content:
                 text = content["text"]
             # TODO: Images / Videos type need to add in future!!
@@ -246,13 +326,7 @@ class BedrockClient(Client):
             tool_calls=tool_calls
         )
 
-        response_usage = response["usage"]
-
-        usage = CompletionUsage(
-            prompt_tokens=response_usage["inputTokens"],
-            completion_tokens=response_usage["outputTokens"],
-            total_tokens=response_usage["totalTokens"],
-        )
+        usage = BedrockClient._convert_usage(response["usage"])
 
         return ChatCompletion(
             id=response["ResponseMetadata"]["RequestId"],
@@ -279,7 +353,7 @@ class BedrockClient(Client):
         _doc_str = inspect.getdoc(func)
         _properties = {}
         _type_hints = typing.get_type_hints(func)
-        async for param, param_type in iter_to_aiter(_type_hints.items()):
+        for param, param_type in _type_hints.items():
             if param != 'return':
                 _properties[param] = {
                     "type": await ptype_to_json_scheme(param_type.__name__),
@@ -384,15 +458,133 @@ class BedrockClient(Client):
             str: A formatted string combining all messages, structured with roles capitalized and separated by newlines.
         """
         formatted_messages = []
-        async for message in iter_to_aiter(messages):
+        for message in messages:
             role = message["role"].capitalize()
             content = message["content"]
             formatted_messages.append(f"\n\n{role}: {content}")
 
         return "".join(formatted_messages) + "\n\nAssistant:"
 
-    def embed(self, text: str, **kwargs):
-        pass
+    def _invoke_embedding(
+            self,
+            texts: list[str],
+            **kwargs
+    ) -> list[list[float]]:
+        """
+        Embeds the texts with one `invoke_model` request.
+
+        Cohere models take the whole batch (`input_type` defaults to `search_document`), Titan models a single
+        text (`dimensions` and `normalize` are forwarded when given).
+        """
+        model_id = self.model
+        if _COHERE_EMBED_MODEL in model_id:
+            body = {
+                'texts': texts,
+                'input_type': kwargs.get('input_type', 'search_document'),
+                'truncate': kwargs.get('truncate', 'END')
+            }
+        else:
+            if len(texts) != 1:
+                raise ValueError(f'Model `{model_id}` embeds a single text per request.')
+            body = {'inputText': texts[0]}
+            body.update({key: kwargs[key] for key in ('dimensions', 'normalize') if key in kwargs})
+
+        try:
+            response = self.client.invoke_model(
+                modelId=model_id,
+                body=json.dumps(body),
+                accept='application/json',
+                contentType='application/json'
+            )
+        except Exception as e:
+            raise RuntimeError(f"Error in embedding with Bedrock model {model_id}: {e}") from e
+        result = json.loads(response['body'].read())
+        if 'embeddings' in result:
+            return result['embeddings']
+        return [result['embedding']]
+
+    def _embed_batches(self, texts: list[str]) -> list[list[str]]:
+        if _COHERE_EMBED_MODEL in self.model:
+            return [
+                texts[index:index + _COHERE_EMBED_BATCH_SIZE]
+                for index in range(0, len(texts), _COHERE_EMBED_BATCH_SIZE)
+            ]
+        return [[text] for text in texts]
+
+    def embed(
+            self,
+            text: str,
+            **kwargs
+    ) -> list[float]:
+        """
+        Get the embedding for the given text using Amazon Bedrock Titan or Cohere embed models.
+
+        Args:
+            text (str): The text to embed.
+
+        Returns:
+            list: The embedding vector.
+        """
+        return self._invoke_embedding([text], **kwargs)[0]
+
+    async def aembed(
+            self,
+            text: str,
+            **kwargs
+    ) -> list[float]:
+        """
+        Get the embedding for the given text using Amazon Bedrock Titan or Cohere embed models.
+
+        Args:
+            text (str): The text to embed.
+
+        Returns:
+            list: The embedding vector.
+        """
+        embeddings = await sync_to_async(self._invoke_embedding, [text], **kwargs)
+        return embeddings[0]
+
+    def embed_many(
+            self,
+            texts: list[str],
+            **kwargs
+    ) -> np.ndarray:
+        """
+        Get the embeddings for the given texts, Cohere models embed up to 96 texts per request.
+
+        Args:
+            texts (list[str]): The texts to embed.
+
+        Returns:
+            np.ndarray: Contiguous float32 matrix, one row per text in the input order.
+        """
+        vectors = []
+        for batch in self._embed_batches(texts):
+            vectors.extend(self._invoke_embedding(batch, **kwargs))
+        return to_matrix(vectors)
+
+    async def aembed_many(
+            self,
+            texts: list[str],
+            *,
+            max_concurrency: int = _EMBED_MAX_CONCURRENCY,
+            **kwargs
+    ) -> np.ndarray:
+        """
+        Get the embeddings for the given texts, sending the requests concurrently.
+
+        Args:
+            texts (list[str]): The texts to embed.
+            max_concurrency (int): Maximum requests in flight.
+
+        Returns:
+            np.ndarray: Contiguous float32 matrix, one row per text in the input order.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _embed_batch(batch: list[str]) -> list[list[float]]:
+            async with semaphore:
+                return await sync_to_async(self._invoke_embedding, batch, **kwargs)
 
-    async def aembed(self, text: str, **kwargs):
-        pass
+        batches = await asyncio.gather(*[_embed_batch(batch) for batch in self._embed_batches(texts)])
+        return to_matrix([vector for vectors in batches for vector in vectors])
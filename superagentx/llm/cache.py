@@ -0,0 +1,597 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+import typing
+import unicodedata
+from abc import ABCMeta, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+from openai.types.chat import ChatCompletion
+
+from superagentx.llm.models import ChatCompletionParams
+from superagentx.utils.helper import sync_to_async
+
+logger = logging.getLogger(__name__)
+
+# Fields which never change the generated output and must not split the cache key.
+_KEY_EXCLUDED_FIELDS = {'user', 'stream'}
+# Stay below the default SQLite limit of bound parameters per statement
+_SQLITE_MAX_PARAMS = 900
+# Entries read per eviction query
+_EVICT_PAGE_SIZE = 256
+
+
+def chat_completion_key(
+        chat_completion_params: ChatCompletionParams,
+        *,
+        model: str | None = None,
+        llm_type: str | None = None
+) -> str:
+    """
+    Builds a canonical hash of the chat completion parameters.
+
+    The parameters are dumped without `None` values, serialized with sorted keys and compact separators so that
+    logically identical requests always produce the same key, regardless of dict ordering.
+
+    Args:
+        chat_completion_params: The chat completion parameters to hash.
+        model: Model name the request is bound to. Clients set the model from their configuration, hence it is
+            part of the key.
+        llm_type: LLM type of the client, e.g. `openai` or `bedrock`.
+
+    Returns:
+        str: Hex encoded SHA-256 digest.
+    """
+    params = chat_completion_params.model_dump(
+        exclude=_KEY_EXCLUDED_FIELDS,
+        exclude_none=True
+    )
+    params['model'] = model or params.get('model')
+    params['llm_type'] = llm_type
+    payload = json.dumps(params, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class CacheBackend(metaclass=ABCMeta):
+
+    @abstractmethod
+    def get(self, key: str) -> str | None:
+        """Return the cached value for the key, or `None` if it is missing or expired."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, key: str, value: str, ttl: float | None = None) -> None:
+        """Store the value for the key, expiring after `ttl` seconds when given."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    async def aget(self, key: str) -> str | None:
+        return await sync_to_async(self.get, key)
+
+    async def aset(self, key: str, value: str, ttl: float | None = None) -> None:
+        await sync_to_async(self.set, key, value, ttl)
+
+    def close(self) -> None:
+        pass
+
+
+class InMemoryCache(CacheBackend):
+    """
+    In-process LRU cache with per entry expiry.
+
+    Args:
+        max_size: Maximum number of entries kept, least recently used entries are evicted first.
+    """
+
+    def __init__(
+            self,
+            *,
+            max_size: int = 1024
+    ):
+        self.max_size = max_size
+        self._data: OrderedDict[str, tuple[str, float | None]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: float | None = None) -> None:
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    # Dict operations only, no need to hop to a worker thread.
+    async def aget(self, key: str) -> str | None:
+        return self.get(key)
+
+    async def aset(self, key: str, value: str, ttl: float | None = None) -> None:
+        self.set(key, value, ttl)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteCache(CacheBackend):
+    """
+    Persistent cache stored in a SQLite database file, survives process restarts.
+
+    Args:
+        db_path: Path of the SQLite database file.
+        max_size: Maximum number of entries kept, least recently used entries are evicted first. The entries are
+            counted by the instance, the entries written by other processes are counted when it is opened.
+    """
+
+    def __init__(
+            self,
+            *,
+            db_path: str | Path,
+            max_size: int = 100_000
+    ):
+        self.db_path = str(db_path)
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self._lock:
+            if self.db_path != ':memory:':
+                self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires_at REAL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache (accessed_at)')
+            self._conn.commit()
+            # Row count, the eviction only runs once it exceeds `max_size`
+            self._size = self._conn.execute('SELECT COUNT(*) FROM llm_cache').fetchone()[0]
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, expires_at FROM llm_cache WHERE key = ?',
+                (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                self._size -= self._conn.execute('DELETE FROM llm_cache WHERE key = ?', (key,)).rowcount
+                self._conn.commit()
+                return None
+            self._conn.execute('UPDATE llm_cache SET accessed_at = ? WHERE key = ?', (now, key))
+            self._conn.commit()
+            return value
+
+    def set(self, key: str, value: str, ttl: float | None = None) -> None:
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        with self._lock:
+            updated = self._conn.execute(
+                'UPDATE llm_cache SET value = ?, expires_at = ?, accessed_at = ? WHERE key = ?',
+                (value, expires_at, now, key)
+            ).rowcount
+            if not updated:
+                self._conn.execute(
+                    'INSERT INTO llm_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)',
+                    (key, value, expires_at, now)
+                )
+                self._size += 1
+            if self._size > self.max_size:
+                # Only the surplus is read, oldest first from the `accessed_at` index
+                self._size -= self._conn.execute(
+                    """
+                    DELETE FROM llm_cache WHERE key IN (
+                        SELECT key FROM llm_cache ORDER BY accessed_at LIMIT ?
+                    )
+                    """,
+                    (self._size - self.max_size,)
+                ).rowcount
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._size -= self._conn.execute('DELETE FROM llm_cache WHERE key = ?', (key,)).rowcount
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute('DELETE FROM llm_cache')
+            self._conn.commit()
+            self._size = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class ResponseCache:
+
+    def __init__(
+            self,
+            *,
+            backend: CacheBackend | None = None,
+            ttl: float | None = 3600,
+            cache_non_deterministic: bool = False
+    ):
+        """
+        Caches `ChatCompletion` responses keyed by a canonical hash of the `ChatCompletionParams`.
+
+        Args:
+            backend: Storage of the cached responses. Defaults to an `InMemoryCache`.
+            ttl: Time to live of a cached response in seconds, `None` keeps entries until they are evicted.
+            cache_non_deterministic: By default only deterministic requests (temperature 0 or a fixed seed) are
+                cached. Set to `True` to cache sampled responses as well.
+        """
+        self.backend = backend or InMemoryCache()
+        self.ttl = ttl
+        self.cache_non_deterministic = cache_non_deterministic
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.saved_prompt_tokens = 0
+        self.saved_completion_tokens = 0
+
+    def is_cacheable(
+            self,
+            chat_completion_params: ChatCompletionParams
+    ) -> bool:
+        """
+        Bypass rules for requests whose responses must not be replayed.
+
+        Streaming requests and requests with several choices are never cached. Sampled requests are only cached
+        when `cache_non_deterministic` is set.
+        """
+        if chat_completion_params.stream:
+            return False
+        if chat_completion_params.n and chat_completion_params.n > 1:
+            return False
+        if self.cache_non_deterministic:
+            return True
+        return chat_completion_params.temperature == 0 or chat_completion_params.seed is not None
+
+    def _on_hit(self, response: ChatCompletion) -> None:
+        self.hits += 1
+        if response.usage:
+            self.saved_prompt_tokens += response.usage.prompt_tokens or 0
+            self.saved_completion_tokens += response.usage.completion_tokens or 0
+
+    def _decode(self, key: str, value: str | None) -> ChatCompletion | None:
+        if value is None:
+            self.misses += 1
+            return None
+        try:
+            response = ChatCompletion.model_validate_json(value)
+        except ValueError as ex:
+            logger.warning(f'Invalid cached response for key {key}, ignoring it!\n{ex}')
+            self.backend.delete(key)
+            self.misses += 1
+            return None
+        self._on_hit(response)
+        logger.debug(f'LLM response cache hit {key}')
+        return response
+
+    def get(self, key: str) -> ChatCompletion | None:
+        return self._decode(key, self.backend.get(key))
+
+    async def aget(self, key: str) -> ChatCompletion | None:
+        return self._decode(key, await self.backend.aget(key))
+
+    def set(self, key: str, response: ChatCompletion) -> None:
+        if response:
+            self.backend.set(key, response.model_dump_json(), self.ttl)
+
+    async def aset(self, key: str, response: ChatCompletion) -> None:
+        if response:
+            await self.backend.aset(key, response.model_dump_json(), self.ttl)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'bypassed': self.bypassed,
+            'hit_rate': self.hit_rate,
+            'saved_prompt_tokens': self.saved_prompt_tokens,
+            'saved_completion_tokens': self.saved_completion_tokens,
+            'saved_total_tokens': self.saved_prompt_tokens + self.saved_completion_tokens
+        }
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+
+def _normalize_text(text: str) -> str:
+    # Clients replace new lines before embedding, whitespace runs do not change the vector in practice
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+
+def embedding_key(
+        text: str,
+        *,
+        model: str,
+        dimensions: int | None = None,
+        **options
+) -> str:
+    """
+    Content address of an embedding: model, dimensions, any other embedding option (e.g. Cohere `input_type`)
+    and the normalized text.
+
+    Returns:
+        str: Hex encoded SHA-256 digest.
+    """
+    payload = json.dumps(
+        [model, dimensions, options, _normalize_text(text)],
+        sort_keys=True,
+        separators=(',', ':'),
+        default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class EmbeddingCache:
+
+    def __init__(
+            self,
+            *,
+            db_path: str | Path = ':memory:',
+            dtype: str = 'float32',
+            max_bytes: int = 512 * 1024 * 1024,
+            max_memory_entries: int = 10_000,
+            warm_load: bool = True
+    ):
+        """
+        Content-addressed embedding store, vectors are kept as compact binary blobs in SQLite.
+
+        Recently used vectors are also held in memory. On startup the most recently used entries are loaded
+        (`warm_load`), so a restarted process does not pay a database read for its hot set.
+
+        Args:
+            db_path: Path of the SQLite database file, `:memory:` keeps the cache for the process lifetime only.
+            dtype: Storage precision, `float32` or `float16` (half the size, ~1e-3 relative error).
+            max_bytes: Maximum size of the stored vectors, least recently used entries are evicted first.
+            max_memory_entries: Maximum vectors held in memory.
+            warm_load: Load the most recently used vectors in memory at startup.
+        """
+        if dtype not in ('float32', 'float16'):
+            raise ValueError(f'Unsupported embedding cache dtype `{dtype}`, use float32 or float16.')
+        self.db_path = str(db_path)
+        self.dtype = np.dtype(dtype)
+        self.max_bytes = max_bytes
+        self.max_memory_entries = max_memory_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory: OrderedDict[str, np.ndarray] = OrderedDict()
+        # Keys served from memory, their access time is written with the next store
+        self._touched: set[str] = set()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self._lock:
+            if self.db_path != ':memory:':
+                self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embedding_cache (
+                    key TEXT PRIMARY KEY,
+                    dtype TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_embedding_cache_accessed ON embedding_cache (accessed_at)'
+            )
+            self._conn.commit()
+            self._bytes = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM embedding_cache').fetchone()[0]
+            if warm_load:
+                self._warm_load()
+
+    def _warm_load(self) -> None:
+        rows = self._conn.execute(
+            'SELECT key, dtype, vector FROM embedding_cache ORDER BY accessed_at DESC LIMIT ?',
+            (self.max_memory_entries,)
+        ).fetchall()
+        # Oldest first, so the in memory LRU order matches the stored access times
+        for key, dtype, blob in reversed(rows):
+            self._memory[key] = self._decode(dtype, blob)
+        if rows:
+            logger.debug(f'Embedding cache warm loaded {len(rows)} vectors')
+
+    @staticmethod
+    def _decode(dtype: str, blob: bytes) -> np.ndarray:
+        return np.frombuffer(blob, dtype=dtype).astype(np.float32)
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys: list[str]) -> dict[str, np.ndarray]:
+        """Returns the cached float32 vectors of the keys found in the cache."""
+        found = {}
+        missing = []
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is None:
+                    missing.append(key)
+                else:
+                    self._memory.move_to_end(key)
+                    self._touched.add(key)
+                    found[key] = vector
+            if missing:
+                now = time.time()
+                for index in range(0, len(missing), _SQLITE_MAX_PARAMS):
+                    chunk = missing[index:index + _SQLITE_MAX_PARAMS]
+                    rows = self._conn.execute(
+                        f'SELECT key, dtype, vector FROM embedding_cache '
+                        f'WHERE key IN ({",".join("?" * len(chunk))})',
+                        chunk
+                    ).fetchall()
+                    for key, dtype, blob in rows:
+                        vector = self._decode(dtype, blob)
+                        self._remember(key, vector)
+                        found[key] = vector
+                    if rows:
+                        self._conn.executemany(
+                            'UPDATE embedding_cache SET accessed_at = ? WHERE key = ?',
+                            [(now, key) for key, _, _ in rows]
+                        )
+                self._conn.commit()
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def get(self, key: str) -> np.ndarray | None:
+        return self.get_many([key]).get(key)
+
+    def set_many(self, items: dict[str, typing.Sequence[float] | np.ndarray]) -> None:
+        """Stores the vectors and evicts the least recently used ones beyond `max_bytes`."""
+        now = time.time()
+        rows = []
+        with self._lock:
+            for key, vector in items.items():
+                vector = np.asarray(vector, dtype=np.float32)
+                self._remember(key, vector)
+                blob = vector.astype(self.dtype).tobytes()
+                rows.append((key, self.dtype.name, blob, len(blob), now))
+            if self._touched:
+                self._conn.executemany(
+                    'UPDATE embedding_cache SET accessed_at = ? WHERE key = ?',
+                    [(now, key) for key in self._touched]
+                )
+                self._touched.clear()
+            replaced = self._stored_size([row[0] for row in rows])
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO embedding_cache (key, dtype, vector, size, accessed_at) VALUES (?, ?, ?, ?, ?)',
+                rows
+            )
+            self._bytes += sum(row[3] for row in rows) - replaced
+            if self._bytes > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def set(self, key: str, vector: typing.Sequence[float] | np.ndarray) -> None:
+        self.set_many({key: vector})
+
+    def _stored_size(self, keys: list[str]) -> int:
+        size = 0
+        for index in range(0, len(keys), _SQLITE_MAX_PARAMS):
+            chunk = keys[index:index + _SQLITE_MAX_PARAMS]
+            size += self._conn.execute(
+                f'SELECT COALESCE(SUM(size), 0) FROM embedding_cache WHERE key IN ({",".join("?" * len(chunk))})',
+                chunk
+            ).fetchone()[0]
+        return size
+
+    def _evict(self) -> None:
+        # Least recently used first, read from the `accessed_at` index a page at a time until under `max_bytes`
+        evicted = 0
+        while self._bytes > self.max_bytes:
+            rows = self._conn.execute(
+                'SELECT key, size FROM embedding_cache ORDER BY accessed_at ASC LIMIT ?',
+                (_EVICT_PAGE_SIZE,)
+            ).fetchall()
+            if not rows:
+                break
+            keys = []
+            for key, size in rows:
+                if self._bytes <= self.max_bytes:
+                    break
+                keys.append(key)
+                self._bytes -= size
+            self._conn.executemany('DELETE FROM embedding_cache WHERE key = ?', [(key,) for key in keys])
+            for key in keys:
+                self._memory.pop(key, None)
+            evicted += len(keys)
+        logger.debug(f'Embedding cache evicted {evicted} vectors')
+
+    async def aget_many(self, keys: list[str]) -> dict[str, np.ndarray]:
+        # Served from memory without hopping to a worker thread when every key is hot
+        if all(key in self._memory for key in keys):
+            return self.get_many(keys)
+        return await sync_to_async(self.get_many, keys)
+
+    async def aget(self, key: str) -> np.ndarray | None:
+        return (await self.aget_many([key])).get(key)
+
+    async def aset_many(self, items: dict[str, typing.Sequence[float] | np.ndarray]) -> None:
+        await sync_to_async(self.set_many, items)
+
+    async def aset(self, key: str, vector: typing.Sequence[float] | np.ndarray) -> None:
+        await self.aset_many({key: vector})
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM embedding_cache').fetchone()[0]
+
+    def stats(self) -> dict:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate,
+            'entries': len(self),
+            'memory_entries': len(self._memory),
+            'bytes': self._bytes,
+            'dtype': self.dtype.name
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute('DELETE FROM embedding_cache')
+            self._conn.commit()
+            self._memory.clear()
+            self._touched.clear()
+            self._bytes = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
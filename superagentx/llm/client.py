@@ -1,7 +1,19 @@
+import asyncio
 from abc import ABCMeta, abstractmethod
 
+import numpy as np
+from openai.types.chat import ChatCompletionChunk
+from openai.types.chat.chat_completion_chunk import (
+    Choice as ChunkChoice,
+    ChoiceDelta,
+    ChoiceDeltaToolCall,
+    ChoiceDeltaToolCallFunction
+)
 from pydantic import typing
 
+from superagentx.llm.embeddings import to_matrix
+from superagentx.llm.models import ChatCompletionParams
+
 
 class Client(metaclass=ABCMeta):
 
@@ -21,6 +33,76 @@ class Client(metaclass=ABCMeta):
     ):
         raise NotImplementedError
 
+    async def achat_completion_stream(
+            self,
+            *,
+            chat_completion_params: ChatCompletionParams
+    ) -> typing.AsyncIterator[ChatCompletionChunk]:
+        """
+        Streams the chat completion as `ChatCompletionChunk` objects.
+
+        Clients with a streaming API override this, the default sends the request with `achat_completion` and
+        yields the whole response as a content chunk per choice, followed by the usage chunk.
+
+        Returns:
+            AsyncIterator[ChatCompletionChunk]: Incremental content and tool call deltas.
+        """
+        response = await self.achat_completion(chat_completion_params=chat_completion_params)
+        for choice in response.choices:
+            tool_calls = None
+            if choice.message.tool_calls:
+                tool_calls = [
+                    ChoiceDeltaToolCall(
+                        index=index,
+                        id=tool_call.id,
+                        type='function',
+                        function=ChoiceDeltaToolCallFunction(
+                            name=tool_call.function.name,
+                            arguments=tool_call.function.arguments
+                        )
+                    )
+                    for index, tool_call in enumerate(choice.message.tool_calls)
+                ]
+            yield ChatCompletionChunk(
+                id=response.id,
+                choices=[
+                    ChunkChoice(
+                        index=choice.index,
+                        delta=ChoiceDelta(
+                            role=choice.message.role,
+                            content=choice.message.content,
+                            tool_calls=tool_calls
+                        ),
+                        finish_reason=choice.finish_reason
+                    )
+                ],
+                created=response.created,
+                model=response.model,
+                object='chat.completion.chunk'
+            )
+        if response.usage:
+            yield ChatCompletionChunk(
+                id=response.id,
+                choices=[],
+                created=response.created,
+                model=response.model,
+                object='chat.completion.chunk',
+                usage=response.usage
+            )
+
+    def without_retries(self) -> 'Client':
+        """
+        Client of the same account without SDK retries, for the requests retried by the request scheduler.
+        Defaults to the client itself.
+        """
+        return self
+
+    def close(self) -> None:
+        """Releases what the client holds beyond the shared SDK clients, nothing by default."""
+
+    async def aclose(self) -> None:
+        self.close()
+
     @abstractmethod
     async def get_tool_json(
             self,
@@ -61,3 +143,39 @@ class Client(metaclass=ABCMeta):
             list: The embedding vector.
         """
         raise NotImplementedError
+
+    def embed_many(
+            self,
+            texts: list[str],
+            **kwargs
+    ) -> np.ndarray:
+        """
+        Get the embeddings for the given texts using Client.
+
+        Clients supporting batched requests override this, the default embeds the texts one by one.
+
+        Args:
+            texts (list[str]): The texts to embed.
+
+        Returns:
+            np.ndarray: Contiguous float32 matrix, one row per text in the input order.
+        """
+        return to_matrix([self.embed(text, **kwargs) for text in texts])
+
+    async def aembed_many(
+            self,
+            texts: list[str],
+            **kwargs
+    ) -> np.ndarray:
+        """
+        Get the embeddings for the given texts using Client.
+
+        Clients supporting batched requests override this, the default embeds the texts concurrently one by one.
+
+        Args:
+            texts (list[str]): The texts to embed.
+
+        Returns:
+            np.ndarray: Contiguous float32 matrix, one row per text in the input order.
+        """
+        return to_matrix(await asyncio.gather(*[self.aembed(text, **kwargs) for text in texts]))
@@ -0,0 +1,42 @@
+import numpy as np
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimation of a text, ~4 characters per token."""
+    return len(text) // 4 + 1
+
+
+def split_batches(
+        texts: list[str],
+        *,
+        max_items: int,
+        max_tokens: int
+) -> list[slice]:
+    """
+    Splits the texts into contiguous batches within the item and token limits of an embedding request.
+
+    A text exceeding `max_tokens` on its own gets a batch of its own, the provider decides whether to truncate it.
+
+    Returns:
+        list[slice]: Slices of `texts`, in order.
+    """
+    batches = []
+    start = 0
+    tokens = 0
+    for index, text in enumerate(texts):
+        text_tokens = estimate_tokens(text)
+        if index > start and (index - start >= max_items or tokens + text_tokens > max_tokens):
+            batches.append(slice(start, index))
+            start = index
+            tokens = 0
+        tokens += text_tokens
+    if start < len(texts):
+        batches.append(slice(start, len(texts)))
+    return batches
+
+
+def to_matrix(vectors: list[list[float]] | list[np.ndarray]) -> np.ndarray:
+    """Stacks the vectors into a contiguous float32 matrix of shape (len(vectors), dimensions)."""
+    if not vectors:
+        return np.empty((0, 0), dtype=np.float32)
+    return np.ascontiguousarray(vectors, dtype=np.float32)
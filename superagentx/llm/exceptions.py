@@ -0,0 +1,27 @@
+from superagentx.llm.tokens import TokenBudget
+
+
+class TokenBudgetExceeded(Exception):
+
+    def __init__(
+            self,
+            message: str,
+            budget: TokenBudget
+    ):
+        self.message = message
+        self.budget = budget
+
+    def __str__(self):
+        return f'TokenBudgetExceeded: {self.message}'
+
+
+class CassetteMiss(Exception):
+    pass
+
+
+class BatchJobError(Exception):
+    pass
+
+
+class BatchRequestError(Exception):
+    pass
@@ -0,0 +1,317 @@
+import bisect
+import json
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from openai.types import CompletionUsage
+
+from superagentx.llm.constants import OPENAI_PRICE1K
+
+logger = logging.getLogger(__name__)
+
+# Seconds, the last bucket catches everything above
+DEFAULT_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, math.inf)
+# Share of the input rate billed for cached prompt tokens, when the price has no cached input rate
+CACHED_INPUT_RATE = 0.5
+
+_llm_caller: ContextVar[str | None] = ContextVar('superagentx_llm_caller', default=None)
+
+
+@contextmanager
+def llm_caller(name: str):
+    """
+    Attributes the LLM requests made within the context to the caller, nested callers are joined with `/`.
+
+    Example:
+        with llm_caller('research-agent'):
+            with llm_caller('SerperDevToolHandler'):
+                ...  # recorded as `research-agent/SerperDevToolHandler`
+    """
+    parent = _llm_caller.get()
+    token = _llm_caller.set(f'{parent}/{name}' if parent else name)
+    try:
+        yield
+    finally:
+        _llm_caller.reset(token)
+
+
+def current_caller() -> str | None:
+    return _llm_caller.get()
+
+
+def compute_cost(
+        model: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        prices: dict | None = None,
+        cached_tokens: int = 0
+) -> float | None:
+    """
+    Cost in USD of the tokens, `None` when the model has no known price.
+
+    Args:
+        model: Model name.
+        prompt_tokens: Input tokens, including the cached tokens.
+        completion_tokens: Output tokens.
+        prices: Prices per 1k tokens overriding `OPENAI_PRICE1K`, either `(input, output)`,
+            `(input, output, cached_input)` or a single rate.
+        cached_tokens: Input tokens read from the provider prompt cache, billed at the cached input rate,
+            `CACHED_INPUT_RATE` times the input rate by default.
+    """
+    price_1k = (prices or {}).get(model) or OPENAI_PRICE1K.get(model)
+    if price_1k is None:
+        return None
+    # First value is input token rate, second value is output token rate
+    if isinstance(price_1k, (tuple, list)):
+        cached_rate = price_1k[2] if len(price_1k) > 2 else price_1k[0] * CACHED_INPUT_RATE
+        return (
+                price_1k[0] * (prompt_tokens - cached_tokens)
+                + cached_rate * cached_tokens
+                + price_1k[1] * completion_tokens
+        ) / 1000
+    return price_1k * (prompt_tokens + completion_tokens) / 1000
+
+
+def usage_cached_tokens(usage: CompletionUsage | None) -> int:
+    """Prompt tokens read from the provider prompt cache."""
+    if usage is None or usage.prompt_tokens_details is None:
+        return 0
+    return usage.prompt_tokens_details.cached_tokens or 0
+
+
+def error_code(ex: BaseException) -> str:
+    """Short label of an upstream error: HTTP status code, AWS error code or the exception name."""
+    status_code = getattr(ex, 'status_code', None)
+    if status_code is not None:
+        return str(status_code)
+    response = getattr(ex, 'response', None)
+    if isinstance(response, dict):
+        code = response.get('Error', {}).get('Code')
+        if code:
+            return code
+    if ex.__cause__ is not None and ex.__cause__ is not ex:
+        return error_code(ex.__cause__)
+    return type(ex).__name__
+
+
+class _Series:
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.requests = 0
+        self.cache_hits = 0
+        self.errors: dict[str, int] = {}
+        self.latency_buckets = [0] * len(buckets)
+        self.latency_sum = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.reasoning_tokens = 0
+        self.cached_tokens = 0
+        self.cost = 0.0
+        self.unpriced_requests = 0
+
+
+class LLMMetrics:
+
+    def __init__(
+            self,
+            *,
+            latency_buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS,
+            prices: dict | None = None
+    ):
+        """
+        Aggregates latency, tokens, cost and errors of the LLM requests per model and per caller.
+
+        The caller is the agent and engine issuing the request (see `llm_caller`), so the snapshot shows which
+        agents burn the budget and where the latency lives. Export with `to_prometheus` or `snapshot`.
+
+        Args:
+            latency_buckets: Upper bounds in seconds of the latency histogram buckets.
+            prices: Prices per 1k tokens of models missing from `OPENAI_PRICE1K`, e.g. Bedrock models,
+                `{model: (input, output)}` or `{model: (input, output, cached_input)}`.
+        """
+        self.latency_buckets = tuple(sorted(latency_buckets))
+        if self.latency_buckets[-1] != math.inf:
+            self.latency_buckets += (math.inf,)
+        self.prices = prices or {}
+        self._series: dict[tuple[str, str], _Series] = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def _get_series(self, model: str, caller: str | None) -> _Series:
+        key = (model, caller or '')
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = _Series(self.latency_buckets)
+        return series
+
+    def record(
+            self,
+            *,
+            model: str,
+            latency: float,
+            usage: CompletionUsage | None = None,
+            error: BaseException | None = None,
+            caller: str | None = None
+    ) -> None:
+        """
+        Records one upstream request.
+
+        Args:
+            model: Model of the request.
+            latency: Seconds of the request, including rate limit waits and retries.
+            usage: Token usage reported by the provider.
+            error: The error raised by the request, if any.
+            caller: Caller of the request, defaults to the current `llm_caller`.
+        """
+        caller = caller if caller is not None else current_caller()
+        with self._lock:
+            series = self._get_series(model, caller)
+            series.requests += 1
+            series.latency_sum += latency
+            series.latency_buckets[bisect.bisect_left(self.latency_buckets, latency)] += 1
+            if error is not None:
+                code = error_code(error)
+                series.errors[code] = series.errors.get(code, 0) + 1
+            if usage is not None:
+                prompt_tokens = usage.prompt_tokens or 0
+                completion_tokens = usage.completion_tokens or 0
+                series.prompt_tokens += prompt_tokens
+                series.completion_tokens += completion_tokens
+                if usage.completion_tokens_details and usage.completion_tokens_details.reasoning_tokens:
+                    series.reasoning_tokens += usage.completion_tokens_details.reasoning_tokens
+                cached = usage_cached_tokens(usage)
+                series.cached_tokens += cached
+                cost = compute_cost(model, prompt_tokens, completion_tokens, self.prices, cached_tokens=cached)
+                if cost is None:
+                    series.unpriced_requests += 1
+                else:
+                    series.cost += cost
+
+    def record_cache_hit(
+            self,
+            *,
+            model: str,
+            caller: str | None = None
+    ) -> None:
+        caller = caller if caller is not None else current_caller()
+        with self._lock:
+            self._get_series(model, caller).cache_hits += 1
+
+    def snapshot(self) -> dict:
+        """JSON serializable snapshot of every series and the totals."""
+        with self._lock:
+            series = []
+            for (model, caller), _series in sorted(self._series.items()):
+                series.append({
+                    'model': model,
+                    'caller': caller or None,
+                    'requests': _series.requests,
+                    'cache_hits': _series.cache_hits,
+                    'errors': dict(_series.errors),
+                    'latency': {
+                        'sum': _series.latency_sum,
+                        'avg': _series.latency_sum / _series.requests if _series.requests else 0.0,
+                        'buckets': {
+                            '+Inf' if bound == math.inf else str(bound): count
+                            for bound, count in zip(self.latency_buckets, _series.latency_buckets)
+                        }
+                    },
+                    'prompt_tokens': _series.prompt_tokens,
+                    'completion_tokens': _series.completion_tokens,
+                    'reasoning_tokens': _series.reasoning_tokens,
+                    'cached_tokens': _series.cached_tokens,
+                    'cost': _series.cost,
+                    'unpriced_requests': _series.unpriced_requests
+                })
+        return {
+            'started_at': self.started_at,
+            'series': series,
+            'totals': {
+                key: sum(item[key] for item in series)
+                for key in (
+                    'requests', 'cache_hits', 'prompt_tokens', 'completion_tokens', 'reasoning_tokens',
+                    'cached_tokens', 'cost'
+                )
+            }
+        }
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.snapshot(), **kwargs)
+
+    @staticmethod
+    def _labels(**labels) -> str:
+        escaped = []
+        for name, value in labels.items():
+            value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            escaped.append(f'{name}="{value}"')
+        return '{' + ','.join(escaped) + '}'
+
+    def to_prometheus(self, prefix: str = 'superagentx_llm') -> str:
+        """
+        Prometheus text exposition format of the metrics, the samples of each family follow its HELP and TYPE
+        lines.
+        """
+        families = [
+            ('requests_total', 'counter', 'LLM requests sent upstream.', self._requests_samples),
+            ('cache_hits_total', 'counter', 'LLM requests served by the response cache.', self._cache_hits_samples),
+            ('errors_total', 'counter', 'Failed LLM requests by error code.', self._errors_samples),
+            ('tokens_total', 'counter', 'Tokens reported by the provider.', self._tokens_samples),
+            ('cost_usd_total', 'counter', 'Estimated cost in USD.', self._cost_samples),
+            ('request_duration_seconds', 'histogram', 'LLM request latency.', self._duration_samples)
+        ]
+        lines = []
+        with self._lock:
+            series = sorted(self._series.items())
+            for name, metric_type, help_text, samples in families:
+                lines.append(f'# HELP {prefix}_{name} {help_text}')
+                lines.append(f'# TYPE {prefix}_{name} {metric_type}')
+                for (model, caller), _series in series:
+                    for suffix, labels, value in samples(_series):
+                        lines.append(
+                            f'{prefix}_{name}{suffix}{self._labels(model=model, caller=caller, **labels)} {value}'
+                        )
+        return '\n'.join(lines) + '\n'
+
+    # Samples of each family for one series, `(name suffix, extra labels, value)`
+
+    @staticmethod
+    def _requests_samples(series: _Series) -> list[tuple]:
+        return [('', {}, series.requests)]
+
+    @staticmethod
+    def _cache_hits_samples(series: _Series) -> list[tuple]:
+        return [('', {}, series.cache_hits)]
+
+    @staticmethod
+    def _errors_samples(series: _Series) -> list[tuple]:
+        return [('', {'code': code}, count) for code, count in sorted(series.errors.items())]
+
+    @staticmethod
+    def _tokens_samples(series: _Series) -> list[tuple]:
+        return [
+            ('', {'type': token_type}, getattr(series, f'{token_type}_tokens'))
+            for token_type in ('prompt', 'completion', 'reasoning', 'cached')
+        ]
+
+    @staticmethod
+    def _cost_samples(series: _Series) -> list[tuple]:
+        return [('', {}, series.cost)]
+
+    def _duration_samples(self, series: _Series) -> list[tuple]:
+        samples = []
+        cumulative = 0
+        for bound, count in zip(self.latency_buckets, series.latency_buckets):
+            cumulative += count
+            samples.append(('_bucket', {'le': '+Inf' if bound == math.inf else str(bound)}, cumulative))
+        samples.append(('_sum', {}, series.latency_sum))
+        samples.append(('_count', {}, series.requests))
+        return samples
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+            self.started_at = time.time()
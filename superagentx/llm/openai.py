@@ -1,9 +1,13 @@
+import asyncio
 import inspect
 import logging
 import re
 
+import numpy as np
+
 from openai import OpenAI, AzureOpenAI, AsyncOpenAI, AsyncAzureOpenAI
 from openai.types import CreateEmbeddingResponse
+from openai.types.chat import ChatCompletionChunk
 from openai.types.chat.chat_completion import ChatCompletion
 from openai.types.completion import Completion
 from pydantic import typing
@@ -11,7 +15,9 @@ from pydantic import typing
 from superagentx.llm import ChatCompletionParams
 from superagentx.llm.client import Client
 from superagentx.llm.constants import OPENAI_PRICE1K
-from superagentx.utils.helper import sync_to_async, iter_to_aiter, ptype_to_json_scheme
+from superagentx.llm.embeddings import split_batches, to_matrix
+from superagentx.llm.metrics import compute_cost
+from superagentx.utils.helper import run_inline, sync_to_async, ptype_to_json_scheme
 
 logger = logging.getLogger(__name__)
 _OPEN_API_BASE_URL_PREFIX = "https://api.openai.com"
@@ -22,6 +28,10 @@ _ASSISTANTS_NAME = 'assistants'
 _ASSISTANTS_KEY_NAME = 'name'
 _ASSISTANTS_KEY_INSTRUCTIONS = 'instructions'
 _TOOLS_KEY_NAME = 'tools'
+# Embeddings endpoint limits, the token limit keeps a margin for the heuristic token estimation
+_EMBED_BATCH_MAX_ITEMS = 2048
+_EMBED_BATCH_MAX_TOKENS = 240_000
+_EMBED_MAX_CONCURRENCY = 4
 
 
 class OpenAIClient(Client):
@@ -31,11 +41,14 @@ class OpenAIClient(Client):
     def __init__(
             self,
             *,
-            client: OpenAI | AsyncOpenAI | AzureOpenAI | AsyncAzureOpenAI
+            client: OpenAI | AsyncOpenAI | AzureOpenAI | AsyncAzureOpenAI,
+            model: str | None = None
     ):
 
         self.client = client
-        self._model = getattr(self.client, 'model')
+        # Shared SDK clients serve several models, the model attribute of the client is the legacy fallback
+        self._model = model or getattr(self.client, 'model')
+        self._without_retries: OpenAIClient | None = None
         if (
                 not isinstance(self.client, OpenAI | AsyncOpenAI | AzureOpenAI | AsyncAzureOpenAI)
                 and not str(client.base_url).startswith(_OPEN_API_BASE_URL_PREFIX)
@@ -45,6 +58,12 @@ class OpenAIClient(Client):
                 "OpenAI or Azure hosted Open AI client, is not valid!"
             )
 
+    def without_retries(self) -> 'OpenAIClient':
+        # A copy sharing the connection pool of the client
+        if self._without_retries is None:
+            self._without_retries = OpenAIClient(client=self.client.with_options(max_retries=0), model=self._model)
+        return self._without_retries
+
     def chat_completion(
             self,
             *,
@@ -66,7 +85,26 @@ class OpenAIClient(Client):
         chat_completion_response = await self.client.chat.completions.create(**params)
         return chat_completion_response
 
+    async def achat_completion_stream(
+            self,
+            *,
+            chat_completion_params: ChatCompletionParams
+    ) -> typing.AsyncIterator[ChatCompletionChunk]:
+        """
+        Streams the chat completion from AsyncOpenAI | AsyncAzureOpenAI.
+
+        Usage is requested with `stream_options`, so the final chunk carries the token counts.
+        """
+        params = chat_completion_params.model_dump(exclude_none=True)
+        params['model'] = self._model  # Get model name from client object attribute and set
+        params['stream'] = True
+        params['stream_options'] = {'include_usage': True}
+        stream = await self.client.chat.completions.create(**params)
+        async for chunk in stream:
+            yield chunk
+
     @staticmethod
+    @run_inline
     def _get_embeddings(response: CreateEmbeddingResponse):
         if response and response.data:
             return response.data[0].embedding
@@ -117,6 +155,83 @@ class OpenAIClient(Client):
             response=response
         )
 
+    @staticmethod
+    def _get_embeddings_batch(response: CreateEmbeddingResponse) -> list[list[float]]:
+        return [data.embedding for data in sorted(response.data, key=lambda data: data.index)]
+
+    def embed_many(
+            self,
+            texts: list[str],
+            *,
+            max_batch_items: int = _EMBED_BATCH_MAX_ITEMS,
+            max_batch_tokens: int = _EMBED_BATCH_MAX_TOKENS,
+            **kwargs
+    ) -> np.ndarray:
+        """
+        Get the embeddings for the given texts using OpenAI | AzureOpenAI, sending the texts as arrays.
+
+        Args:
+            texts (list[str]): The texts to embed.
+            max_batch_items (int): Maximum texts per request.
+            max_batch_tokens (int): Maximum estimated tokens per request.
+
+        Returns:
+            np.ndarray: Contiguous float32 matrix, one row per text in the input order.
+        """
+        texts = [text.replace("\n", " ") for text in texts]
+        vectors = []
+        for batch in split_batches(texts, max_items=max_batch_items, max_tokens=max_batch_tokens):
+            response = self.client.embeddings.create(
+                input=texts[batch],
+                model=self._model,
+                **kwargs
+            )
+            vectors.extend(self._get_embeddings_batch(response))
+        return to_matrix(vectors)
+
+    async def aembed_many(
+            self,
+            texts: list[str],
+            *,
+            max_batch_items: int = _EMBED_BATCH_MAX_ITEMS,
+            max_batch_tokens: int = _EMBED_BATCH_MAX_TOKENS,
+            max_concurrency: int = _EMBED_MAX_CONCURRENCY,
+            **kwargs
+    ) -> np.ndarray:
+        """
+        Get the embeddings for the given texts using AsyncOpenAI | AsyncAzureOpenAI.
+
+        The texts are split by item and token limits and the batches are sent concurrently.
+
+        Args:
+            texts (list[str]): The texts to embed.
+            max_batch_items (int): Maximum texts per request.
+            max_batch_tokens (int): Maximum estimated tokens per request.
+            max_concurrency (int): Maximum batches in flight.
+
+        Returns:
+            np.ndarray: Contiguous float32 matrix, one row per text in the input order.
+        """
+        texts = [text.replace("\n", " ") for text in texts]
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _embed_batch(batch: slice) -> list[list[float]]:
+            async with semaphore:
+                response = await self.client.embeddings.create(
+                    input=texts[batch],
+                    model=self._model,
+                    **kwargs
+                )
+            return self._get_embeddings_batch(response)
+
+        batches = await asyncio.gather(
+            *[
+                _embed_batch(batch)
+                for batch in split_batches(texts, max_items=max_batch_items, max_tokens=max_batch_tokens)
+            ]
+        )
+        return to_matrix([vector for vectors in batches for vector in vectors])
+
     @staticmethod
     def is_valid_api_key(api_key: str) -> bool:
         """Determine if input is valid OpenAI API key.
@@ -130,12 +245,13 @@ class OpenAIClient(Client):
         api_key_re = re.compile(r"^sk-([A-Za-z0-9]+(-+[A-Za-z0-9]+)*-)?[A-Za-z0-9]{32,}$")
         return bool(re.fullmatch(api_key_re, api_key))
 
-    async def get_tool_json(self, func: typing.Callable) -> dict:
+    @staticmethod
+    async def get_tool_json(func: typing.Callable) -> dict:
         _func_name = func.__name__
         _doc_str = inspect.getdoc(func)
         _properties = {}
         _type_hints = typing.get_type_hints(func)
-        async for param, param_type in iter_to_aiter(_type_hints.items()):
+        for param, param_type in _type_hints.items():
             if param != 'return':
                 _properties[param] = {
                     "type": await ptype_to_json_scheme(param_type.__name__),
@@ -170,8 +286,4 @@ class OpenAIClient(Client):
         n_output_tokens = response.usage.completion_tokens if response.usage is not None else 0
         if n_output_tokens is None:
             n_output_tokens = 0
-        tmp_price_1k = OPENAI_PRICE1K[model]
-        # First value is input token rate, second value is output token rate
-        if isinstance(tmp_price_1k, tuple):
-            return (tmp_price_1k[0] * n_input_tokens + tmp_price_1k[1] * n_output_tokens) / 1000
-        return tmp_price_1k * (n_input_tokens + n_output_tokens) / 1000
+        return compute_cost(model, n_input_tokens, n_output_tokens)
@@ -0,0 +1,391 @@
+import asyncio
+import hashlib
+import importlib.util
+import logging
+import threading
+import typing
+import weakref
+
+import httpx
+from openai import (
+    OpenAI,
+    AzureOpenAI,
+    AsyncOpenAI,
+    AsyncAzureOpenAI,
+    DEFAULT_TIMEOUT,
+    DefaultHttpxClient,
+    DefaultAsyncHttpxClient
+)
+
+from superagentx.utils.llm_config import LLMType
+
+logger = logging.getLogger(__name__)
+
+# One pool serves every client of a process, so it keeps more idle connections alive than the SDK default
+DEFAULT_LIMITS = httpx.Limits(max_connections=200, max_keepalive_connections=100, keepalive_expiry=60.0)
+DEFAULT_MAX_POOL_CONNECTIONS = 50
+
+
+def _secret_digest(secret: str | None) -> str | None:
+    # Keys hold a digest of the secrets, never the secrets themselves
+    if not secret:
+        return None
+    return hashlib.sha256(secret.encode('utf-8')).hexdigest()[:16]
+
+
+def _normalize_url(url: str | None) -> str | None:
+    if not url:
+        return None
+    return str(url).strip().rstrip('/').lower()
+
+
+def _pool_connections(http_client: httpx.Client | httpx.AsyncClient) -> tuple[int, int] | None:
+    # Connections of the httpcore pool behind the default transport, `None` for other transports
+    pool = getattr(getattr(http_client, '_transport', None), '_pool', None)
+    connections = getattr(pool, 'connections', None)
+    if connections is None:
+        return None
+    idle = sum(1 for connection in connections if connection.is_idle())
+    return len(connections), idle
+
+
+class _LoopBoundClient:
+    """
+    Async SDK client of the running event loop. An httpx async pool cannot outlive its loop, so each loop, e.g. of
+    each `asyncio.run`, gets its own client on first use. The clients of closed loops are dropped.
+    """
+
+    def __init__(self, factory: typing.Callable[[], tuple[typing.Any, httpx.AsyncClient | None]]):
+        self._factory = factory
+        self._clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        # Attributes read outside a loop, e.g. the base URL, come from a client without a loop
+        self._detached: tuple | None = None
+        self._lock = threading.Lock()
+
+    def _entry(self) -> tuple[typing.Any, httpx.AsyncClient | None]:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        with self._lock:
+            if loop is None:
+                if self._detached is None:
+                    self._detached = self._factory()
+                return self._detached
+            entry = self._clients.get(loop)
+            if entry is None:
+                for closed in [closed for closed in self._clients if closed.is_closed()]:
+                    del self._clients[closed]
+                entry = self._clients[loop] = self._factory()
+            return entry
+
+    def http_clients(self) -> list[httpx.AsyncClient]:
+        with self._lock:
+            entries = list(self._clients.values()) + ([self._detached] if self._detached else [])
+        return [http_client for _, http_client in entries if http_client is not None]
+
+    def with_options(self, **options) -> '_LoopBoundClient':
+        # The copy of each loop shares the pool of the loop
+        return _LoopBoundClient(lambda: (self._entry()[0].with_options(**options), None))
+
+    async def aclose(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entries = [entry for entry_loop, entry in self._clients.items() if entry_loop is loop]
+            self._clients = weakref.WeakKeyDictionary()
+            if self._detached is not None:
+                entries.append(self._detached)
+                self._detached = None
+        # The pools of the other loops are released with them, they cannot be closed from this loop
+        for _, http_client in entries:
+            if http_client is not None:
+                await http_client.aclose()
+
+    def __getattr__(self, name: str):
+        return getattr(self._entry()[0], name)
+
+
+class _Entry:
+
+    def __init__(
+            self,
+            *,
+            kind: str,
+            label: str,
+            client: typing.Any,
+            http_client: httpx.Client | None = None
+    ):
+        self.kind = kind
+        self.label = label
+        self.client = client
+        self.http_client = http_client
+        self.refs = 0
+        self.acquired = 0
+
+    @property
+    def is_async(self) -> bool:
+        return isinstance(self.client, _LoopBoundClient)
+
+    def close(self) -> None:
+        if self.is_async:
+            # Async pools close on `aclose`, the sockets are released with the client otherwise
+            logger.debug(f'Async client {self.label} dropped without `aclose`')
+        elif self.http_client is None:
+            self.client.close()
+        else:
+            self.http_client.close()
+
+    async def aclose(self) -> None:
+        if self.is_async:
+            await self.client.aclose()
+        else:
+            self.close()
+
+    def stats(self) -> dict:
+        stats = {
+            'kind': self.kind,
+            'client': self.label,
+            'refs': self.refs,
+            'acquired': self.acquired
+        }
+        if self.is_async or self.http_client is not None:
+            http_clients = self.client.http_clients() if self.is_async else [self.http_client]
+            pools = [_pool_connections(http_client) for http_client in http_clients]
+            pools = [connections for connections in pools if connections is not None]
+            if pools:
+                stats['connections'] = sum(connections for connections, _ in pools)
+                stats['idle_connections'] = sum(idle for _, idle in pools)
+        else:
+            stats['max_pool_connections'] = self.client.meta.config.max_pool_connections
+        return stats
+
+
+class ClientRegistry:
+
+    def __init__(
+            self,
+            *,
+            limits: httpx.Limits = DEFAULT_LIMITS,
+            timeout: float | httpx.Timeout = DEFAULT_TIMEOUT,
+            http2: bool | None = None,
+            max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS
+    ):
+        """
+        Process-wide registry of SDK clients, shared by every `LLMClient` and vector store of the same configuration.
+
+        Clients are keyed by the normalized configuration, type, endpoint, credentials digest and retries, so clients
+        of the same account reuse one connection pool with keep-alive instead of a new pool and TLS handshake each.
+        The model is not part of the key, it is passed to the `Client` wrappers. Each `acquire` is counted and
+        released with `release`/`arelease`, the last release closes the pool. Async clients hold one SDK client and
+        pool per event loop, so a client acquired once serves every `asyncio.run` of the process.
+
+        Args:
+            limits: Connection limits of the OpenAI HTTP pools.
+            timeout: Request timeout of the OpenAI HTTP pools.
+            http2: Use HTTP/2 for the OpenAI pools, defaults to `True` when the `h2` package is installed.
+            max_pool_connections: Connection pool size of the boto3 clients.
+        """
+        self.limits = limits
+        self.timeout = timeout
+        self.http2 = importlib.util.find_spec('h2') is not None if http2 is None else http2
+        self.max_pool_connections = max_pool_connections
+        self._entries: dict[tuple, _Entry] = {}
+        self._keys: dict[int, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _acquire(
+            self,
+            key: tuple,
+            factory: typing.Callable[[], _Entry]
+    ) -> typing.Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = factory()
+                self._keys[id(entry.client)] = key
+                logger.debug(f'Client registry created {entry.kind} client {entry.label}')
+            entry.refs += 1
+            entry.acquired += 1
+            return entry.client
+
+    def openai_client(
+            self,
+            *,
+            llm_type: str,
+            async_mode: bool,
+            api_key: str | None,
+            base_url: str | None = None,
+            azure_deployment: str | None = None,
+            api_version: str | None = None,
+            max_retries: int | None = None
+    ) -> OpenAI | AsyncOpenAI | AzureOpenAI | AsyncAzureOpenAI:
+        """
+        Shared OpenAI or Azure OpenAI client of the configuration. The async client resolves the SDK client of the
+        running event loop on each use.
+
+        Args:
+            llm_type: `openai` or `azure-openai`.
+            async_mode: Async client with an `httpx.AsyncClient` pool.
+            api_key: API key of the account.
+            base_url: OpenAI base URL or Azure endpoint.
+            azure_deployment: Azure deployment name.
+            api_version: Azure API version.
+            max_retries: SDK retries, defaults to the SDK default.
+        """
+        azure = llm_type == LLMType.AZURE_OPENAI_CLIENT
+        key = (
+            'openai',
+            llm_type,
+            async_mode,
+            _secret_digest(api_key),
+            _normalize_url(base_url),
+            azure_deployment if azure else None,
+            api_version if azure else None,
+            max_retries
+        )
+
+        def _client() -> tuple[typing.Any, httpx.Client | httpx.AsyncClient]:
+            http_client_class = DefaultAsyncHttpxClient if async_mode else DefaultHttpxClient
+            http_client = http_client_class(limits=self.limits, timeout=self.timeout, http2=self.http2)
+            options = {'api_key': api_key, 'http_client': http_client}
+            if max_retries is not None:
+                options['max_retries'] = max_retries
+            if azure:
+                client_class = AsyncAzureOpenAI if async_mode else AzureOpenAI
+                client = client_class(
+                    azure_endpoint=base_url,
+                    azure_deployment=azure_deployment,
+                    api_version=api_version,
+                    **options
+                )
+            else:
+                client_class = AsyncOpenAI if async_mode else OpenAI
+                client = client_class(base_url=base_url, **options)
+            return client, http_client
+
+        def _factory() -> _Entry:
+            if async_mode:
+                client, http_client = _LoopBoundClient(_client), None
+            else:
+                client, http_client = _client()
+            return _Entry(
+                kind=llm_type,
+                label=f'{llm_type}:{_normalize_url(str(client.base_url))}',
+                client=client,
+                http_client=http_client
+            )
+
+        return self._acquire(key, _factory)
+
+    def bedrock_client(
+            self,
+            *,
+            region: str,
+            aws_access_key: str | None = None,
+            aws_secret_key: str | None = None,
+            max_attempts: int = 5
+    ):
+        """
+        Shared `bedrock-runtime` client of the region and credentials, boto3 clients are thread safe.
+
+        Args:
+            region: AWS region.
+            aws_access_key: Access key, defaults to the boto3 credential chain.
+            aws_secret_key: Secret key.
+            max_attempts: Retries after the first attempt in the standard retry mode.
+        """
+        key = (
+            'bedrock-runtime',
+            region,
+            aws_access_key,
+            _secret_digest(aws_secret_key),
+            max_attempts
+        )
+
+        def _factory() -> _Entry:
+            import boto3
+            from botocore.config import Config
+
+            config = Config(
+                region_name=region,
+                signature_version="v4",
+                retries={
+                    "max_attempts": max_attempts,
+                    "mode": "standard"
+                },
+                max_pool_connections=self.max_pool_connections,
+                tcp_keepalive=True
+            )
+            client = boto3.client(
+                service_name="bedrock-runtime",
+                aws_access_key_id=aws_access_key,
+                aws_secret_access_key=aws_secret_key,
+                config=config
+            )
+            return _Entry(kind=LLMType.BEDROCK_CLIENT, label=f'bedrock-runtime:{region}', client=client)
+
+        return self._acquire(key, _factory)
+
+    def _release(self, client: typing.Any) -> _Entry | None:
+        with self._lock:
+            key = self._keys.get(id(client))
+            if key is None:
+                return None
+            entry = self._entries[key]
+            entry.refs -= 1
+            if entry.refs > 0:
+                return None
+            del self._entries[key]
+            del self._keys[id(client)]
+            return entry
+
+    def release(self, client: typing.Any) -> None:
+        """Releases an acquired client, the last release closes it. Use `arelease` for async clients."""
+        entry = self._release(client)
+        if entry is not None:
+            entry.close()
+
+    async def arelease(self, client: typing.Any) -> None:
+        """Releases an acquired client, the last release closes it."""
+        entry = self._release(client)
+        if entry is not None:
+            await entry.aclose()
+
+    def _drain(self) -> list[_Entry]:
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+            self._keys.clear()
+        return entries
+
+    def close(self) -> None:
+        """Closes every client, e.g. at process shutdown. Async pools are only closed by `aclose`."""
+        for entry in self._drain():
+            entry.close()
+
+    async def aclose(self) -> None:
+        """Closes every client, e.g. at process shutdown."""
+        for entry in self._drain():
+            await entry.aclose()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = list(self._entries.values())
+        return {
+            'http2': self.http2,
+            'clients': len(entries),
+            'refs': sum(entry.refs for entry in entries),
+            'acquired': sum(entry.acquired for entry in entries),
+            'pools': [entry.stats() for entry in entries]
+        }
+
+
+_registry: ClientRegistry | None = None
+
+
+def get_client_registry() -> ClientRegistry:
+    """Returns the process-wide client registry."""
+    global _registry
+    if _registry is None:
+        _registry = ClientRegistry()
+    return _registry
@@ -0,0 +1,279 @@
+import asyncio
+import atexit
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+import typing
+from pathlib import Path
+
+from openai.types.chat import ChatCompletion
+
+from superagentx.llm.cache import chat_completion_key, embedding_key
+from superagentx.llm.client import Client
+from superagentx.llm.exceptions import CassetteMiss
+from superagentx.llm.models import ChatCompletionParams
+from superagentx.llm.openai import OpenAIClient
+from superagentx.utils.helper import sync_to_async
+
+logger = logging.getLogger(__name__)
+
+_CASSETTE_VERSION = 1
+_CHAT = 'chat'
+_EMBED = 'embed'
+
+
+class Cassette:
+
+    def __init__(
+            self,
+            path: str | Path
+    ):
+        """
+        Recorded LLM interactions stored in a JSON file.
+
+        Each interaction keeps the request key, the request itself for readability and the response, either a
+        `ChatCompletion` or an embedding vector.
+
+        Args:
+            path: Path of the cassette file, created on the first save when it does not exist.
+        """
+        self.path = Path(path)
+        self.interactions: list[dict] = []
+        self._index: dict[tuple[str, str], list[int]] = {}
+        self._cursor: dict[str, int] = {}
+        self._lock = threading.Lock()
+        if self.path.exists():
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+            for interaction in data.get('interactions', []):
+                self._append(interaction)
+        # Interactions written by the last save
+        self._saved = len(self.interactions)
+
+    def _append(self, interaction: dict) -> None:
+        self._index.setdefault((interaction['kind'], interaction['key']), []).append(len(self.interactions))
+        self.interactions.append(interaction)
+
+    def find(self, kind: str, key: str, occurrence: int = 0) -> dict | None:
+        """Recorded interaction of the key, the same request recorded several times replays in order."""
+        positions = self._index.get((kind, key))
+        if not positions:
+            return None
+        return self.interactions[positions[min(occurrence, len(positions) - 1)]]
+
+    def next(self, kind: str) -> dict | None:
+        """Next interaction of the kind in recording order, wrapping around at the end."""
+        with self._lock:
+            positions = [index for index, interaction in enumerate(self.interactions) if interaction['kind'] == kind]
+            if not positions:
+                return None
+            cursor = self._cursor.get(kind, 0)
+            self._cursor[kind] = cursor + 1
+            return self.interactions[positions[cursor % len(positions)]]
+
+    def record(self, interaction: dict) -> None:
+        with self._lock:
+            self._append(interaction)
+
+    @property
+    def dirty(self) -> bool:
+        """Whether interactions were recorded since the last save."""
+        return len(self.interactions) != self._saved
+
+    def save(self) -> None:
+        """Writes the cassette atomically, a crash never leaves a truncated file."""
+        with self._lock:
+            saved = len(self.interactions)
+            payload = json.dumps(
+                {'version': _CASSETTE_VERSION, 'interactions': self.interactions},
+                indent=2,
+                default=str
+            )
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=f'.{self.path.name}.')
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            file.write(payload)
+        os.replace(tmp_path, self.path)
+        self._saved = saved
+
+    def flush(self) -> None:
+        """Saves the cassette when interactions were recorded since the last save."""
+        if self.dirty:
+            self.save()
+
+    def __len__(self):
+        return len(self.interactions)
+
+
+class ReplayClient(Client):
+
+    def __init__(
+            self,
+            *,
+            cassette: str | Path | Cassette,
+            model: str | None = None,
+            mode: typing.Literal['replay', 'record'] = 'replay',
+            client: Client | None = None,
+            latency: float | tuple[float, float] = 0.0,
+            strict: bool = True
+    ):
+        """
+        Offline LLM backend replaying recorded responses, for benchmarks and CI without network or credentials.
+
+        In `record` mode the requests go to the wrapped `client` and the responses are appended to the cassette,
+        written once by `close`/`aclose` (or `async with` on the `LLMClient`), and at interpreter exit otherwise.
+        Without a wrapped client the tools use the OpenAI format, record with an OpenAI client to replay tool calls.
+        In `replay` mode the responses come from the cassette, matched by the canonical hash of the request. A
+        request missing from the cassette raises `CassetteMiss`, unless `strict` is off, then the recorded
+        interactions are replayed in order.
+
+        Args:
+            cassette: Cassette or the path of the cassette file.
+            model: Model name of the requests, part of the request key.
+            mode: `replay` or `record`.
+            client: Real client wrapped in `record` mode.
+            latency: Synthetic latency of every replayed response in seconds, or a `(min, max)` range.
+            strict: Fail on requests missing from the cassette.
+        """
+        if mode not in ('replay', 'record'):
+            raise ValueError(f'Invalid replay mode `{mode}`, use replay or record.')
+        if mode == 'record' and client is None:
+            raise ValueError('Record mode requires the client to record.')
+        self.cassette = cassette if isinstance(cassette, Cassette) else Cassette(cassette)
+        self.model = model
+        self.mode = mode
+        self.client = client
+        self.latency = latency
+        self.strict = strict
+        self._occurrences: dict[tuple[str, str], int] = {}
+        self.replayed = 0
+        self.recorded = 0
+        if self.mode == 'record':
+            # Recordings of a client never closed are not lost
+            atexit.register(self.cassette.flush)
+
+    def _latency(self) -> float:
+        if isinstance(self.latency, (tuple, list)):
+            return random.uniform(*self.latency)
+        return self.latency
+
+    def _chat_key(self, chat_completion_params: ChatCompletionParams) -> str:
+        return chat_completion_key(chat_completion_params, model=self.model)
+
+    def _lookup(self, kind: str, key: str) -> dict:
+        occurrence = self._occurrences.get((kind, key), 0)
+        self._occurrences[(kind, key)] = occurrence + 1
+        interaction = self.cassette.find(kind, key, occurrence)
+        if interaction is None:
+            if self.strict:
+                raise CassetteMiss(f'No recorded {kind} interaction for key {key} in {self.cassette.path}')
+            interaction = self.cassette.next(kind)
+            if interaction is None:
+                raise CassetteMiss(f'No recorded {kind} interactions in {self.cassette.path}')
+            logger.debug(f'Replaying the next recorded {kind} interaction for key {key}')
+        self.replayed += 1
+        return interaction
+
+    def _record(self, interaction: dict) -> None:
+        # Kept in memory, rewriting the whole file per interaction is quadratic in the recording length
+        self.cassette.record(interaction)
+        self.recorded += 1
+
+    def close(self) -> None:
+        """Writes the recorded interactions to the cassette file."""
+        if self.mode == 'record':
+            self.cassette.flush()
+            atexit.unregister(self.cassette.flush)
+
+    async def aclose(self) -> None:
+        await sync_to_async(self.close)
+
+    def _record_chat(
+            self,
+            key: str,
+            chat_completion_params: ChatCompletionParams,
+            response: ChatCompletion
+    ) -> None:
+        self._record({
+            'kind': _CHAT,
+            'key': key,
+            'request': chat_completion_params.model_dump(mode='json', exclude={'user'}, exclude_none=True),
+            'response': response.model_dump(mode='json')
+        })
+
+    def chat_completion(
+            self,
+            *,
+            chat_completion_params: ChatCompletionParams
+    ) -> ChatCompletion:
+        key = self._chat_key(chat_completion_params)
+        if self.mode == 'record':
+            response = self.client.chat_completion(chat_completion_params=chat_completion_params)
+            self._record_chat(key, chat_completion_params, response)
+            return response
+        interaction = self._lookup(_CHAT, key)
+        time.sleep(self._latency())
+        return ChatCompletion.model_validate(interaction['response'])
+
+    async def achat_completion(
+            self,
+            *,
+            chat_completion_params: ChatCompletionParams
+    ) -> ChatCompletion:
+        key = self._chat_key(chat_completion_params)
+        if self.mode == 'record':
+            response = await self.client.achat_completion(chat_completion_params=chat_completion_params)
+            self._record_chat(key, chat_completion_params, response)
+            return response
+        interaction = self._lookup(_CHAT, key)
+        await asyncio.sleep(self._latency())
+        return ChatCompletion.model_validate(interaction['response'])
+
+    async def get_tool_json(
+            self,
+            *,
+            func: typing.Callable
+    ) -> dict:
+        if self.client is not None:
+            return await self.client.get_tool_json(func=func)
+        # Replayed requests use the OpenAI tool format
+        return await OpenAIClient.get_tool_json(func=func)
+
+    def _record_embedding(self, key: str, text: str, embedding: list[float]) -> None:
+        self._record({
+            'kind': _EMBED,
+            'key': key,
+            'request': {'text': text},
+            'response': list(embedding)
+        })
+
+    def embed(self, text: str, **kwargs):
+        key = embedding_key(text, model=self.model, **kwargs)
+        if self.mode == 'record':
+            embedding = self.client.embed(text, **kwargs)
+            self._record_embedding(key, text, embedding)
+            return embedding
+        interaction = self._lookup(_EMBED, key)
+        time.sleep(self._latency())
+        return interaction['response']
+
+    async def aembed(self, text: str, **kwargs):
+        key = embedding_key(text, model=self.model, **kwargs)
+        if self.mode == 'record':
+            embedding = await self.client.aembed(text, **kwargs)
+            self._record_embedding(key, text, embedding)
+            return embedding
+        interaction = self._lookup(_EMBED, key)
+        await asyncio.sleep(self._latency())
+        return interaction['response']
+
+    def stats(self) -> dict:
+        return {
+            'mode': self.mode,
+            'interactions': len(self.cassette),
+            'replayed': self.replayed,
+            'recorded': self.recorded
+        }
@@ -0,0 +1,359 @@
+import asyncio
+import logging
+import math
+import time
+import typing
+from collections import deque
+
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+from superagentx.llm.client import Client
+from superagentx.llm.metrics import compute_cost
+from superagentx.llm.models import ChatCompletionParams
+from superagentx.llm.scheduler import classify_error
+from superagentx.utils.llm_config import LLMType
+
+if typing.TYPE_CHECKING:
+    from superagentx.llm import LLMClient
+
+logger = logging.getLogger(__name__)
+
+_LATENCY_WINDOW = 100
+_MIN_HEDGE_SAMPLES = 5
+_DEFAULT_HEDGE_DELAY = 2.0
+
+
+def openai_tool_to_bedrock(tool: dict) -> dict:
+    function = tool['function']
+    return {
+        'toolSpec': {
+            'name': function['name'],
+            'description': function.get('description'),
+            'inputSchema': {
+                'json': function.get('parameters') or {'type': 'object', 'properties': {}}
+            }
+        }
+    }
+
+
+def bedrock_tool_to_openai(tool: dict) -> dict:
+    spec = tool['toolSpec']
+    return {
+        'type': 'function',
+        'function': {
+            'name': spec['name'],
+            'description': spec.get('description'),
+            'parameters': spec.get('inputSchema', {}).get('json') or {'type': 'object', 'properties': {}}
+        }
+    }
+
+
+def convert_tools(tools: list[dict] | None, llm_type: str) -> list[dict] | None:
+    """Converts the tool definitions to the format of the backend, OpenAI `function` or Bedrock `toolSpec`."""
+    if not tools:
+        return tools
+    if llm_type == LLMType.BEDROCK_CLIENT:
+        if any('function' in tool for tool in tools):
+            return [openai_tool_to_bedrock(tool) if 'function' in tool else tool for tool in tools]
+    elif any('toolSpec' in tool for tool in tools):
+        return [bedrock_tool_to_openai(tool) if 'toolSpec' in tool else tool for tool in tools]
+    return tools
+
+
+class RouterBackend:
+
+    def __init__(
+            self,
+            *,
+            client: 'LLMClient',
+            ewma_alpha: float
+    ):
+        self.client = client
+        self.name = f'{client.llm_config_model.llm_type}:{client.llm_config_model.model}'
+        self.llm_type = client.llm_config_model.llm_type
+        # Price of 1k prompt and 1k completion tokens, 0 when unknown
+        self.price = compute_cost(client.llm_config_model.model, 1000, 1000) or 0.0
+        self.ewma_alpha = ewma_alpha
+        self.ewma_latency: float | None = None
+        self.error_rate = 0.0
+        self.latencies: deque[float] = deque(maxlen=_LATENCY_WINDOW)
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.hedged_wins = 0
+
+    def on_success(self, latency: float) -> None:
+        self.requests += 1
+        self.consecutive_failures = 0
+        self.latencies.append(latency)
+        self.ewma_latency = latency if self.ewma_latency is None else (
+                self.ewma_alpha * latency + (1 - self.ewma_alpha) * self.ewma_latency
+        )
+        self.error_rate = (1 - self.ewma_alpha) * self.error_rate
+
+    def on_failure(self) -> None:
+        self.requests += 1
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.error_rate = self.ewma_alpha + (1 - self.ewma_alpha) * self.error_rate
+
+    def cool_down(self, seconds: float) -> None:
+        self.cooldown_until = max(self.cooldown_until, time.monotonic() + seconds)
+
+    @property
+    def available(self) -> bool:
+        return self.cooldown_until <= time.monotonic()
+
+    def p95(self) -> float | None:
+        if len(self.latencies) < _MIN_HEDGE_SAMPLES:
+            return None
+        latencies = sorted(self.latencies)
+        return latencies[min(len(latencies) - 1, math.ceil(0.95 * len(latencies)) - 1)]
+
+    def stats(self) -> dict:
+        return {
+            'name': self.name,
+            'requests': self.requests,
+            'failures': self.failures,
+            'error_rate': self.error_rate,
+            'ewma_latency': self.ewma_latency,
+            'p95_latency': self.p95(),
+            'hedged_wins': self.hedged_wins,
+            'available': self.available
+        }
+
+
+class RouterClient(Client):
+
+    def __init__(
+            self,
+            *,
+            backends: list['LLMClient'],
+            hedge: bool = False,
+            hedge_delay: float | None = None,
+            cooldown: float = 30.0,
+            failure_threshold: int = 3,
+            error_weight: float = 10.0,
+            cost_weight: float = 1.0,
+            ewma_alpha: float = 0.2
+    ):
+        """
+        Routes the requests of one logical model over several `LLMClient` backends, e.g. OpenAI, Azure OpenAI and
+        Bedrock.
+
+        Backends are ranked by score, lowest first: EWMA latency in seconds, plus `error_weight` times the recent
+        error rate, plus `cost_weight` times the price of 1k prompt and 1k completion tokens. Backends without
+        latency samples are tried early. A failed request fails over to the next backend. Rate limited backends
+        cool down for the `Retry-After` delay, other backends after `failure_threshold` consecutive failures.
+
+        With `hedge`, a second request goes to the next backend when the first did not answer after its p95
+        latency (or `hedge_delay`), the first response wins and the other request is cancelled.
+
+        Args:
+            backends: The backend clients, the first one also serves the embeddings.
+            hedge: Send hedged requests.
+            hedge_delay: Fixed hedging delay in seconds, defaults to the p95 latency of the primary backend.
+            cooldown: Seconds a failing backend is skipped.
+            failure_threshold: Consecutive failures before a backend cools down.
+            error_weight: Weight of the error rate in the score, in seconds.
+            cost_weight: Weight of the price in the score, in seconds per USD.
+            ewma_alpha: Smoothing factor of the latency and error rate averages.
+        """
+        if not backends:
+            raise ValueError('Router requires at least one backend client.')
+        self.backends = [RouterBackend(client=backend, ewma_alpha=ewma_alpha) for backend in backends]
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+        self.cooldown = cooldown
+        self.failure_threshold = failure_threshold
+        self.error_weight = error_weight
+        self.cost_weight = cost_weight
+        self.hedged_requests = 0
+
+    def _score(self, backend: RouterBackend) -> float:
+        # Backends without latency samples score 0 seconds, so they are tried early
+        return (
+                (backend.ewma_latency or 0.0)
+                + self.error_weight * backend.error_rate
+                + self.cost_weight * backend.price
+        )
+
+    def ranked(self) -> list[RouterBackend]:
+        """Available backends by score, then the cooling down backends by end of cool down as last resort."""
+        available = sorted((backend for backend in self.backends if backend.available), key=self._score)
+        cooling = sorted(
+            (backend for backend in self.backends if not backend.available),
+            key=lambda backend: backend.cooldown_until
+        )
+        return available + cooling
+
+    @staticmethod
+    def _params_for(
+            backend: RouterBackend,
+            chat_completion_params: ChatCompletionParams
+    ) -> ChatCompletionParams:
+        tools = convert_tools(chat_completion_params.tools, backend.llm_type)
+        if tools is chat_completion_params.tools:
+            return chat_completion_params
+        return chat_completion_params.model_copy(update={'tools': tools})
+
+    def _on_error(self, backend: RouterBackend, ex: Exception) -> None:
+        backend.on_failure()
+        rate_limited, retry_after = classify_error(ex)
+        if rate_limited:
+            backend.cool_down(retry_after or self.cooldown)
+        elif backend.consecutive_failures >= self.failure_threshold:
+            backend.cool_down(self.cooldown)
+        logger.warning(f'Router backend {backend.name} failed, failing over.\n{ex}')
+
+    async def _acall(
+            self,
+            backend: RouterBackend,
+            chat_completion_params: ChatCompletionParams
+    ) -> ChatCompletion:
+        started_at = time.perf_counter()
+        try:
+            response = await backend.client.achat_completion(
+                chat_completion_params=self._params_for(backend, chat_completion_params)
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as ex:
+            self._on_error(backend, ex)
+            raise
+        backend.on_success(time.perf_counter() - started_at)
+        return response
+
+    async def _ahedged(
+            self,
+            primary: RouterBackend,
+            secondary: RouterBackend,
+            chat_completion_params: ChatCompletionParams
+    ) -> ChatCompletion:
+        delay = self.hedge_delay or primary.p95() or _DEFAULT_HEDGE_DELAY
+        primary_task = asyncio.ensure_future(self._acall(primary, chat_completion_params))
+        tasks = {primary_task: primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                if primary_task.exception() is None:
+                    return primary_task.result()
+                # Failed before the hedging delay, fail over to the secondary right away
+                return await self._acall(secondary, chat_completion_params)
+
+            self.hedged_requests += 1
+            logger.debug(f'Hedging {primary.name} after {delay:.3f}s with {secondary.name}')
+            tasks[asyncio.ensure_future(self._acall(secondary, chat_completion_params))] = secondary
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                errors = [task.exception() for task in done]
+                for task, task_error in zip(done, errors):
+                    if task_error is None:
+                        if tasks[task] is secondary:
+                            secondary.hedged_wins += 1
+                        return task.result()
+                    error = task_error
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def achat_completion(
+            self,
+            *,
+            chat_completion_params: ChatCompletionParams
+    ) -> ChatCompletion:
+        backends = self.ranked()
+        error = None
+        index = 0
+        while index < len(backends):
+            backend = backends[index]
+            try:
+                if self.hedge and index + 1 < len(backends):
+                    # A failed hedged pair moves on to the following backends
+                    index += 1
+                    return await self._ahedged(backend, backends[index], chat_completion_params)
+                return await self._acall(backend, chat_completion_params)
+            except Exception as ex:
+                error = ex
+            index += 1
+        raise error
+
+    def chat_completion(
+            self,
+            *,
+            chat_completion_params: ChatCompletionParams
+    ) -> ChatCompletion:
+        error = None
+        for backend in self.ranked():
+            started_at = time.perf_counter()
+            try:
+                response = backend.client.chat_completion(
+                    chat_completion_params=self._params_for(backend, chat_completion_params)
+                )
+            except Exception as ex:
+                self._on_error(backend, ex)
+                error = ex
+                continue
+            backend.on_success(time.perf_counter() - started_at)
+            return response
+        raise error
+
+    async def achat_completion_stream(
+            self,
+            *,
+            chat_completion_params: ChatCompletionParams
+    ) -> typing.AsyncIterator[ChatCompletionChunk]:
+        """
+        Streams from the best backend. Fails over only until the first chunk arrived, streams are not hedged.
+        """
+        error = None
+        for backend in self.ranked():
+            started_at = time.perf_counter()
+            streaming = False
+            try:
+                async for chunk in backend.client.astream_chat_completion(
+                        chat_completion_params=self._params_for(backend, chat_completion_params)
+                ):
+                    if not streaming:
+                        streaming = True
+                        backend.on_success(time.perf_counter() - started_at)
+                    yield chunk
+                return
+            except Exception as ex:
+                if streaming:
+                    raise
+                self._on_error(backend, ex)
+                error = ex
+        raise error
+
+    async def get_tool_json(
+            self,
+            *,
+            func: typing.Callable
+    ) -> dict:
+        # Tools are converted for each backend at request time
+        return await self.backends[0].client.get_tool_json(func=func)
+
+    def embed(self, text: str, **kwargs):
+        # Vectors of different models are not comparable, the first backend serves every embedding
+        return self.backends[0].client.embed(text=text, **kwargs)
+
+    async def aembed(self, text: str, **kwargs):
+        return await self.backends[0].client.aembed(text=text, **kwargs)
+
+    def embed_many(self, texts: list[str], **kwargs):
+        return self.backends[0].client.embed_many(texts=texts, **kwargs)
+
+    async def aembed_many(self, texts: list[str], **kwargs):
+        return await self.backends[0].client.aembed_many(texts=texts, **kwargs)
+
+    def stats(self) -> dict:
+        return {
+            'hedged_requests': self.hedged_requests,
+            'backends': [backend.stats() for backend in self.backends]
+        }
@@ -0,0 +1,360 @@
+import asyncio
+import itertools
+import logging
+import random
+import time
+import typing
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from enum import IntEnum
+from heapq import heappush, heapify
+
+logger = logging.getLogger(__name__)
+
+_RATE_LIMIT_ERROR_CODES = {
+    'ThrottlingException',
+    'TooManyRequestsException',
+    'ServiceQuotaExceededException'
+}
+_TRANSIENT_ERROR_CODES = {
+    'ServiceUnavailableException',
+    'InternalServerException',
+    'ModelNotReadyException'
+}
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    BATCH = 1
+
+
+_request_priority: ContextVar[Priority | None] = ContextVar('superagentx_request_priority', default=None)
+
+
+@contextmanager
+def scheduling_priority(priority: Priority):
+    """
+    Sets the scheduling priority of every LLM request made within the context.
+
+    Example:
+        with scheduling_priority(Priority.BATCH):
+            await agent.execute(query_instruction=...)
+    """
+    token = _request_priority.set(priority)
+    try:
+        yield
+    finally:
+        _request_priority.reset(token)
+
+
+def current_priority() -> Priority | None:
+    return _request_priority.get()
+
+
+class TokenBucket:
+
+    def __init__(
+            self,
+            *,
+            per_minute: float,
+            capacity: float | None = None
+    ):
+        """
+        Classic token bucket refilled continuously at `per_minute / 60` tokens per second.
+
+        Args:
+            per_minute: Refill rate, e.g. the requests or tokens per minute quota of the model.
+            capacity: Maximum burst size. Defaults to one minute of quota.
+        """
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.tokens = self.capacity
+        self._updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available. Requests larger than the capacity wait for a full bucket."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self.tokens -= amount
+
+    def adjust(self, amount: float) -> None:
+        """Charges (positive) or refunds (negative) the difference between estimated and actual usage."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    future: asyncio.Future | None = field(default=None, compare=False)
+
+
+class RequestScheduler:
+
+    def __init__(
+            self,
+            *,
+            requests_per_minute: float | None = None,
+            tokens_per_minute: float | None = None,
+            max_retries: int = 5,
+            name: str | None = None
+    ):
+        """
+        Schedules LLM requests of a model within its requests and tokens per minute quota.
+
+        Waiting requests are served by priority (interactive before batch) and then in arrival order. When the
+        provider still answers with a rate limit error, the `Retry-After` header pauses the whole queue instead of
+        letting every caller retry on its own.
+
+        Args:
+            requests_per_minute: RPM quota of the model, `None` for unlimited.
+            tokens_per_minute: TPM quota of the model, `None` for unlimited.
+            max_retries: Maximum retries of a request rejected by a rate limit or a transient server error.
+            name: Name used in logs, usually `<llm_type>:<model>`.
+        """
+        self.name = name
+        self.max_retries = max_retries
+        self.limits = {
+            'requests_per_minute': requests_per_minute,
+            'tokens_per_minute': tokens_per_minute,
+            'max_retries': max_retries
+        }
+        self.request_bucket = TokenBucket(per_minute=requests_per_minute) if requests_per_minute else None
+        self.token_bucket = TokenBucket(per_minute=tokens_per_minute) if tokens_per_minute else None
+        self._waiters: list[_Waiter] = []
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+        self._metrics = {
+            'requests': 0,
+            'rate_limited': 0,
+            'retries': 0,
+            'queue_time_total': 0.0,
+            'queue_time_max': 0.0,
+            'by_priority': {}
+        }
+
+    def _wait_time(self, tokens: float) -> float:
+        wait = max(0.0, self._paused_until - time.monotonic())
+        if self.request_bucket:
+            wait = max(wait, self.request_bucket.wait_time(1))
+        if self.token_bucket and tokens:
+            wait = max(wait, self.token_bucket.wait_time(tokens))
+        return wait
+
+    def _wake_head(self) -> None:
+        if self._waiters:
+            future = self._waiters[0].future
+            if future and not future.done():
+                future.set_result(None)
+
+    def _remove(self, waiter: _Waiter) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            return
+        heapify(self._waiters)
+        self._wake_head()
+
+    async def acquire(
+            self,
+            *,
+            tokens: float = 0,
+            priority: Priority = Priority.INTERACTIVE
+    ) -> float:
+        """
+        Waits until the request fits in the quota and reserves it.
+
+        Args:
+            tokens: Estimated tokens of the request (prompt and maximum completion).
+            priority: Scheduling class of the request.
+
+        Returns:
+            float: Seconds the request spent in the queue.
+        """
+        started_at = time.monotonic()
+        waiter = _Waiter(int(priority), next(self._seq))
+        heappush(self._waiters, waiter)
+        try:
+            while True:
+                if self._waiters[0] is waiter:
+                    wait = self._wait_time(tokens)
+                    if wait <= 0:
+                        break
+                    await asyncio.sleep(wait)
+                else:
+                    waiter.future = asyncio.get_running_loop().create_future()
+                    await waiter.future
+        finally:
+            self._remove(waiter)
+
+        if self.request_bucket:
+            self.request_bucket.consume(1)
+        if self.token_bucket and tokens:
+            self.token_bucket.consume(tokens)
+
+        queued = time.monotonic() - started_at
+        self._record(priority, queued)
+        return queued
+
+    def _record(self, priority: Priority, queued: float) -> None:
+        self._metrics['requests'] += 1
+        self._metrics['queue_time_total'] += queued
+        self._metrics['queue_time_max'] = max(self._metrics['queue_time_max'], queued)
+        _by_priority = self._metrics['by_priority'].setdefault(
+            Priority(priority).name.lower(),
+            {'requests': 0, 'queue_time_total': 0.0}
+        )
+        _by_priority['requests'] += 1
+        _by_priority['queue_time_total'] += queued
+
+    def reconcile(self, *, estimated_tokens: float, actual_tokens: float | None) -> None:
+        """Corrects the token bucket with the usage reported by the provider."""
+        if self.token_bucket and actual_tokens is not None:
+            self.token_bucket.adjust(actual_tokens - estimated_tokens)
+
+    def on_rate_limited(self, retry_after: float | None = None) -> None:
+        """Pauses the queue until `retry_after` seconds elapsed, defaults to emptying the request bucket."""
+        self._metrics['rate_limited'] += 1
+        if retry_after is None:
+            retry_after = 1 / self.request_bucket.rate if self.request_bucket else 1.0
+        self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+        logger.warning(f'Rate limited {self.name or ""}, pausing requests for {retry_after:.2f}s')
+
+    async def run(
+            self,
+            func: typing.Callable[[], typing.Awaitable[typing.Any]],
+            *,
+            tokens: float = 0,
+            priority: Priority = Priority.INTERACTIVE,
+            usage_tokens: typing.Callable[[typing.Any], float | None] | None = None
+    ) -> typing.Any:
+        """
+        Runs the request within the quota, retrying rate limited and transient failures.
+
+        Args:
+            func: Coroutine function issuing the upstream request.
+            tokens: Estimated tokens of the request.
+            priority: Scheduling class of the request.
+            usage_tokens: Extracts the actual tokens from the result to reconcile the token bucket.
+        """
+        attempt = 0
+        while True:
+            await self.acquire(tokens=tokens, priority=priority)
+            try:
+                result = await func()
+            except Exception as ex:
+                rate_limited, retry_after = classify_error(ex)
+                if attempt >= self.max_retries or rate_limited is None:
+                    raise
+                attempt += 1
+                self._metrics['retries'] += 1
+                if rate_limited:
+                    self.on_rate_limited(retry_after)
+                else:
+                    await asyncio.sleep(min(2 ** attempt, 30) * random.uniform(0.5, 1))
+                continue
+            if usage_tokens:
+                self.reconcile(estimated_tokens=tokens, actual_tokens=usage_tokens(result))
+            return result
+
+    @property
+    def queue_length(self) -> int:
+        return len(self._waiters)
+
+    def stats(self) -> dict:
+        requests = self._metrics['requests']
+        return {
+            **self._metrics,
+            'queue_length': self.queue_length,
+            'queue_time_avg': self._metrics['queue_time_total'] / requests if requests else 0.0
+        }
+
+
+def _retry_after_from_headers(headers) -> float | None:
+    if not headers:
+        return None
+    retry_after_ms = headers.get('retry-after-ms')
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+    retry_after = headers.get('retry-after')
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            return None
+    return None
+
+
+def classify_error(ex: Exception) -> tuple[bool | None, float | None]:
+    """
+    Classifies an upstream error without importing the provider SDKs.
+
+    Returns:
+        tuple: (`True` for rate limit errors, `False` for transient errors, `None` for anything else
+            which must not be retried) and the `Retry-After` delay in seconds when the provider sent one.
+    """
+    status_code = getattr(ex, 'status_code', None)
+    if status_code is not None:
+        response = getattr(ex, 'response', None)
+        retry_after = _retry_after_from_headers(getattr(response, 'headers', None))
+        if status_code == 429:
+            return True, retry_after
+        if status_code >= 500:
+            return False, retry_after
+        return None, None
+
+    # botocore.exceptions.ClientError
+    response = getattr(ex, 'response', None)
+    if isinstance(response, dict):
+        code = response.get('Error', {}).get('Code')
+        headers = response.get('ResponseMetadata', {}).get('HTTPHeaders')
+        if code in _RATE_LIMIT_ERROR_CODES:
+            return True, _retry_after_from_headers(headers)
+        if code in _TRANSIENT_ERROR_CODES:
+            return False, _retry_after_from_headers(headers)
+
+    # Clients wrap the SDK error, e.g. `raise RuntimeError(...) from ex`
+    if ex.__cause__ is not None and ex.__cause__ is not ex:
+        return classify_error(ex.__cause__)
+    return None, None
+
+
+_schedulers: dict[str, RequestScheduler] = {}
+
+
+def get_scheduler(
+        key: str,
+        **limits
+) -> RequestScheduler:
+    """
+    Returns the process-wide scheduler of the model, so every `LLMClient` of the same model shares one quota.
+
+    The first client of the model sets the limits, the different limits of the later clients are ignored with a
+    warning.
+    """
+    scheduler = _schedulers.get(key)
+    if scheduler is None:
+        scheduler = _schedulers[key] = RequestScheduler(name=key, **limits)
+        return scheduler
+    requested = RequestScheduler(name=key, **limits).limits
+    if requested != scheduler.limits:
+        logger.warning(
+            f'Ignoring the rate limits {requested} of {key}, its shared scheduler already runs with {scheduler.limits}'
+        )
+    return scheduler
@@ -0,0 +1,66 @@
+import asyncio
+import logging
+import typing
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Collapses identical in-flight requests into one upstream call.
+
+    The first caller of a key starts the upstream call in its own task; callers arriving while it runs await the
+    same task and receive the same result or exception. A cancelled caller only stops waiting, the upstream call is
+    cancelled once every caller of the key went away.
+    """
+
+    def __init__(self):
+        self._calls: dict[str, _Call] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def _forget(self, key: str, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    async def do(
+            self,
+            key: str,
+            func: typing.Callable[[], typing.Awaitable[typing.Any]]
+    ) -> typing.Any:
+        call = self._calls.get(key)
+        if call is None or call.task.done():
+            call = _Call(asyncio.ensure_future(func()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _task: self._forget(key, call))
+            self.executed += 1
+        else:
+            self.coalesced += 1
+            logger.debug(f'Coalesced in-flight request {key}')
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+                self._forget(key, call)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def stats(self) -> dict:
+        return {
+            'executed': self.executed,
+            'coalesced': self.coalesced,
+            'in_flight': self.in_flight
+        }
@@ -0,0 +1,153 @@
+import logging
+import typing
+from datetime import datetime, timezone
+
+from openai.types.chat import ChatCompletionChunk
+
+from superagentx.llm.metrics import usage_cached_tokens
+from superagentx.llm.types.response import Message, Tool
+from superagentx.utils.helper import json_loads
+
+logger = logging.getLogger(__name__)
+
+
+class _ToolCallBuffer:
+
+    def __init__(self):
+        self.id: str | None = None
+        self.tool_type: str | None = None
+        self.name: str = ''
+        self.arguments: list[str] = []
+
+
+class _ChoiceBuffer:
+
+    def __init__(self):
+        self.role: str | None = None
+        self.content: list[str] = []
+        self.finish_reason: str | None = None
+        self.tool_calls: dict[int, _ToolCallBuffer] = {}
+
+
+class MessageStream:
+    """
+    Async iterator over the content deltas of a streamed chat completion.
+
+    Every `ChatCompletionChunk` is folded into per choice buffers while iterating, including incremental tool call
+    deltas (the tool name arrives first, the JSON arguments arrive in fragments). Once the stream is exhausted,
+    `messages()` returns the assembled `Message` objects, same as `LLMClient.afunc_chat_completion`.
+
+    Example:
+        stream = llm_client.afunc_chat_completion_stream(chat_completion_params=params)
+        async for delta in stream:
+            await ws_conn.send(delta)
+        messages = await stream.messages()
+    """
+
+    def __init__(
+            self,
+            chunks: typing.AsyncIterator[ChatCompletionChunk]
+    ):
+        self._chunks = chunks
+        self._choices: dict[int, _ChoiceBuffer] = {}
+        self._model: str | None = None
+        self._created: int | None = None
+        self._usage = None
+        self._exhausted = False
+
+    def __aiter__(self) -> typing.AsyncIterator[str]:
+        return self._iterate()
+
+    async def _iterate(self) -> typing.AsyncIterator[str]:
+        if self._exhausted:
+            return
+        async for chunk in self._chunks:
+            delta = self.add_chunk(chunk)
+            if delta:
+                yield delta
+        self._exhausted = True
+
+    def add_chunk(
+            self,
+            chunk: ChatCompletionChunk
+    ) -> str:
+        """
+        Folds the chunk into the buffers.
+
+        Returns:
+            str: Content delta of the chunk, empty string if the chunk carries no content.
+        """
+        self._model = chunk.model or self._model
+        self._created = chunk.created or self._created
+        if chunk.usage:
+            self._usage = chunk.usage
+        content_delta = []
+        for choice in chunk.choices:
+            buffer = self._choices.setdefault(choice.index, _ChoiceBuffer())
+            delta = choice.delta
+            if choice.finish_reason:
+                buffer.finish_reason = choice.finish_reason
+            if not delta:
+                continue
+            if delta.role:
+                buffer.role = delta.role
+            if delta.content:
+                buffer.content.append(delta.content)
+                content_delta.append(delta.content)
+            for tool_call in delta.tool_calls or []:
+                tool_buffer = buffer.tool_calls.setdefault(tool_call.index, _ToolCallBuffer())
+                if tool_call.id:
+                    tool_buffer.id = tool_call.id
+                if tool_call.type:
+                    tool_buffer.tool_type = tool_call.type
+                if tool_call.function:
+                    if tool_call.function.name:
+                        tool_buffer.name += tool_call.function.name
+                    if tool_call.function.arguments:
+                        tool_buffer.arguments.append(tool_call.function.arguments)
+        return ''.join(content_delta)
+
+    @staticmethod
+    def _build_tool(tool_buffer: _ToolCallBuffer) -> Tool:
+        arguments = ''.join(tool_buffer.arguments)
+        return Tool(
+            tool_type=tool_buffer.tool_type or 'function',
+            name=tool_buffer.name,
+            arguments=json_loads(arguments) if arguments else {}
+        )
+
+    async def messages(self) -> list[Message]:
+        """
+        Drains the remaining chunks and returns the assembled messages.
+        """
+        async for _ in self:
+            pass
+        created = datetime.fromtimestamp(self._created, tz=timezone.utc) if self._created else datetime.now(
+            tz=timezone.utc
+        )
+        usage = self._usage
+        message_instances = []
+        for index in sorted(self._choices):
+            buffer = self._choices[index]
+            tool_calls = [
+                self._build_tool(buffer.tool_calls[tool_index])
+                for tool_index in sorted(buffer.tool_calls)
+            ]
+            message_instances.append(
+                Message(
+                    role=buffer.role or 'assistant',
+                    model=self._model or '',
+                    content=''.join(buffer.content) if buffer.content else None,
+                    tool_calls=tool_calls or None,
+                    completion_tokens=usage.completion_tokens if usage else 0,
+                    prompt_tokens=usage.prompt_tokens if usage else 0,
+                    total_tokens=usage.total_tokens if usage else 0,
+                    reasoning_tokens=(
+                        usage.completion_tokens_details.reasoning_tokens or 0
+                        if usage and usage.completion_tokens_details else 0
+                    ),
+                    cached_tokens=usage_cached_tokens(usage),
+                    created=created
+                )
+            )
+        return message_instances
@@ -0,0 +1,181 @@
+import json
+import logging
+import math
+import typing
+
+from pydantic import BaseModel, Field
+
+from superagentx.utils.llm_config import LLMType
+
+logger = logging.getLogger(__name__)
+
+# OpenAI chat format overhead, tokens per message and priming of the assistant reply
+_TOKENS_PER_MESSAGE = 3
+_TOKENS_REPLY_PRIMING = 3
+_CHARS_PER_TOKEN = 4
+_DEFAULT_ENCODING = 'o200k_base'
+_TRIM_MARKER = '...'
+
+
+class TokenBudget(BaseModel):
+    max_prompt_tokens: int | None = Field(
+        description='Maximum tokens of the prompt, `None` when the call has no budget',
+        default=None
+    )
+    prompt_tokens: int = Field(
+        description='Estimated prompt tokens sent after trimming',
+        default=0
+    )
+    sections: dict[str, int] = Field(
+        description='Estimated tokens of each prompt section (messages, tools, context sections) after trimming',
+        default_factory=dict
+    )
+    trimmed: dict[str, int] = Field(
+        description='Tokens removed from each section to fit the budget',
+        default_factory=dict
+    )
+    exact: bool = Field(
+        description='Whether the counts come from the model tokenizer or from the heuristic estimation',
+        default=False
+    )
+
+    @property
+    def remaining(self) -> int | None:
+        if self.max_prompt_tokens is None:
+            return None
+        return self.max_prompt_tokens - self.prompt_tokens
+
+
+class TokenCounter:
+
+    def __init__(
+            self,
+            *,
+            model: str | None = None,
+            llm_type: str | None = None
+    ):
+        """
+        Counts prompt tokens before the request is sent.
+
+        OpenAI models are counted with `tiktoken` when it is installed (`pip install superagentx[tokens]`), other
+        models (e.g. Bedrock) and environments without `tiktoken` or its encodings use the ~4 characters per token
+        heuristic.
+
+        Args:
+            model: Model name used to select the tokenizer.
+            llm_type: LLM type of the client, e.g. `openai` or `bedrock`.
+        """
+        self.model = model
+        self.llm_type = llm_type
+        self._encoding = None
+        if llm_type in (None, LLMType.OPENAI_CLIENT, LLMType.AZURE_OPENAI_CLIENT):
+            self._encoding = self._load_encoding(model)
+
+    @staticmethod
+    def _load_encoding(model: str | None):
+        try:
+            import tiktoken
+        except ImportError:
+            return None
+        try:
+            try:
+                return tiktoken.encoding_for_model(model)
+            except KeyError:
+                # Unknown names, e.g. Azure deployments, use the encoding of the current OpenAI models
+                return tiktoken.get_encoding(_DEFAULT_ENCODING)
+        except Exception as ex:
+            # Encodings are downloaded on first use, offline environments fall back to the heuristic
+            logger.debug(f'Tokenizer not available for model {model}, using estimation.\n{ex}')
+            return None
+
+    @property
+    def exact(self) -> bool:
+        return self._encoding is not None
+
+    def count(self, text: str | None) -> int:
+        if not text:
+            return 0
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return math.ceil(len(text) / _CHARS_PER_TOKEN)
+
+    def count_message(self, message: typing.Any) -> int:
+        if isinstance(message, dict):
+            content = message.get('content')
+            role = message.get('role')
+        else:
+            content = getattr(message, 'content', None)
+            role = getattr(message, 'role', None)
+        if content is not None and not isinstance(content, str):
+            content = json.dumps(content, default=str)
+        return _TOKENS_PER_MESSAGE + self.count(role) + self.count(content)
+
+    def count_messages(self, messages: list[typing.Any]) -> int:
+        if not messages:
+            return 0
+        return sum(self.count_message(message) for message in messages) + _TOKENS_REPLY_PRIMING
+
+    def count_tools(self, tools: list[dict] | None) -> int:
+        if not tools:
+            return 0
+        return self.count(json.dumps(tools, separators=(',', ':'), default=str))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Keeps the beginning of the text within `max_tokens`, marking the cut with an ellipsis."""
+        if max_tokens <= 0:
+            return ''
+        if self.count(text) <= max_tokens:
+            return text
+        if self._encoding is not None:
+            tokens = self._encoding.encode(text, disallowed_special=())
+            return self._encoding.decode(tokens[:max(max_tokens - 1, 0)]) + _TRIM_MARKER
+        return text[:max((max_tokens - 1) * _CHARS_PER_TOKEN, 0)] + _TRIM_MARKER
+
+
+_counters: dict[tuple[str | None, str | None], TokenCounter] = {}
+
+
+def get_token_counter(
+        model: str | None = None,
+        llm_type: str | None = None
+) -> TokenCounter:
+    """Returns the process-wide counter of the model, tokenizers are expensive to load."""
+    key = (model, llm_type)
+    counter = _counters.get(key)
+    if counter is None:
+        counter = _counters[key] = TokenCounter(model=model, llm_type=llm_type)
+    return counter
+
+
+def fit_sections(
+        sections: dict[str, str | None],
+        *,
+        max_tokens: int,
+        counter: TokenCounter
+) -> tuple[dict[str, str], dict[str, int], dict[str, int]]:
+    """
+    Fits the context sections within `max_tokens`.
+
+    Sections are ordered by priority: the first sections are kept whole as long as they fit, the section crossing
+    the budget is truncated and the following sections are dropped, so sections are trimmed last-first.
+
+    Returns:
+        tuple: The fitted sections, the tokens of each fitted section and the tokens trimmed from each section.
+    """
+    fitted = {}
+    used = {}
+    trimmed = {}
+    remaining = max_tokens
+    for name, text in sections.items():
+        if not text:
+            continue
+        tokens = counter.count(text)
+        if tokens > remaining:
+            text = counter.truncate(text, remaining)
+            trimmed[name] = tokens - counter.count(text)
+            tokens = counter.count(text)
+        if text:
+            fitted[name] = text
+            used[name] = tokens
+            remaining -= tokens
+    return fitted, used, trimmed
@@ -67,6 +67,11 @@ class Message(BaseModel):
         description="Tokens generated by the model for reasoning."
     )
 
+    cached_tokens: int = Field(
+        default=0,
+        description="Prompt tokens read from the provider prompt cache, billed at the cached rate."
+    )
+
     created: datetime = Field(
         description="The timestamp when the message was created, in datetime format."
     )  # Updated created field as datetime
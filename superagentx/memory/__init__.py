@@ -1,20 +1,37 @@
+import asyncio
 import datetime
 import logging
+import uuid
 from enum import Enum
-from typing import Any, final
+from pathlib import Path
+from typing import Any, Literal, final
 
 from pydantic import ValidationError
 
 from superagentx.memory.base import MemoryBase, MemoryItem
+from superagentx.memory.cache import RecentWindowCache
 from superagentx.memory.config import MemoryConfig
-from superagentx.memory.storage import SQLiteManager
-from superagentx.utils.helper import iter_to_aiter
-from superagentx.vector_stores import ChromaDB
+from superagentx.memory.fusion import reciprocal_rank_fusion
+from superagentx.llm.models import ChatCompletionParams
+from superagentx.memory.storage import FILTER_COLUMNS, SQLiteManager
 from superagentx.vector_stores.base import BaseVectorStore
 
 logger = logging.getLogger(__name__)
 
 COLLECTION_NAME = "agent"
+SUMMARY_ROLE = "summary"
+# Characters kept of each message by the summary written without an LLM
+_EXTRACT_CHARS = 200
+# Latest messages returned by `Memory.recent` without a recent window
+_RECENT_LIMIT = 20
+# Share of deleted rows past which the vector store is rewritten by `Memory.compact`
+_VECTOR_DEAD_FRACTION = 0.25
+
+_SUMMARY_PROMPT = """Summarize the conversation below for the long-term memory of an assistant.
+
+Keep the facts, decisions, results and open questions. Keep identifiers, names, numbers and dates exactly as written.
+Earlier summaries are marked with `summary`, merge them in. Answer with the summary only, at most {max_chars} characters.
+"""
 
 
 class Memory(MemoryBase):
@@ -27,7 +44,21 @@ class Memory(MemoryBase):
         self.db = SQLiteManager(self.memory_config.db_path)
         self.vector_db: BaseVectorStore = self.memory_config.vector_store
         if not self.vector_db:
-            self.vector_db: BaseVectorStore = ChromaDB(collection_name=COLLECTION_NAME)
+            # In-process store next to the history database, in memory with an in-memory history. The collection is
+            # named after the database file, so the databases of a directory do not share their vector files
+            from superagentx.vector_stores.numpy_store import NumpyVectorStore
+
+            collection_name, vector_path = COLLECTION_NAME, None
+            if not self.db.is_memory:
+                db_path = Path(self.memory_config.db_path)
+                collection_name, vector_path = db_path.stem, db_path.parent / "vectors"
+            self.vector_db: BaseVectorStore = NumpyVectorStore(collection_name=collection_name, path=vector_path)
+        self.recent_cache: RecentWindowCache | None = None
+        if self.memory_config.recent_window > 0:
+            self.recent_cache = RecentWindowCache(
+                window=self.memory_config.recent_window,
+                max_chats=self.memory_config.recent_window_chats
+            )
 
     @staticmethod
     def _from_config(config_dict: dict[str, Any]):
@@ -40,14 +71,85 @@ class Memory(MemoryBase):
 
     @final
     async def add(self, *args, **kwargs):
-        async with self.db as db:
-            await db.add_history(*args, **kwargs)
+        # The history database keeps one connection for the life of the memory
+        item = await self.db.add_history(*args, **kwargs)
+        if self.recent_cache is not None:
+            self.recent_cache.append(item)
         await self._add_to_vector_store(*args, **kwargs)
+        max_messages = self.memory_config.max_messages_per_chat
+        if max_messages is not None:
+            memory_id, chat_id = kwargs.get("memory_id"), kwargs.get("chat_id")
+            if await self.db.count_history(memory_id=memory_id, chat_id=chat_id) > max_messages:
+                await self.compact(memory_id=memory_id, chat_id=chat_id)
 
     @final
     async def get(self, *args, **kwargs):
-        async with self.db as db:
-            return await db.get_history(*args, **kwargs)
+        memory_id, chat_id = kwargs.get("memory_id"), kwargs.get("chat_id")
+        if self.recent_cache is None or args or not (memory_id and chat_id):
+            return await self.db.get_history(*args, **kwargs)
+        # A window holding the whole chat session is the history
+        cached = self.recent_cache.get(memory_id, chat_id)
+        if cached is not None and cached[1]:
+            return cached[0] or None
+        version = self.recent_cache.version
+        rows = await self.db.get_history(memory_id=memory_id, chat_id=chat_id)
+        if cached is None:
+            self.recent_cache.put(
+                memory_id,
+                chat_id,
+                rows or [],
+                complete=len(rows or []) <= self.recent_cache.window,
+                version=version
+            )
+        return rows
+
+    async def recent(
+            self,
+            *,
+            memory_id: str,
+            chat_id: str,
+            limit: int | None = None
+    ) -> list[dict]:
+        """
+        Latest messages of the chat session, oldest first, served from the recent window cache when enabled.
+
+        Args:
+            memory_id: Memories of the user.
+            chat_id: Chat session.
+            limit: Number of messages, defaults to `MemoryConfig.recent_window`, or 20 without the window. More than
+                the window are read from the history database.
+        """
+        if limit is not None and limit <= 0:
+            raise ValueError(f'Invalid limit `{limit}`, at least one message.')
+        if self.recent_cache is None:
+            return await self.db.get_recent_history(
+                memory_id=memory_id,
+                chat_id=chat_id,
+                limit=limit or _RECENT_LIMIT
+            )
+        limit = limit or self.recent_cache.window
+        if limit <= self.recent_cache.window:
+            messages, _ = await self._recent_window(memory_id=memory_id, chat_id=chat_id)
+            return messages[-limit:]
+        return await self.db.get_recent_history(memory_id=memory_id, chat_id=chat_id, limit=limit)
+
+    async def _recent_window(
+            self,
+            *,
+            memory_id: str,
+            chat_id: str
+    ) -> tuple[list[dict], bool]:
+        cached = self.recent_cache.get(memory_id, chat_id)
+        if cached is not None:
+            return cached
+        version = self.recent_cache.version
+        window = self.recent_cache.window
+        # One message past the window tells whether the chat session has older messages
+        rows = await self.db.get_recent_history(memory_id=memory_id, chat_id=chat_id, limit=window + 1)
+        complete = len(rows) <= window
+        rows = rows[-window:]
+        self.recent_cache.put(memory_id, chat_id, rows, complete=complete, version=version)
+        return rows, complete
 
     @final
     async def update(self, memory_id, data):
@@ -55,14 +157,152 @@ class Memory(MemoryBase):
 
     @final
     async def delete(self, *args, **kwargs):
-        async with self.db as db:
-            await db.reset()
+        await self.db.reset()
         await self.vector_db.delete_collection()
+        if self.recent_cache is not None:
+            self.recent_cache.clear()
+
+    async def close(self):
+        """Closes the history database connection, the in-memory history is discarded with it."""
+        await self.db.close()
+        if self.recent_cache is not None:
+            self.recent_cache.clear()
+
+    async def compact(
+            self,
+            *,
+            memory_id: str | None = None,
+            chat_id: str | None = None
+    ) -> dict:
+        """
+        Merges the old messages of each chat session into a summary, so the history and the vector index stay
+        bounded.
+
+        The messages before the `keep_recent_messages` latest ones, and those older than `max_message_age`, are
+        replaced by one summary message, the previous summary included. The replaced messages are archived (or
+        deleted without `archive_compacted`) and their vectors deleted, the summary is added to the vector store.
+        A vector store with a `compact` method is rewritten without the deleted vectors once they hold a quarter of
+        its rows. Run it periodically, or set `max_messages_per_chat` to compact a chat session when a message is
+        added.
+
+        Args:
+            memory_id: Only the chat sessions of the user, defaults to every user.
+            chat_id: Only the chat session, requires the `memory_id`.
+
+        Returns:
+            dict
+                The compacted chat sessions and the replaced messages.
+        """
+        if chat_id is not None and memory_id is not None:
+            chats = [(memory_id, chat_id)]
+        else:
+            chats = await self.db.list_chats(memory_id=memory_id)
+        stats = {"chats": 0, "messages": 0}
+        for _memory_id, _chat_id in chats:
+            compacted = await self._compact_chat(memory_id=_memory_id, chat_id=_chat_id)
+            if compacted:
+                stats["chats"] += 1
+                stats["messages"] += compacted
+        if stats["chats"]:
+            logger.info(f"Memory compacted {stats['messages']} messages of {stats['chats']} chat sessions")
+            await self._compact_vector_store()
+        return stats
+
+    async def _compact_vector_store(self):
+        compact = getattr(self.vector_db, "compact", None)
+        if compact is None:
+            return
+        dead_fraction = getattr(self.vector_db, "dead_fraction", None)
+        if dead_fraction is None or dead_fraction >= _VECTOR_DEAD_FRACTION:
+            await compact()
+
+    def _compaction_rows(self, rows: list[dict]) -> list[dict]:
+        keep_recent = self.memory_config.keep_recent_messages
+        selected = rows[:-keep_recent] if keep_recent > 0 else list(rows)
+        max_age = self.memory_config.max_message_age
+        if max_age is not None:
+            cutoff = datetime.datetime.now() - datetime.timedelta(seconds=max_age)
+            recent = rows[len(selected):]
+            selected += [row for row in recent if datetime.datetime.fromisoformat(str(row["created_at"])) < cutoff]
+        return selected
+
+    async def _compact_chat(
+            self,
+            *,
+            memory_id: str,
+            chat_id: str
+    ) -> int:
+        rows = await self.db.get_history(memory_id=memory_id, chat_id=chat_id) or []
+        selected = self._compaction_rows(rows)
+        # A lone previous summary has nothing to merge
+        if not any(row["role"] != SUMMARY_ROLE for row in selected):
+            return 0
+        summary = {
+            "memory_id": memory_id,
+            "chat_id": chat_id,
+            "message_id": uuid.uuid4().hex,
+            "role": SUMMARY_ROLE,
+            "data": await self._summarize(selected),
+            "reason": (
+                f"Summary of {len(selected)} messages from {selected[0]['created_at']} to "
+                f"{selected[-1]['created_at']}"
+            ),
+            # In place of the summarized messages, before the recent ones
+            "created_at": selected[-1]["created_at"]
+        }
+        await self.db.compact_history(
+            ids=[row["id"] for row in selected],
+            summary=summary,
+            archive=self.memory_config.archive_compacted
+        )
+        # Indexed once the history holds the summary, a failed compaction leaves no orphan vector
+        await self._add_to_vector_store(**summary)
+        if self.recent_cache is not None:
+            self.recent_cache.invalidate(memory_id, chat_id)
+        try:
+            await self.vector_db.delete_vectors(ids=[row["message_id"] for row in selected])
+        except NotImplementedError:
+            logger.warning(f"Vector store {type(self.vector_db).__name__} cannot delete the compacted vectors")
+        return len(selected)
+
+    async def _summarize(self, rows: list[dict]) -> str:
+        max_chars = self.memory_config.summary_max_chars
+        llm = self.memory_config.summary_llm
+        if llm is not None:
+            transcript = "\n".join(f"{row['role']}: {row['data']}" for row in rows)
+            response = await llm.achat_completion(
+                chat_completion_params=ChatCompletionParams(
+                    messages=[
+                        {"role": "system", "content": _SUMMARY_PROMPT.format(max_chars=max_chars)},
+                        {"role": "user", "content": transcript}
+                    ]
+                )
+            )
+            content = response.choices[0].message.content if response and response.choices else None
+            if content:
+                return content.strip()[:max_chars]
+            logger.warning("Summary LLM returned no content, keeping the start of each message")
+        # The latest messages matter most, they are kept first when the summary is full
+        lines = []
+        size = 0
+        for row in reversed(rows):
+            data = str(row["data"])
+            if row["role"] != SUMMARY_ROLE and len(data) > _EXTRACT_CHARS:
+                data = f"{data[:_EXTRACT_CHARS]}..."
+            line = f"{row['role']}: {data}"
+            if size + len(line) > max_chars:
+                # The oldest kept message, e.g. a previous summary, is cut to the remaining space
+                if max_chars - size > 0:
+                    lines.append(line[:max_chars - size])
+                break
+            lines.append(line)
+            size += len(line) + 1
+        return "\n".join(reversed(lines))
 
     @staticmethod
     async def _get_history(memory_id: str, data) -> list[dict]:
         messages = []
-        async for _data in iter_to_aiter(data):
+        for _data in data:
             if memory_id == _data.get("memory_id"):
                 message_construct = f"Reason: {_data.get('reason')}\nResult: {_data.get('memory')}"
                 message = {
@@ -78,21 +318,99 @@ class Memory(MemoryBase):
             memory_id: str,
             chat_id: str,
             limit: int = 10,
-            filters: dict | None = None
+            filters: dict | None = None,
+            mode: Literal['hybrid', 'vector', 'keyword'] | None = None
     ) -> list[dict]:
+        """
+        Searches the memories of the user relevant to the query.
+
+        Args:
+            query: Text to search.
+            memory_id: Memories of the user.
+            chat_id: Chat session of the search.
+            limit: Maximum number of memories.
+            filters: Payload filters, applied to the history columns by the keyword search. Filters on other
+                payload keys are only known to the vector store, the search falls back to the `vector` mode.
+            mode: `vector` searches the vector store, `keyword` the FTS5 index of the history without a query
+                embedding, so exact identifiers like order numbers or emails are found. `hybrid` fuses both with
+                reciprocal rank fusion. Defaults to `MemoryConfig.search_mode`.
+
+        With a `MemoryConfig.recent_window`, the latest messages of the chat session come from the recent window
+        cache and follow the retrieved ones, the search retrieves the older messages of the chat session and of the
+        other chat sessions of the user.
+        """
+        mode = mode or self.memory_config.search_mode
+        if mode not in ('hybrid', 'vector', 'keyword'):
+            raise ValueError(f'Invalid search mode `{mode}`, use hybrid, vector or keyword.')
+        unsupported = set(filters or {}) - FILTER_COLUMNS
+        if mode != 'vector' and unsupported:
+            logger.info(f'Keyword search cannot filter on {sorted(unsupported)}, searching the vector store only')
+            mode = 'vector'
+        recent = []
+        # Payload filters select messages the window does not know about
+        if self.recent_cache is not None and memory_id and chat_id and not filters:
+            recent, _ = await self._recent_window(memory_id=memory_id, chat_id=chat_id)
         filters = filters or {}
         if memory_id:
             filters["memory_id"] = memory_id
-        result = await self._search_vector_store(
-            query=query,
-            filters=filters,
-            limit=limit
-        )
+        # The window messages found by the search are dropped, enough are retrieved to fill the limit
+        search_limit = limit + len(recent)
+        if mode == 'keyword':
+            result = await self._search_keyword(query=query, filters=filters, limit=search_limit)
+        elif mode == 'vector':
+            result = await self._search_vector_store(
+                query=query,
+                filters=filters,
+                limit=search_limit
+            )
+        else:
+            vector_result, keyword_result = await asyncio.gather(
+                self._search_vector_store(query=query, filters=filters, limit=search_limit),
+                self._search_keyword(query=query, filters=filters, limit=search_limit)
+            )
+            result = reciprocal_rank_fusion(
+                vector_result,
+                keyword_result,
+                k=self.memory_config.rrf_k,
+                limit=search_limit
+            )
+        if recent:
+            in_window = {row["message_id"] for row in recent}
+            result = [
+                item for item in result if item.get("message_id") not in in_window
+            ][:limit] + [self._history_item(row) for row in recent]
         return await self._get_history(
             memory_id=memory_id,
             data=result
         )
 
+    async def _search_keyword(
+            self,
+            query: str,
+            filters: dict,
+            limit: int
+    ) -> list[dict]:
+        rows = await self.db.search_history(query=query, filters=filters, limit=limit)
+        return [self._history_item(row) for row in rows]
+
+    @staticmethod
+    def _history_item(row: dict) -> dict:
+        # Keyed by the message id like the vector store items, so the same message fuses
+        return {
+            **MemoryItem(
+                id=row["message_id"],
+                memory=row["data"],
+                reason=row["reason"],
+                role=row["role"],
+                created_at=str(row["created_at"]),
+                updated_at=str(row["updated_at"]),
+                score=row.get("score"),
+            ).model_dump(),
+            "memory_id": row["memory_id"],
+            "chat_id": row["chat_id"],
+            "message_id": row["message_id"]
+        }
+
     async def _search_vector_store(
             self,
             query: str,
@@ -133,7 +451,7 @@ class Memory(MemoryBase):
                     else {}
                 ),
             }
-            async for mem in iter_to_aiter(memories)
+            for mem in memories
         ]
 
         return original_memories
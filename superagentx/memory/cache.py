@@ -0,0 +1,100 @@
+from collections import OrderedDict, deque
+
+
+class RecentWindowCache:
+    """
+    In-process LRU cache of the latest messages of each chat session.
+
+    Each chat keeps a window of its last `window` history items, oldest first, and whether the window holds the
+    whole chat. `Memory.add` appends to the windows of the cached chats, so they stay current without a read. The
+    least recently used chats are evicted past `max_chats`.
+
+    Args:
+        window: Latest messages kept per chat session.
+        max_chats: Maximum number of chat sessions kept.
+    """
+
+    def __init__(
+            self,
+            *,
+            window: int = 20,
+            max_chats: int = 1024
+    ):
+        self.window = window
+        self.max_chats = max_chats
+        self.hits = 0
+        self.misses = 0
+        self._chats: OrderedDict[tuple[str, str], tuple[deque, bool]] = OrderedDict()
+        # Incremented by every write, a window read before a write is not stored after it
+        self.version = 0
+
+    def get(self, memory_id: str, chat_id: str) -> tuple[list[dict], bool] | None:
+        """The window of the chat and whether it is the whole chat, `None` when the chat is not cached."""
+        entry = self._chats.get((memory_id, chat_id))
+        if entry is None:
+            self.misses += 1
+            return None
+        self._chats.move_to_end((memory_id, chat_id))
+        self.hits += 1
+        messages, complete = entry
+        return list(messages), complete
+
+    def put(
+            self,
+            memory_id: str,
+            chat_id: str,
+            messages: list[dict],
+            *,
+            complete: bool,
+            version: int
+    ) -> None:
+        """Stores the window read from the history, unless the cache was written since the `version` was taken."""
+        if version != self.version:
+            return
+        key = (memory_id, chat_id)
+        self._chats[key] = (deque(messages[-self.window:], maxlen=self.window), complete)
+        self._chats.move_to_end(key)
+        while len(self._chats) > self.max_chats:
+            self._chats.popitem(last=False)
+
+    def append(self, item: dict) -> None:
+        """Appends a message added to the history to the window of its chat, when the chat is cached."""
+        self.version += 1
+        key = (item["memory_id"], item["chat_id"])
+        entry = self._chats.get(key)
+        if entry is None:
+            return
+        messages, complete = entry
+        if messages and str(item["created_at"]) < str(messages[-1]["created_at"]):
+            # An older message belongs before the window, read it again
+            del self._chats[key]
+            return
+        if len(messages) == self.window:
+            complete = False
+        messages.append(item)
+        self._chats[key] = (messages, complete)
+
+    def invalidate(self, memory_id: str, chat_id: str | None = None) -> None:
+        """Drops the chat, or every chat of the user without a `chat_id`."""
+        self.version += 1
+        if chat_id is not None:
+            self._chats.pop((memory_id, chat_id), None)
+            return
+        for key in [key for key in self._chats if key[0] == memory_id]:
+            del self._chats[key]
+
+    def clear(self) -> None:
+        self.version += 1
+        self._chats.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'chats': len(self._chats),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+    def __len__(self):
+        return len(self._chats)
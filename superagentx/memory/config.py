@@ -1,7 +1,10 @@
 import os
 from pathlib import Path
+from typing import Literal
 
 from pydantic import BaseModel, Field
+
+from superagentx.llm import LLMClient
 from superagentx.vector_stores.base import BaseVectorStore
 
 
@@ -25,5 +28,55 @@ class MemoryConfig(BaseModel):
         default=_db_path(),
     )
 
+    search_mode: Literal['hybrid', 'vector', 'keyword'] = Field(
+        description="Default retrieval of `Memory.search`, keyword search needs no query embedding",
+        default='hybrid',
+    )
+
+    rrf_k: int = Field(
+        description="Rank constant of the reciprocal rank fusion of the hybrid search",
+        default=60,
+    )
+
+    max_messages_per_chat: int | None = Field(
+        description="Messages of a chat session that trigger its compaction when added, `None` never compacts on add",
+        default=None,
+    )
+
+    keep_recent_messages: int = Field(
+        description="Latest messages of a chat session kept as they are by the compaction",
+        default=20,
+    )
+
+    max_message_age: float | None = Field(
+        description="Seconds after which the compaction summarizes a message, even among the latest ones",
+        default=None,
+    )
+
+    archive_compacted: bool = Field(
+        description="Keep the summarized messages in the archive table instead of deleting them",
+        default=True,
+    )
+
+    summary_llm: LLMClient | None = Field(
+        description="LLM writing the summaries, without it the summary keeps the start of each message",
+        default=None,
+    )
+
+    summary_max_chars: int = Field(
+        description="Maximum characters of a summary",
+        default=2000,
+    )
+
+    recent_window: int = Field(
+        description="Latest messages of each chat session cached in memory and returned by search, 0 disables it",
+        default=0,
+    )
+
+    recent_window_chats: int = Field(
+        description="Chat sessions kept in the recent window cache, least recently used first evicted",
+        default=1024,
+    )
+
     class Config:
         arbitrary_types_allowed = True
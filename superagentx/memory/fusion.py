@@ -0,0 +1,42 @@
+import typing
+
+# Constant of the reciprocal rank fusion paper (Cormack et al., 2009), it damps the weight of the top ranks
+RRF_K = 60
+
+
+def reciprocal_rank_fusion(
+        *rankings: list[dict],
+        key: str = 'id',
+        k: int = RRF_K,
+        limit: int | None = None
+) -> list[dict]:
+    """
+    Fuses ranked result lists with reciprocal rank fusion, each result scores the sum of `1 / (k + rank)` over the
+    lists containing it. Only the ranks are used, so lists with incomparable scores, e.g. vector similarity and
+    BM25, fuse without normalization.
+
+    Args:
+        rankings: Result lists, best result first.
+        key: Key identifying the same result in the lists.
+        k: Rank constant, higher values flatten the difference between the top ranks.
+        limit: Maximum number of results, defaults to all of them.
+
+    Returns:
+        list[dict]
+            The results by fused score, the first list's item is kept for results found in several lists, with
+            the fused `score` and the `ranks` of the result in each list (`None` when missing).
+    """
+    fused: dict[typing.Any, dict] = {}
+    for position, ranking in enumerate(rankings):
+        for rank, item in enumerate(ranking, start=1):
+            entry = fused.get(item[key])
+            if entry is None:
+                entry = fused[item[key]] = {
+                    **item,
+                    'score': 0.0,
+                    'ranks': [None] * len(rankings)
+                }
+            entry['score'] += 1.0 / (k + rank)
+            entry['ranks'][position] = rank
+    results = sorted(fused.values(), key=lambda entry: entry['score'], reverse=True)
+    return results[:limit] if limit is not None else results
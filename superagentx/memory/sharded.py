@@ -0,0 +1,265 @@
+import asyncio
+import contextlib
+import hashlib
+import logging
+import re
+import shutil
+import typing
+from collections import OrderedDict
+from pathlib import Path
+
+from superagentx.memory import Memory
+from superagentx.memory.base import MemoryBase
+from superagentx.memory.config import MemoryConfig
+from superagentx.vector_stores.base import BaseVectorStore
+
+logger = logging.getLogger(__name__)
+
+_HISTORY_FILE = "history.db"
+_SAFE_SHARD = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$")
+
+
+def shard_name(tenant: str) -> str:
+    """Directory name of the tenant, the tenant itself when it is a safe file name, its digest otherwise."""
+    if _SAFE_SHARD.match(tenant):
+        return tenant
+    return hashlib.sha256(tenant.encode("utf-8")).hexdigest()[:32]
+
+
+class ShardedMemory(MemoryBase):
+
+    def __init__(
+            self,
+            memory_config: MemoryConfig = MemoryConfig(),
+            *,
+            shard_dir: str | Path | None = None,
+            tenant_key: typing.Callable[[str], str] | None = None,
+            vector_store_factory: typing.Callable[[str], BaseVectorStore] | None = None,
+            max_open_shards: int = 64
+    ):
+        """
+        Memory partitioned by tenant, each tenant has its own history database and vector collection.
+
+        Every call is routed by the `memory_id` to the `Memory` of its tenant, so a busy tenant never scans or locks
+        the history of the others, and deleting or exporting a tenant only touches its own files. The shards are
+        directories of `shard_dir`, named by the tenant, and are opened on first use. The least recently used idle
+        shards are closed past `max_open_shards` and reopened transparently.
+
+        Args:
+            memory_config: Configuration of every shard, the `db_path` and `vector_store` are set per shard.
+            shard_dir: Directory of the shards, defaults to the directory of `memory_config.db_path`. Without a
+                directory, an in-memory `db_path`, the shards are in memory and never closed.
+            tenant_key: Tenant of a `memory_id`, defaults to the `memory_id` itself.
+            vector_store_factory: Vector store of a shard name, defaults to the `Memory` default store in the
+                shard directory.
+            max_open_shards: Shards kept open, each holds a database connection.
+        """
+        if memory_config.vector_store is not None and vector_store_factory is None:
+            raise ValueError("A shared vector store cannot be sharded, use `vector_store_factory` instead.")
+        self.memory_config = memory_config
+        if shard_dir is None and memory_config.db_path != ":memory:":
+            shard_dir = Path(memory_config.db_path).parent / "shards"
+        self.shard_dir = Path(shard_dir) if shard_dir is not None else None
+        self.tenant_key = tenant_key or (lambda memory_id: memory_id)
+        self.vector_store_factory = vector_store_factory
+        self.max_open_shards = max(max_open_shards, 1)
+        self._shards: OrderedDict[str, Memory] = OrderedDict()
+        self._in_use: dict[str, int] = {}
+        self._lock = asyncio.Lock()
+        # Notified when a shard is released or deleted, a deletion waits for the users of the shard
+        self._released = asyncio.Condition(self._lock)
+        self._deleting: set[str] = set()
+
+    def _shard_name(self, memory_id: str) -> str:
+        if not memory_id:
+            raise ValueError("Sharded memory requires the `memory_id`.")
+        return shard_name(self.tenant_key(memory_id))
+
+    def _shard_path(self, name: str) -> Path | None:
+        return self.shard_dir / name if self.shard_dir is not None else None
+
+    def _open(self, name: str) -> Memory:
+        path = self._shard_path(name)
+        config = self.memory_config.model_copy(
+            update={
+                "db_path": str(path / _HISTORY_FILE) if path is not None else ":memory:",
+                "vector_store": self.vector_store_factory(name) if self.vector_store_factory else None
+            }
+        )
+        logger.debug(f"Opening memory shard {name}")
+        return Memory(config)
+
+    async def _close(self, memory: Memory) -> None:
+        await memory.close()
+        flush = getattr(memory.vector_db, "flush", None)
+        if flush is not None:
+            flush()
+
+    async def _evict(self) -> None:
+        # In-memory shards hold their only copy, they are kept
+        if self.shard_dir is None:
+            return
+        for name in list(self._shards):
+            if len(self._shards) <= self.max_open_shards:
+                break
+            if not self._in_use.get(name):
+                await self._close(self._shards.pop(name))
+
+    @contextlib.asynccontextmanager
+    async def _use(self, name: str) -> typing.AsyncIterator[Memory]:
+        async with self._released:
+            await self._released.wait_for(lambda: name not in self._deleting)
+            memory = self._shards.get(name)
+            if memory is None:
+                memory = self._shards[name] = self._open(name)
+            self._shards.move_to_end(name)
+            self._in_use[name] = self._in_use.get(name, 0) + 1
+            await self._evict()
+        try:
+            yield memory
+        finally:
+            async with self._released:
+                self._in_use[name] -= 1
+                if not self._in_use[name]:
+                    del self._in_use[name]
+                    self._released.notify_all()
+
+    def shard(self, memory_id: str) -> typing.AsyncContextManager[Memory]:
+        """Memory of the tenant of the `memory_id`, kept open while the `async with` block runs."""
+        return self._use(self._shard_name(memory_id))
+
+    def shards(self) -> list[str]:
+        """Names of the open shards and of those stored in the shard directory."""
+        names = set(self._shards)
+        if self.shard_dir is not None and self.shard_dir.exists():
+            names.update(path.name for path in self.shard_dir.iterdir() if (path / _HISTORY_FILE).exists())
+        return sorted(names)
+
+    async def add(self, *args, **kwargs):
+        async with self.shard(kwargs.get("memory_id")) as memory:
+            await memory.add(*args, **kwargs)
+
+    async def get(self, *args, **kwargs):
+        async with self.shard(kwargs.get("memory_id")) as memory:
+            return await memory.get(*args, **kwargs)
+
+    async def recent(self, *, memory_id: str, **kwargs) -> list[dict]:
+        """Latest messages of the chat session, see `Memory.recent`."""
+        async with self.shard(memory_id) as memory:
+            return await memory.recent(memory_id=memory_id, **kwargs)
+
+    async def update(self, memory_id, data):
+        pass
+
+    async def search(
+            self,
+            query: str,
+            memory_id: str,
+            chat_id: str,
+            **kwargs
+    ) -> list[dict]:
+        """Searches the memories of the user in its shard only, see `Memory.search`."""
+        async with self.shard(memory_id) as memory:
+            return await memory.search(query=query, memory_id=memory_id, chat_id=chat_id, **kwargs)
+
+    async def compact(
+            self,
+            *,
+            memory_id: str | None = None,
+            chat_id: str | None = None
+    ) -> dict:
+        """Compacts the chat sessions of the user, or of every shard without a `memory_id`, see `Memory.compact`."""
+        if memory_id is not None:
+            async with self.shard(memory_id) as memory:
+                return await memory.compact(memory_id=memory_id, chat_id=chat_id)
+        stats = {"chats": 0, "messages": 0}
+        for name in self.shards():
+            async with self._use(name) as memory:
+                shard_stats = await memory.compact()
+            stats["chats"] += shard_stats["chats"]
+            stats["messages"] += shard_stats["messages"]
+        return stats
+
+    async def delete(self, *args, memory_id: str | None = None, **kwargs):
+        """Deletes the shard of the user, or every shard without a `memory_id`."""
+        if memory_id is not None:
+            await self.delete_tenant(memory_id)
+            return
+        for name in self.shards():
+            await self._delete_shard(name)
+
+    async def delete_tenant(self, memory_id: str):
+        """
+        Deletes the history and the vectors of the tenant of the `memory_id`, the other shards are untouched.
+
+        The deletion waits until the calls using the shard are done, the calls arriving meanwhile wait for the
+        deletion. Do not call it inside a `shard` block of the same tenant.
+        """
+        await self._delete_shard(self._shard_name(memory_id))
+
+    async def _delete_shard(self, name: str):
+        async with self._released:
+            await self._released.wait_for(lambda: name not in self._deleting)
+            self._deleting.add(name)
+            await self._released.wait_for(lambda: not self._in_use.get(name))
+            memory = self._shards.pop(name, None)
+        try:
+            if memory is not None:
+                # Custom vector stores may live outside the shard directory
+                await memory.vector_db.delete_collection()
+                await memory.close()
+            elif self.vector_store_factory is not None:
+                await self.vector_store_factory(name).delete_collection()
+            path = self._shard_path(name)
+            if path is not None and path.exists():
+                await asyncio.to_thread(shutil.rmtree, path)
+        finally:
+            async with self._released:
+                self._deleting.discard(name)
+                self._released.notify_all()
+        logger.info(f"Deleted memory shard {name}")
+
+    async def export_tenant(
+            self,
+            memory_id: str,
+            destination: str | Path
+    ) -> Path:
+        """
+        Copies the shard of the tenant of the `memory_id` to a directory, a shard directory itself.
+
+        The history is copied consistently while the shard stays in use, the vector files are copied after a flush.
+
+        Args:
+            memory_id: User of the tenant.
+            destination: Directory of the copy, it must not exist.
+
+        Returns:
+            Path
+                The directory of the copy.
+        """
+        if self.shard_dir is None:
+            raise ValueError("In-memory shards cannot be exported, set the `shard_dir`.")
+        destination = Path(destination)
+        if destination.exists():
+            raise FileExistsError(f"Export destination {destination} already exists")
+        name = self._shard_name(memory_id)
+        async with self._use(name) as memory:
+            await memory.db.export(destination / _HISTORY_FILE)
+            flush = getattr(memory.vector_db, "flush", None)
+            if flush is not None:
+                flush()
+            await asyncio.to_thread(
+                shutil.copytree,
+                self._shard_path(name),
+                destination,
+                ignore=shutil.ignore_patterns(f"{_HISTORY_FILE}*"),
+                dirs_exist_ok=True
+            )
+        return destination
+
+    async def close(self):
+        """Closes every open shard."""
+        async with self._lock:
+            shards, self._shards = list(self._shards.values()), OrderedDict()
+        for memory in shards:
+            await self._close(memory)
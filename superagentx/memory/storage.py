@@ -1,40 +1,236 @@
+import asyncio
 import datetime
+import re
 import uuid
 from enum import Enum
 from pathlib import Path
 
 import aiosqlite
 
-from superagentx.utils.helper import iter_to_aiter
+# Applied to every connection. WAL lets readers run alongside the writer and `NORMAL` sync is durable in WAL mode
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'temp_store': 'MEMORY',
+    'cache_size': -16000,
+    'busy_timeout': 5000
+}
+# Prepared statements kept per connection, the statements below are compiled once
+_CACHED_STATEMENTS = 256
+
+_CREATE_HISTORY = """
+    CREATE TABLE IF NOT EXISTS history (
+        id TEXT PRIMARY KEY,
+        memory_id TEXT,
+        chat_id TEXT,
+        message_id TEXT,
+        created_at DATETIME,
+        updated_at DATETIME,
+        role TEXT,
+        data TEXT,
+        reason TEXT,
+        is_deleted BOOLEAN
+    )
+"""
+
+# Schema migrations, the statements of version `n` are at index `n - 1`. The applied version is kept in
+# `PRAGMA user_version`, append new versions and never edit the applied ones.
+_MIGRATIONS: list[tuple[str, ...]] = [
+    (_CREATE_HISTORY,),
+    (
+        # History of a chat in order and of a memory by update, both read from the index without a sort
+        "CREATE INDEX IF NOT EXISTS idx_history_memory_chat_created ON history (memory_id, chat_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_history_memory_updated ON history (memory_id, updated_at)",
+    ),
+    (
+        # Keyword index of the messages, an external content table kept in sync by the triggers
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5(
+            data, reason, content='history', content_rowid='rowid', tokenize='unicode61'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS history_fts_insert AFTER INSERT ON history BEGIN
+            INSERT INTO history_fts (rowid, data, reason) VALUES (new.rowid, new.data, new.reason);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS history_fts_delete AFTER DELETE ON history BEGIN
+            INSERT INTO history_fts (history_fts, rowid, data, reason) VALUES ('delete', old.rowid, old.data, old.reason);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS history_fts_update AFTER UPDATE OF data, reason ON history BEGIN
+            INSERT INTO history_fts (history_fts, rowid, data, reason) VALUES ('delete', old.rowid, old.data, old.reason);
+            INSERT INTO history_fts (rowid, data, reason) VALUES (new.rowid, new.data, new.reason);
+        END
+        """,
+        # Messages stored before the index
+        "INSERT INTO history_fts (history_fts) VALUES ('rebuild')",
+    ),
+    (
+        # Messages replaced by a summary in the compaction, with the id of the summary
+        """
+        CREATE TABLE IF NOT EXISTS history_archive (
+            id TEXT PRIMARY KEY,
+            memory_id TEXT,
+            chat_id TEXT,
+            message_id TEXT,
+            created_at DATETIME,
+            updated_at DATETIME,
+            role TEXT,
+            data TEXT,
+            reason TEXT,
+            is_deleted BOOLEAN,
+            summary_id TEXT,
+            archived_at DATETIME
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_history_archive_summary ON history_archive (summary_id)",
+    ),
+]
+SCHEMA_VERSION = len(_MIGRATIONS)
+_SELECT_HISTORY = """
+    SELECT id, memory_id, chat_id, message_id, role, data, reason, created_at, updated_at, is_deleted
+    FROM history
+    WHERE memory_id = ? AND chat_id = ?
+    ORDER BY created_at ASC
+"""
+_SELECT_USER_HISTORY = """
+    SELECT id, memory_id, chat_id, message_id, role, data, reason, created_at, updated_at, is_deleted
+    FROM history
+    WHERE memory_id = ?
+    ORDER BY updated_at ASC
+"""
+# bm25 is lower for better matches, the score is negated so higher is better like the vector scores
+_SEARCH_HISTORY = """
+    SELECT history.id, history.memory_id, history.chat_id, history.message_id, history.role, history.data,
+        history.reason, history.created_at, history.updated_at, history.is_deleted, -bm25(history_fts) AS score
+    FROM history_fts
+    JOIN history ON history.rowid = history_fts.rowid
+    WHERE history_fts MATCH ? {filters}
+    ORDER BY bm25(history_fts)
+    LIMIT ?
+"""
+# Latest messages of a chat, read backwards from the (memory_id, chat_id, created_at) index
+_SELECT_RECENT_HISTORY = """
+    SELECT id, memory_id, chat_id, message_id, role, data, reason, created_at, updated_at, is_deleted
+    FROM history
+    WHERE memory_id = ? AND chat_id = ?
+    ORDER BY created_at DESC
+    LIMIT ?
+"""
+_COUNT_HISTORY = "SELECT COUNT(*) FROM history WHERE memory_id = ? AND chat_id = ?"
+_ARCHIVE_HISTORY = """
+    INSERT INTO history_archive (id, memory_id, chat_id, message_id, created_at, updated_at, role, data, reason,
+        is_deleted, summary_id, archived_at)
+    SELECT id, memory_id, chat_id, message_id, created_at, updated_at, role, data, reason, is_deleted, ?, ?
+    FROM history
+    WHERE id IN ({placeholders})
+"""
+_SELECT_ARCHIVE = """
+    SELECT id, memory_id, chat_id, message_id, role, data, reason, created_at, updated_at, is_deleted
+    FROM history_archive
+    WHERE summary_id = ?
+    ORDER BY created_at ASC
+"""
+# Columns of the history the keyword search filters on, the payload keys of the vector store of the same name
+FILTER_COLUMNS = frozenset({
+    "memory_id", "chat_id", "message_id", "role", "data", "reason", "created_at", "updated_at", "is_deleted"
+})
+_INSERT_HISTORY = """
+    INSERT INTO history (id, memory_id, chat_id, message_id, role, data, reason, created_at, updated_at, is_deleted)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def fts_query(query: str) -> str | None:
+    """
+    FTS5 query matching any term of the text. Each term is quoted, so identifiers like `ORD-1042` or
+    `jane@example.com` match as a phrase of their tokens and the FTS5 operators of the text are not interpreted.
+    """
+    terms = [term for term in re.split(r"\s+", query.strip()) if re.search(r"\w", term)]
+    if not terms:
+        return None
+    return " OR ".join('"' + term.replace('"', '""') + '"' for term in terms)
 
 
 class SQLiteManager:
     """
     A class to manage SQLite database connections.
 
-    This class provides functionality to establish and manage a connection
-    to an SQLite database, either in memory or from a file.
+    This class keeps one long-lived connection to an SQLite database, either in memory or from a file. The
+    connection is opened on first use with the pragmas applied and the schema created once, later calls reuse it
+    and its prepared statements. An in-memory database lives as long as the connection, so its history is kept
+    until `close`. The writes share the transaction of the connection, so each one holds a lock from its first
+    statement until its commit or rollback, and a commit cannot land in the middle of another write.
 
     """
     def __init__(
             self,
-            db_path: str | Path = ":memory:"
+            db_path: str | Path = ":memory:",
+            *,
+            pragmas: dict | None = None
     ):
         self.db_path = db_path
+        self.pragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
         self.connection: aiosqlite.Connection | None = None
+        self._connect_lock = asyncio.Lock()
+        self._write_lock = asyncio.Lock()
+        # Whether each open `async with` block opened the connection, only those close it on exit
+        self._context_opened: list[bool] = []
         """
         Parameters:
             db_path : str, optional
                 The file path to the SQLite database. Defaults to ":memory:" 
-                for an in-memory database.
+                for an in-memory database. `file:` URIs are supported, e.g.
+                "file:history?mode=memory&cache=shared" for an in-memory database shared by connections.
+            pragmas : dict, optional
+                PRAGMA statements applied to the connection. Defaults to `DEFAULT_PRAGMAS`, WAL mode is
+                ignored by in-memory databases.
         """
 
+    @property
+    def is_memory(self) -> bool:
+        db_path = str(self.db_path)
+        return db_path == ":memory:" or (db_path.startswith("file:") and "mode=memory" in db_path)
+
+    async def connect(self) -> aiosqlite.Connection:
+        """
+        Opens the connection on first use, applies the pragmas and creates the schema. Later calls return the open
+        connection.
+        """
+        if self.connection is not None:
+            return self.connection
+        async with self._connect_lock:
+            if self.connection is None:
+                db_path = str(self.db_path)
+                if not self.is_memory:
+                    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+                connection = aiosqlite.connect(
+                    database=db_path,
+                    check_same_thread=False,
+                    uri=db_path.startswith("file:"),
+                    cached_statements=_CACHED_STATEMENTS
+                )
+                # The worker thread of a connection left open does not hold the interpreter at exit
+                connection.daemon = True
+                connection = await connection
+                for name, value in self.pragmas.items():
+                    await connection.execute(f"PRAGMA {name}={value}")
+                self.connection = connection
+                await self.create_table()
+        return self.connection
+
+    async def close(self):
+        """Closes the connection, an in-memory database is discarded with it."""
+        if self.connection is not None:
+            connection, self.connection = self.connection, None
+            await connection.close()
+
     async def __aenter__(self):
-        self.connection = await aiosqlite.connect(
-            database=self.db_path,
-            check_same_thread=False
-        )
-        await self.create_table()
+        self._context_opened.append(self.connection is None)
+        await self.connect()
         return self
 
     async def __aexit__(
@@ -43,7 +239,9 @@ class SQLiteManager:
             exc_val,
             exc_tb
     ):
-        await self.connection.close()
+        # A connection opened before the block stays open for its owner
+        if self._context_opened.pop():
+            await self.close()
 
     async def create_table(self):
         """
@@ -58,23 +256,24 @@ class SQLiteManager:
         ------
         This method is asynchronous, meaning it must be awaited and
         should be run within an asynchronous event loop.
+
+        The schema is versioned, the migrations newer than the `user_version` of the database are applied in one
+        transaction, so databases created by older versions get the new indexes on first open.
         """
-        await self.connection.execute(
-            """
-            CREATE TABLE IF NOT EXISTS history (
-                id TEXT PRIMARY KEY,
-                memory_id TEXT,
-                chat_id TEXT,
-                message_id TEXT,
-                created_at DATETIME,
-                updated_at DATETIME,
-                role TEXT,
-                data TEXT,
-                reason TEXT,
-                is_deleted BOOLEAN
-            )
-        """
-        )
+        rows = await self.connection.execute_fetchall("PRAGMA user_version")
+        version = rows[0][0]
+        if version >= SCHEMA_VERSION:
+            return
+        try:
+            await self.connection.execute("BEGIN")
+            for statements in _MIGRATIONS[version:]:
+                for statement in statements:
+                    await self.connection.execute(statement)
+            await self.connection.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+            await self.connection.commit()
+        except Exception:
+            await self.connection.rollback()
+            raise
 
     async def get_history(
             self,
@@ -91,32 +290,47 @@ class SQLiteManager:
             chat_id : str
                 The unique identifier of the chat session to retrieve the history from.
         """
-        cursor = await self.connection.execute(
-            """
-            SELECT id, memory_id, chat_id, message_id, role, data, reason, created_at, updated_at, is_deleted
-            FROM history
-            WHERE memory_id = ? AND chat_id = ?
-            ORDER BY created_at ASC
-        """,
-            (memory_id, chat_id),
-        )
-        rows = await cursor.fetchall()
+        connection = await self.connect()
+        rows = await connection.execute_fetchall(_SELECT_HISTORY, (memory_id, chat_id))
         if rows:
-            return [
-                {
-                    "id": row[0],
-                    "memory_id": row[1],
-                    "chat_id": row[2],
-                    "message_id": row[3],
-                    "role": row[4],
-                    "data": row[5],
-                    "reason": row[6],
-                    "created_at": row[7],
-                    "updated_at": row[8],
-                    "is_deleted": row[9]
-                }
-                async for row in iter_to_aiter(rows)
-            ]
+            return [self._to_item(row) for row in rows]
+
+    async def get_recent_history(
+            self,
+            *,
+            memory_id: str,
+            chat_id: str,
+            limit: int
+    ) -> list[dict]:
+        """
+        Asynchronously retrieves the latest messages of a chat session, oldest first.
+
+        Parameters:
+            memory_id : str
+                The unique identifier of the user whose chat history is being requested.
+            chat_id : str
+                The unique identifier of the chat session to retrieve the history from.
+            limit : int
+                The number of latest messages.
+        """
+        connection = await self.connect()
+        rows = await connection.execute_fetchall(_SELECT_RECENT_HISTORY, (memory_id, chat_id, limit))
+        return [self._to_item(row) for row in reversed(rows)]
+
+    @staticmethod
+    def _to_item(row) -> dict:
+        return {
+            "id": row[0],
+            "memory_id": row[1],
+            "chat_id": row[2],
+            "message_id": row[3],
+            "role": row[4],
+            "data": row[5],
+            "reason": row[6],
+            "created_at": row[7],
+            "updated_at": row[8],
+            "is_deleted": row[9]
+        }
 
     async def _get_user_by_id(
             self,
@@ -133,25 +347,23 @@ class SQLiteManager:
                 The unique identifier of the user to be retrieved.
 
         """
-        cursor = await self.connection.execute(
-                """
-                SELECT id, memory_id, chat_id, message_id, role, data, reason, created_at, updated_at, is_deleted
-                FROM history
-                WHERE memory_id = ?
-                ORDER BY updated_at ASC
-            """,
-                (memory_id,),
-        )
-        return await cursor.fetchall()
+        connection = await self.connect()
+        return await connection.execute_fetchall(_SELECT_USER_HISTORY, (memory_id,))
 
     async def reset(self):
         """
         Asynchronously resets the database by dropping the history table.
 
         This method will execute an SQL query to drop the `history` table if it exists,
-        effectively clearing the stored chat history.
+        effectively clearing the stored chat history and its archive. The tables are created again empty.
         """
-        await self.connection.execute("DROP TABLE IF EXISTS history")
+        connection = await self.connect()
+        async with self._write_lock:
+            await connection.execute("DROP TABLE IF EXISTS history_fts")
+            await connection.execute("DROP TABLE IF EXISTS history")
+            await connection.execute("DROP TABLE IF EXISTS history_archive")
+            await connection.execute("PRAGMA user_version=0")
+            await self.create_table()
 
     async def add_history(
             self,
@@ -197,22 +409,257 @@ class SQLiteManager:
             created_at = datetime.datetime.now()
         if not updated_at:
             updated_at = datetime.datetime.now()
-        await self.connection.execute(
-            """
-            INSERT INTO history (id, memory_id, chat_id, message_id, role, data, reason, created_at, updated_at, is_deleted)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
+        connection = await self.connect()
+        row = (
+            uuid.uuid4().hex,
+            memory_id,
+            chat_id,
+            message_id,
+            role,
+            data,
+            reason,
+            created_at,
+            updated_at,
+            is_deleted
+        )
+        async with self._write_lock:
+            try:
+                await connection.execute(_INSERT_HISTORY, row)
+                await connection.commit()
+            except Exception:
+                await connection.rollback()
+                raise
+        # The item as `get_history` reads it back, the values stored as SQLite stores them
+        return self._to_item((
+            *row[:4],
+            role.value if isinstance(role, Enum) else role,
+            data,
+            reason,
+            str(created_at),
+            str(updated_at),
+            int(is_deleted)
+        ))
+
+    async def add_history_many(
+            self,
+            items: list[dict]
+    ):
+        """
+        Asynchronously adds several messages to the chat history in one transaction.
+
+        The rows are inserted with a single `executemany` and one commit, much faster than `add_history` per
+        message, e.g. to import a conversation. Either every message is stored or none.
+
+        Parameters:
+            items : list[dict]
+                The messages, each with the keyword arguments of `add_history`.
+        """
+        if not items:
+            return
+        now = datetime.datetime.now()
+        rows = [
             (
                 uuid.uuid4().hex,
-                memory_id,
-                chat_id,
-                message_id,
-                role,
-                data,
-                reason,
-                created_at,
-                updated_at,
-                is_deleted
-            ),
-        )
-        await self.connection.commit()
+                item["memory_id"],
+                item["chat_id"],
+                item["message_id"],
+                item["role"],
+                item["data"],
+                item["reason"],
+                item.get("created_at") or now,
+                item.get("updated_at") or now,
+                item.get("is_deleted", False)
+            )
+            for item in items
+        ]
+        connection = await self.connect()
+        async with self._write_lock:
+            try:
+                await connection.executemany(_INSERT_HISTORY, rows)
+                await connection.commit()
+            except Exception:
+                await connection.rollback()
+                raise
+
+    async def search_history(
+            self,
+            *,
+            query: str,
+            memory_id: str | None = None,
+            chat_id: str | None = None,
+            filters: dict | None = None,
+            limit: int = 10
+    ) -> list[dict]:
+        """
+        Asynchronously searches the messages and reasons with the FTS5 keyword index, best matches first.
+
+        Exact identifiers such as ticker symbols, order numbers or emails are found without a query embedding.
+
+        Parameters:
+            query : str
+                The text to search, messages matching any of its terms are returned ranked by BM25.
+            memory_id : str, optional
+                Only the messages of the user.
+            chat_id : str, optional
+                Only the messages of the chat session.
+            filters : dict, optional
+                Values of the `FILTER_COLUMNS` the messages must have, like the vector store filters:
+                `{column: value}`, `{column: [values]}` or `{column: {'$in': [values]}}`.
+            limit : int, optional
+                The maximum number of messages. Defaults to 10.
+        """
+        match = fts_query(query)
+        if match is None:
+            return []
+        conditions = ""
+        params: list = [match]
+        filters = dict(filters or {})
+        if memory_id is not None:
+            filters["memory_id"] = memory_id
+        if chat_id is not None:
+            filters["chat_id"] = chat_id
+        for column, value in filters.items():
+            if column not in FILTER_COLUMNS:
+                raise ValueError(f"Cannot filter the history on `{column}`.")
+            if isinstance(value, dict) and "$in" in value:
+                value = value["$in"]
+            if isinstance(value, Enum):
+                value = value.value
+            if isinstance(value, (list, tuple, set)):
+                values = [item.value if isinstance(item, Enum) else item for item in value]
+                conditions += f" AND history.{column} IN ({', '.join('?' for _ in values)})"
+                params.extend(values)
+            else:
+                conditions += f" AND history.{column} = ?"
+                params.append(value)
+        params.append(limit)
+        connection = await self.connect()
+        rows = await connection.execute_fetchall(_SEARCH_HISTORY.format(filters=conditions), params)
+        return [{**self._to_item(row), "score": row[10]} for row in rows]
+
+    async def count_history(
+            self,
+            *,
+            memory_id: str,
+            chat_id: str
+    ) -> int:
+        """
+        Asynchronously counts the messages of a chat session, read from the index.
+
+        Parameters:
+            memory_id : str
+                The unique identifier of the user.
+            chat_id : str
+                The unique identifier of the chat session.
+        """
+        connection = await self.connect()
+        rows = await connection.execute_fetchall(_COUNT_HISTORY, (memory_id, chat_id))
+        return rows[0][0]
+
+    async def list_chats(
+            self,
+            memory_id: str | None = None
+    ) -> list[tuple[str, str]]:
+        """
+        Asynchronously lists the `(memory_id, chat_id)` pairs having history.
+
+        Parameters:
+            memory_id : str, optional
+                Only the chat sessions of the user.
+        """
+        connection = await self.connect()
+        if memory_id is None:
+            rows = await connection.execute_fetchall("SELECT DISTINCT memory_id, chat_id FROM history")
+        else:
+            rows = await connection.execute_fetchall(
+                "SELECT DISTINCT memory_id, chat_id FROM history WHERE memory_id = ?",
+                (memory_id,)
+            )
+        return [(row[0], row[1]) for row in rows]
+
+    async def compact_history(
+            self,
+            *,
+            ids: list[str],
+            summary: dict,
+            archive: bool = True
+    ):
+        """
+        Asynchronously replaces messages with their summary in one transaction.
+
+        The messages are moved to the `history_archive` table with the id of the summary, or deleted when
+        `archive` is off, and the summary is added to the history. The keyword index follows both.
+
+        Parameters:
+            ids : list[str]
+                The row ids, `id` of `get_history`, of the replaced messages.
+            summary : dict
+                The summary message, with the keyword arguments of `add_history`.
+            archive : bool, optional
+                Keep the replaced messages in the archive. Defaults to True.
+        """
+        if not ids:
+            return
+        placeholders = ", ".join("?" for _ in ids)
+        connection = await self.connect()
+        async with self._write_lock:
+            try:
+                if archive:
+                    await connection.execute(
+                        _ARCHIVE_HISTORY.format(placeholders=placeholders),
+                        (summary["message_id"], datetime.datetime.now(), *ids)
+                    )
+                await connection.execute(f"DELETE FROM history WHERE id IN ({placeholders})", ids)
+                now = datetime.datetime.now()
+                await connection.execute(
+                    _INSERT_HISTORY,
+                    (
+                        uuid.uuid4().hex,
+                        summary["memory_id"],
+                        summary["chat_id"],
+                        summary["message_id"],
+                        summary["role"],
+                        summary["data"],
+                        summary["reason"],
+                        summary.get("created_at") or now,
+                        summary.get("updated_at") or now,
+                        False
+                    )
+                )
+                await connection.commit()
+            except Exception:
+                await connection.rollback()
+                raise
+
+    async def get_archive(
+            self,
+            *,
+            summary_id: str
+    ) -> list[dict]:
+        """
+        Asynchronously retrieves the archived messages replaced by a summary.
+
+        Parameters:
+            summary_id : str
+                The message id of the summary.
+        """
+        connection = await self.connect()
+        rows = await connection.execute_fetchall(_SELECT_ARCHIVE, (summary_id,))
+        return [self._to_item(row) for row in rows]
+
+    async def export(
+            self,
+            path: str | Path
+    ):
+        """
+        Asynchronously writes a consistent copy of the database to a new file, while the connection stays in use.
+
+        Parameters:
+            path : str | Path
+                The file path of the copy, it must not exist.
+        """
+        connection = await self.connect()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # VACUUM cannot run inside the transaction of a write
+        async with self._write_lock:
+            await connection.execute("VACUUM INTO ?", (str(path),))
@@ -1,10 +1,10 @@
 import logging
-import copy
 from enum import Enum
 from typing import Any
 
 from superagentx.constants import DEFAULT
 from superagentx.exceptions import InvalidType
+from superagentx.llm.tokens import TokenBudget, TokenCounter, fit_sections, get_token_counter
 
 
 class PromptTypeEnum(str, Enum):
@@ -27,16 +27,30 @@ class PromptTemplate:
     def __init__(
             self,
             *,
-            prompt_type: str | Enum | None = None
+            prompt_type: str | Enum | None = None,
+            token_budget: int | None = None,
+            token_counter: TokenCounter | None = None
     ):
+        """
+        Args:
+            prompt_type: Prompt type of the messages, defaults to `default`.
+            token_budget: Maximum prompt tokens. Context sections passed to `get_messages` are trimmed, last section
+                first, to stay within the budget. Defaults to `None`, no trimming.
+            token_counter: Counter used to measure the prompt. Defaults to the heuristic estimation.
+        """
         self.prompt_type = prompt_type
         if self.prompt_type is None:
             self.prompt_type = "default"
+        self.token_budget = token_budget
+        self.token_counter = token_counter or get_token_counter()
+        # Budget report of the latest `get_messages` call
+        self.last_token_budget: TokenBudget | None = None
 
     async def _get_prompt(self) -> list[dict]:
         match self.prompt_type:
             case PromptTypeEnum.DEFAULT:
-                return copy.deepcopy(DEFAULT)
+                # The messages are flat dicts of strings, a copy per message keeps the defaults untouched
+                return [dict(message) for message in DEFAULT]
             case _:
                 raise InvalidType(f"Invalid Prompt type: {self.prompt_type}")
 
@@ -44,22 +58,61 @@ class PromptTemplate:
             self,
             *,
             input_prompt: str,
+            context_sections: dict[str, Any] | None = None,
+            instructions: str | None = None,
             **kwargs: Any
     ) -> list[dict]:
         """
         To construct the message structure based on the user's prompt type
 
+        The messages keep the static content first, the prompt type messages and the `instructions`, then the
+        formatted prompt and its context sections, so providers serve the shared prefix from their prompt cache.
+
         Args:
             input_prompt (str): Give the instruction of your expected result.
+            instructions (str): Static instructions sent as a system message after the prompt type messages. They
+                are not formatted, keep the values varying between calls in the `input_prompt`.
+            context_sections (dict[str, Any]): Named context appended after the formatted prompt, e.g.
+                previous results or memory, ordered by priority. The sections are not formatted and are trimmed,
+                last section first, when the prompt exceeds the `token_budget`.
             kwargs (Any): Format the variable's value in the given prompt.
         """
         prompt = await self._get_prompt()
+        if instructions:
+            prompt.append({"role": "system", "content": instructions})
         if not kwargs:
             kwargs = {}
         format_string = input_prompt.format(**kwargs)
+        budget = TokenBudget(max_prompt_tokens=self.token_budget, exact=self.token_counter.exact)
+        # The static messages are counted once, only the user message is counted again with its sections
+        static_tokens = self.token_counter.count_messages(prompt)
+        budget.sections['prompt'] = static_tokens + self.token_counter.count_message(
+            {"role": "user", "content": format_string}
+        )
+        if context_sections:
+            # Sections like the previous results of a pipe may come as lists
+            sections = {
+                name: text if isinstance(text, str) else str(text)
+                for name, text in context_sections.items()
+                if text
+            }
+            if self.token_budget is not None:
+                # Two new lines separate each section, about one token
+                sections, _, budget.trimmed = fit_sections(
+                    sections,
+                    max_tokens=self.token_budget - budget.sections['prompt'] - len(sections),
+                    counter=self.token_counter
+                )
+            for name, text in sections.items():
+                format_string = f'{format_string}\n\n{text}'
+                budget.sections[name] = self.token_counter.count(text)
+            if budget.trimmed:
+                logger.info(f'Prompt context trimmed to the token budget {self.token_budget}: {budget.trimmed}')
         content = {
             "role": "user",
             "content": format_string
         }
         prompt.append(content)
+        budget.prompt_tokens = static_tokens + self.token_counter.count_message(content)
+        self.last_token_budget = budget
         return prompt
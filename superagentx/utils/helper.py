@@ -1,21 +1,187 @@
-from typing import Any
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator
+import importlib
+import json
 import re
 import asyncio
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class ThreadHops:
+
+    def __init__(self):
+        """Calls of `sync_to_async` offloaded to the thread pool and run inline."""
+        self.offloaded = 0
+        self.inline = 0
+
+    def as_dict(self) -> dict:
+        return {'offloaded': self.offloaded, 'inline': self.inline}
+
+
+_thread_hops: ContextVar[ThreadHops | None] = ContextVar('superagentx_thread_hops', default=None)
+_total_thread_hops = ThreadHops()
+_inline_callables: set = set()
+
+
+def run_inline(func: Callable) -> Callable:
+    """
+    Marks a cheap synchronous function, e.g. a request or response conversion, to run inline in `sync_to_async`
+    instead of paying a thread pool submission and a context switch. Only mark functions that neither block on I/O
+    nor run long CPU work, they hold the event loop.
+
+    Example:
+        class MyHandler(BaseHandler):
+
+            @run_inline
+            def format_report(self, rows: list) -> str:
+                ...
+    """
+    func._superagentx_inline = True
+    return func
+
+
+def register_inline(*funcs: Callable) -> None:
+    """Marks cheap synchronous callables of other libraries, e.g. `email.message.Message.attach`, to run inline."""
+    for func in funcs:
+        _inline_callables.add(getattr(func, '__func__', func))
+
+
+def is_inline(func: Callable) -> bool:
+    # Bound methods are looked up by their function, so marking the method marks it for every instance
+    func = getattr(func, '__func__', func)
+    if getattr(func, '_superagentx_inline', False):
+        return True
+    try:
+        return func in _inline_callables
+    except TypeError:
+        return False
+
+
+@contextmanager
+def count_thread_hops() -> Iterator[ThreadHops]:
+    """
+    Counts the `sync_to_async` calls made within the context, e.g. the thread hops of one request.
+
+    Example:
+        with count_thread_hops() as hops:
+            await llm_client.achat_completion(chat_completion_params=chat_completion_params)
+        print(hops.as_dict())
+    """
+    hops = ThreadHops()
+    token = _thread_hops.set(hops)
+    try:
+        yield hops
+    finally:
+        _thread_hops.reset(token)
+
+
+def thread_hop_stats() -> dict:
+    """`sync_to_async` calls of the process, offloaded and inline."""
+    return _total_thread_hops.as_dict()
+
 
 async def sync_to_async(func, *args, **kwargs) -> Any:
     """
+    Runs a synchronous callable from async code. Blocking I/O and heavy CPU work are offloaded to the default thread
+    pool, callables marked with `run_inline` or `register_inline` run inline on the event loop.
 
     @rtype: Any
     """
+    hops = _thread_hops.get()
+    if is_inline(func):
+        _total_thread_hops.inline += 1
+        if hops is not None:
+            hops.inline += 1
+        return func(*args, **kwargs)
+    _total_thread_hops.offloaded += 1
+    if hops is not None:
+        hops.offloaded += 1
     return await asyncio.to_thread(func, *args, **kwargs)
 
 
+def lazy_import(
+        module_name: str,
+        lazy_imports: dict[str, str]
+) -> Callable[[str], Any]:
+    """
+    Module `__getattr__` importing the attributes from their modules on first access, so provider SDKs are only
+    imported by the applications using them.
+
+    Args:
+        module_name: Name of the package, `__name__`.
+        lazy_imports: Attribute names and the module defining each of them.
+    """
+
+    def __getattr__(name: str) -> Any:
+        module = lazy_imports.get(name)
+        if module is None:
+            raise AttributeError(f'module {module_name!r} has no attribute {name!r}')
+        value = getattr(importlib.import_module(module), name)
+        # Cached on the package, later lookups do not come back here
+        setattr(importlib.import_module(module_name), name, value)
+        return value
+
+    return __getattr__
+
+
+def json_loads(data: str | bytes) -> Any:
+    """
+    Decodes JSON with `orjson` when it is installed, several times faster than `json.loads` on tool arguments.
+    Documents `orjson` rejects, e.g. `NaN` or integers over 64 bits, are decoded by `json.loads`.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
 async def iter_to_aiter(iterable):
     for item in iterable:
         yield item
 
 
+async def sync_iter_to_aiter(iterable):
+    """
+    Consumes a blocking iterator (e.g. a botocore event stream) in a worker thread and yields its items
+    as soon as they are produced.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+    stopped = False
+
+    def _produce():
+        try:
+            for _item in iterable:
+                if stopped:
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, (_item, None))
+        except Exception as ex:
+            loop.call_soon_threadsafe(queue.put_nowait, (done, ex))
+            return
+        loop.call_soon_threadsafe(queue.put_nowait, (done, None))
+
+    loop.run_in_executor(None, _produce)
+    try:
+        while True:
+            item, error = await queue.get()
+            if error:
+                raise error
+            if item is done:
+                break
+            yield item
+    finally:
+        # Let the worker thread stop reading once the consumer goes away
+        stopped = True
+
+
 async def get_fstring_variables(s: str):
     # This regular expression looks for variables in curly braces
     return re.findall(r'\{(.*?)}', s)
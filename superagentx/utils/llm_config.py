@@ -11,6 +11,8 @@ class LLMType(str, Enum):
     TOGETHER_CLIENT = 'together'
     GROQ_CLIENT = 'groq'
     ANTHROPIC_CLIENT = 'anthropic'
+    ROUTER_CLIENT = 'router'
+    REPLAY_CLIENT = 'replay'
 
     @classmethod
     def has_member_key(cls, key):
@@ -1,6 +1,5 @@
 import re
 
-from superagentx.utils.helper import iter_to_aiter
 from superagentx.utils.parsers.base import BaseParser
 
 
@@ -15,7 +14,7 @@ class CommaSeparatedListOutputParser(BaseParser):
           Returns:
                A list of strings.
          """
-        return [part.strip() async for part in iter_to_aiter(text.split(","))]
+        return [part.strip() for part in text.split(",")]
 
     async def get_format_instructions(self) -> str:
         """Return the format instructions for the comma-separated list output."""
@@ -1,20 +1,30 @@
 import logging
 from enum import Enum
 
-from superagentx.vector_stores.chroma import ChromaDB
 from superagentx.llm import LLMClient
+from superagentx.utils.helper import lazy_import
 from superagentx.vector_stores.constants import DEFAULT_EMBED_TYPE, DEFAULT_EMBED_MODEL, EmbedTypeEnum
-from superagentx.vector_stores.opensearch import Opensearch
 
 logger = logging.getLogger(__name__)
 
+# Vector database clients are imported on first use, chromadb and opensearch-py are slow to import
+__getattr__ = lazy_import(
+    __name__,
+    {
+        'ChromaDB': 'superagentx.vector_stores.chroma',
+        'NumpyVectorStore': 'superagentx.vector_stores.numpy_store',
+        'Opensearch': 'superagentx.vector_stores.opensearch'
+    }
+)
 
-class VectorDatabaseType(Enum):
+
+class VectorDatabaseType(str, Enum):
     CHROMA = "chroma"
     NEO4J = "neo4j"
     ELASTICSEARCH = "elasticsearch"
     OPENSEARCH = "opensearch"
     QDRANT = "qdrant"
+    NUMPY = "numpy"
 
 
 class VectorStore:
@@ -57,9 +67,20 @@ class VectorStore:
 
         match self.vector_type:
             case VectorDatabaseType.CHROMA:
+                from superagentx.vector_stores.chroma import ChromaDB
+
                 self.cli = ChromaDB(**_params)
             case VectorDatabaseType.OPENSEARCH:
+                from superagentx.vector_stores.opensearch import Opensearch
+
                 self.cli = Opensearch(**_params)
+            case VectorDatabaseType.NUMPY:
+                from superagentx.vector_stores.numpy_store import NumpyVectorStore
+
+                self.cli = NumpyVectorStore(
+                    collection_name=self.collection_name or "agent",
+                    embed_cli=self.embed_cli
+                )
             case _:
                 _msg = (
                     f'Invalid Vector data type - '
@@ -128,3 +149,13 @@ class VectorStore:
             *args,
             **kwargs
         )
+
+    async def delete_vectors(
+            self,
+            *args,
+            **kwargs
+    ):
+        return await self.cli.delete_vectors(
+            *args,
+            **kwargs
+        )
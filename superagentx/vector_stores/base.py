@@ -1,5 +1,13 @@
 from abc import ABCMeta, abstractmethod
 
+from pydantic import BaseModel
+
+
+class Documents(BaseModel):
+    id: str  # memory id
+    score: float  # distance or similarity, see the store
+    payload: dict  # metadata
+
 
 class BaseVectorStore(metaclass=ABCMeta):
 
@@ -31,3 +39,7 @@ class BaseVectorStore(metaclass=ABCMeta):
     async def delete_collection(self, *args, **kwargs):
         """Delete a collection."""
         raise NotImplementedError
+
+    async def delete_vectors(self, *args, **kwargs):
+        """Delete vectors by their ids."""
+        raise NotImplementedError
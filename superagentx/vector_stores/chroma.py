@@ -1,6 +1,5 @@
 import logging
 
-from pydantic import BaseModel
 from typing import List, Sequence, Dict
 
 import chromadb
@@ -8,7 +7,7 @@ from chromadb.api.models import Collection
 from chromadb.config import Settings
 
 from superagentx.llm import LLMClient
-from superagentx.vector_stores.base import BaseVectorStore
+from superagentx.vector_stores.base import BaseVectorStore, Documents
 from superagentx.utils.helper import sync_to_async, iter_to_aiter
 from superagentx.llm.client import Client
 from superagentx.vector_stores.constants import DEFAULT_EMBED_TYPE, DEFAULT_EMBED_MODEL
@@ -16,12 +15,6 @@ from superagentx.vector_stores.constants import DEFAULT_EMBED_TYPE, DEFAULT_EMBE
 logger = logging.getLogger(__name__)
 
 
-class Documents(BaseModel):
-    id: str  # memory id
-    score: float  # distance
-    payload: dict  # metadata
-
-
 class ChromaDB(BaseVectorStore):
 
     def __init__(
@@ -119,7 +112,7 @@ class ChromaDB(BaseVectorStore):
             ids (Optional[List[str]], optional): List of IDs corresponding to vectors. Defaults to None.
         """
 
-        vectors = [await self.embed_cli.aembed(text=text) async for text in iter_to_aiter(texts)]
+        vectors = (await self.embed_cli.aembed_many(texts=texts)).tolist()
         logger.info(f"Inserting {len(vectors)} vectors into collection {self.collection_name}")
         collection = await self._get_or_create_collection(name=self.collection_name)
         await sync_to_async(
@@ -198,6 +191,24 @@ class ChromaDB(BaseVectorStore):
         """
         return await sync_to_async(self.client.list_collections)
 
+    async def delete_vectors(
+            self,
+            ids: list[str]
+    ):
+        """
+        Delete vectors by their ids.
+
+        Args:
+            ids (List[str]): IDs of the vectors to delete.
+        """
+        if not ids:
+            return
+        collection = await self._get_or_create_collection(name=self.collection_name)
+        await sync_to_async(
+            collection.delete,
+            ids=ids
+        )
+
     async def delete_collection(self):
         """
         Delete a collection.
@@ -0,0 +1,418 @@
+import json
+import logging
+import os
+import threading
+import typing
+from pathlib import Path
+
+import numpy as np
+
+from superagentx.llm import LLMClient
+from superagentx.llm.client import Client
+from superagentx.utils.helper import sync_to_async
+from superagentx.vector_stores.base import BaseVectorStore, Documents
+from superagentx.vector_stores.constants import DEFAULT_EMBED_MODEL, DEFAULT_EMBED_TYPE
+
+logger = logging.getLogger(__name__)
+
+_LOG_VERSION = 1
+# Searches over more rows run in a worker thread, smaller ones are faster inline
+_OFFLOAD_ROWS = 50_000
+
+
+class NumpyVectorStore(BaseVectorStore):
+
+    def __init__(
+            self,
+            *,
+            collection_name: str = 'agent',
+            path: str | Path | None = None,
+            embed_cli: Client | None = None,
+            metric: typing.Literal['cosine', 'dot'] = 'cosine',
+            initial_capacity: int = 1024
+    ):
+        """
+        In-process vector store keeping the vectors in a contiguous float32 NumPy matrix, without a database server.
+
+        Searches compute every similarity with one matrix product and select the top k with `argpartition`. The
+        payload values are kept in columns, the filter masks are computed once per value and the writes update
+        the rows they change. Deleted vectors are masked out and their rows reclaimed by `compact`.
+
+        With a `path`, the matrix is a memory-mapped `.npy` file and the ids and payloads an append-only JSON lines
+        log, so writes cost one row and one line and a reopened store maps the file instead of reading it.
+
+        Args:
+            collection_name: Name of the collection, the file names of a persistent store.
+            path: Directory of the persistent store, defaults to `None`, in memory only.
+            embed_cli: Client embedding the texts, defaults to the OpenAI embedding model.
+            metric: `cosine` normalizes the vectors on insert, `dot` keeps them as they are.
+            initial_capacity: Rows allocated before the matrix first grows, it doubles when full.
+        """
+        if metric not in ('cosine', 'dot'):
+            raise ValueError(f'Invalid metric `{metric}`, use cosine or dot.')
+        self.embed_cli = embed_cli
+        if not self.embed_cli:
+            self.embed_cli = LLMClient(llm_config={"model": DEFAULT_EMBED_MODEL, "llm_type": DEFAULT_EMBED_TYPE})
+        self.collection_name = collection_name
+        self.path = Path(path) if path is not None else None
+        self.metric = metric
+        self.initial_capacity = max(initial_capacity, 1)
+        self._lock = threading.RLock()
+        self._reset_state()
+        if self.path is not None and self._log_path.exists():
+            self._load()
+
+    def _reset_state(self) -> None:
+        self._matrix: np.ndarray | None = None
+        self._size = 0
+        self._ids: list[str | None] = []
+        self._payloads: list[dict | None] = []
+        self._rows: dict[str, int] = {}
+        self._alive = np.zeros(0, dtype=bool)
+        self._columns: dict[str, np.ndarray] = {}
+        self._masks: dict[tuple, np.ndarray] = {}
+
+    @property
+    def _matrix_path(self) -> Path:
+        return self.path / f'{self.collection_name}.vectors.npy'
+
+    @property
+    def _log_path(self) -> Path:
+        return self.path / f'{self.collection_name}.meta.jsonl'
+
+    @property
+    def dimension(self) -> int | None:
+        return None if self._matrix is None else self._matrix.shape[1]
+
+    @property
+    def count(self) -> int:
+        # Not `__len__`, an empty store must stay truthy
+        return len(self._rows)
+
+    @property
+    def dead_fraction(self) -> float:
+        """Share of the rows held by deleted or replaced vectors, reclaimed by `compact`."""
+        return 1 - len(self._rows) / self._size if self._size else 0.0
+
+    # Storage
+
+    def _allocate(self, capacity: int, dimension: int) -> np.ndarray:
+        if self.path is None:
+            return np.zeros((capacity, dimension), dtype=np.float32)
+        self.path.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._matrix_path.with_suffix('.tmp.npy')
+        matrix = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32, shape=(capacity, dimension))
+        return matrix
+
+    def _grow(self, rows: int, dimension: int) -> None:
+        if self._matrix is not None and self._matrix.shape[1] != dimension:
+            raise ValueError(f'Vectors of {dimension} dimensions, the collection has {self._matrix.shape[1]}.')
+        capacity = 0 if self._matrix is None else self._matrix.shape[0]
+        if self._size + rows <= capacity:
+            return
+        new_capacity = max(capacity, self.initial_capacity)
+        while new_capacity < self._size + rows:
+            new_capacity *= 2
+        matrix = self._allocate(new_capacity, dimension)
+        if self._matrix is not None:
+            matrix[:self._size] = self._matrix[:self._size]
+        if self.path is not None:
+            matrix.flush()
+            del self._matrix
+            os.replace(self._matrix_path.with_suffix('.tmp.npy'), self._matrix_path)
+            matrix = np.load(self._matrix_path, mmap_mode='r+')
+        self._matrix = matrix
+        self._alive = np.concatenate([self._alive, np.zeros(new_capacity - len(self._alive), dtype=bool)])
+        for key, column in self._columns.items():
+            self._columns[key] = self._extend_column(column, new_capacity)
+        for cache_key, value_mask in self._masks.items():
+            self._masks[cache_key] = np.concatenate([value_mask, np.zeros(new_capacity - len(value_mask), dtype=bool)])
+
+    @staticmethod
+    def _extend_column(column: np.ndarray, capacity: int) -> np.ndarray:
+        extended = np.empty(capacity, dtype=object)
+        extended[:len(column)] = column
+        return extended
+
+    def _append_log(self, entries: list[dict]) -> None:
+        if self.path is None:
+            return
+        self.path.mkdir(parents=True, exist_ok=True)
+        with open(self._log_path, 'a', encoding='utf-8') as file:
+            file.write(''.join(json.dumps(entry, default=str) + '\n' for entry in entries))
+
+    def _load(self) -> None:
+        entries = [
+            json.loads(line)
+            for line in self._log_path.read_text(encoding='utf-8').splitlines()
+            if line.strip()
+        ]
+        header = entries[0] if entries and entries[0].get('op') == 'init' else {}
+        if header.get('metric', self.metric) != self.metric:
+            raise ValueError(f'Collection {self.collection_name} uses the {header["metric"]} metric.')
+        matrix = np.load(self._matrix_path, mmap_mode='r+')
+        self._matrix = matrix
+        self._alive = np.zeros(matrix.shape[0], dtype=bool)
+        for entry in entries:
+            match entry['op']:
+                case 'put':
+                    self._set_row(entry['row'], entry['id'], entry['payload'])
+                case 'delete':
+                    self._delete_row(entry['id'])
+        logger.debug(f'Loaded {self.count} vectors of collection {self.collection_name} from {self.path}')
+
+    def _set_row(self, row: int, vector_id: str, payload: dict) -> None:
+        if row >= len(self._ids):
+            self._ids.extend([None] * (row + 1 - len(self._ids)))
+            self._payloads.extend([None] * (row + 1 - len(self._payloads)))
+        previous = self._rows.get(vector_id)
+        if previous is not None and previous != row:
+            self._alive[previous] = False
+        self._ids[row] = vector_id
+        self._payloads[row] = payload
+        self._rows[vector_id] = row
+        self._alive[row] = True
+        self._size = max(self._size, row + 1)
+        for key, value in payload.items():
+            column = self._columns.get(key)
+            if column is None:
+                column = self._columns[key] = np.empty(len(self._alive), dtype=object)
+            column[row] = value
+        for key, column in self._columns.items():
+            if key not in payload:
+                column[row] = None
+        for (key, value), value_mask in self._masks.items():
+            value_mask[row] = self._matches(payload.get(key), value)
+
+    def _delete_row(self, vector_id: str) -> bool:
+        row = self._rows.pop(vector_id, None)
+        if row is None:
+            return False
+        self._alive[row] = False
+        return True
+
+    def _prepare(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        if self.metric == 'cosine':
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.where(norms == 0, 1, norms)
+        return vectors
+
+    # Filters
+
+    def _mask(self, filters: dict | None) -> np.ndarray:
+        """Rows alive and matching every filter, `{key: value}`, `{key: [values]}` or `{key: {'$in': [values]}}`."""
+        mask = self._alive[:self._size]
+        for key, value in (filters or {}).items():
+            if isinstance(value, dict) and '$in' in value:
+                value = value['$in']
+            if isinstance(value, (list, tuple, set)):
+                value = tuple(value)
+            cache_key = (key, value)
+            value_mask = self._masks.get(cache_key)
+            if value_mask is None:
+                # Sized like the matrix, `_set_row` keeps the rows written later current
+                value_mask = np.zeros(len(self._alive), dtype=bool)
+                column = self._columns.get(key)
+                if column is not None:
+                    if isinstance(value, tuple):
+                        values = set(value)
+                        matches = (item in values for item in column[:self._size])
+                    else:
+                        matches = (item == value for item in column[:self._size])
+                    value_mask[:self._size] = np.fromiter(matches, bool, self._size)
+                self._masks[cache_key] = value_mask
+            mask = mask & value_mask[:self._size]
+        return mask
+
+    @staticmethod
+    def _matches(item, value) -> bool:
+        return item in value if isinstance(value, tuple) else item == value
+
+    def _top_k(self, query: np.ndarray, limit: int, filters: dict | None) -> list[tuple[int, float]]:
+        with self._lock:
+            if self._matrix is None or not self._rows or limit <= 0:
+                return []
+            if query.shape[1] != self._matrix.shape[1]:
+                raise ValueError(f'Query of {query.shape[1]} dimensions, the collection has {self._matrix.shape[1]}.')
+            candidates = np.flatnonzero(self._mask(filters))
+            if not len(candidates):
+                return []
+            if len(candidates) == self._size:
+                scores = self._matrix[:self._size] @ query[0]
+            else:
+                scores = self._matrix[candidates] @ query[0]
+            k = min(limit, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+            top = top[np.argsort(-scores[top], kind='stable')]
+            rows = top if len(candidates) == self._size else candidates[top]
+            return [(int(row), float(scores[index])) for row, index in zip(rows, top)]
+
+    # BaseVectorStore
+
+    async def create(self, *args, **kwargs):
+        """The collection is created by the first insert."""
+        return self
+
+    async def insert(
+            self,
+            texts: list[str],
+            payloads: list[dict] | dict | None = None,
+            ids: list[str] | None = None,
+            vectors: np.ndarray | list[list[float]] | None = None
+    ):
+        """
+        Insert vectors into the collection, an existing id is replaced.
+
+        Args:
+            texts (List[str]): List of text to insert.
+            payloads (Optional[List[Dict]], optional): Payloads of the texts, a single dict for a single text.
+            ids (Optional[List[str]], optional): IDs of the texts. Defaults to their position.
+            vectors (Optional[np.ndarray], optional): Embeddings of the texts, embedded with `embed_cli` when not set.
+        """
+        if not texts:
+            return
+        if isinstance(payloads, dict):
+            payloads = [payloads]
+        payloads = payloads or [{} for _ in texts]
+        if vectors is None:
+            vectors = await self.embed_cli.aembed_many(texts=texts)
+        vectors = self._prepare(np.asarray(vectors))
+        with self._lock:
+            ids = ids or [str(self._size + index) for index in range(len(texts))]
+            if not (len(ids) == len(payloads) == len(vectors)):
+                raise ValueError('Texts, payloads, ids and vectors must have the same length.')
+            self._grow(len(ids), vectors.shape[1])
+            start = self._size
+            self._matrix[start:start + len(ids)] = vectors
+            entries = []
+            if start == 0 and self.path is not None and not self._log_path.exists():
+                entries.append({'op': 'init', 'version': _LOG_VERSION, 'metric': self.metric})
+            for offset, (vector_id, payload) in enumerate(zip(ids, payloads)):
+                self._set_row(start + offset, vector_id, dict(payload or {}))
+                entries.append({'op': 'put', 'id': vector_id, 'row': start + offset, 'payload': payload or {}})
+            self._append_log(entries)
+        logger.debug(f"Inserted {len(ids)} vectors into collection {self.collection_name}")
+
+    async def search(
+            self,
+            query: str,
+            limit: int = 5,
+            filters: dict | None = None
+    ) -> list[Documents]:
+        """
+        Search for similar vectors.
+
+        Args:
+            query (str): The query to embed.
+            limit (int, optional): Number of results to return. Defaults to 5.
+            filters (Optional[Dict], optional): Payload values the results must have. Defaults to None.
+
+        Returns:
+            List[Documents]: Search results, best first, the `score` is the cosine similarity (or dot product).
+        """
+        if not self._rows:
+            return []
+        query_vector = await self.embed_cli.aembed(text=query)
+        return await self.search_vector(query_vector, limit=limit, filters=filters)
+
+    async def search_vector(
+            self,
+            vector: np.ndarray | list[float],
+            limit: int = 5,
+            filters: dict | None = None
+    ) -> list[Documents]:
+        """Search with an embedded query, see `search`."""
+        query = self._prepare(np.asarray(vector))
+        if self._size > _OFFLOAD_ROWS:
+            top = await sync_to_async(self._top_k, query, limit, filters)
+        else:
+            top = self._top_k(query, limit, filters)
+        return [
+            Documents(id=self._ids[row], score=score, payload=self._payloads[row])
+            for row, score in top
+        ]
+
+    async def update(
+            self,
+            vector_id: str,
+            vector: list[float] | None = None,
+            payload: dict | None = None
+    ):
+        """
+        Update a vector and its payload.
+
+        Args:
+            vector_id (str): ID of the vector to update.
+            vector (Optional[List[float]], optional): Updated vector. Defaults to None.
+            payload (Optional[Dict], optional): Updated payload. Defaults to None.
+        """
+        with self._lock:
+            row = self._rows.get(vector_id)
+            if row is None:
+                raise KeyError(f'Vector {vector_id} not found in collection {self.collection_name}')
+            if vector is not None:
+                self._matrix[row] = self._prepare(np.asarray(vector))[0]
+            if payload is not None:
+                self._set_row(row, vector_id, dict(payload))
+            self._append_log([{'op': 'put', 'id': vector_id, 'row': row, 'payload': self._payloads[row]}])
+
+    async def exists(self, *args, **kwargs):
+        return self._matrix is not None
+
+    async def delete_vectors(
+            self,
+            ids: list[str]
+    ):
+        """
+        Delete vectors by their ids, their rows are reclaimed by `compact`.
+
+        Args:
+            ids (List[str]): IDs of the vectors to delete.
+        """
+        with self._lock:
+            deleted = [vector_id for vector_id in ids if self._delete_row(vector_id)]
+            if deleted:
+                self._append_log([{'op': 'delete', 'id': vector_id} for vector_id in deleted])
+
+    async def delete_collection(self, *args, **kwargs):
+        """Delete the collection and its files."""
+        with self._lock:
+            matrix = self._matrix
+            self._reset_state()
+            del matrix
+            if self.path is not None:
+                for path in (self._matrix_path, self._log_path):
+                    path.unlink(missing_ok=True)
+
+    async def compact(self):
+        """Rewrites the collection without the deleted vectors, the persistent log is rewritten as well."""
+        with self._lock:
+            rows = np.flatnonzero(self._alive[:self._size])
+            if len(rows) == self._size:
+                return
+            vectors = np.array(self._matrix[rows])
+            items = [(self._ids[row], self._payloads[row]) for row in rows]
+            dimension = self._matrix.shape[1]
+            matrix = self._matrix
+            self._reset_state()
+            del matrix
+            if self.path is not None:
+                self._matrix_path.unlink(missing_ok=True)
+                self._log_path.unlink(missing_ok=True)
+            if not items:
+                return
+            self._grow(len(items), dimension)
+            self._matrix[:len(items)] = vectors
+            entries = [{'op': 'init', 'version': _LOG_VERSION, 'metric': self.metric}] if self.path else []
+            for row, (vector_id, payload) in enumerate(items):
+                self._set_row(row, vector_id, payload)
+                entries.append({'op': 'put', 'id': vector_id, 'row': row, 'payload': payload})
+            self._append_log(entries)
+
+    def flush(self):
+        """Writes the memory-mapped rows to the file."""
+        if isinstance(self._matrix, np.memmap):
+            self._matrix.flush()
@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from superagentx.llm.bedrock import BedrockClient
+from superagentx.llm.models import ChatCompletionParams
+
+logger = logging.getLogger(__name__)
+
+'''
+ Run Pytest:
+
+   1. pytest --log-cli-level=INFO tests/benchmarks/test_bedrock_sync_benchmark.py::TestBedrockSyncBenchmark::test_sync_tool_call_latency
+
+ Set `SUPERAGENTX_BENCH_ITERATIONS` and `SUPERAGENTX_BENCH_LATENCY` (seconds per Bedrock call) to tune the run.
+'''
+
+_ITERATIONS = int(os.getenv('SUPERAGENTX_BENCH_ITERATIONS', 10))
+_LATENCY = float(os.getenv('SUPERAGENTX_BENCH_LATENCY', 0.05))
+
+_RESPONSE = {
+    'ResponseMetadata': {'RequestId': 'bench'},
+    'output': {
+        'message': {
+            'role': 'assistant',
+            'content': [
+                {'toolUse': {'toolUseId': 'tool-1', 'name': 'top_song', 'input': {'sign': 'WZPZ'}}}
+            ]
+        }
+    },
+    'stopReason': 'tool_use',
+    'usage': {'inputTokens': 20, 'outputTokens': 9, 'totalTokens': 29}
+}
+
+
+class SimulatedBedrockRuntime:
+    model = 'anthropic.claude-3-5-sonnet-20240620-v1:0'
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+
+    def converse(self, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        return _RESPONSE
+
+
+def _legacy_chat_completion(client: BedrockClient, chat_completion_params: ChatCompletionParams):
+    """The previous synchronous tool path: two `converse` calls, then a thread plus a new event loop to format."""
+    request = client._converse_request(chat_completion_params)
+    client.client.converse(**request)
+    response = client.client.converse(**request)
+
+    async def _format():
+        return client._prepare_bedrock_formatted_output(response=response, model_id=request['modelId'])
+
+    with ThreadPoolExecutor(1) as pool:
+        return pool.submit(lambda: asyncio.run(_format())).result()
+
+
+class TestBedrockSyncBenchmark:
+
+    def test_sync_tool_call_latency(self):
+        chat_completion_params = ChatCompletionParams(
+            messages=[{'role': 'user', 'content': 'What is the most famous song on WZPZ?'}],
+            tools=[{'toolSpec': {'name': 'top_song'}}]
+        )
+
+        legacy_runtime = SimulatedBedrockRuntime(_LATENCY)
+        legacy_client = BedrockClient(client=legacy_runtime)
+        start = time.perf_counter()
+        for _ in range(_ITERATIONS):
+            legacy_response = _legacy_chat_completion(legacy_client, chat_completion_params)
+        legacy_elapsed = (time.perf_counter() - start) / _ITERATIONS
+
+        runtime = SimulatedBedrockRuntime(_LATENCY)
+        client = BedrockClient(client=runtime)
+        start = time.perf_counter()
+        for _ in range(_ITERATIONS):
+            response = client.chat_completion(chat_completion_params=chat_completion_params)
+        elapsed = (time.perf_counter() - start) / _ITERATIONS
+
+        logger.info(
+            f'Bedrock sync tool call: legacy {legacy_elapsed * 1000:.2f} ms '
+            f'({legacy_runtime.calls // _ITERATIONS} calls), '
+            f'single round trip {elapsed * 1000:.2f} ms ({runtime.calls // _ITERATIONS} call), '
+            f'saved {(legacy_elapsed - elapsed) * 1000:.2f} ms per request'
+        )
+        assert runtime.calls == _ITERATIONS
+        assert response.choices[0].message.tool_calls == legacy_response.choices[0].message.tool_calls
+        assert elapsed < legacy_elapsed
+
+    async def test_sync_matches_async_output(self):
+        chat_completion_params = ChatCompletionParams(
+            messages=[{'role': 'user', 'content': 'What is the most famous song on WZPZ?'}],
+            tools=[{'toolSpec': {'name': 'top_song'}}]
+        )
+        client = BedrockClient(client=SimulatedBedrockRuntime(0))
+        response = client.chat_completion(chat_completion_params=chat_completion_params)
+        aresponse = await client.achat_completion(chat_completion_params=chat_completion_params)
+        assert response.model_dump(exclude={'created'}) == aresponse.model_dump(exclude={'created'})
@@ -0,0 +1,86 @@
+import logging
+import os
+import random
+import time
+import uuid
+
+from superagentx.memory.storage import SQLiteManager
+
+logger = logging.getLogger(__name__)
+
+'''
+ Run Pytest:
+
+   1. pytest --log-cli-level=INFO tests/benchmarks/test_history_benchmark.py::TestHistoryBenchmark::test_history_throughput
+
+ Set `SUPERAGENTX_BENCH_HISTORY_ROWS=1000000` for the 1M rows run, the default keeps the suite fast.
+'''
+
+_ROWS = int(os.getenv('SUPERAGENTX_BENCH_HISTORY_ROWS', 50_000))
+_BATCH_SIZE = 10_000
+_CHATS_PER_MEMORY = 10
+_MESSAGES_PER_CHAT = 20
+_LOOKUPS = 200
+
+# The previous lookup, a scan of the table and a sort
+_LEGACY_SELECT = """
+    SELECT id, memory_id, chat_id, message_id, role, data, reason, created_at, updated_at, is_deleted
+    FROM history NOT INDEXED
+    WHERE memory_id = ? AND chat_id = ?
+    ORDER BY created_at ASC
+"""
+
+
+def _item(index: int) -> dict:
+    chat = index // _MESSAGES_PER_CHAT
+    return {
+        'memory_id': f'memory-{chat // _CHATS_PER_MEMORY}',
+        'chat_id': f'chat-{chat}',
+        'message_id': uuid.uuid4().hex,
+        'role': 'user' if index % 2 == 0 else 'assistant',
+        'data': f'Message {index} of the conversation about the quarterly report',
+        'reason': 'Benchmark'
+    }
+
+
+class TestHistoryBenchmark:
+
+    async def test_history_throughput(self, tmp_path):
+        db = SQLiteManager(tmp_path / 'history.db')
+
+        start = time.perf_counter()
+        for offset in range(0, _ROWS, _BATCH_SIZE):
+            await db.add_history_many([_item(index) for index in range(offset, min(offset + _BATCH_SIZE, _ROWS))])
+        batched_rate = _ROWS / (time.perf_counter() - start)
+
+        single_rows = min(_ROWS // 10, 1000)
+        start = time.perf_counter()
+        for index in range(_ROWS, _ROWS + single_rows):
+            await db.add_history(**_item(index))
+        single_rate = single_rows / (time.perf_counter() - start)
+
+        chats = _ROWS // _MESSAGES_PER_CHAT
+        lookups = [random.randrange(chats) for _ in range(_LOOKUPS)]
+        start = time.perf_counter()
+        for chat in lookups:
+            history = await db.get_history(memory_id=f'memory-{chat // _CHATS_PER_MEMORY}', chat_id=f'chat-{chat}')
+            assert len(history) >= _MESSAGES_PER_CHAT
+        indexed = (time.perf_counter() - start) / _LOOKUPS
+
+        legacy_lookups = lookups[:max(_LOOKUPS // 20, 5)]
+        start = time.perf_counter()
+        for chat in legacy_lookups:
+            rows = await db.connection.execute_fetchall(
+                _LEGACY_SELECT,
+                (f'memory-{chat // _CHATS_PER_MEMORY}', f'chat-{chat}')
+            )
+            assert len(rows) >= _MESSAGES_PER_CHAT
+        scanned = (time.perf_counter() - start) / len(legacy_lookups)
+        await db.close()
+
+        logger.info(
+            f'History of {_ROWS} rows: inserts {batched_rate:,.0f} rows/s batched, {single_rate:,.0f} rows/s one '
+            f'by one; chat lookup {indexed * 1000:.3f} ms indexed, {scanned * 1000:.3f} ms table scan'
+        )
+        assert batched_rate > single_rate
+        assert indexed < scanned
@@ -0,0 +1,115 @@
+import logging
+import os
+import time
+import tracemalloc
+
+from superagentx.agent import Agent
+from superagentx.agentxpipe import AgentXPipe
+from superagentx.engine import Engine
+from superagentx.llm import LLMClient
+from superagentx.llm.models import ChatCompletionParams
+from superagentx.prompt import PromptTemplate
+from tests.llm.test_replay import ScriptedClient, WeatherHandler
+
+logger = logging.getLogger(__name__)
+
+'''
+ Run Pytest:
+
+   1. pytest --log-cli-level=INFO tests/benchmarks/test_hot_path_benchmark.py::TestHotPathBenchmark::test_layer_overhead
+   2. pytest --log-cli-level=INFO tests/benchmarks/test_hot_path_benchmark.py::TestHotPathBenchmark::test_engine_tools_built_once
+
+ Set `SUPERAGENTX_BENCH_ITERATIONS` to tune the run. The fake LLM answers at once, so the timings are the framework
+ overhead of each layer, the network time of a real provider comes on top.
+'''
+
+_ITERATIONS = int(os.getenv('SUPERAGENTX_BENCH_ITERATIONS', 200))
+_QUERY = 'What is the weather in Chennai?'
+
+
+class CountingScriptedClient(ScriptedClient):
+
+    def __init__(self):
+        super().__init__()
+        self.tool_json_calls = 0
+
+    async def get_tool_json(self, func):
+        self.tool_json_calls += 1
+        return await super().get_tool_json(func)
+
+
+def _layers() -> dict:
+    llm_client = LLMClient(llm_config={'model': 'gpt-4o', 'llm_type': 'openai', 'api_key': 'sk-test'})
+    llm_client.client = CountingScriptedClient()
+    prompt_template = PromptTemplate()
+    engine = Engine(handler=WeatherHandler(), llm=llm_client, prompt_template=prompt_template)
+    agent = Agent(
+        goal='Report the weather of the city',
+        role='Weather reporter',
+        llm=llm_client,
+        prompt_template=prompt_template,
+        engines=[engine],
+        max_retry=1
+    )
+    pipe = AgentXPipe(agents=[agent])
+    chat_completion_params = ChatCompletionParams(messages=[{'role': 'user', 'content': _QUERY}], tools=[{}])
+    return {
+        'prompt': lambda: prompt_template.get_messages(
+            input_prompt=_QUERY,
+            context_sections={'pre_result': 'Reason: Found\nResult: Sunny', 'memory': 'Context:\nChennai'}
+        ),
+        'llm': lambda: llm_client.afunc_chat_completion(chat_completion_params=chat_completion_params),
+        'engine': lambda: engine.start(input_prompt=_QUERY),
+        'agent': lambda: agent.execute(query_instruction=_QUERY),
+        'pipe': lambda: pipe.flow(query_instruction=_QUERY),
+        'llm_client': llm_client
+    }
+
+
+async def _profile(func, iterations: int = _ITERATIONS) -> tuple[float, float]:
+    """Mean microseconds per call and the mean peak of the memory allocated by one call in KiB."""
+    await func()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await func()
+    elapsed = (time.perf_counter() - start) / iterations * 1e6
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(max(iterations // 10, 1)):
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            await func()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - baseline)
+    finally:
+        tracemalloc.stop()
+    return elapsed, sum(peaks) / len(peaks) / 1024
+
+
+class TestHotPathBenchmark:
+
+    async def test_layer_overhead(self):
+        layers = _layers()
+        report = {}
+        for name in ('prompt', 'llm', 'engine', 'agent', 'pipe'):
+            report[name] = await _profile(layers[name])
+        logger.info(
+            'Framework overhead per call with a zero latency LLM:\n' + '\n'.join(
+                f'  {name:<8} {elapsed:>9.1f} us {peak:>8.1f} KiB peak'
+                for name, (elapsed, peak) in report.items()
+            )
+        )
+        # An engine call builds a prompt and calls the LLM, an agent adds the goal verification, a pipe one agent
+        assert report['engine'][0] > report['prompt'][0]
+        assert report['agent'][0] > report['engine'][0]
+        # Far below the network time of any provider
+        assert report['pipe'][0] < 20_000
+
+    async def test_engine_tools_built_once(self):
+        layers = _layers()
+        llm_client = layers['llm_client']
+        for _ in range(5):
+            assert await layers['engine']() == ['Sunny in Chennai']
+        assert llm_client.client.tool_json_calls == 1
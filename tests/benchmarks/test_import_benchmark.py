@@ -0,0 +1,74 @@
+import json
+import logging
+import os
+import subprocess
+import sys
+
+logger = logging.getLogger(__name__)
+
+'''
+ Run Pytest:
+
+   1. pytest --log-cli-level=INFO tests/benchmarks/test_import_benchmark.py::TestImportBenchmark::test_cold_import_time
+
+ Set `SUPERAGENTX_BENCH_ITERATIONS` to tune the number of cold interpreter starts.
+'''
+
+_ITERATIONS = int(os.getenv('SUPERAGENTX_BENCH_ITERATIONS', 3))
+_HEAVY_MODULES = ('boto3', 'botocore', 'chromadb', 'opensearchpy', 'elasticsearch', 'exa_py')
+
+# The eager imports of the package before the providers were loaded lazily
+_EAGER_IMPORTS = '''
+import superagentx.llm.bedrock
+import superagentx.llm.registry
+import superagentx.llm.replay
+import superagentx.llm.router
+import superagentx.vector_stores.chroma
+import superagentx.vector_stores.opensearch
+import superagentx.handler.ai
+import superagentx.handler.elastic_search
+import superagentx.handler.exa_search
+'''
+
+_SCRIPT = '''
+import json
+import sys
+import time
+
+started_at = time.perf_counter()
+import superagentx.agentxpipe
+{eager}
+elapsed = time.perf_counter() - started_at
+print(json.dumps({{'elapsed': elapsed, 'modules': sorted(name for name in sys.modules if '.' not in name)}}))
+'''
+
+
+def _cold_import(eager: bool) -> tuple[float, set[str]]:
+    # Best of the runs, each in a fresh interpreter so nothing is imported yet
+    best, modules = None, set()
+    for _ in range(_ITERATIONS):
+        output = subprocess.run(
+            [sys.executable, '-c', _SCRIPT.format(eager=_EAGER_IMPORTS if eager else '')],
+            check=True,
+            capture_output=True,
+            text=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        if best is None or result['elapsed'] < best:
+            best = result['elapsed']
+        modules = set(result['modules'])
+    return best, modules
+
+
+class TestImportBenchmark:
+
+    def test_cold_import_time(self):
+        eager_elapsed, eager_modules = _cold_import(eager=True)
+        lazy_elapsed, lazy_modules = _cold_import(eager=False)
+        logger.info(
+            f'Cold `import superagentx.agentxpipe`: eager providers {eager_elapsed * 1000:.0f} ms, '
+            f'lazy providers {lazy_elapsed * 1000:.0f} ms, saved {(eager_elapsed - lazy_elapsed) * 1000:.0f} ms '
+            f'({len(eager_modules - lazy_modules)} top level packages not imported)'
+        )
+        assert not lazy_modules.intersection(_HEAVY_MODULES)
+        assert lazy_elapsed < eager_elapsed
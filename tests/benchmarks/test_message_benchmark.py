@@ -0,0 +1,116 @@
+import json
+import logging
+import os
+import time
+
+from openai.types import CompletionUsage
+from openai.types.chat import ChatCompletion, ChatCompletionMessage, ChatCompletionMessageToolCall
+from openai.types.chat.chat_completion import Choice
+from openai.types.chat.chat_completion_message_tool_call import Function
+
+from superagentx.llm import LLMClient
+from superagentx.llm.types.response import Message, Tool
+from superagentx.utils.helper import json_loads
+
+logger = logging.getLogger(__name__)
+
+'''
+ Run Pytest:
+
+   1. pytest --log-cli-level=INFO tests/benchmarks/test_message_benchmark.py::TestMessageBenchmark::test_matches_legacy_messages
+   2. pytest --log-cli-level=INFO tests/benchmarks/test_message_benchmark.py::TestMessageBenchmark::test_message_build_time
+
+ Set `SUPERAGENTX_BENCH_ITERATIONS` to tune the run.
+'''
+
+_ITERATIONS = int(os.getenv('SUPERAGENTX_BENCH_ITERATIONS', 2000))
+
+_ARGUMENTS = json.dumps({
+    'query': 'quarterly revenue by region',
+    'filters': {'year': 2024, 'regions': ['emea', 'apac', 'amer'], 'include_forecast': False},
+    'limit': 50
+})
+
+
+def _response(tool_calls: int = 3) -> ChatCompletion:
+    return ChatCompletion(
+        id='bench',
+        choices=[
+            Choice(
+                finish_reason='tool_calls',
+                index=0,
+                message=ChatCompletionMessage(
+                    role='assistant',
+                    tool_calls=[
+                        ChatCompletionMessageToolCall(
+                            id=f'call_{index}',
+                            type='function',
+                            function=Function(name='search_reports', arguments=_ARGUMENTS)
+                        )
+                        for index in range(tool_calls)
+                    ]
+                )
+            )
+        ],
+        created=1729000000,
+        model='gpt-4o',
+        object='chat.completion',
+        usage=CompletionUsage(prompt_tokens=120, completion_tokens=80, total_tokens=200)
+    )
+
+
+def _legacy_messages(response: ChatCompletion) -> list[Message]:
+    """The previous path: a `Tool` model per tool call with `json.loads`, then the `Message` model."""
+    messages = []
+    usage_data = response.usage
+    for choice in response.choices:
+        tool_calls_data = [
+            Tool(
+                tool_type=tool_call.type,
+                name=tool_call.function.name,
+                arguments=json.loads(tool_call.function.arguments)
+            )
+            for tool_call in choice.message.tool_calls or []
+        ]
+        messages.append(
+            Message(
+                role=choice.message.role,
+                model=response.model,
+                content=choice.message.content,
+                tool_calls=tool_calls_data or None,
+                completion_tokens=usage_data.completion_tokens,
+                prompt_tokens=usage_data.prompt_tokens,
+                total_tokens=usage_data.total_tokens,
+                reasoning_tokens=0,
+                created=response.created
+            )
+        )
+    return messages
+
+
+def _timed(build, response: ChatCompletion) -> float:
+    started_at = time.perf_counter()
+    for _ in range(_ITERATIONS):
+        build(response)
+    return (time.perf_counter() - started_at) / _ITERATIONS
+
+
+class TestMessageBenchmark:
+
+    async def test_matches_legacy_messages(self):
+        response = _response()
+        messages = LLMClient._build_messages(response)
+        assert messages == _legacy_messages(response)
+        assert messages[0].tool_calls[0].arguments['filters']['regions'] == ['emea', 'apac', 'amer']
+        # Documents orjson rejects fall back to `json.loads`
+        assert json_loads('{"value": NaN}')['value'] != 0
+
+    async def test_message_build_time(self):
+        response = _response()
+        legacy_elapsed = _timed(_legacy_messages, response)
+        elapsed = _timed(LLMClient._build_messages, response)
+        logger.info(
+            f'Messages of a response with 3 tool calls: legacy {legacy_elapsed * 1e6:.1f} us, '
+            f'fast path {elapsed * 1e6:.1f} us ({legacy_elapsed / elapsed:.1f}x)'
+        )
+        assert elapsed < legacy_elapsed
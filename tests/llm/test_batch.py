@@ -0,0 +1,255 @@
+import asyncio
+import io
+import json
+import logging
+
+import pytest
+
+from superagentx.agent import Agent
+from superagentx.engine import Engine
+from superagentx.llm import LLMClient
+from superagentx.llm.batch import BatchCollector, BedrockBatchBackend, LocalFileBatchBackend, OpenAIBatchBackend
+from superagentx.llm.exceptions import BatchRequestError
+from superagentx.llm.models import ChatCompletionParams
+from superagentx.prompt import PromptTemplate
+from tests.llm.test_replay import ScriptedClient, WeatherHandler
+
+logger = logging.getLogger(__name__)
+
+'''
+ Run Pytest:
+
+   1. pytest --log-cli-level=INFO tests/llm/test_batch.py::TestBatch::test_requests_collected_in_one_job
+   2. pytest --log-cli-level=INFO tests/llm/test_batch.py::TestBatch::test_failed_request
+   3. pytest --log-cli-level=INFO tests/llm/test_batch.py::TestBatch::test_agent_execute_many
+   4. pytest --log-cli-level=INFO tests/llm/test_batch.py::TestBatch::test_bedrock_batch_records
+   5. pytest --log-cli-level=INFO tests/llm/test_batch.py::TestBatch::test_openai_backend_uses_llm_client
+   6. pytest --log-cli-level=INFO tests/llm/test_batch.py::TestBatch::test_bedrock_results_after_restart
+   7. pytest --log-cli-level=INFO tests/llm/test_batch.py::TestBatch::test_bedrock_rejects_tool_messages
+'''
+
+
+class FailingScriptedClient(ScriptedClient):
+
+    async def achat_completion(self, *, chat_completion_params: ChatCompletionParams):
+        if chat_completion_params.messages[-1].content == 'fail':
+            raise RuntimeError('Invalid request')
+        return await super().achat_completion(chat_completion_params=chat_completion_params)
+
+
+class FakeS3:
+
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, *, Bucket, Key, Body):
+        self.objects[(Bucket, Key)] = Body
+
+    def get_object(self, *, Bucket, Key):
+        return {'Body': io.BytesIO(self.objects[(Bucket, Key)])}
+
+
+class FakeBedrock:
+    """Completes every job at once, answering each record with a tool use when tools are offered."""
+
+    def __init__(self, s3: FakeS3):
+        self.s3 = s3
+        self.jobs = []
+        self.input_uris = {}
+
+    def create_model_invocation_job(self, *, jobName, roleArn, modelId, inputDataConfig, outputDataConfig):
+        self.jobs.append(jobName)
+        input_uri = inputDataConfig['s3InputDataConfig']['s3Uri']
+        bucket, _, key = input_uri.removeprefix('s3://').partition('/')
+        records = []
+        for line in self.s3.objects[(bucket, key)].decode().splitlines():
+            record = json.loads(line)
+            if record['modelInput'].get('tools'):
+                content = [{'type': 'tool_use', 'id': 'tool-1', 'name': 'get_weather', 'input': {'city': 'Chennai'}}]
+                stop_reason = 'tool_use'
+            else:
+                content = [{'type': 'text', 'text': 'Sunny.'}]
+                stop_reason = 'end_turn'
+            record['modelOutput'] = {
+                'content': content,
+                'stop_reason': stop_reason,
+                'usage': {'input_tokens': 40, 'output_tokens': 8}
+            }
+            records.append(json.dumps(record))
+        output_bucket, _, output_prefix = outputDataConfig['s3OutputDataConfig']['s3Uri'].removeprefix(
+            's3://'
+        ).partition('/')
+        output_key = f'{output_prefix}{jobName}/{key.rsplit("/", 1)[-1]}.out'
+        self.s3.put_object(Bucket=output_bucket, Key=output_key, Body='\n'.join(records).encode())
+        job_arn = f'arn:aws:bedrock:us-east-1:123456789012:model-invocation-job/{jobName}'
+        self.input_uris[job_arn] = input_uri
+        return {'jobArn': job_arn}
+
+    def get_model_invocation_job(self, *, jobIdentifier):
+        return {
+            'status': 'Completed',
+            'inputDataConfig': {'s3InputDataConfig': {'s3Uri': self.input_uris[jobIdentifier]}}
+        }
+
+
+def _batch_llm_client(tmp_path, client=None) -> LLMClient:
+    backend = LocalFileBatchBackend(directory=tmp_path, client=client or ScriptedClient(), model='gpt-4o')
+    return LLMClient(
+        llm_config={'model': 'gpt-4o', 'llm_type': 'openai', 'api_key': 'sk-test'},
+        batch=BatchCollector(backend=backend, flush_interval=0.05, poll_interval=0.01)
+    )
+
+
+class TestBatch:
+
+    async def test_requests_collected_in_one_job(self, tmp_path):
+        llm_client = _batch_llm_client(tmp_path)
+        responses = await asyncio.gather(*[
+            llm_client.achat_completion(
+                chat_completion_params=ChatCompletionParams(messages=[{'role': 'user', 'content': f'Question {index}'}])
+            )
+            for index in range(5)
+        ])
+        stats = llm_client.batch.stats()
+        logger.info(f'Batch stats {stats}')
+        assert stats['jobs_submitted'] == 1
+        assert stats['requests_submitted'] == 5
+        assert all(json.loads(response.choices[0].message.content)['is_goal_satisfied'] for response in responses)
+        assert len(list(tmp_path.glob('*.output.jsonl'))) == 1
+
+    async def test_failed_request(self, tmp_path):
+        llm_client = _batch_llm_client(tmp_path, client=FailingScriptedClient())
+        ok, failed = await asyncio.gather(
+            llm_client.achat_completion(
+                chat_completion_params=ChatCompletionParams(messages=[{'role': 'user', 'content': 'ok'}])
+            ),
+            llm_client.achat_completion(
+                chat_completion_params=ChatCompletionParams(messages=[{'role': 'user', 'content': 'fail'}])
+            ),
+            return_exceptions=True
+        )
+        assert ok.choices[0].message.content
+        assert isinstance(failed, BatchRequestError)
+        assert llm_client.batch.stats()['failed_requests'] == 1
+
+    async def test_agent_execute_many(self, tmp_path):
+        llm_client = _batch_llm_client(tmp_path)
+        prompt_template = PromptTemplate()
+        engine = Engine(handler=WeatherHandler(), llm=llm_client, prompt_template=prompt_template)
+        agent = Agent(
+            goal='Report the weather of the city',
+            role='Weather reporter',
+            llm=llm_client,
+            prompt_template=prompt_template,
+            engines=[engine],
+            max_retry=1
+        )
+        results = await agent.execute_many(
+            query_instructions=[f'What is the weather in city {index}?' for index in range(3)]
+        )
+        assert [result.result for result in results] == ['Sunny in Chennai'] * 3
+        # One job for the tool calls of every query, one for the goal verifications
+        assert llm_client.batch.stats()['jobs_submitted'] == 2
+        assert llm_client.batch.stats()['requests_submitted'] == 6
+
+    async def test_bedrock_batch_records(self):
+        s3 = FakeS3()
+        backend = BedrockBatchBackend(
+            model='anthropic.claude-3-5-sonnet-20240620-v1:0',
+            role_arn='arn:aws:iam::123456789012:role/batch',
+            input_s3_uri='s3://batch-bucket/input',
+            output_s3_uri='s3://batch-bucket/output',
+            bedrock_client=FakeBedrock(s3),
+            s3_client=s3
+        )
+        collector = BatchCollector(backend=backend, flush_interval=0.01, poll_interval=0.01)
+        tool = {'toolSpec': {'name': 'get_weather', 'inputSchema': {'json': {'type': 'object', 'properties': {}}}}}
+        tool_response, text_response = await asyncio.gather(
+            collector.asubmit(ChatCompletionParams(
+                messages=[
+                    {'role': 'system', 'content': 'You are a helpful assistant.'},
+                    {'role': 'user', 'content': 'Weather in Chennai?'}
+                ],
+                tools=[tool]
+            )),
+            collector.asubmit(ChatCompletionParams(messages=[{'role': 'user', 'content': 'Hello'}]))
+        )
+        record = json.loads(next(body for key, body in s3.objects.items() if key[1].startswith('input/')).splitlines()[0])
+        assert record['modelInput']['system'] == 'You are a helpful assistant.'
+        assert record['modelInput']['tools'][0]['name'] == 'get_weather'
+        assert tool_response.choices[0].finish_reason == 'tool_calls'
+        assert json.loads(tool_response.choices[0].message.tool_calls[0].function.arguments) == {'city': 'Chennai'}
+        assert text_response.choices[0].message.content == 'Sunny.'
+        assert text_response.usage.total_tokens == 48
+
+        with pytest.raises(ValueError):
+            BedrockBatchBackend(
+                model='amazon.titan-text-express-v1',
+                role_arn='arn',
+                input_s3_uri='s3://bucket',
+                output_s3_uri='s3://bucket',
+                bedrock_client=object(),
+                s3_client=object()
+            )
+
+    async def test_bedrock_results_after_restart(self):
+        s3 = FakeS3()
+        bedrock = FakeBedrock(s3)
+        backend_kwargs = dict(
+            model='anthropic.claude-3-5-sonnet-20240620-v1:0',
+            role_arn='arn:aws:iam::123456789012:role/batch',
+            input_s3_uri='s3://batch-bucket/input',
+            output_s3_uri='s3://batch-bucket/output',
+            bedrock_client=bedrock,
+            s3_client=s3
+        )
+        job_id = await BedrockBatchBackend(**backend_kwargs).asubmit(
+            [('request-1', ChatCompletionParams(messages=[{'role': 'user', 'content': 'Hello'}]))]
+        )
+        # A new backend finds the input file of the job from the job itself
+        results = await BedrockBatchBackend(**backend_kwargs).aresults(job_id)
+        assert results['request-1'].choices[0].message.content == 'Sunny.'
+
+    async def test_bedrock_rejects_tool_messages(self):
+        s3 = FakeS3()
+        backend = BedrockBatchBackend(
+            model='anthropic.claude-3-5-sonnet-20240620-v1:0',
+            role_arn='arn:aws:iam::123456789012:role/batch',
+            input_s3_uri='s3://batch-bucket/input',
+            output_s3_uri='s3://batch-bucket/output',
+            bedrock_client=FakeBedrock(s3),
+            s3_client=s3
+        )
+        collector = BatchCollector(backend=backend, flush_interval=0.01, poll_interval=0.01)
+        weather = {'role': 'user', 'content': 'Weather in Chennai?'}
+        for messages in (
+                [weather, {'role': 'assistant', 'content': ''}],
+                [weather, {'role': 'tool', 'content': '{"forecast": "Sunny"}'}]
+        ):
+            with pytest.raises(ValueError):
+                await collector.asubmit(ChatCompletionParams(messages=messages))
+        # The rejected requests never reach a job
+        assert collector.stats()['pending_requests'] == 0
+        response = await collector.asubmit(ChatCompletionParams(
+            messages=[weather, {'role': 'assistant', 'content': 'Which day?'}, {'role': 'user', 'content': 'Today'}]
+        ))
+        assert response.choices[0].message.content == 'Sunny.'
+
+    async def test_openai_backend_uses_llm_client(self):
+        backend = OpenAIBatchBackend()
+        llm_client = LLMClient(
+            llm_config={'model': 'gpt-4o-mini', 'llm_type': 'openai', 'api_key': 'sk-test'},
+            batch=BatchCollector(backend=backend)
+        )
+        # The shared SDK client of the LLMClient, not a client configured from the environment
+        assert backend.client is llm_client.client.client
+        assert backend.model == 'gpt-4o-mini'
+
+        with pytest.raises(ValueError):
+            LLMClient(
+                llm_config={'model': 'gpt-4o', 'llm_type': 'openai', 'api_key': 'sk-test', 'async_mode': False},
+                batch=BatchCollector(backend=OpenAIBatchBackend())
+            )
+        with pytest.raises(ValueError):
+            await OpenAIBatchBackend(model='gpt-4o').asubmit([])
+        await llm_client.aclose()
@@ -0,0 +1,136 @@
+import asyncio
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from superagentx.llm import LLMClient
+from superagentx.llm.models import ChatCompletionParams
+from superagentx.llm.registry import ClientRegistry
+
+logger = logging.getLogger(__name__)
+
+'''
+ Run Pytest:
+
+   1. pytest --log-cli-level=INFO tests/llm/test_client_registry.py::TestClientRegistry::test_shared_openai_pool
+   2. pytest --log-cli-level=INFO tests/llm/test_client_registry.py::TestClientRegistry::test_release_closes_pool
+   3. pytest --log-cli-level=INFO tests/llm/test_client_registry.py::TestClientRegistry::test_shared_bedrock_client
+   4. pytest --log-cli-level=INFO tests/llm/test_client_registry.py::TestClientRegistry::test_async_client_per_event_loop
+'''
+
+
+class ChatCompletionHandler(BaseHTTPRequestHandler):
+    # Keep-alive, the pool keeps the connection for the next request
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        body = json.dumps({
+            'id': 'chat-1',
+            'object': 'chat.completion',
+            'created': 1729000000,
+            'model': 'gpt-4o',
+            'choices': [
+                {'index': 0, 'finish_reason': 'stop', 'message': {'role': 'assistant', 'content': 'Hello!'}}
+            ]
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestClientRegistry:
+
+    async def test_shared_openai_pool(self):
+        registry = ClientRegistry()
+        chat_client = LLMClient(llm_config={'model': 'gpt-4o', 'llm_type': 'openai'}, client_registry=registry)
+        embed_client = LLMClient(
+            llm_config={'model': 'text-embedding-3-small', 'llm_type': 'openai'},
+            client_registry=registry
+        )
+        other_account = LLMClient(
+            llm_config={'model': 'gpt-4o', 'llm_type': 'openai', 'api_key': 'sk-other'},
+            client_registry=registry
+        )
+        assert chat_client.client.client is embed_client.client.client
+        assert other_account.client.client is not chat_client.client.client
+        assert chat_client.client._model == 'gpt-4o'
+        assert embed_client.client._model == 'text-embedding-3-small'
+
+        stats = registry.stats()
+        logger.info(f'Registry stats {stats}')
+        assert stats['clients'] == 2
+        assert stats['refs'] == 3
+        await registry.aclose()
+        assert registry.stats()['clients'] == 0
+
+    async def test_release_closes_pool(self):
+        registry = ClientRegistry()
+        first = LLMClient(llm_config={'model': 'gpt-4o', 'llm_type': 'openai'}, client_registry=registry)
+        second = LLMClient(llm_config={'model': 'gpt-4o-mini', 'llm_type': 'openai'}, client_registry=registry)
+        http_client = first.client.client._client
+
+        await first.aclose()
+        assert not http_client.is_closed
+        async with second:
+            pass
+        assert http_client.is_closed
+        assert registry.stats()['clients'] == 0
+
+        third = LLMClient(llm_config={'model': 'gpt-4o', 'llm_type': 'openai'}, client_registry=registry)
+        assert third.client.client._client is not http_client
+        await third.aclose()
+
+    async def test_shared_bedrock_client(self):
+        registry = ClientRegistry(max_pool_connections=20)
+        llm_config = {'model': 'anthropic.claude-3-5-sonnet-20240620-v1:0', 'llm_type': 'bedrock'}
+        chat_client = LLMClient(llm_config=llm_config, client_registry=registry, aws_region='us-east-1')
+        embed_client = LLMClient(
+            llm_config={'model': 'cohere.embed-english-v3', 'llm_type': 'bedrock'},
+            client_registry=registry,
+            aws_region='us-east-1'
+        )
+        assert chat_client.client.client is embed_client.client.client
+        assert embed_client.client.model == 'cohere.embed-english-v3'
+        assert registry.stats()['pools'][0]['max_pool_connections'] == 20
+
+        chat_client.close()
+        embed_client.close()
+        assert registry.stats()['clients'] == 0
+
+    def test_async_client_per_event_loop(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), ChatCompletionHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        registry = ClientRegistry()
+        llm_client = LLMClient(
+            llm_config={
+                'model': 'gpt-4o',
+                'llm_type': 'openai',
+                'api_key': 'sk-test',
+                'base_url': f'http://127.0.0.1:{server.server_port}/v1'
+            },
+            client_registry=registry
+        )
+
+        async def _chat():
+            response = await llm_client.achat_completion(
+                chat_completion_params=ChatCompletionParams(messages=[{'role': 'user', 'content': 'Hi'}])
+            )
+            return response.choices[0].message.content, llm_client.client.client._client
+
+        try:
+            # Each `asyncio.run` closes its loop, the kept-alive connection of the first one is not reused
+            first_content, first_pool = asyncio.run(_chat())
+            second_content, second_pool = asyncio.run(_chat())
+            assert first_content == second_content == 'Hello!'
+            assert first_pool is not second_pool
+            assert registry.stats()['clients'] == 1
+        finally:
+            server.shutdown()
+            server.server_close()
@@ -0,0 +1,123 @@
+import asyncio
+import io
+import json
+import logging
+
+import numpy as np
+from openai.types import CreateEmbeddingResponse, Embedding
+from openai.types.create_embedding_response import Usage
+
+from superagentx.llm.bedrock import BedrockClient
+from superagentx.llm.embeddings import split_batches
+from superagentx.llm.openai import OpenAIClient
+
+logger = logging.getLogger(__name__)
+
+'''
+ Run Pytest:
+
+   1. pytest --log-cli-level=INFO tests/llm/test_embed_many.py::TestEmbedMany::test_split_batches
+   2. pytest --log-cli-level=INFO tests/llm/test_embed_many.py::TestEmbedMany::test_openai_aembed_many
+   3. pytest --log-cli-level=INFO tests/llm/test_embed_many.py::TestEmbedMany::test_bedrock_cohere_embed_many
+   4. pytest --log-cli-level=INFO tests/llm/test_embed_many.py::TestEmbedMany::test_bedrock_titan_aembed_many
+'''
+
+
+def _vector(text: str) -> list[float]:
+    return [float(len(text)), float(ord(text[0])), 1.0]
+
+
+class FakeAsyncEmbeddings:
+
+    def __init__(self):
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def create(self, *, input: list[str], model: str, **kwargs):
+        self.requests.append(input)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        data = [
+            Embedding(embedding=_vector(text), index=index, object='embedding')
+            for index, text in enumerate(input)
+        ]
+        # Out of order on purpose, the index decides the row
+        return CreateEmbeddingResponse(
+            data=list(reversed(data)),
+            model=model,
+            object='list',
+            usage=Usage(prompt_tokens=len(input), total_tokens=len(input))
+        )
+
+
+class FakeAsyncOpenAI:
+    model = 'text-embedding-3-small'
+    base_url = 'https://api.openai.com/v1'
+    api_key = 'sk-test'
+
+    def __init__(self):
+        self.embeddings = FakeAsyncEmbeddings()
+
+
+class FakeBedrockRuntime:
+
+    def __init__(self, model: str):
+        self.model = model
+        self.requests = []
+
+    def invoke_model(self, *, modelId: str, body: str, **kwargs):
+        request = json.loads(body)
+        self.requests.append(request)
+        if 'texts' in request:
+            result = {'embeddings': [_vector(text) for text in request['texts']]}
+        else:
+            result = {'embedding': _vector(request['inputText'])}
+        return {'body': io.BytesIO(json.dumps(result).encode('utf-8'))}
+
+
+class TestEmbedMany:
+
+    async def test_split_batches(self):
+        texts = ['a' * 40] * 10
+        assert split_batches(texts, max_items=4, max_tokens=1000) == [slice(0, 4), slice(4, 8), slice(8, 10)]
+        # 11 estimated tokens per text
+        assert split_batches(texts, max_items=100, max_tokens=30) == [slice(i, i + 2) for i in range(0, 10, 2)]
+        assert split_batches(['a' * 400], max_items=10, max_tokens=5) == [slice(0, 1)]
+        assert split_batches([], max_items=10, max_tokens=5) == []
+
+    async def test_openai_aembed_many(self):
+        cli = FakeAsyncOpenAI()
+        client = OpenAIClient(client=cli)
+        texts = [f'{chr(97 + index % 26)} text\nnumber {index}' for index in range(25)]
+        matrix = await client.aembed_many(texts, max_batch_items=4, max_concurrency=2)
+        logger.info(f'Requests {len(cli.embeddings.requests)} max in flight {cli.embeddings.max_in_flight}')
+        assert matrix.dtype == np.float32
+        assert matrix.shape == (25, 3)
+        assert matrix.flags['C_CONTIGUOUS']
+        assert len(cli.embeddings.requests) == 7
+        assert cli.embeddings.max_in_flight == 2
+        expected = np.asarray([_vector(text.replace('\n', ' ')) for text in texts], dtype=np.float32)
+        assert np.array_equal(matrix, expected)
+
+    async def test_bedrock_cohere_embed_many(self):
+        runtime = FakeBedrockRuntime('cohere.embed-english-v3')
+        client = BedrockClient(client=runtime)
+        texts = [f'chunk {index}' for index in range(200)]
+        matrix = client.embed_many(texts, input_type='search_query')
+        assert matrix.shape == (200, 3)
+        assert [len(request['texts']) for request in runtime.requests] == [96, 96, 8]
+        assert runtime.requests[0]['input_type'] == 'search_query'
+        assert client.embed('chunk 7') == _vector('chunk 7')
+
+    async def test_bedrock_titan_aembed_many(self):
+        runtime = FakeBedrockRuntime('amazon.titan-embed-text-v2:0')
+        client = BedrockClient(client=runtime)
+        texts = ['alpha', 'be', 'gamma ray', 'd']
+        matrix = await client.aembed_many(texts, dimensions=256)
+        assert len(runtime.requests) == 4
+        assert all(request['dimensions'] == 256 for request in runtime.requests)
+        assert np.array_equal(matrix, np.asarray([_vector(text) for text in texts], dtype=np.float32))
+        assert await client.aembed('alpha') == _vector('alpha')
@@ -0,0 +1,119 @@
+import logging
+
+import numpy as np
+import pytest
+
+from superagentx.llm import LLMClient
+from superagentx.llm.cache import EmbeddingCache, embedding_key
+from superagentx.llm.client import Client
+from superagentx.llm.models import ChatCompletionParams
+
+logger = logging.getLogger(__name__)
+
+'''
+ Run Pytest:
+
+   1. pytest --log-cli-level=INFO tests/llm/test_embedding_cache.py::TestEmbeddingCache::test_key_normalization
+   2. pytest --log-cli-level=INFO tests/llm/test_embedding_cache.py::TestEmbeddingCache::test_aembed_many_only_missing
+   3. pytest --log-cli-level=INFO tests/llm/test_embedding_cache.py::TestEmbeddingCache::test_persistent_warm_load
+   4. pytest --log-cli-level=INFO tests/llm/test_embedding_cache.py::TestEmbeddingCache::test_size_eviction
+'''
+
+
+def _vector(text: str) -> list[float]:
+    return [float(len(text)), float(sum(map(ord, text)) % 97), 0.5, -1.25]
+
+
+class FakeEmbedClient(Client):
+
+    def __init__(self):
+        self.embedded = []
+
+    def chat_completion(self, *, chat_completion_params: ChatCompletionParams):
+        raise NotImplementedError
+
+    async def achat_completion(self, *, chat_completion_params: ChatCompletionParams):
+        raise NotImplementedError
+
+    async def get_tool_json(self, func):
+        return {}
+
+    def embed(self, text: str, **kwargs):
+        self.embedded.append(text)
+        return _vector(text)
+
+    async def aembed(self, text: str, **kwargs):
+        return self.embed(text, **kwargs)
+
+
+@pytest.fixture
+def embed_client() -> LLMClient:
+    llm_config = {'model': 'text-embedding-3-small', 'llm_type': 'openai', 'api_key': 'sk-test'}
+    llm_client = LLMClient(llm_config=llm_config, embed_cache=EmbeddingCache())
+    llm_client.client = FakeEmbedClient()
+    return llm_client
+
+
+class TestEmbeddingCache:
+
+    async def test_key_normalization(self):
+        key = embedding_key('Hello\n  world ', model='text-embedding-3-small')
+        assert key == embedding_key('Hello world', model='text-embedding-3-small')
+        assert key != embedding_key('Hello world', model='text-embedding-3-large')
+        assert key != embedding_key('Hello world', model='text-embedding-3-small', dimensions=256)
+        assert key != embedding_key('hello world', model='text-embedding-3-small')
+
+    async def test_aembed_many_only_missing(self, embed_client: LLMClient):
+        fake_client: FakeEmbedClient = embed_client.client
+        vector = await embed_client.aembed(text='memory write')
+        assert vector == _vector('memory write')
+        assert await embed_client.aembed(text='memory write') == vector
+        assert fake_client.embedded == ['memory write']
+
+        texts = ['memory write', 'new chunk', 'other chunk', 'new chunk']
+        matrix = await embed_client.aembed_many(texts=texts)
+        assert matrix.shape == (4, 4)
+        assert np.array_equal(matrix, np.asarray([_vector(text) for text in texts], dtype=np.float32))
+        assert fake_client.embedded == ['memory write', 'new chunk', 'other chunk']
+
+        stats = embed_client.embed_cache.stats()
+        logger.info(f'Embedding cache stats {stats}')
+        assert stats['hits'] == 2
+        assert stats['entries'] == 3
+
+    async def test_persistent_warm_load(self, tmp_path):
+        db_path = tmp_path / 'embeddings.db'
+        cache = EmbeddingCache(db_path=db_path, dtype='float16')
+        cache.set_many({f'key-{index}': _vector(f'text {index}') for index in range(10)})
+        assert cache.stats()['bytes'] == 10 * 4 * 2
+        cache.close()
+
+        cache = EmbeddingCache(db_path=db_path, max_memory_entries=5)
+        assert cache.stats()['memory_entries'] == 5
+        vector = cache.get('key-3')
+        assert vector.dtype == np.float32
+        assert np.allclose(vector, _vector('text 3'), rtol=1e-3)
+        assert cache.get('missing') is None
+        assert cache.hit_rate == 0.5
+        cache.close()
+
+    async def test_size_eviction(self):
+        # 4 float32 values per vector, room for 3 vectors
+        cache = EmbeddingCache(max_bytes=48, max_memory_entries=2)
+        for index in range(3):
+            cache.set(f'key-{index}', _vector(f'text {index}'))
+        cache.get('key-0')
+        cache.set('key-3', _vector('text 3'))
+        assert len(cache) == 3
+        assert cache.get('key-1') is None
+        assert cache.get('key-0') is not None
+        assert cache.stats()['bytes'] == 48
+
+        # A store past the bound evicts over several pages, the recent vectors stay
+        cache = EmbeddingCache(max_bytes=16 * 300, max_memory_entries=2)
+        cache.set_many({f'old-{index}': _vector(f'old {index}') for index in range(300)})
+        cache.set_many({f'new-{index}': _vector(f'new {index}') for index in range(300)})
+        assert len(cache) == 300
+        assert cache.get('old-299') is None
+        assert cache.get('new-0') is not None
+        assert cache.stats()['bytes'] == 16 * 300
@@ -0,0 +1,113 @@
+import asyncio
+import json
+import logging
+
+import pytest
+
+from superagentx.llm import LLMClient
+from superagentx.llm.cache import ResponseCache
+from superagentx.llm.metrics import LLMMetrics, llm_caller
+from superagentx.llm.models import ChatCompletionParams
+from tests.llm.test_response_cache import FakeClient, messages
+
+logger = logging.getLogger(__name__)
+
+'''
+ Run Pytest:
+
+   1. pytest --log-cli-level=INFO tests/llm/test_metrics.py::TestLLMMetrics::test_record_per_caller
+   2. pytest --log-cli-level=INFO tests/llm/test_metrics.py::TestLLMMetrics::test_errors_and_cache_hits
+   3. pytest --log-cli-level=INFO tests/llm/test_metrics.py::TestLLMMetrics::test_prometheus_export
+'''
+
+
+class FailingClient(FakeClient):
+
+    async def achat_completion(self, *, chat_completion_params: ChatCompletionParams):
+        ex = RuntimeError('Bedrock failed')
+        ex.__cause__ = type('ClientError', (Exception,), {})()
+        ex.__cause__.response = {'Error': {'Code': 'ValidationException'}}
+        raise ex
+
+
+@pytest.fixture
+def metrics_llm_client() -> LLMClient:
+    llm_config = {'model': 'gpt-4o', 'llm_type': 'openai', 'api_key': 'sk-test'}
+    llm_client = LLMClient(
+        llm_config=llm_config,
+        response_cache=ResponseCache(),
+        metrics=LLMMetrics()
+    )
+    llm_client.client = FakeClient()
+    return llm_client
+
+
+class TestLLMMetrics:
+
+    async def test_record_per_caller(self, metrics_llm_client: LLMClient):
+        async def _call(agent: str, engine: str):
+            with llm_caller(agent):
+                with llm_caller(engine):
+                    await metrics_llm_client.achat_completion(
+                        chat_completion_params=ChatCompletionParams(messages=messages)
+                    )
+
+        await asyncio.gather(
+            _call('researcher', 'SerperDevToolHandler'),
+            _call('researcher', 'SerperDevToolHandler'),
+            _call('writer', 'ContentCreatorHandler')
+        )
+        snapshot = metrics_llm_client.metrics.snapshot()
+        logger.info(f'Metrics snapshot {json.dumps(snapshot, indent=2)}')
+        callers = {series['caller']: series for series in snapshot['series']}
+        assert set(callers) == {'researcher/SerperDevToolHandler', 'writer/ContentCreatorHandler'}
+        researcher = callers['researcher/SerperDevToolHandler']
+        assert researcher['requests'] == 2
+        assert researcher['prompt_tokens'] == 24
+        assert researcher['completion_tokens'] == 6
+        # gpt-4o (0.005, 0.015) per 1k tokens
+        assert researcher['cost'] == pytest.approx(2 * (12 * 0.005 + 3 * 0.015) / 1000)
+        assert sum(researcher['latency']['buckets'].values()) == 2
+        assert snapshot['totals']['requests'] == 3
+
+    async def test_errors_and_cache_hits(self, metrics_llm_client: LLMClient):
+        chat_completion_params = ChatCompletionParams(messages=messages, temperature=0)
+        await metrics_llm_client.achat_completion(chat_completion_params=chat_completion_params)
+        await metrics_llm_client.achat_completion(chat_completion_params=chat_completion_params)
+
+        metrics_llm_client.client = FailingClient()
+        with pytest.raises(RuntimeError):
+            await metrics_llm_client.achat_completion(chat_completion_params=ChatCompletionParams(messages=messages))
+
+        series = metrics_llm_client.metrics.snapshot()['series'][0]
+        assert series['caller'] is None
+        assert series['requests'] == 2
+        assert series['cache_hits'] == 1
+        assert series['errors'] == {'ValidationException': 1}
+
+    async def test_prometheus_export(self):
+        metrics = LLMMetrics(latency_buckets=(0.5, 1.0), prices={'anthropic.claude-3-haiku': (0.00025, 0.00125)})
+        with llm_caller('agent "one"'):
+            metrics.record(model='anthropic.claude-3-haiku', latency=0.7)
+        text = metrics.to_prometheus()
+        logger.info(f'Prometheus\n{text}')
+        labels = 'model="anthropic.claude-3-haiku",caller="agent \\"one\\""'
+        assert f'superagentx_llm_requests_total{{{labels}}} 1' in text
+        assert f'superagentx_llm_request_duration_seconds_bucket{{{labels},le="0.5"}} 0' in text
+        assert f'superagentx_llm_request_duration_seconds_bucket{{{labels},le="1.0"}} 1' in text
+        assert f'superagentx_llm_request_duration_seconds_bucket{{{labels},le="+Inf"}} 1' in text
+        assert '# TYPE superagentx_llm_request_duration_seconds histogram' in text
+
+        # With several series, the samples of each family sit together after its own HELP and TYPE lines
+        with llm_caller('agent two'):
+            metrics.record(model='gpt-4o', latency=0.2)
+            metrics.record(model='gpt-4o', latency=0.3, error=RuntimeError('Timed out'))
+        families = []
+        for line in metrics.to_prometheus().splitlines():
+            if line.startswith('# TYPE '):
+                families.append(line.split()[2])
+            elif not line.startswith('#'):
+                name = line.split('{')[0]
+                family = families[-1]
+                assert name == family or name in (f'{family}_bucket', f'{family}_sum', f'{family}_count'), line
+        assert len(families) == len(set(families)) == 6
@@ -0,0 +1,129 @@
+import logging
+
+from openai.types import CompletionUsage
+from openai.types.completion_usage import PromptTokensDetails
+
+from superagentx.agent import Agent
+from superagentx.llm import LLMClient
+from superagentx.llm.bedrock import BedrockClient
+from superagentx.llm.metrics import LLMMetrics, compute_cost
+from superagentx.llm.models import ChatCompletionParams
+from superagentx.prompt import PromptTemplate
+from tests.llm.test_response_cache import FakeClient
+
+logger = logging.getLogger(__name__)
+
+'''
+ Run Pytest:
+
+   1. pytest --log-cli-level=INFO tests/llm/test_prompt_caching.py::TestPromptCaching::test_bedrock_cache_points
+   2. pytest --log-cli-level=INFO tests/llm/test_prompt_caching.py::TestPromptCaching::test_cached_tokens_reported
+   3. pytest --log-cli-level=INFO tests/llm/test_prompt_caching.py::TestPromptCaching::test_goal_prompt_static_prefix
+'''
+
+_CACHE_POINT = {'cachePoint': {'type': 'default'}}
+
+
+class CachingBedrockRuntime:
+
+    def __init__(self):
+        self.requests = []
+
+    def converse(self, **kwargs):
+        self.requests.append(kwargs)
+        return {
+            'ResponseMetadata': {'RequestId': 'req-1'},
+            'output': {'message': {'role': 'assistant', 'content': [{'text': 'Cached.'}]}},
+            'stopReason': 'end_turn',
+            'usage': {
+                'inputTokens': 30,
+                'outputTokens': 10,
+                'totalTokens': 2040,
+                'cacheReadInputTokens': 2000,
+                'cacheWriteInputTokens': 0
+            }
+        }
+
+
+class CachedUsageClient(FakeClient):
+
+    def _response(self):
+        response = super()._response()
+        response.usage = CompletionUsage(
+            prompt_tokens=1500,
+            completion_tokens=20,
+            total_tokens=1520,
+            prompt_tokens_details=PromptTokensDetails(cached_tokens=1024)
+        )
+        return response
+
+
+class RecordingClient(FakeClient):
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    async def achat_completion(self, *, chat_completion_params: ChatCompletionParams):
+        self.requests.append(chat_completion_params)
+        return self._response()
+
+
+class TestPromptCaching:
+
+    async def test_bedrock_cache_points(self):
+        runtime = CachingBedrockRuntime()
+        client = BedrockClient(client=runtime, model='anthropic.claude-3-7-sonnet', prompt_caching=True)
+        chat_completion_params = ChatCompletionParams(
+            messages=[
+                {'role': 'system', 'content': 'You are a helpful assistant.'},
+                {'role': 'user', 'content': 'What is the most famous song on WZPZ?'}
+            ],
+            tools=[{'toolSpec': {'name': 'top_song'}}]
+        )
+        response = await client.achat_completion(chat_completion_params=chat_completion_params)
+        request = runtime.requests[0]
+        assert request['toolConfig']['tools'] == [{'toolSpec': {'name': 'top_song'}}, _CACHE_POINT]
+        assert request['system'] == [{'text': 'You are a helpful assistant.'}, _CACHE_POINT]
+        assert response.usage.prompt_tokens == 2030
+        assert response.usage.prompt_tokens_details.cached_tokens == 2000
+
+        # Without prompt caching the system prompt is still sent with the tools, without checkpoints
+        client.prompt_caching = False
+        await client.achat_completion(chat_completion_params=chat_completion_params)
+        assert runtime.requests[1]['system'] == [{'text': 'You are a helpful assistant.'}]
+        assert runtime.requests[1]['toolConfig']['tools'] == [{'toolSpec': {'name': 'top_song'}}]
+
+    async def test_cached_tokens_reported(self):
+        metrics = LLMMetrics()
+        llm_client = LLMClient(
+            llm_config={'model': 'gpt-4o', 'llm_type': 'openai', 'api_key': 'sk-test'},
+            metrics=metrics
+        )
+        llm_client.client = CachedUsageClient()
+        messages = await llm_client.afunc_chat_completion(
+            chat_completion_params=ChatCompletionParams(messages=[{'role': 'user', 'content': 'Hello'}])
+        )
+        assert messages[0].cached_tokens == 1024
+
+        totals = metrics.snapshot()['totals']
+        logger.info(f'Metrics totals {totals}')
+        assert totals['cached_tokens'] == 1024
+        # Cached prompt tokens are billed at half the input rate
+        assert totals['cost'] == compute_cost('gpt-4o', 1500, 20, cached_tokens=1024)
+        assert totals['cost'] < compute_cost('gpt-4o', 1500, 20)
+        assert 'type="cached"} 1024' in metrics.to_prometheus()
+
+    async def test_goal_prompt_static_prefix(self):
+        llm_client = LLMClient(llm_config={'model': 'gpt-4o', 'llm_type': 'openai', 'api_key': 'sk-test'})
+        fake = llm_client.client = RecordingClient()
+        agent = Agent(goal='Summarize the report', role='Analyst', llm=llm_client, prompt_template=PromptTemplate())
+        await agent._verify_goal(query_instruction='First question', results=['first result'])
+        await agent._verify_goal(query_instruction='Second question', results=['second result'])
+
+        first, second = (params.messages for params in fake.requests)
+        # Identical system prefix, only the last user message varies
+        assert [message.model_dump() for message in first[:-1]] == [message.model_dump() for message in second[:-1]]
+        assert first[1].role == 'system' and 'Always generate the JSON output.' in first[1].content
+        assert first[-1].content.startswith('Goal: Summarize the report')
+        assert first[-1].content.rstrip().endswith("['first result']")
@@ -0,0 +1,164 @@
+import json
+import logging
+import time
+
+import pytest
+from openai.types import CompletionUsage
+from openai.types.chat import ChatCompletion, ChatCompletionMessage, ChatCompletionMessageToolCall
+from openai.types.chat.chat_completion import Choice
+from openai.types.chat.chat_completion_message_tool_call import Function
+
+from superagentx.agent import Agent
+from superagentx.agentxpipe import AgentXPipe
+from superagentx.engine import Engine
+from superagentx.handler.base import BaseHandler
+from superagentx.llm import LLMClient
+from superagentx.llm.exceptions import CassetteMiss
+from superagentx.llm.models import ChatCompletionParams
+from superagentx.llm.openai import OpenAIClient
+from superagentx.prompt import PromptTemplate
+from tests.llm.test_response_cache import FakeClient, messages
+
+logger = logging.getLogger(__name__)
+
+'''
+ Run Pytest:
+
+   1. pytest --log-cli-level=INFO tests/llm/test_replay.py::TestReplay::test_record_replay_pipe
+   2. pytest --log-cli-level=INFO tests/llm/test_replay.py::TestReplay::test_strict_and_sequential
+   3. pytest --log-cli-level=INFO tests/llm/test_replay.py::TestReplay::test_embeddings_and_stream
+'''
+
+
+class WeatherHandler(BaseHandler):
+
+    async def get_weather(self, city: str) -> str:
+        """
+        Get the current weather of the city.
+
+        Args:
+            city: Name of the city.
+        """
+        return f'Sunny in {city}'
+
+    def __dir__(self):
+        return ['get_weather']
+
+
+class ScriptedClient(FakeClient):
+    """Calls the handler tool when tools are offered, otherwise answers the goal verification."""
+
+    def _scripted(self, chat_completion_params: ChatCompletionParams) -> ChatCompletion:
+        self.calls += 1
+        if chat_completion_params.tools:
+            message = ChatCompletionMessage(
+                role='assistant',
+                tool_calls=[
+                    ChatCompletionMessageToolCall(
+                        id='call_1',
+                        type='function',
+                        function=Function(name='get_weather', arguments='{"city": "Chennai"}')
+                    )
+                ]
+            )
+        else:
+            message = ChatCompletionMessage(
+                role='assistant',
+                content=json.dumps({'reason': 'Weather found', 'result': 'Sunny in Chennai', 'is_goal_satisfied': True})
+            )
+        return ChatCompletion(
+            id=f'scripted-{self.calls}',
+            choices=[Choice(finish_reason='stop', index=0, message=message)],
+            created=1729000000,
+            model='gpt-4o',
+            object='chat.completion',
+            usage=CompletionUsage(prompt_tokens=50, completion_tokens=10, total_tokens=60)
+        )
+
+    async def achat_completion(self, *, chat_completion_params: ChatCompletionParams):
+        return self._scripted(chat_completion_params)
+
+    async def aembed(self, text: str, **kwargs):
+        return [float(len(text)), 0.5]
+
+    async def get_tool_json(self, func):
+        return await OpenAIClient.get_tool_json(func=func)
+
+
+def _replay_client(cassette, **kwargs) -> LLMClient:
+    return LLMClient(llm_config={'model': 'gpt-4o', 'llm_type': 'replay'}, cassette=cassette, **kwargs)
+
+
+async def _pipe(llm_client: LLMClient) -> AgentXPipe:
+    prompt_template = PromptTemplate()
+    engine = Engine(handler=WeatherHandler(), llm=llm_client, prompt_template=prompt_template)
+    agent = Agent(
+        goal='Report the weather of the city',
+        role='Weather reporter',
+        llm=llm_client,
+        prompt_template=prompt_template,
+        engines=[engine],
+        max_retry=1
+    )
+    return AgentXPipe(agents=[agent])
+
+
+class TestReplay:
+
+    async def test_record_replay_pipe(self, tmp_path):
+        cassette = tmp_path / 'pipe.json'
+        record_client = LLMClient(llm_config={'model': 'gpt-4o', 'llm_type': 'openai', 'api_key': 'sk-test'})
+        record_client.client = ScriptedClient()
+        recorder = _replay_client(cassette, replay_mode='record', record_client=record_client)
+        pipe = await _pipe(recorder)
+        recorded = await pipe.flow(query_instruction='What is the weather in Chennai?')
+        assert recorder.client.stats()['recorded'] == 2
+        # Written once when the recording is closed
+        assert not cassette.exists()
+        await recorder.aclose()
+        assert cassette.exists()
+
+        llm_client = _replay_client(cassette, latency=0.02)
+        pipe = await _pipe(llm_client)
+        started_at = time.perf_counter()
+        replayed = await pipe.flow(query_instruction='What is the weather in Chennai?')
+        elapsed = time.perf_counter() - started_at
+        logger.info(f'Replayed pipe in {elapsed:.3f}s, stats {llm_client.client.stats()}')
+        assert replayed[0].result == recorded[0].result == 'Sunny in Chennai'
+        assert replayed[0].is_goal_satisfied
+        assert llm_client.client.stats()['replayed'] == 2
+        assert elapsed >= 0.04
+
+    async def test_strict_and_sequential(self, tmp_path):
+        cassette = tmp_path / 'chat.json'
+        record_client = LLMClient(llm_config={'model': 'gpt-4o', 'llm_type': 'openai', 'api_key': 'sk-test'})
+        record_client.client = ScriptedClient()
+        recorder = _replay_client(cassette, replay_mode='record', record_client=record_client)
+        async with recorder:
+            await recorder.achat_completion(chat_completion_params=ChatCompletionParams(messages=messages))
+
+        other = ChatCompletionParams(messages=[{'role': 'user', 'content': 'Not recorded'}])
+        with pytest.raises(CassetteMiss):
+            await _replay_client(cassette).achat_completion(chat_completion_params=other)
+
+        response = await _replay_client(cassette, strict=False).achat_completion(chat_completion_params=other)
+        assert response.id == 'scripted-1'
+
+    async def test_embeddings_and_stream(self, tmp_path):
+        cassette = tmp_path / 'embed.json'
+        record_client = LLMClient(llm_config={'model': 'gpt-4o', 'llm_type': 'openai', 'api_key': 'sk-test'})
+        record_client.client = ScriptedClient()
+        recorder = _replay_client(cassette, replay_mode='record', record_client=record_client)
+        await recorder.aembed(text='hello world')
+        await recorder.achat_completion(chat_completion_params=ChatCompletionParams(messages=messages, tools=[{}]))
+        recorder.close()
+
+        llm_client = _replay_client(cassette)
+        assert await llm_client.aembed(text='hello world') == [11.0, 0.5]
+        stream = llm_client.afunc_chat_completion_stream(
+            chat_completion_params=ChatCompletionParams(messages=messages, tools=[{}])
+        )
+        replayed = await stream.messages()
+        assert replayed[0].tool_calls[0].name == 'get_weather'
+        assert replayed[0].tool_calls[0].arguments == {'city': 'Chennai'}
+        assert replayed[0].total_tokens == 60
@@ -0,0 +1,158 @@
+import logging
+import time
+
+import pytest
+from openai.types import CompletionUsage
+from openai.types.chat import ChatCompletion, ChatCompletionMessage
+from openai.types.chat.chat_completion import Choice
+
+from superagentx.llm import LLMClient
+from superagentx.llm.cache import ResponseCache, InMemoryCache, SQLiteCache, chat_completion_key
+from superagentx.llm.client import Client
+from superagentx.llm.models import ChatCompletionParams
+
+logger = logging.getLogger(__name__)
+
+'''
+ Run Pytest:
+
+   1. pytest --log-cli-level=INFO tests/llm/test_response_cache.py::TestResponseCache::test_cache_hit
+   2. pytest --log-cli-level=INFO tests/llm/test_response_cache.py::TestResponseCache::test_bypass_non_deterministic
+   3. pytest --log-cli-level=INFO tests/llm/test_response_cache.py::TestResponseCache::test_sqlite_backend
+   4. pytest --log-cli-level=INFO tests/llm/test_response_cache.py::TestResponseCache::test_sqlite_eviction_on_overflow
+'''
+
+messages = [
+    {
+        "role": "system",
+        "content": "You are a helpful assistant."
+    },
+    {
+        "role": "user",
+        "content": "Say hello!"
+    }
+]
+
+
+class FakeClient(Client):
+
+    def __init__(self):
+        self.calls = 0
+
+    def _response(self) -> ChatCompletion:
+        self.calls += 1
+        return ChatCompletion(
+            id=f'fake-{self.calls}',
+            choices=[
+                Choice(
+                    finish_reason='stop',
+                    index=0,
+                    message=ChatCompletionMessage(role='assistant', content='Hello!')
+                )
+            ],
+            created=int(time.time()),
+            model='gpt-4o',
+            object='chat.completion',
+            usage=CompletionUsage(prompt_tokens=12, completion_tokens=3, total_tokens=15)
+        )
+
+    def chat_completion(self, *, chat_completion_params: ChatCompletionParams):
+        return self._response()
+
+    async def achat_completion(self, *, chat_completion_params: ChatCompletionParams):
+        return self._response()
+
+    async def get_tool_json(self, func):
+        return {}
+
+    def embed(self, text: str, **kwargs):
+        return []
+
+    async def aembed(self, text: str, **kwargs):
+        return []
+
+
+@pytest.fixture
+def cached_llm_client_init() -> dict:
+    llm_config = {'model': 'gpt-4o', 'llm_type': 'openai', 'api_key': 'sk-test'}
+    response_cache = ResponseCache(backend=InMemoryCache(max_size=8), ttl=60)
+    llm_client: LLMClient = LLMClient(llm_config=llm_config, response_cache=response_cache)
+    fake_client = FakeClient()
+    llm_client.client = fake_client
+    return {'llm': llm_client, 'fake': fake_client, 'cache': response_cache}
+
+
+class TestResponseCache:
+
+    async def test_cache_hit(self, cached_llm_client_init: dict):
+        llm_client: LLMClient = cached_llm_client_init.get('llm')
+        fake_client: FakeClient = cached_llm_client_init.get('fake')
+        response_cache: ResponseCache = cached_llm_client_init.get('cache')
+
+        for _ in range(3):
+            response = await llm_client.achat_completion(
+                chat_completion_params=ChatCompletionParams(messages=messages, temperature=0)
+            )
+            assert response.choices[0].message.content == 'Hello!'
+        llm_client.chat_completion(
+            chat_completion_params=ChatCompletionParams(messages=messages, temperature=0)
+        )
+        assert fake_client.calls == 1
+        stats = response_cache.stats()
+        logger.info(f'Cache stats {stats}')
+        assert stats['hits'] == 3
+        assert stats['saved_total_tokens'] == 45
+
+    async def test_bypass_non_deterministic(self, cached_llm_client_init: dict):
+        llm_client: LLMClient = cached_llm_client_init.get('llm')
+        fake_client: FakeClient = cached_llm_client_init.get('fake')
+        response_cache: ResponseCache = cached_llm_client_init.get('cache')
+
+        for _ in range(2):
+            await llm_client.achat_completion(
+                chat_completion_params=ChatCompletionParams(messages=messages)
+            )
+        assert fake_client.calls == 2
+        assert response_cache.stats()['bypassed'] == 2
+
+    async def test_key_is_canonical(self):
+        first = ChatCompletionParams(messages=messages, temperature=0, tools=[{'b': 1, 'a': 2}])
+        second = ChatCompletionParams(messages=messages, temperature=0, tools=[{'a': 2, 'b': 1}], user='other')
+        assert chat_completion_key(first, model='gpt-4o') == chat_completion_key(second, model='gpt-4o')
+        assert chat_completion_key(first, model='gpt-4o') != chat_completion_key(first, model='gpt-4o-mini')
+
+    async def test_sqlite_backend(self, tmp_path):
+        backend = SQLiteCache(db_path=tmp_path / 'llm_cache.db', max_size=2)
+        backend.set('a', '1')
+        backend.set('b', '2', ttl=-1)
+        backend.set('c', '3')
+        backend.set('d', '4')
+        assert backend.get('a') is None
+        assert backend.get('b') is None
+        assert backend.get('d') == '4'
+        backend.close()
+
+        backend = SQLiteCache(db_path=tmp_path / 'llm_cache.db')
+        assert await backend.aget('c') == '3'
+        backend.close()
+
+    async def test_sqlite_eviction_on_overflow(self, tmp_path):
+        backend = SQLiteCache(db_path=tmp_path / 'llm_cache.db', max_size=3)
+        statements = []
+        backend._conn.set_trace_callback(statements.append)
+        for value in range(5):
+            # Rewriting a key does not grow the cache
+            backend.set('a', str(value))
+        backend.set('b', '1')
+        backend.set('c', '1')
+        assert not [statement for statement in statements if statement.lstrip().startswith('DELETE')]
+        backend.set('d', '1')
+        assert [statement for statement in statements if statement.lstrip().startswith('DELETE')]
+        assert backend.get('a') is None
+        backend.close()
+
+        # The entries of the file are counted when it is reopened
+        backend = SQLiteCache(db_path=tmp_path / 'llm_cache.db', max_size=2)
+        backend.set('e', '1')
+        assert [backend.get(key) for key in 'bcde'] == [None, None, '1', '1']
+        backend.close()
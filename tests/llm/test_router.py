@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import time
+
+from superagentx.llm import LLMClient
+from superagentx.llm.models import ChatCompletionParams
+from superagentx.llm.router import RouterClient
+from tests.llm.test_response_cache import FakeClient, messages
+
+logger = logging.getLogger(__name__)
+
+'''
+ Run Pytest:
+
+   1. pytest --log-cli-level=INFO tests/llm/test_router.py::TestRouter::test_failover_on_rate_limit
+   2. pytest --log-cli-level=INFO tests/llm/test_router.py::TestRouter::test_hedged_request
+   3. pytest --log-cli-level=INFO tests/llm/test_router.py::TestRouter::test_latency_ranking
+   4. pytest --log-cli-level=INFO tests/llm/test_router.py::TestRouter::test_tool_conversion
+'''
+
+_TOOL = {
+    'type': 'function',
+    'function': {
+        'name': 'get_delivery_date',
+        'description': 'Get the delivery date of the order.',
+        'parameters': {'type': 'object', 'properties': {'order_id': {'type': 'string'}}, 'required': ['order_id']}
+    }
+}
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+    class response:
+        headers = {'retry-after': '20'}
+
+
+class FakeBackend(FakeClient):
+
+    def __init__(self, name: str, latency: float = 0.0, error: Exception | None = None):
+        super().__init__()
+        self.name = name
+        self.latency = latency
+        self.error = error
+        self.requests = []
+        self.cancelled = 0
+
+    async def achat_completion(self, *, chat_completion_params: ChatCompletionParams):
+        self.requests.append(chat_completion_params)
+        try:
+            await asyncio.sleep(self.latency)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error:
+            raise self.error
+        response = self._response()
+        response.id = self.name
+        return response
+
+
+def _backend(fake: FakeBackend, llm_type: str = 'openai') -> LLMClient:
+    llm_config = {'model': 'gpt-4o', 'llm_type': llm_type, 'api_key': 'sk-test'}
+    llm_client = LLMClient(llm_config=llm_config, aws_region='us-east-1')
+    llm_client.client = fake
+    return llm_client
+
+
+def _router(*fakes: FakeBackend, **kwargs) -> LLMClient:
+    llm_config = {'model': 'gpt-4o', 'llm_type': 'router'}
+    return LLMClient(llm_config=llm_config, backends=[_backend(fake) for fake in fakes], **kwargs)
+
+
+class TestRouter:
+
+    async def test_failover_on_rate_limit(self):
+        limited = FakeBackend('openai', error=RateLimitError('Too many requests'))
+        azure = FakeBackend('azure')
+        llm_client = _router(limited, azure)
+        router: RouterClient = llm_client.client
+
+        response = await llm_client.achat_completion(chat_completion_params=ChatCompletionParams(messages=messages))
+        assert response.id == 'azure'
+        assert not router.backends[0].available
+        assert router.backends[0].cooldown_until - time.monotonic() > 15
+
+        response = await llm_client.achat_completion(chat_completion_params=ChatCompletionParams(messages=messages))
+        assert response.id == 'azure'
+        assert len(limited.requests) == 1
+        logger.info(f'Router stats {router.stats()}')
+
+    async def test_hedged_request(self):
+        slow = FakeBackend('slow', latency=1.0)
+        fast = FakeBackend('fast', latency=0.01)
+        llm_client = _router(slow, fast, hedge=True, hedge_delay=0.05)
+        started_at = time.perf_counter()
+        response = await llm_client.achat_completion(chat_completion_params=ChatCompletionParams(messages=messages))
+        elapsed = time.perf_counter() - started_at
+        logger.info(f'Hedged response in {elapsed:.3f}s')
+        assert response.id == 'fast'
+        assert elapsed < 0.5
+        await asyncio.sleep(0)
+        assert slow.cancelled == 1
+        assert llm_client.client.stats()['hedged_requests'] == 1
+        assert llm_client.client.backends[1].hedged_wins == 1
+
+    async def test_latency_ranking(self):
+        slow = FakeBackend('slow', latency=0.05)
+        fast = FakeBackend('fast', latency=0.001)
+        llm_client = _router(slow, fast)
+        for _ in range(4):
+            await llm_client.achat_completion(chat_completion_params=ChatCompletionParams(messages=messages))
+        assert llm_client.client.ranked()[0].client.client is fast
+        assert len(slow.requests) == 1
+
+    async def test_tool_conversion(self):
+        openai_fake = FakeBackend('openai', error=RuntimeError('Service unavailable'))
+        bedrock_fake = FakeBackend('bedrock')
+        llm_client = LLMClient(
+            llm_config={'model': 'gpt-4o', 'llm_type': 'router'},
+            backends=[
+                _backend(openai_fake),
+                _backend(bedrock_fake, llm_type='bedrock')
+            ]
+        )
+        response = await llm_client.achat_completion(
+            chat_completion_params=ChatCompletionParams(messages=messages, tools=[_TOOL])
+        )
+        assert response.id == 'bedrock'
+        assert openai_fake.requests[0].tools == [_TOOL]
+        tool_spec = bedrock_fake.requests[0].tools[0]['toolSpec']
+        assert tool_spec['name'] == 'get_delivery_date'
+        assert tool_spec['inputSchema']['json']['required'] == ['order_id']
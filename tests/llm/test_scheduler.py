@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import time
+
+import pytest
+
+from superagentx.llm import LLMClient
+from superagentx.llm.scheduler import (
+    Priority,
+    RequestScheduler,
+    classify_error,
+    current_priority,
+    get_scheduler,
+    scheduling_priority
+)
+from superagentx.llm.models import ChatCompletionParams
+from tests.llm.test_response_cache import FakeClient
+
+logger = logging.getLogger(__name__)
+
+'''
+ Run Pytest:
+
+   1. pytest --log-cli-level=INFO tests/llm/test_scheduler.py::TestRequestScheduler::test_priority_order
+   2. pytest --log-cli-level=INFO tests/llm/test_scheduler.py::TestRequestScheduler::test_retry_after
+   3. pytest --log-cli-level=INFO tests/llm/test_scheduler.py::TestRequestScheduler::test_context_priority_overrides_client
+   4. pytest --log-cli-level=INFO tests/llm/test_scheduler.py::TestRequestScheduler::test_sdk_retries_outside_scheduler
+   5. pytest --log-cli-level=INFO tests/llm/test_scheduler.py::TestRequestScheduler::test_shared_scheduler_limits
+   6. pytest --log-cli-level=INFO tests/llm/test_scheduler.py::TestRequestScheduler::test_embeddings_scheduled
+'''
+
+
+_MESSAGES = [{'role': 'user', 'content': 'Hello!'}]
+
+
+class FakeHTTPResponse:
+
+    def __init__(self, headers: dict):
+        self.headers = headers
+
+
+class FakeRateLimitError(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after: str):
+        super().__init__('Rate limit reached')
+        self.response = FakeHTTPResponse({'retry-after': retry_after})
+
+
+class FakeThrottlingError(Exception):
+
+    def __init__(self):
+        super().__init__('ThrottlingException')
+        self.response = {'Error': {'Code': 'ThrottlingException'}, 'ResponseMetadata': {'HTTPHeaders': {}}}
+
+
+class TestRequestScheduler:
+
+    async def test_priority_order(self):
+        # 60 RPM, burst of 1: one request per second after the first
+        scheduler = RequestScheduler(requests_per_minute=60)
+        scheduler.request_bucket.capacity = 1
+        scheduler.request_bucket.tokens = 0
+        scheduler.request_bucket.rate = 100  # refill quickly to keep the test fast
+        order = []
+
+        async def _request(name: str, priority: Priority):
+            await scheduler.acquire(priority=priority)
+            order.append(name)
+
+        await asyncio.gather(
+            _request('batch-1', Priority.BATCH),
+            _request('batch-2', Priority.BATCH),
+            _request('interactive', Priority.INTERACTIVE)
+        )
+        logger.info(f'Order {order} stats {scheduler.stats()}')
+        assert order[0] == 'interactive'
+        assert order[1:] == ['batch-1', 'batch-2']
+        assert scheduler.stats()['by_priority']['batch']['requests'] == 2
+
+    async def test_token_bucket_waits(self):
+        scheduler = RequestScheduler(tokens_per_minute=6000)  # 100 tokens per second
+        await scheduler.acquire(tokens=6000)
+        started = time.monotonic()
+        await scheduler.acquire(tokens=10)
+        assert time.monotonic() - started >= 0.09
+
+    async def test_retry_after(self):
+        scheduler = RequestScheduler(requests_per_minute=6000, max_retries=2)
+        calls = []
+
+        async def _call():
+            calls.append(time.monotonic())
+            if len(calls) == 1:
+                raise FakeRateLimitError(retry_after='0.2')
+            return 'ok'
+
+        assert await scheduler.run(_call) == 'ok'
+        assert calls[1] - calls[0] >= 0.19
+        assert scheduler.stats()['rate_limited'] == 1
+
+    async def test_gives_up_after_max_retries(self):
+        scheduler = RequestScheduler(max_retries=1)
+
+        async def _call():
+            raise RuntimeError('Failed to get response from Bedrock') from FakeThrottlingError()
+
+        scheduler.on_rate_limited = lambda retry_after=None: None
+        with pytest.raises(RuntimeError):
+            await scheduler.run(_call)
+        assert scheduler.stats()['retries'] == 1
+
+    async def test_cancelled_waiter_leaves_queue(self):
+        scheduler = RequestScheduler(requests_per_minute=60)
+        scheduler.request_bucket.tokens = 0
+        task = asyncio.create_task(scheduler.acquire())
+        await asyncio.sleep(0.01)
+        assert scheduler.queue_length == 1
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert scheduler.queue_length == 0
+
+    async def test_classify_error(self):
+        assert classify_error(FakeRateLimitError(retry_after='3')) == (True, 3.0)
+        assert classify_error(FakeThrottlingError()) == (True, None)
+        assert classify_error(ValueError('invalid')) == (None, None)
+        with scheduling_priority(Priority.BATCH):
+            assert current_priority() == Priority.BATCH
+        assert current_priority() is None
+
+    async def test_context_priority_overrides_client(self):
+        llm_client = LLMClient(
+            llm_config={'model': 'gpt-4o', 'llm_type': 'openai', 'api_key': 'sk-test'},
+            rate_limit={'requests_per_minute': 6000},
+            priority=Priority.BATCH
+        )
+        llm_client.client = FakeClient()
+        priorities = []
+        run = llm_client.scheduler.run
+
+        async def _run(func, *, priority, **kwargs):
+            priorities.append(priority)
+            return await run(func, priority=priority, **kwargs)
+
+        llm_client.scheduler.run = _run
+        # `Priority.INTERACTIVE` is 0, it still overrides the batch priority of the client
+        with scheduling_priority(Priority.INTERACTIVE):
+            await llm_client.achat_completion(chat_completion_params=ChatCompletionParams(messages=_MESSAGES))
+        await llm_client.achat_completion(chat_completion_params=ChatCompletionParams(messages=_MESSAGES))
+        assert priorities == [Priority.INTERACTIVE, Priority.BATCH]
+
+    async def test_sdk_retries_outside_scheduler(self):
+        llm_client = LLMClient(
+            llm_config={'model': 'gpt-4o-mini', 'llm_type': 'openai', 'api_key': 'sk-test'},
+            rate_limit={'requests_per_minute': 6000}
+        )
+        # Sync, embedding and streaming requests keep the SDK retries, the scheduled requests have none
+        assert llm_client.client.client.max_retries > 0
+        assert llm_client.client.without_retries().client.max_retries == 0
+        assert llm_client.client.without_retries() is llm_client.client.without_retries()
+
+        bedrock_client = LLMClient(
+            llm_config={'model': 'anthropic.claude-3-5-sonnet-20240620-v1:0', 'llm_type': 'bedrock'},
+            rate_limit={'requests_per_minute': 6000},
+            aws_region='us-east-1'
+        )
+        assert bedrock_client.client.client.meta.config.retries['total_max_attempts'] > 1
+        retry_free = bedrock_client.client.without_retries()
+        assert retry_free.client.meta.config.retries['total_max_attempts'] == 1
+
+    async def test_shared_scheduler_limits(self, caplog):
+        scheduler = get_scheduler('openai:test-shared-limits', requests_per_minute=600)
+        with caplog.at_level(logging.WARNING, logger='superagentx.llm.scheduler'):
+            assert get_scheduler('openai:test-shared-limits', requests_per_minute=600) is scheduler
+            assert not caplog.records
+            # The limits of the first client are kept, the others are reported
+            assert get_scheduler('openai:test-shared-limits', requests_per_minute=60) is scheduler
+        assert scheduler.limits['requests_per_minute'] == 600
+        assert 'Ignoring the rate limits' in caplog.text
+
+    async def test_embeddings_scheduled(self):
+        llm_client = LLMClient(
+            llm_config={'model': 'text-embedding-3-small', 'llm_type': 'openai', 'api_key': 'sk-test'},
+            rate_limit={'requests_per_minute': 6000}
+        )
+        llm_client.client = FakeClient()
+        await llm_client.aembed(text='Hello!')
+        await llm_client.aembed_many(texts=['Hello!', 'World!'])
+        assert llm_client.scheduler.stats()['requests'] == 2
@@ -0,0 +1,101 @@
+import asyncio
+import logging
+
+import pytest
+
+from superagentx.llm.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+'''
+ Run Pytest:
+
+   1. pytest --log-cli-level=INFO tests/llm/test_singleflight.py::TestSingleFlight::test_coalesce
+   2. pytest --log-cli-level=INFO tests/llm/test_singleflight.py::TestSingleFlight::test_cancellation
+'''
+
+
+class TestSingleFlight:
+
+    async def test_coalesce(self):
+        singleflight = SingleFlight()
+        calls = []
+
+        async def _upstream():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {'answer': 42}
+
+        results = await asyncio.gather(*[singleflight.do('same', _upstream) for _ in range(10)])
+        logger.info(f'Stats {singleflight.stats()}')
+        assert len(calls) == 1
+        assert all(result == {'answer': 42} for result in results)
+        assert singleflight.stats() == {'executed': 1, 'coalesced': 9, 'in_flight': 0}
+
+        await singleflight.do('same', _upstream)
+        assert len(calls) == 2
+
+    async def test_error_fans_out(self):
+        singleflight = SingleFlight()
+
+        async def _upstream():
+            await asyncio.sleep(0.01)
+            raise ValueError('upstream failed')
+
+        results = await asyncio.gather(
+            *[singleflight.do('same', _upstream) for _ in range(3)],
+            return_exceptions=True
+        )
+        assert all(isinstance(result, ValueError) for result in results)
+
+    async def test_cancellation(self):
+        singleflight = SingleFlight()
+        started = asyncio.Event()
+        upstream_cancelled = asyncio.Event()
+
+        async def _upstream():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                upstream_cancelled.set()
+                raise
+            return 'never'
+
+        first = asyncio.create_task(singleflight.do('same', _upstream))
+        second = asyncio.create_task(singleflight.do('same', _upstream))
+        await started.wait()
+
+        # One waiter going away must not cancel the shared upstream call
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        assert not upstream_cancelled.is_set()
+
+        # The last waiter going away cancels it
+        second.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await second
+        await asyncio.wait_for(upstream_cancelled.wait(), timeout=1)
+        assert singleflight.in_flight == 0
+
+    async def test_llm_client_coalesce(self):
+        from superagentx.llm import LLMClient
+        from superagentx.llm.models import ChatCompletionParams
+        from tests.llm.test_response_cache import FakeClient, messages
+
+        llm_client = LLMClient(
+            llm_config={'model': 'gpt-4o', 'llm_type': 'openai', 'api_key': 'sk-test'},
+            coalesce_requests=True
+        )
+        fake_client = FakeClient()
+        llm_client.client = fake_client
+        responses = await asyncio.gather(
+            *[
+                llm_client.achat_completion(chat_completion_params=ChatCompletionParams(messages=messages))
+                for _ in range(5)
+            ]
+        )
+        assert fake_client.calls == 1
+        assert {response.id for response in responses} == {'fake-1'}
+        assert llm_client.singleflight.stats()['coalesced'] == 4
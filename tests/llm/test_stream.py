@@ -0,0 +1,133 @@
+import logging
+
+import pytest
+from openai.types import CompletionUsage
+from openai.types.chat import ChatCompletionChunk
+from openai.types.chat.chat_completion_chunk import (
+    Choice,
+    ChoiceDelta,
+    ChoiceDeltaToolCall,
+    ChoiceDeltaToolCallFunction
+)
+
+from superagentx.llm.bedrock import BedrockClient
+from superagentx.llm.models import ChatCompletionParams
+from superagentx.llm.stream import MessageStream
+from tests.llm.test_response_cache import FakeClient
+
+logger = logging.getLogger(__name__)
+
+'''
+ Run Pytest:
+
+   1. pytest --log-cli-level=INFO tests/llm/test_stream.py::TestMessageStream::test_openai_tool_call_deltas
+   2. pytest --log-cli-level=INFO tests/llm/test_stream.py::TestMessageStream::test_bedrock_converse_stream
+   3. pytest --log-cli-level=INFO tests/llm/test_stream.py::TestMessageStream::test_client_without_native_stream
+'''
+
+
+def _chunk(delta: ChoiceDelta | None = None, finish_reason: str | None = None, usage=None) -> ChatCompletionChunk:
+    return ChatCompletionChunk(
+        id='chunk',
+        choices=[Choice(index=0, delta=delta, finish_reason=finish_reason)] if delta else [],
+        created=1729000000,
+        model='gpt-4o',
+        object='chat.completion.chunk',
+        usage=usage
+    )
+
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+
+class FakeBedrockRuntime:
+    model = 'anthropic.claude-3-5-sonnet-20240620-v1:0'
+
+    def __init__(self):
+        self.requests = []
+
+    def converse_stream(self, **kwargs):
+        self.requests.append(kwargs)
+        return {
+            'ResponseMetadata': {'RequestId': 'req-1'},
+            'stream': iter([
+                {'messageStart': {'role': 'assistant'}},
+                {'contentBlockDelta': {'delta': {'text': 'Looking '}, 'contentBlockIndex': 0}},
+                {'contentBlockDelta': {'delta': {'text': 'it up.'}, 'contentBlockIndex': 0}},
+                {'contentBlockStop': {'contentBlockIndex': 0}},
+                {'contentBlockStart': {
+                    'start': {'toolUse': {'toolUseId': 'tool-1', 'name': 'top_song'}},
+                    'contentBlockIndex': 1
+                }},
+                {'contentBlockDelta': {'delta': {'toolUse': {'input': '{"sign": '}}, 'contentBlockIndex': 1}},
+                {'contentBlockDelta': {'delta': {'toolUse': {'input': '"WZPZ"}'}}, 'contentBlockIndex': 1}},
+                {'contentBlockStop': {'contentBlockIndex': 1}},
+                {'messageStop': {'stopReason': 'tool_use'}},
+                {'metadata': {'usage': {'inputTokens': 20, 'outputTokens': 9, 'totalTokens': 29}}}
+            ])
+        }
+
+
+class TestMessageStream:
+
+    async def test_openai_tool_call_deltas(self):
+        chunks = [
+            _chunk(ChoiceDelta(role='assistant')),
+            _chunk(ChoiceDelta(tool_calls=[
+                ChoiceDeltaToolCall(
+                    index=0,
+                    id='call_1',
+                    type='function',
+                    function=ChoiceDeltaToolCallFunction(name='get_delivery_date', arguments='')
+                )
+            ])),
+            _chunk(ChoiceDelta(tool_calls=[
+                ChoiceDeltaToolCall(index=0, function=ChoiceDeltaToolCallFunction(arguments='{"order_'))
+            ])),
+            _chunk(ChoiceDelta(tool_calls=[
+                ChoiceDeltaToolCall(index=0, function=ChoiceDeltaToolCallFunction(arguments='id": "3454232"}'))
+            ])),
+            _chunk(ChoiceDelta(), finish_reason='tool_calls'),
+            _chunk(usage=CompletionUsage(prompt_tokens=40, completion_tokens=12, total_tokens=52))
+        ]
+        stream = MessageStream(_aiter(chunks))
+        deltas = [delta async for delta in stream]
+        assert deltas == []
+        messages = await stream.messages()
+        assert len(messages) == 1
+        assert messages[0].tool_calls[0].name == 'get_delivery_date'
+        assert messages[0].tool_calls[0].arguments == {'order_id': '3454232'}
+        assert messages[0].total_tokens == 52
+
+    async def test_bedrock_converse_stream(self):
+        runtime = FakeBedrockRuntime()
+        client = BedrockClient(client=runtime)
+        chat_completion_params = ChatCompletionParams(
+            messages=[{'role': 'user', 'content': 'What is the most famous song on WZPZ?'}],
+            tools=[{'toolSpec': {'name': 'top_song'}}]
+        )
+        stream = MessageStream(client.achat_completion_stream(chat_completion_params=chat_completion_params))
+        deltas = [delta async for delta in stream]
+        logger.info(f'Deltas {deltas}')
+        assert deltas == ['Looking ', 'it up.']
+
+        messages = await stream.messages()
+        assert messages[0].content == 'Looking it up.'
+        assert messages[0].tool_calls[0].name == 'top_song'
+        assert messages[0].tool_calls[0].arguments == {'sign': 'WZPZ'}
+        assert messages[0].prompt_tokens == 20
+        assert runtime.requests[0]['toolConfig'] == {'tools': [{'toolSpec': {'name': 'top_song'}}]}
+
+    async def test_client_without_native_stream(self):
+        client = FakeClient()
+        chat_completion_params = ChatCompletionParams(messages=[{'role': 'user', 'content': 'Say hello!'}])
+        stream = MessageStream(client.achat_completion_stream(chat_completion_params=chat_completion_params))
+        deltas = [delta async for delta in stream]
+        assert deltas == ['Hello!']
+
+        messages = await stream.messages()
+        assert messages[0].content == 'Hello!'
+        assert messages[0].total_tokens == 15
+        assert client.calls == 1
@@ -0,0 +1,166 @@
+import datetime
+import logging
+
+import pytest
+
+from openai.types.chat import ChatCompletion, ChatCompletionMessage
+from openai.types.chat.chat_completion import Choice
+
+from superagentx.llm import LLMClient
+from superagentx.memory import Memory, SUMMARY_ROLE
+from superagentx.memory.config import MemoryConfig
+from tests.llm.test_response_cache import FakeClient
+from superagentx.vector_stores.numpy_store import NumpyVectorStore
+from tests.memory.test_storage import NullVectorStore
+from tests.vector_stores.test_numpy_store import HashEmbedClient
+
+logger = logging.getLogger(__name__)
+
+'''
+ Run Pytest:
+
+   1. pytest --log-cli-level=INFO tests/memory/test_compaction.py::TestCompaction::test_bounded_on_add
+   2. pytest --log-cli-level=INFO tests/memory/test_compaction.py::TestCompaction::test_age_with_llm_summary
+   3. pytest --log-cli-level=INFO tests/memory/test_compaction.py::TestCompaction::test_vector_rows_reclaimed
+   4. pytest --log-cli-level=INFO tests/memory/test_compaction.py::TestCompaction::test_failed_compaction_keeps_index
+'''
+
+
+class TrackingVectorStore(NullVectorStore):
+
+    def __init__(self):
+        self.ids: set[str] = set()
+
+    async def insert(self, *, texts, payloads, ids):
+        self.ids.update(ids)
+
+    async def delete_vectors(self, ids):
+        self.ids.difference_update(ids)
+
+
+class SummaryClient(FakeClient):
+
+    async def achat_completion(self, *, chat_completion_params):
+        self.calls += 1
+        self.last_params = chat_completion_params
+        return ChatCompletion(
+            id='summary',
+            choices=[
+                Choice(
+                    finish_reason='stop',
+                    index=0,
+                    message=ChatCompletionMessage(role='assistant', content='Order ORD-3 shipped, refund pending.')
+                )
+            ],
+            created=1729000000,
+            model='gpt-4o',
+            object='chat.completion'
+        )
+
+
+async def _add(memory: Memory, index: int, created_at: datetime.datetime | None = None):
+    await memory.add(
+        memory_id='memory-1',
+        chat_id='chat-1',
+        message_id=f'm{index}',
+        role='user' if index % 2 == 0 else 'assistant',
+        data=f'Message {index} about order ORD-{index}',
+        reason='Noted',
+        created_at=created_at
+    )
+
+
+class TestCompaction:
+
+    async def test_bounded_on_add(self):
+        memory = Memory(MemoryConfig(
+            vector_store=TrackingVectorStore(),
+            db_path=':memory:',
+            max_messages_per_chat=10,
+            keep_recent_messages=4
+        ))
+        for index in range(25):
+            await _add(memory, index)
+            assert await memory.db.count_history(memory_id='memory-1', chat_id='chat-1') <= 10
+
+        history = await memory.get(memory_id='memory-1', chat_id='chat-1')
+        logger.info(f'Compacted history {[item["role"] for item in history]}')
+        assert history[0]['role'] == SUMMARY_ROLE
+        assert [item['message_id'] for item in history[-4:]] == ['m21', 'm22', 'm23', 'm24']
+        # The vector index holds exactly the messages of the history
+        assert memory.vector_db.ids == {item['message_id'] for item in history}
+        # Every summarized message is archived once, the rolling summaries included
+        archived = await memory.db.connection.execute_fetchall("SELECT message_id FROM history_archive")
+        archived_ids = {row[0] for row in archived}
+        assert {f'm{index}' for index in range(25)} - {item['message_id'] for item in history} <= archived_ids
+        assert len(history[0]['data']) <= memory.memory_config.summary_max_chars
+        # The summarized messages are still found by their identifiers
+        result = await memory.search(query='ORD-12', memory_id='memory-1', chat_id='chat-1', mode='keyword')
+        assert result
+        await memory.close()
+
+    async def test_age_with_llm_summary(self):
+        llm_client = LLMClient(llm_config={'model': 'gpt-4o', 'llm_type': 'openai', 'api_key': 'sk-test'})
+        llm_client.client = SummaryClient()
+        memory = Memory(MemoryConfig(
+            vector_store=TrackingVectorStore(),
+            db_path=':memory:',
+            keep_recent_messages=20,
+            max_message_age=3600,
+            archive_compacted=False,
+            summary_llm=llm_client
+        ))
+        old = datetime.datetime.now() - datetime.timedelta(days=2)
+        for index in range(3):
+            await _add(memory, index, created_at=old + datetime.timedelta(minutes=index))
+        await _add(memory, 3)
+
+        stats = await memory.compact()
+        assert stats == {'chats': 1, 'messages': 3}
+        history = await memory.get(memory_id='memory-1', chat_id='chat-1')
+        assert [item['role'] for item in history] == [SUMMARY_ROLE, 'assistant']
+        assert history[0]['data'] == 'Order ORD-3 shipped, refund pending.'
+        assert 'Message 0 about order ORD-0' in llm_client.client.last_params.messages[-1].content
+        summary_id = history[0]['message_id']
+        assert await memory.db.get_archive(summary_id=summary_id) == []
+        assert memory.vector_db.ids == {summary_id, 'm3'}
+
+        # Nothing old is left to merge
+        assert await memory.compact() == {'chats': 0, 'messages': 0}
+        await memory.close()
+
+    async def test_vector_rows_reclaimed(self, tmp_path):
+        vector_store = NumpyVectorStore(path=tmp_path, embed_cli=HashEmbedClient())
+        memory = Memory(MemoryConfig(
+            vector_store=vector_store,
+            db_path=':memory:',
+            max_messages_per_chat=10,
+            keep_recent_messages=4
+        ))
+        for index in range(60):
+            await _add(memory, index)
+
+        # The deleted vectors are rewritten away, the store stays near the size of the history
+        history = await memory.get(memory_id='memory-1', chat_id='chat-1')
+        assert vector_store.count == len(history)
+        assert vector_store.dead_fraction < 0.25
+        assert vector_store._size < 20
+        log_lines = len(vector_store._log_path.read_text().splitlines())
+        assert log_lines < 40
+        await memory.close()
+
+    async def test_failed_compaction_keeps_index(self, monkeypatch):
+        memory = Memory(MemoryConfig(vector_store=TrackingVectorStore(), db_path=':memory:', keep_recent_messages=2))
+        for index in range(5):
+            await _add(memory, index)
+
+        async def _compact_history(**kwargs):
+            raise RuntimeError('Database is locked')
+
+        monkeypatch.setattr(memory.db, 'compact_history', _compact_history)
+        with pytest.raises(RuntimeError):
+            await memory.compact()
+        # No summary vector without the summary message
+        assert memory.vector_db.ids == {f'm{index}' for index in range(5)}
+        assert len(await memory.get(memory_id='memory-1', chat_id='chat-1')) == 5
+        await memory.close()
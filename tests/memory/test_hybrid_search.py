@@ -0,0 +1,179 @@
+import logging
+import sqlite3
+from types import SimpleNamespace
+
+from superagentx.memory import Memory
+from superagentx.memory.config import MemoryConfig
+from superagentx.memory.fusion import reciprocal_rank_fusion
+from superagentx.memory.storage import SQLiteManager
+from tests.memory.test_storage import NullVectorStore
+
+logger = logging.getLogger(__name__)
+
+'''
+ Run Pytest:
+
+   1. pytest --log-cli-level=INFO tests/memory/test_hybrid_search.py::TestHybridSearch::test_keyword_mode
+   2. pytest --log-cli-level=INFO tests/memory/test_hybrid_search.py::TestHybridSearch::test_hybrid_fusion
+   3. pytest --log-cli-level=INFO tests/memory/test_hybrid_search.py::TestHybridSearch::test_reciprocal_rank_fusion
+   4. pytest --log-cli-level=INFO tests/memory/test_hybrid_search.py::TestHybridSearch::test_index_follows_history
+   5. pytest --log-cli-level=INFO tests/memory/test_hybrid_search.py::TestHybridSearch::test_filters_in_every_mode
+'''
+
+_MESSAGES = {
+    'm1': 'The quarterly revenue grew in every region',
+    'm2': 'Order ORD-1042 was shipped to jane@example.com',
+    'm3': 'Revenue of the EMEA region is below the forecast',
+    'm4': 'NVDA closed higher after the earnings call'
+}
+
+
+class RankedVectorStore(NullVectorStore):
+    """Returns the stored messages in a fixed similarity order, identifiers are not understood."""
+
+    def __init__(self, ranking: list[str]):
+        self.ranking = ranking
+        self.payloads = {}
+        self.searches = 0
+
+    async def insert(self, *, texts, payloads, ids):
+        self.payloads[ids[0]] = payloads
+
+    async def search(self, *, query, limit, filters):
+        self.searches += 1
+        return [
+            SimpleNamespace(id=message_id, payload=self.payloads[message_id], score=1.0 - index / 10)
+            for index, message_id in enumerate(
+                [
+                    message_id for message_id in self.ranking
+                    if message_id in self.payloads and all(
+                        self.payloads[message_id].get(key) == value for key, value in (filters or {}).items()
+                    )
+                ][:limit]
+            )
+        ]
+
+
+async def _memory(ranking: list[str]) -> Memory:
+    memory = Memory(MemoryConfig(vector_store=RankedVectorStore(ranking), db_path=':memory:'))
+    for message_id, data in _MESSAGES.items():
+        await memory.add(
+            memory_id='memory-1',
+            chat_id='chat-1',
+            message_id=message_id,
+            role='user',
+            data=data,
+            reason='Noted'
+        )
+    return memory
+
+
+class TestHybridSearch:
+
+    async def test_keyword_mode(self):
+        memory = await _memory(ranking=['m1', 'm3', 'm4', 'm2'])
+        for query in ('ORD-1042', 'jane@example.com', 'status of order ORD-1042?'):
+            result = await memory.search(query=query, memory_id='memory-1', chat_id='chat-1', mode='keyword')
+            assert result[0]['content'].endswith(_MESSAGES['m2']), query
+        assert await memory.search(query='NVDA', memory_id='memory-2', chat_id='chat-1', mode='keyword') == []
+        assert await memory.search(query='?!', memory_id='memory-1', chat_id='chat-1', mode='keyword') == []
+        # No query embedding in keyword mode
+        assert memory.vector_db.searches == 0
+        await memory.close()
+
+    async def test_hybrid_fusion(self):
+        memory = await _memory(ranking=['m1', 'm3', 'm4'])
+        vector = await memory.search(query='ORD-1042 revenue', memory_id='memory-1', chat_id='chat-1', mode='vector')
+        hybrid = await memory.search(query='ORD-1042 revenue', memory_id='memory-1', chat_id='chat-1')
+        logger.info(f'Hybrid search {hybrid}')
+        assert all(not item['content'].endswith(_MESSAGES['m2']) for item in vector)
+        contents = [item['content'] for item in hybrid]
+        # m1 and m3 are found by both searches, the order number only by its keyword
+        assert contents[0].endswith(_MESSAGES['m1'])
+        assert any(content.endswith(_MESSAGES['m2']) for content in contents)
+        assert memory.vector_db.searches == 2
+        await memory.close()
+
+    async def test_reciprocal_rank_fusion(self):
+        fused = reciprocal_rank_fusion(
+            [{'id': 'a'}, {'id': 'b'}, {'id': 'c'}],
+            [{'id': 'c'}, {'id': 'a'}, {'id': 'd'}],
+            k=60
+        )
+        assert [item['id'] for item in fused] == ['a', 'c', 'b', 'd']
+        assert fused[0]['score'] == 1 / 61 + 1 / 62
+        assert fused[2]['ranks'] == [2, None]
+        assert len(reciprocal_rank_fusion([{'id': 'a'}, {'id': 'b'}], limit=1)) == 1
+
+    async def test_index_follows_history(self, tmp_path):
+        db_path = tmp_path / 'history.db'
+        db = SQLiteManager(db_path)
+        await db.add_history(memory_id='memory-1', chat_id='chat-1', message_id='m1', role='user',
+                             data='Invoice INV-77 is overdue', reason='Asked')
+        assert len(await db.search_history(query='INV-77')) == 1
+        await db.connection.execute("UPDATE history SET data = 'Invoice INV-78 is paid' WHERE message_id = 'm1'")
+        await db.connection.commit()
+        assert await db.search_history(query='INV-77') == []
+        assert len(await db.search_history(query='INV-78', memory_id='memory-1', chat_id='chat-1')) == 1
+        await db.connection.execute("DELETE FROM history WHERE message_id = 'm1'")
+        await db.connection.commit()
+        assert await db.search_history(query='INV-78') == []
+        await db.close()
+
+        # Messages stored before the keyword index are indexed by the migration
+        with sqlite3.connect(db_path) as connection:
+            # Back to the version 2 schema
+            for trigger in ('insert', 'delete', 'update'):
+                connection.execute(f'DROP TRIGGER history_fts_{trigger}')
+            connection.execute('DROP TABLE history_fts')
+            connection.execute(
+                "INSERT INTO history (id, memory_id, chat_id, message_id, role, data, reason) "
+                "VALUES ('1', 'memory-1', 'chat-1', 'm2', 'user', 'Ticket SUP-5 reopened', 'Asked')"
+            )
+            connection.execute('PRAGMA user_version=2')
+        connection.close()
+        db = SQLiteManager(db_path)
+        assert len(await db.search_history(query='SUP-5')) == 1
+        await db.close()
+
+    async def test_filters_in_every_mode(self):
+        memory = await _memory(ranking=['m1', 'm5', 'm3'])
+        await memory.add(
+            memory_id='memory-1',
+            chat_id='chat-2',
+            message_id='m5',
+            role='assistant',
+            data='The revenue report of order ORD-1042 is ready',
+            reason='Noted'
+        )
+        for mode in ('keyword', 'hybrid', 'vector'):
+            result = await memory.search(
+                query='revenue ORD-1042',
+                memory_id='memory-1',
+                chat_id='chat-1',
+                filters={'role': 'assistant'},
+                mode=mode
+            )
+            assert [item['role'] for item in result] == ['assistant'], mode
+        result = await memory.search(
+            query='revenue ORD-1042',
+            memory_id='memory-1',
+            chat_id='chat-1',
+            filters={'chat_id': ['chat-1']},
+            mode='keyword'
+        )
+        assert len(result) == 3
+        assert not any(item['content'].endswith('is ready') for item in result)
+
+        # Filters on keys the history does not have only apply to the vector store
+        searches = memory.vector_db.searches
+        result = await memory.search(
+            query='ORD-1042',
+            memory_id='memory-1',
+            chat_id='chat-1',
+            filters={'topic': 'sales'},
+            mode='keyword'
+        )
+        assert result == []
+        assert memory.vector_db.searches == searches + 1
+        await memory.close()
@@ -0,0 +1,152 @@
+import datetime
+import logging
+
+import pytest
+
+from superagentx.memory import Memory
+from superagentx.memory.cache import RecentWindowCache
+from superagentx.memory.config import MemoryConfig
+from tests.memory.test_hybrid_search import RankedVectorStore
+
+logger = logging.getLogger(__name__)
+
+'''
+ Run Pytest:
+
+   1. pytest --log-cli-level=INFO tests/memory/test_recent_window.py::TestRecentWindow::test_search_served_from_window
+   2. pytest --log-cli-level=INFO tests/memory/test_recent_window.py::TestRecentWindow::test_window_coherent_with_writes
+   3. pytest --log-cli-level=INFO tests/memory/test_recent_window.py::TestRecentWindow::test_lru_bound
+   4. pytest --log-cli-level=INFO tests/memory/test_recent_window.py::TestRecentWindow::test_new_chat_finds_older_chats
+   5. pytest --log-cli-level=INFO tests/memory/test_recent_window.py::TestRecentWindow::test_recent_without_window
+'''
+
+_START = datetime.datetime(2024, 10, 1, 12, 0)
+
+
+async def _add(memory: Memory, index: int, created_at: datetime.datetime | None = None):
+    await memory.add(
+        memory_id='memory-1',
+        chat_id='chat-1',
+        message_id=f'm{index}',
+        role='user' if index % 2 == 0 else 'assistant',
+        data=f'Message {index}',
+        reason='Noted',
+        created_at=created_at or _START + datetime.timedelta(minutes=index)
+    )
+
+
+def _contents(messages: list[dict]) -> list[str]:
+    return [message['content'].removeprefix('Reason: Noted\nResult: ') for message in messages]
+
+
+class TestRecentWindow:
+
+    async def test_search_served_from_window(self):
+        vector_store = RankedVectorStore(ranking=['m4', 'm0', 'm3', 'm1', 'm2'])
+        memory = Memory(MemoryConfig(vector_store=vector_store, db_path=':memory:', recent_window=3))
+        for index in range(3):
+            await _add(memory, index)
+
+        # The whole chat session fits the window, the messages found are not repeated
+        result = await memory.search(query='status', memory_id='memory-1', chat_id='chat-1', mode='vector')
+        assert _contents(result) == ['Message 0', 'Message 1', 'Message 2']
+        assert vector_store.searches == 1
+        assert memory.recent_cache.stats()['misses'] == 1
+
+        # Older messages are retrieved, the window ones are not repeated
+        for index in range(3, 5):
+            await _add(memory, index)
+        result = await memory.search(query='status', memory_id='memory-1', chat_id='chat-1', mode='vector', limit=1)
+        assert _contents(result) == ['Message 0', 'Message 2', 'Message 3', 'Message 4']
+        assert vector_store.searches == 2
+        assert memory.recent_cache.stats()['hits'] == 1
+        assert [row['message_id'] for row in await memory.recent(memory_id='memory-1', chat_id='chat-1')] == [
+            'm2', 'm3', 'm4'
+        ]
+        await memory.close()
+
+    async def test_window_coherent_with_writes(self):
+        memory = Memory(MemoryConfig(
+            vector_store=RankedVectorStore(ranking=[]),
+            db_path=':memory:',
+            recent_window=4,
+            keep_recent_messages=2
+        ))
+        await _add(memory, 0)
+        await _add(memory, 1)
+        history = await memory.get(memory_id='memory-1', chat_id='chat-1')
+        await _add(memory, 2)
+        # Served from the window, with the message added after the read
+        assert await memory.get(memory_id='memory-1', chat_id='chat-1') == history + [
+            (await memory.db.get_history(memory_id='memory-1', chat_id='chat-1'))[-1]
+        ]
+        assert memory.recent_cache.stats()['hits'] == 1
+
+        # A message older than the window is read again from the history
+        await _add(memory, 3, created_at=_START - datetime.timedelta(minutes=1))
+        assert len(memory.recent_cache) == 0
+        rows = await memory.get(memory_id='memory-1', chat_id='chat-1')
+        assert [row['message_id'] for row in rows] == ['m3', 'm0', 'm1', 'm2']
+
+        # The compaction rewrites the history of the chat session
+        await memory.compact(memory_id='memory-1', chat_id='chat-1')
+        assert len(memory.recent_cache) == 0
+        assert await memory.get(memory_id='memory-1', chat_id='chat-1') == await memory.db.get_history(
+            memory_id='memory-1',
+            chat_id='chat-1'
+        )
+        await memory.close()
+
+    async def test_lru_bound(self):
+        cache = RecentWindowCache(window=2, max_chats=2)
+        for chat_id in ('c1', 'c2', 'c3'):
+            cache.put('memory-1', chat_id, [], complete=True, version=cache.version)
+        assert cache.get('memory-1', 'c1') is None
+        assert cache.get('memory-1', 'c3') == ([], True)
+
+        # A window read before a write is not stored
+        version = cache.version
+        cache.append({'memory_id': 'memory-1', 'chat_id': 'c4', 'created_at': '2024-10-01 12:00:00'})
+        cache.put('memory-1', 'c4', [], complete=True, version=version)
+        assert cache.get('memory-1', 'c4') is None
+
+        for index in range(3):
+            cache.append({'memory_id': 'memory-1', 'chat_id': 'c3', 'created_at': f'2024-10-01 12:0{index}:00'})
+        messages, complete = cache.get('memory-1', 'c3')
+        assert [message['created_at'] for message in messages] == ['2024-10-01 12:01:00', '2024-10-01 12:02:00']
+        assert not complete
+
+        cache.invalidate('memory-1')
+        assert len(cache) == 0
+
+    async def test_new_chat_finds_older_chats(self):
+        memory = Memory(MemoryConfig(vector_store=RankedVectorStore(ranking=[]), db_path=':memory:', recent_window=3))
+        await _add(memory, 0)
+        await memory.add(
+            memory_id='memory-1',
+            chat_id='chat-2',
+            message_id='m1',
+            role='user',
+            data='Where is order ORD-7?',
+            reason='Noted'
+        )
+
+        # The window of the new chat session is complete, the keyword index still finds the earlier chat
+        result = await memory.search(query='Message 0', memory_id='memory-1', chat_id='chat-2', mode='keyword')
+        assert _contents(result) == ['Message 0', 'Where is order ORD-7?']
+        await memory.close()
+
+    async def test_recent_without_window(self):
+        memory = Memory(MemoryConfig(vector_store=RankedVectorStore(ranking=[]), db_path=':memory:'))
+        assert memory.recent_cache is None
+        assert await memory.recent(memory_id='memory-1', chat_id='chat-1') == []
+        for index in range(3):
+            await _add(memory, index)
+
+        rows = await memory.recent(memory_id='memory-1', chat_id='chat-1')
+        assert [row['message_id'] for row in rows] == ['m0', 'm1', 'm2']
+        rows = await memory.recent(memory_id='memory-1', chat_id='chat-1', limit=2)
+        assert [row['message_id'] for row in rows] == ['m1', 'm2']
+        with pytest.raises(ValueError):
+            await memory.recent(memory_id='memory-1', chat_id='chat-1', limit=0)
+        await memory.close()
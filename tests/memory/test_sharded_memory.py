@@ -0,0 +1,111 @@
+import asyncio
+import logging
+from pathlib import Path
+
+from superagentx.memory import Memory
+from superagentx.memory.config import MemoryConfig
+from superagentx.memory.sharded import ShardedMemory, shard_name
+from superagentx.vector_stores.numpy_store import NumpyVectorStore
+from tests.memory.test_storage import _add
+from tests.vector_stores.test_numpy_store import HashEmbedClient
+
+logger = logging.getLogger(__name__)
+
+'''
+ Run Pytest:
+
+   1. pytest --log-cli-level=INFO tests/memory/test_sharded_memory.py::TestShardedMemory::test_tenants_isolated
+   2. pytest --log-cli-level=INFO tests/memory/test_sharded_memory.py::TestShardedMemory::test_export_and_delete_tenant
+   3. pytest --log-cli-level=INFO tests/memory/test_sharded_memory.py::TestShardedMemory::test_idle_shards_closed
+   4. pytest --log-cli-level=INFO tests/memory/test_sharded_memory.py::TestShardedMemory::test_delete_tenant_in_use
+'''
+
+
+def _sharded(shard_dir: Path | None, **kwargs) -> ShardedMemory:
+    return ShardedMemory(
+        MemoryConfig(db_path=':memory:'),
+        shard_dir=shard_dir,
+        vector_store_factory=lambda name: NumpyVectorStore(
+            path=shard_dir / name / 'vectors' if shard_dir else None,
+            embed_cli=HashEmbedClient()
+        ),
+        **kwargs
+    )
+
+
+class TestShardedMemory:
+
+    async def test_tenants_isolated(self, tmp_path):
+        memory = _sharded(tmp_path)
+        for index in range(3):
+            await _add(memory, index, memory_id='tenant-a')
+        await _add(memory, 0, memory_id='tenant/b')
+
+        assert memory.shards() == sorted(['tenant-a', shard_name('tenant/b')])
+        assert (tmp_path / 'tenant-a' / 'history.db').exists()
+        assert len(await memory.get(memory_id='tenant-a', chat_id='chat-1')) == 3
+        assert len(await memory.get(memory_id='tenant/b', chat_id='chat-1')) == 1
+
+        results = await memory.search(query='Message 0', memory_id='tenant/b', chat_id='chat-1', mode='vector')
+        assert results == [{'role': 'user', 'content': 'Reason: Asked\nResult: Message 0'}]
+        await memory.close()
+
+    async def test_export_and_delete_tenant(self, tmp_path):
+        memory = _sharded(tmp_path / 'shards')
+        for index in range(2):
+            await _add(memory, index, memory_id='tenant-a')
+            await _add(memory, index, memory_id='tenant-b')
+
+        export_dir = await memory.export_tenant('tenant-a', tmp_path / 'export')
+        await memory.delete_tenant('tenant-a')
+        assert memory.shards() == ['tenant-b']
+        assert not (tmp_path / 'shards' / 'tenant-a').exists()
+        assert len(await memory.get(memory_id='tenant-b', chat_id='chat-1')) == 2
+
+        # The export is a shard directory, readable by a plain memory
+        exported = Memory(MemoryConfig(
+            db_path=str(export_dir / 'history.db'),
+            vector_store=NumpyVectorStore(path=export_dir / 'vectors', embed_cli=HashEmbedClient())
+        ))
+        assert len(await exported.get(memory_id='tenant-a', chat_id='chat-1')) == 2
+        assert exported.vector_db.count == 2
+        await exported.close()
+        await memory.close()
+
+    async def test_idle_shards_closed(self, tmp_path):
+        memory = _sharded(tmp_path, max_open_shards=2)
+        tenants = [f'tenant-{index}' for index in range(5)]
+        for tenant in tenants:
+            await _add(memory, 0, memory_id=tenant)
+        assert len(memory._shards) == 2
+
+        # Closed shards are reopened from their files
+        for tenant in tenants:
+            assert len(await memory.get(memory_id=tenant, chat_id='chat-1')) == 1
+        assert len(memory._shards) == 2
+        await memory.close()
+
+        in_memory = _sharded(None, max_open_shards=2)
+        for tenant in tenants:
+            await _add(in_memory, 0, memory_id=tenant)
+        assert len(in_memory._shards) == 5
+        await in_memory.close()
+
+    async def test_delete_tenant_in_use(self, tmp_path):
+        memory = _sharded(tmp_path)
+        await _add(memory, 0, memory_id='tenant-a')
+        async with memory.shard('tenant-a') as shard:
+            deletion = asyncio.create_task(memory.delete_tenant('tenant-a'))
+            await asyncio.sleep(0.05)
+            # The deletion waits, the shard in use keeps its connection
+            assert not deletion.done()
+            await _add(shard, 1, memory_id='tenant-a')
+            assert len(await shard.get(memory_id='tenant-a', chat_id='chat-1')) == 2
+            # A call arriving during the deletion runs after it, on a new shard
+            late_add = asyncio.create_task(_add(memory, 2, memory_id='tenant-a'))
+            await asyncio.sleep(0.05)
+            assert not late_add.done()
+        await deletion
+        await late_add
+        assert len(await memory.get(memory_id='tenant-a', chat_id='chat-1')) == 1
+        await memory.close()
@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import sqlite3
+import uuid
+
+import pytest
+
+from superagentx.memory import Memory
+from superagentx.memory.config import MemoryConfig
+from superagentx.memory.storage import SCHEMA_VERSION, SQLiteManager
+from superagentx.vector_stores.base import BaseVectorStore
+
+logger = logging.getLogger(__name__)
+
+'''
+ Run Pytest:
+
+   1. pytest --log-cli-level=INFO tests/memory/test_storage.py::TestSQLiteStorage::test_in_memory_history_kept
+   2. pytest --log-cli-level=INFO tests/memory/test_storage.py::TestSQLiteStorage::test_file_database
+   3. pytest --log-cli-level=INFO tests/memory/test_storage.py::TestSQLiteStorage::test_context_manager
+   4. pytest --log-cli-level=INFO tests/memory/test_storage.py::TestSQLiteStorage::test_concurrent_adds
+   5. pytest --log-cli-level=INFO tests/memory/test_storage.py::TestSQLiteStorage::test_add_history_many
+   6. pytest --log-cli-level=INFO tests/memory/test_storage.py::TestSQLiteStorage::test_migrates_legacy_database
+   7. pytest --log-cli-level=INFO tests/memory/test_storage.py::TestSQLiteStorage::test_interleaved_writers
+'''
+
+
+class NullVectorStore(BaseVectorStore):
+
+    async def create(self, *args, **kwargs):
+        pass
+
+    async def insert(self, *args, **kwargs):
+        pass
+
+    async def search(self, *args, **kwargs):
+        return []
+
+    async def update(self, *args, **kwargs):
+        pass
+
+    async def exists(self, *args, **kwargs):
+        return True
+
+    async def delete_collection(self, *args, **kwargs):
+        pass
+
+
+async def _add(db: SQLiteManager | Memory, index: int, memory_id: str = 'memory-1', chat_id: str = 'chat-1'):
+    add = db.add_history if isinstance(db, SQLiteManager) else db.add
+    await add(
+        memory_id=memory_id,
+        chat_id=chat_id,
+        message_id=uuid.uuid4().hex,
+        role='user',
+        data=f'Message {index}',
+        reason='Asked'
+    )
+
+
+class TestSQLiteStorage:
+
+    async def test_in_memory_history_kept(self):
+        memory = Memory(MemoryConfig(vector_store=NullVectorStore(), db_path=':memory:'))
+        await _add(memory, 1)
+        connection = memory.db.connection
+        await _add(memory, 2)
+        history = await memory.get(memory_id='memory-1', chat_id='chat-1')
+        assert [item['data'] for item in history] == ['Message 1', 'Message 2']
+        assert memory.db.connection is connection
+
+        await memory.delete()
+        assert await memory.get(memory_id='memory-1', chat_id='chat-1') is None
+        await _add(memory, 3)
+        assert len(await memory.get(memory_id='memory-1', chat_id='chat-1')) == 1
+        await memory.close()
+        assert memory.db.connection is None
+
+    async def test_file_database(self, tmp_path):
+        db_path = tmp_path / 'memory' / 'history.db'
+        db = SQLiteManager(db_path)
+        await _add(db, 1)
+        journal_mode = await db.connection.execute_fetchall('PRAGMA journal_mode')
+        synchronous = await db.connection.execute_fetchall('PRAGMA synchronous')
+        assert journal_mode[0][0] == 'wal'
+        assert synchronous[0][0] == 1
+        await db.close()
+
+        reopened = SQLiteManager(db_path)
+        assert len(await reopened.get_history(memory_id='memory-1', chat_id='chat-1')) == 1
+        await reopened.close()
+
+    async def test_context_manager(self):
+        async with SQLiteManager() as db:
+            await _add(db, 1)
+            assert db.connection is not None
+        assert db.connection is None
+
+        db = SQLiteManager()
+        await db.connect()
+        async with db:
+            await _add(db, 1)
+        # Opened before the block, the in-memory history stays
+        assert len(await db.get_history(memory_id='memory-1', chat_id='chat-1')) == 1
+        await db.close()
+
+    async def test_concurrent_adds(self, tmp_path):
+        db = SQLiteManager(tmp_path / 'history.db')
+        await asyncio.gather(*[_add(db, index, chat_id=f'chat-{index % 4}') for index in range(100)])
+        counts = [
+            len(await db.get_history(memory_id='memory-1', chat_id=f'chat-{chat}'))
+            for chat in range(4)
+        ]
+        assert counts == [25] * 4
+        await db.close()
+
+    async def test_add_history_many(self):
+        db = SQLiteManager()
+        await db.add_history_many([
+            {
+                'memory_id': 'memory-1',
+                'chat_id': 'chat-1',
+                'message_id': uuid.uuid4().hex,
+                'role': 'user' if index % 2 == 0 else 'assistant',
+                'data': f'Message {index}',
+                'reason': 'Imported'
+            }
+            for index in range(10)
+        ])
+        history = await db.get_history(memory_id='memory-1', chat_id='chat-1')
+        assert len(history) == 10
+
+        # One transaction, the second row cannot be bound and the first one is rolled back
+        batch = [
+            {'memory_id': 'memory-2', 'chat_id': 'chat-1', 'message_id': f'm{index}', 'role': 'user',
+             'data': data, 'reason': 'Imported'}
+            for index, data in enumerate(['Lost', object()])
+        ]
+        with pytest.raises(sqlite3.Error):
+            await db.add_history_many(batch)
+        assert await db.get_history(memory_id='memory-2', chat_id='chat-1') is None
+
+        plan = await db.connection.execute_fetchall(
+            'EXPLAIN QUERY PLAN SELECT * FROM history WHERE memory_id = ? AND chat_id = ? ORDER BY created_at',
+            ('memory-1', 'chat-1')
+        )
+        details = ' '.join(row[-1] for row in plan)
+        logger.info(f'Query plan: {details}')
+        assert 'idx_history_memory_chat_created' in details
+        assert 'TEMP B-TREE' not in details
+        await db.close()
+
+    async def test_interleaved_writers(self):
+        db = SQLiteManager()
+        for index in range(3):
+            await _add(db, index)
+        ids = [item['id'] for item in await db.get_history(memory_id='memory-1', chat_id='chat-1')]
+
+        # The summary cannot be bound, an add running alongside must not commit the moved messages
+        summary = {'memory_id': 'memory-1', 'chat_id': 'chat-1', 'message_id': 'summary-1', 'role': 'system',
+                   'data': object(), 'reason': 'Summary'}
+        results = await asyncio.gather(
+            db.compact_history(ids=ids, summary=summary),
+            _add(db, 3),
+            return_exceptions=True
+        )
+        assert isinstance(results[0], sqlite3.Error)
+        history = await db.get_history(memory_id='memory-1', chat_id='chat-1')
+        assert [item['data'] for item in history] == ['Message 0', 'Message 1', 'Message 2', 'Message 3']
+        assert await db.get_archive(summary_id='summary-1') == []
+        await db.close()
+
+    async def test_migrates_legacy_database(self, tmp_path):
+        db_path = tmp_path / 'legacy.db'
+        # The schema of the previous releases, no indexes and no version
+        with sqlite3.connect(db_path) as connection:
+            connection.execute(
+                'CREATE TABLE history (id TEXT PRIMARY KEY, memory_id TEXT, chat_id TEXT, message_id TEXT, '
+                'created_at DATETIME, updated_at DATETIME, role TEXT, data TEXT, reason TEXT, is_deleted BOOLEAN)'
+            )
+            connection.execute(
+                "INSERT INTO history VALUES ('1', 'memory-1', 'chat-1', 'm1', '2024-10-01', '2024-10-01', 'user', "
+                "'Old message', 'Asked', 0)"
+            )
+        connection.close()
+
+        db = SQLiteManager(db_path)
+        history = await db.get_history(memory_id='memory-1', chat_id='chat-1')
+        assert [item['data'] for item in history] == ['Old message']
+        version = await db.connection.execute_fetchall('PRAGMA user_version')
+        indexes = await db.connection.execute_fetchall("SELECT name FROM sqlite_master WHERE type = 'index'")
+        assert version[0][0] == SCHEMA_VERSION
+        assert {'idx_history_memory_chat_created', 'idx_history_memory_updated'} <= {row[0] for row in indexes}
+
+        await db.reset()
+        version = await db.connection.execute_fetchall('PRAGMA user_version')
+        assert version[0][0] == SCHEMA_VERSION
+        await db.close()
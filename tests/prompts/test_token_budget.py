@@ -0,0 +1,124 @@
+import logging
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from superagentx.engine import Engine
+from superagentx.handler.base import BaseHandler
+from superagentx.llm import LLMClient
+from superagentx.llm.exceptions import TokenBudgetExceeded
+from superagentx.llm.models import ChatCompletionParams
+from superagentx.llm.tokens import TokenCounter, get_token_counter
+from superagentx.prompt import PromptTemplate
+from tests.llm.test_response_cache import FakeClient
+
+logger = logging.getLogger(__name__)
+
+'''
+ Run Pytest:
+
+   1. pytest --log-cli-level=INFO tests/prompts/test_token_budget.py::TestTokenBudget::test_sections_trimmed_last_first
+   2. pytest --log-cli-level=INFO tests/prompts/test_token_budget.py::TestTokenBudget::test_engine_context_sections
+   3. pytest --log-cli-level=INFO tests/prompts/test_token_budget.py::TestTokenBudget::test_llm_client_preflight
+   4. pytest --log-cli-level=INFO tests/prompts/test_token_budget.py::TestTokenBudget::test_offline_unknown_model
+'''
+
+
+class EchoHandler(BaseHandler):
+
+    async def echo(self, text: str) -> str:
+        """
+        Echo the given text.
+
+        Args:
+            text: Text to echo.
+        """
+        return text
+
+    def __dir__(self):
+        return ['echo']
+
+
+@pytest.fixture
+def llm_client() -> LLMClient:
+    llm_config = {'model': 'gpt-4o', 'llm_type': 'openai', 'api_key': 'sk-test'}
+    llm_client = LLMClient(llm_config=llm_config, max_prompt_tokens=200)
+    llm_client.client = FakeClient()
+    return llm_client
+
+
+class TestTokenBudget:
+
+    async def test_sections_trimmed_last_first(self):
+        counter = TokenCounter(llm_type='bedrock')
+        prompt_template = PromptTemplate(token_budget=120, token_counter=counter)
+        messages = await prompt_template.get_messages(
+            input_prompt='Summarize the {topic} results.',
+            context_sections={
+                'pre_result': 'r' * 200,
+                'memory': 'm' * 400,
+                'notes': 'n' * 40
+            },
+            topic='{sales}'
+        )
+        budget = prompt_template.last_token_budget
+        logger.info(f'Token budget {budget.model_dump()}')
+        content = messages[-1]['content']
+        assert content.startswith('Summarize the {sales} results.\n\n' + 'r' * 200 + '\n\nmmm')
+        assert 'n' * 40 not in content
+        assert set(budget.trimmed) == {'memory', 'notes'}
+        assert 'pre_result' not in budget.trimmed
+        assert budget.prompt_tokens <= 120
+        assert not budget.exact
+
+    async def test_engine_context_sections(self, llm_client: LLMClient):
+        prompt_template = PromptTemplate()
+        engine = Engine(handler=EchoHandler(), llm=llm_client, prompt_template=prompt_template)
+        results = await engine.start(
+            input_prompt='Say hello!',
+            pre_result=['Previous agent said hi.'],
+            old_memory='User likes short answers.'
+        )
+        assert results == ['Hello!']
+        assert set(prompt_template.last_token_budget.sections) == {'prompt', 'pre_result', 'memory'}
+        assert llm_client.last_token_budget.prompt_tokens <= 200
+
+    async def test_llm_client_preflight(self, llm_client: LLMClient):
+        history = [
+            {'role': 'system', 'content': 'You are a helpful assistant.'},
+            *[{'role': 'user', 'content': f'Old question {index} ' + 'x' * 200} for index in range(5)],
+            {'role': 'user', 'content': 'Say hello!'}
+        ]
+        with pytest.raises(TokenBudgetExceeded) as ex:
+            await llm_client.achat_completion(chat_completion_params=ChatCompletionParams(messages=history))
+        assert ex.value.budget.prompt_tokens > 200
+        assert llm_client.client.calls == 0
+
+        llm_client.prompt_overflow = 'trim'
+        chat_completion_params = ChatCompletionParams(messages=history)
+        response = await llm_client.achat_completion(chat_completion_params=chat_completion_params)
+        assert response.choices[0].message.content == 'Hello!'
+        budget = llm_client.last_token_budget
+        logger.info(f'Token budget {budget.model_dump()}')
+        assert budget.trimmed['messages'] > 0
+        assert budget.remaining >= 0
+        assert len(chat_completion_params.messages) == 7
+
+    async def test_offline_unknown_model(self, monkeypatch):
+        def _encoding_for_model(model):
+            raise KeyError(model)
+
+        def _get_encoding(name):
+            raise ConnectionError('Encoding download failed')
+
+        monkeypatch.setitem(
+            sys.modules,
+            'tiktoken',
+            SimpleNamespace(encoding_for_model=_encoding_for_model, get_encoding=_get_encoding)
+        )
+        counter = TokenCounter(model='my-azure-deployment', llm_type='azure-openai')
+        assert not counter.exact
+        assert counter.count('x' * 40) == 10
+        # The counter of the `LLMClient` constructor
+        assert not get_token_counter('my-azure-deployment-2', 'azure-openai').exact
@@ -0,0 +1,133 @@
+import hashlib
+import logging
+
+import numpy as np
+
+from superagentx.memory import Memory
+from superagentx.memory.config import MemoryConfig
+from superagentx.vector_stores.numpy_store import NumpyVectorStore
+from tests.llm.test_response_cache import FakeClient
+
+logger = logging.getLogger(__name__)
+
+'''
+ Run Pytest:
+
+   1. pytest --log-cli-level=INFO tests/vector_stores/test_numpy_store.py::TestNumpyVectorStore::test_top_k_matches_brute_force
+   2. pytest --log-cli-level=INFO tests/vector_stores/test_numpy_store.py::TestNumpyVectorStore::test_filters_update_delete
+   3. pytest --log-cli-level=INFO tests/vector_stores/test_numpy_store.py::TestNumpyVectorStore::test_persistent_reload
+   4. pytest --log-cli-level=INFO tests/vector_stores/test_numpy_store.py::TestNumpyVectorStore::test_memory_default
+'''
+
+_DIMENSION = 16
+
+
+class HashEmbedClient(FakeClient):
+    """Deterministic embeddings derived from the text digest."""
+
+    @staticmethod
+    def _vector(text: str) -> np.ndarray:
+        seed = int.from_bytes(hashlib.sha256(text.encode('utf-8')).digest()[:8], 'little')
+        return np.random.default_rng(seed).standard_normal(_DIMENSION).astype(np.float32)
+
+    async def aembed(self, text: str, **kwargs):
+        return self._vector(text).tolist()
+
+    async def aembed_many(self, texts: list[str], **kwargs):
+        return np.stack([self._vector(text) for text in texts])
+
+
+def _store(**kwargs) -> NumpyVectorStore:
+    return NumpyVectorStore(embed_cli=HashEmbedClient(), initial_capacity=4, **kwargs)
+
+
+class TestNumpyVectorStore:
+
+    async def test_top_k_matches_brute_force(self):
+        store = _store()
+        texts = [f'document {index}' for index in range(50)]
+        await store.insert(texts=texts, ids=[f'd{index}' for index in range(50)])
+        assert store.count == 50
+
+        matrix = np.stack([HashEmbedClient._vector(text) for text in texts])
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+        query = HashEmbedClient._vector('a query')
+        expected = np.argsort(-(matrix @ (query / np.linalg.norm(query))))[:5]
+
+        results = await store.search(query='a query', limit=5)
+        logger.info(results)
+        assert [result.id for result in results] == [f'd{index}' for index in expected]
+        assert results[0].score >= results[-1].score
+
+    async def test_filters_update_delete(self):
+        store = _store()
+        await store.insert(
+            texts=['alpha', 'beta', 'gamma', 'delta'],
+            payloads=[{'chat_id': 'c1'}, {'chat_id': 'c2'}, {'chat_id': 'c1'}, {'chat_id': 'c3'}],
+            ids=['a', 'b', 'c', 'd']
+        )
+        results = await store.search(query='alpha', limit=10, filters={'chat_id': 'c1'})
+        assert {result.id for result in results} == {'a', 'c'}
+        results = await store.search(query='alpha', limit=10, filters={'chat_id': {'$in': ['c2', 'c3']}})
+        assert {result.id for result in results} == {'b', 'd'}
+
+        # Writes update the cached filter masks in place, the matrix grows past its capacity
+        await store.update(vector_id='b', payload={'chat_id': 'c1'})
+        await store.delete_vectors(ids=['a'])
+        await store.insert(texts=['epsilon'], payloads=[{'chat_id': 'c3'}], ids=['e'])
+        assert set(store._masks) == {('chat_id', 'c1'), ('chat_id', ('c2', 'c3'))}
+        results = await store.search(query='alpha', limit=10, filters={'chat_id': 'c1'})
+        assert {result.id for result in results} == {'b', 'c'}
+        results = await store.search(query='alpha', limit=10, filters={'chat_id': {'$in': ['c2', 'c3']}})
+        assert {result.id for result in results} == {'d', 'e'}
+
+        await store.compact()
+        assert store.count == 4
+        results = await store.search(query='delta', limit=1)
+        assert results[0].id == 'd'
+        assert results[0].score > 0.99
+
+    async def test_persistent_reload(self, tmp_path):
+        store = _store(path=tmp_path)
+        await store.insert(
+            texts=[f'note {index}' for index in range(10)],
+            payloads=[{'even': index % 2 == 0} for index in range(10)],
+            ids=[f'n{index}' for index in range(10)]
+        )
+        await store.delete_vectors(ids=['n0'])
+        store.flush()
+        expected = await store.search(query='note 4', limit=3, filters={'even': True})
+
+        reopened = _store(path=tmp_path)
+        assert reopened.count == 9
+        assert isinstance(reopened._matrix, np.memmap)
+        results = await reopened.search(query='note 4', limit=3, filters={'even': True})
+        assert results == expected
+        assert results[0].id == 'n4'
+
+        await reopened.delete_collection()
+        assert not list(tmp_path.iterdir())
+
+    async def test_memory_default(self, monkeypatch, tmp_path):
+        # The default embedding client is only constructed, the test embeds with the hash client
+        monkeypatch.setenv('OPENAI_API_KEY', 'sk-test')
+        # The databases of a directory keep their own vector files
+        first = Memory(MemoryConfig(db_path=str(tmp_path / 'first.db')))
+        second = Memory(MemoryConfig(db_path=str(tmp_path / 'second.db')))
+        assert first.vector_db.path == second.vector_db.path == tmp_path / 'vectors'
+        assert first.vector_db._log_path != second.vector_db._log_path
+
+        memory = Memory(MemoryConfig(db_path=':memory:'))
+        assert isinstance(memory.vector_db, NumpyVectorStore)
+        memory.vector_db.embed_cli = HashEmbedClient()
+        await memory.add(
+            memory_id='memory-1',
+            chat_id='chat-1',
+            message_id='m1',
+            role='user',
+            data='The invoice was paid',
+            reason='test'
+        )
+        results = await memory.search(query='The invoice was paid', memory_id='memory-1', chat_id='chat-1', mode='vector')
+        assert results == [{'role': 'user', 'content': 'Reason: test\nResult: The invoice was paid'}]
+        await memory.close()